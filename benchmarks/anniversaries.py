@@ -0,0 +1,155 @@
+"""Cost of finding one day's join anniversaries, per source.
+
+Synthetic members with join dates spread over several years:
+
+- ``compare``: the naive daily check, comparing every member's join date
+  with today (baseline);
+- ``index_build``: ``JoinIndex.from_members``, the one bucketing pass over
+  the member cache, repeated only after ``JOIN_SNAPSHOT_MAX_AGE_DAYS`` or a
+  reconnect;
+- ``index_lookup``: today's buckets, which is all a daily run reads from the
+  index when the guild is chunked;
+- ``snapshot_rebuild``: writing the stored snapshot, as after
+  ``JOIN_SNAPSHOT_MAX_AGE_DAYS``;
+- ``snapshot_lookup``: the indexed ``doy`` query a run makes otherwise.
+
+Each per-run figure is the mean over ``--days`` consecutive days. The
+snapshot runs on SQLite, on mongomock-motor, or on a real mongod with
+``--mongo-uri``.
+
+Usage:
+    python benchmarks/anniversaries.py --members 100000
+    python benchmarks/anniversaries.py --backend sqlite --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BENCH_DB_NAME = "mangalify_anniversary_bench"
+
+
+def make_members(count: int, seed: int) -> list[SimpleNamespace]:
+    rng = random.Random(seed)
+    first = datetime(2016, 1, 1, tzinfo=timezone.utc)
+    span = int((datetime(2026, 1, 1, tzinfo=timezone.utc) - first).total_seconds())
+    return [
+        SimpleNamespace(id=user_id, joined_at=first + timedelta(seconds=rng.randrange(span)), bot=rng.random() < 0.01)
+        for user_id in range(1, count + 1)
+    ]
+
+
+def _open(backend: str, mongo_uri: str | None, directory: str):
+    if backend == "sqlite":
+        from utils.sqlite_manager import SQLiteDatabaseManager
+
+        return SQLiteDatabaseManager(os.path.join(directory, "bench.db"))
+    from utils.db_manager import DatabaseManager
+
+    if mongo_uri:
+        return DatabaseManager(mongo_uri, BENCH_DB_NAME)
+    from mongomock_motor import AsyncMongoMockClient
+
+    return DatabaseManager(None, client=AsyncMongoMockClient())
+
+
+def bench_memory(members, days: list[date]) -> dict:
+    from utils.anniversaries import JoinIndex, due_anniversaries
+
+    started = time.perf_counter()
+    found = 0
+    for day in days:
+        found += sum(
+            1 for member in members
+            if not member.bot and member.joined_at is not None
+            and (member.joined_at.month, member.joined_at.day) == (day.month, day.day) and member.joined_at.year < day.year
+        )
+    compare = (time.perf_counter() - started) / len(days)
+
+    started = time.perf_counter()
+    index = JoinIndex.from_members(members)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for day in days:
+        due_anniversaries(index.on(day), day)
+    lookup = (time.perf_counter() - started) / len(days)
+    return {
+        "compare_ms": round(compare * 1000, 3),
+        "index_build_ms": round(build * 1000, 1),
+        "index_lookup_ms": round(lookup * 1000, 3),
+        "found": found,
+    }
+
+
+async def bench_snapshot(members, days: list[date], backend: str, mongo_uri: str | None) -> dict:
+    from utils.anniversaries import snapshot_entry
+    from utils.dates import doy_ranges
+
+    entries = [snapshot_entry(member.id, member.joined_at) for member in members if not member.bot]
+    with tempfile.TemporaryDirectory() as directory:
+        db = _open(backend, mongo_uri, directory)
+        try:
+            if backend == "mongo":
+                from utils.migrations import MigrationRunner
+
+                await MigrationRunner(db, pause_seconds=0).run()  # member_joins doy index
+            started = time.perf_counter()
+            await db.replace_member_joins(entries)
+            rebuild = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for day in days:
+                await db.get_member_joins_in_doy_ranges(doy_ranges(day, 1))
+            lookup = (time.perf_counter() - started) / len(days)
+        finally:
+            if backend == "mongo" and mongo_uri:
+                await db.client.drop_database(BENCH_DB_NAME)
+            db.close()
+    return {"snapshot_rebuild_ms": round(rebuild * 1000, 1), "snapshot_lookup_ms": round(lookup * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=30, help="consecutive daily runs to average over")
+    parser.add_argument("--backend", choices=("mongo", "sqlite"), default="sqlite")
+    parser.add_argument("--mongo-uri", help="benchmark a real mongod (scratch database) instead of mongomock")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print a single JSON document")
+    args = parser.parse_args()
+
+    members = make_members(args.members, args.seed)
+    days = [date(2026, 10, 1) + timedelta(days=offset) for offset in range(args.days)]
+    report = {
+        "members": args.members,
+        "days": args.days,
+        "backend": args.backend,
+        **bench_memory(members, days),
+        **asyncio.run(bench_snapshot(members, days, args.backend, args.mongo_uri)),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.members} members, mean of {args.days} daily runs ({report['found']} anniversaries found)")
+    print(f"  compare every member   {report['compare_ms']:>10} ms/run")
+    print(f"  index lookup           {report['index_lookup_ms']:>10} ms/run")
+    print(f"  snapshot lookup        {report['snapshot_lookup_ms']:>10} ms/run ({args.backend})")
+    print(f"  index build            {report['index_build_ms']:>10} ms per rebuild")
+    print(f"  snapshot rebuild       {report['snapshot_rebuild_ms']:>10} ms per rebuild")
+
+
+if __name__ == "__main__":
+    main()
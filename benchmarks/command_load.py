@@ -0,0 +1,250 @@
+"""Load test for slash-command handlers under concurrent use.
+
+Calls the ``Birthdays`` and ``Wishes`` command callbacks directly with fake
+``discord.Interaction`` objects, so no Discord connection is needed. Storage
+is mongomock-motor by default; ``--mongo-uri`` points at a local mongod.
+
+Two latencies are recorded for every call:
+
+- ``ack``: time until the handler's first response (``send_message``,
+  ``defer`` or ``send_modal``). Discord drops interactions that are not
+  acknowledged within 3 seconds, so an ack later than ``--deadline`` counts
+  as a miss.
+- ``total``: time until the handler returned, follow-ups included.
+
+Permission checks (``is_staff``) are decorators on the command, so calling
+the callback skips them, as this harness intends.
+
+Usage:
+    python benchmarks/command_load.py
+    python benchmarks/command_load.py --requests 500 --concurrency 50 --rate 100
+    python benchmarks/command_load.py --commands export_birthdays --seed 50000
+    python benchmarks/command_load.py --mongo-uri mongodb://localhost:27017 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault("LOAD_DOTENV", "false")
+
+DISCORD_ACK_DEADLINE = 3.0
+COMMANDS = ("set_birthday", "view_birthday", "export_birthdays", "import_birthdays", "status")
+USER_IDS = range(10_000, 60_000)
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _ack(self):
+        if self._done:
+            raise RuntimeError("interaction already acknowledged")
+        self._done = True
+        self._interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, **kwargs):
+        await self._ack()
+
+    async def defer(self, **kwargs):
+        await self._ack()
+
+    async def send_modal(self, modal):
+        await self._ack()
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        return None
+
+
+class FakeInteraction:
+    def __init__(self, user_id: int, guild=None):
+        self.user = MagicMock(id=user_id, display_name=f"user{user_id}", mention=f"<@{user_id}>")
+        self.guild = guild
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup()
+        self.acked_at: float | None = None
+
+
+def percentile(samples: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of ``samples``, or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def build_cogs(mongo_uri: str | None):
+    from config import Settings
+    from cogs.birthdays import Birthdays
+    from cogs.wishes import Wishes
+    from utils.api_client import ApiClient
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+
+    settings = Settings(
+        bot_token="bench", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6,
+    )
+    if mongo_uri:
+        db = DatabaseManager(mongo_uri, "mangalify_command_load")
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        db = DatabaseManager(None, client=AsyncMongoMockClient())
+    context = AppContext(settings=settings, db=db, api=ApiClient())
+    bot = MagicMock(app_context=context, latency=0.05)
+    return context, Birthdays(bot), Wishes(bot)
+
+
+def _random_birthday(rng: random.Random) -> tuple[int, int, int]:
+    return rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2010)
+
+
+async def seed(db, count: int, rng: random.Random):
+    await db.birthdays.delete_many({})
+    for start in range(0, count, 1000):
+        docs = []
+        for user_id in USER_IDS[start:min(start + 1000, count)]:
+            day, month, year = _random_birthday(rng)
+            docs.append({"_id": user_id, "day": day, "month": month, "year": year})
+        if docs:
+            await db.birthdays.insert_many(docs)
+
+
+def make_call(command: str, birthdays, wishes, rng: random.Random, import_size: int):
+    """An (interaction, coroutine factory) pair for one invocation of ``command``."""
+    interaction = FakeInteraction(rng.choice(USER_IDS))
+    if command == "set_birthday":
+        day, month, year = _random_birthday(rng)
+        return interaction, lambda: birthdays.set_birthday.callback(birthdays, interaction, day, month, year)
+    if command == "view_birthday":
+        return interaction, lambda: birthdays.view_birthday.callback(birthdays, interaction)
+    if command == "export_birthdays":
+        return interaction, lambda: birthdays.export_birthdays.callback(birthdays, interaction)
+    if command == "import_birthdays":
+        items = []
+        for _ in range(import_size):
+            day, month, year = _random_birthday(rng)
+            items.append({"user_id": rng.choice(USER_IDS), "day": day, "month": month, "year": year})
+        payload = json.dumps(items)
+        return interaction, lambda: birthdays.import_birthdays.callback(birthdays, interaction, payload)
+    if command == "status":
+        return interaction, lambda: wishes.status.callback(wishes, interaction)
+    raise ValueError(f"unknown command {command}")
+
+
+async def run_command(command: str, birthdays, wishes, requests: int, concurrency: int, rate: float | None,
+                      deadline: float, import_size: int, rng: random.Random) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    acks, totals, errors = [], [], []
+
+    async def one(delay: float):
+        await asyncio.sleep(delay)
+        async with limit:
+            interaction, call = make_call(command, birthdays, wishes, rng, import_size)
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception as exc:
+                errors.append(repr(exc))
+                return
+            totals.append(time.perf_counter() - started)
+            if interaction.acked_at is None:
+                errors.append("never acknowledged")
+            else:
+                acks.append(interaction.acked_at - started)
+
+    started = time.perf_counter()
+    # With --rate, start times are spread out (open loop); otherwise all start at once
+    await asyncio.gather(*(one(index / rate if rate else 0) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "command": command,
+        "requests": requests,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "throughput_rps": round(len(totals) / elapsed, 1) if elapsed else None,
+        "ack_ms": {name: ms(percentile(acks, pct)) for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "total_ms": {name: ms(percentile(totals, pct)) for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "max_ack_ms": ms(max(acks) if acks else None),
+        "deadline_misses": sum(1 for ack in acks if ack > deadline),
+    }
+
+
+async def run(args) -> list[dict]:
+    rng = random.Random(args.random_seed)
+    context, birthdays, wishes = build_cogs(args.mongo_uri)
+    try:
+        await seed(context.db, args.seed, rng)
+        results = []
+        for command in args.commands:
+            requests = args.export_requests if command == "export_birthdays" else args.requests
+            results.append(await run_command(
+                command, birthdays, wishes, requests, args.concurrency, args.rate,
+                args.deadline, args.import_size, rng,
+            ))
+        return results
+    finally:
+        if args.mongo_uri:
+            await context.db.db.client.drop_database("mangalify_command_load")
+        await context.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", nargs="+", choices=COMMANDS, default=list(COMMANDS))
+    parser.add_argument("--requests", type=int, default=200, help="calls per command")
+    parser.add_argument("--export-requests", type=int, default=10, help="calls for export_birthdays (each reads everything)")
+    parser.add_argument("--concurrency", type=int, default=20, help="calls in flight at once")
+    parser.add_argument("--rate", type=float, help="start at most this many calls per second")
+    parser.add_argument("--seed", type=int, default=5000, help="birthdays inserted before the run")
+    parser.add_argument("--import-size", type=int, default=50, help="entries per import_birthdays payload")
+    parser.add_argument("--deadline", type=float, default=DISCORD_ACK_DEADLINE)
+    parser.add_argument("--mongo-uri", help="use this mongod (a scratch database) instead of mongomock")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print a single JSON document")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'command':<18} {'reqs':>5} {'err':>4} {'rps':>8} {'ack p50':>9} {'p95':>9} {'p99':>9} {'total p99':>10} {'misses':>7}")
+    for result in results:
+        ack, total = result["ack_ms"], result["total_ms"]
+        print(
+            f"{result['command']:<18} {result['requests']:>5} {result['errors']:>4} {result['throughput_rps'] or 0:>8} "
+            f"{ack['p50'] or '-':>9} {ack['p95'] or '-':>9} {ack['p99'] or '-':>9} {total['p99'] or '-':>10} "
+            f"{result['deadline_misses']:>7}"
+        )
+    late = [result["command"] for result in results if result["deadline_misses"]]
+    if late:
+        print(f"Would miss Discord's {args.deadline:g}s interaction deadline: {', '.join(late)}")
+    for result in results:
+        for sample in result["error_samples"]:
+            print(f"  {result['command']} error: {sample}")
+
+
+if __name__ == "__main__":
+    main()
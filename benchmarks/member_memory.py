@@ -0,0 +1,110 @@
+"""RSS comparison of the default member cache against LOW_MEMORY_MODE.
+
+Builds a synthetic guild in a fresh interpreter per mode, using discord.py's
+own Member/ConnectionState objects so the per-member cost is realistic:
+
+- ``full``: every member is cached, as after startup chunking.
+- ``low``: only the day's celebrants are held (about members/365), as the
+  MemberResolver does with ``MemberCacheFlags.none()``.
+
+Usage:
+    python benchmarks/member_memory.py --members 200000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _member_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None,
+                 "global_name": f"User {user_id}"},
+        "roles": [],
+        "joined_at": "2021-06-01T12:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def run_mode(mode: str, members: int) -> dict:
+    import gc
+    from unittest.mock import MagicMock
+
+    import discord
+    from discord.state import ConnectionState
+
+    from utils.members import MemberResolver
+
+    intents = discord.Intents.default()
+    intents.members = True
+    cache_flags = discord.MemberCacheFlags.none() if mode == "low" else discord.MemberCacheFlags.from_intents(intents)
+    state = ConnectionState(
+        dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=MagicMock(),
+        intents=intents, member_cache_flags=cache_flags, chunk_guilds_at_startup=(mode != "low"),
+    )
+    guild = discord.Guild(
+        data={"id": "1", "name": "bench", "owner_id": "2", "member_count": members,
+              "roles": [{"id": "1", "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                         "hoist": False, "managed": False, "mentionable": False}]},
+        state=state,
+    )
+
+    gc.collect()
+    before = _rss_bytes()
+    if mode == "full":
+        for user_id in range(10, members + 10):
+            guild._add_member(discord.Member(data=_member_payload(user_id), guild=guild, state=state))
+        held = len(guild.members)
+    else:
+        resolver = MemberResolver()
+        celebrants = range(10, 10 + max(members // 365, 1))
+        for user_id in celebrants:
+            resolver._members[user_id] = discord.Member(data=_member_payload(user_id), guild=guild, state=state)
+        held = len(resolver._members)
+    gc.collect()
+    after = _rss_bytes()
+    return {"mode": mode, "members": members, "held": held, "rss_delta_bytes": after - before, "rss_bytes": after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--mode", choices=("full", "low"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        sys.path.insert(0, PROJECT_ROOT)
+        print(json.dumps(run_mode(args.mode, args.members)))
+        return
+
+    results = []
+    for mode in ("full", "low"):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--members", str(args.members), "--mode", mode],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    for result in results:
+        print(
+            f"{result['mode']:<5} held {result['held']:>8} members  "
+            f"+{result['rss_delta_bytes'] / 2**20:8.1f} MiB  (RSS {result['rss_bytes'] / 2**20:.1f} MiB)"
+        )
+    full, low = results
+    if low["rss_delta_bytes"] > 0:
+        print(f"Low-memory mode uses {full['rss_delta_bytes'] / low['rss_delta_bytes']:.0f}x less member memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Startup benchmark: import time, baseline RSS and (optionally) time to on_ready.
+
+Usage:
+    python benchmarks/startup.py            # offline: import time + RSS
+    python benchmarks/startup.py --live     # also start the bot (needs a real .env)
+    python benchmarks/startup.py --json     # machine-readable output for CI diffs
+
+Every measurement runs in a fresh interpreter so module caches never leak
+between runs.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import cost we track; cogs are what the bot loads in setup_hook
+MODULES = ["main", "utils.db_manager", "utils.api_client", "cogs.wishes", "cogs.birthdays"]
+
+RSS_SNIPPET = """
+import importlib, json, sys
+sys.path.insert(0, {root!r})
+before = open('/proc/self/statm').read().split()[1]
+for name in {modules!r}:
+    importlib.import_module(name)
+after = open('/proc/self/statm').read().split()[1]
+import os
+page = os.sysconf('SC_PAGE_SIZE')
+print(json.dumps({{'rss_before_bytes': int(before) * page, 'rss_after_bytes': int(after) * page}}))
+"""
+
+# Dummy values so cog modules can be imported without a real .env
+BENCH_ENV = {
+    "LOAD_DOTENV": "false",
+    "GUILD_ID": "1",
+    "STAFF_ROLE_ID": "1",
+    "BIRTHDAY_ROLE_ID": "1",
+    "WISHES_CHANNEL_ID": "1",
+    "BIRTHDAY_CHANNEL_ID": "1",
+    "STAFF_ALERTS_CHANNEL_ID": "1",
+    "MONGO_URI": "mongodb://localhost:27017",
+}
+
+
+def _env(live: bool = False) -> dict:
+    env = dict(os.environ)
+    if not live:
+        env.update(BENCH_ENV)
+    return env
+
+
+def import_times(module: str) -> dict:
+    """Run ``python -X importtime -c 'import module'`` and parse the tree."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    total = next((row["cumulative_us"] for row in reversed(rows) if row["module"] == module), None)
+    top = sorted(rows, key=lambda row: row["self_us"], reverse=True)[:10]
+    return {"module": module, "total_ms": round(total / 1000, 1) if total else None, "top_self": top}
+
+
+def baseline_rss() -> dict:
+    """RSS of a fresh interpreter before and after importing the bot modules."""
+    code = RSS_SNIPPET.format(root=PROJECT_ROOT, modules=MODULES)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def time_to_ready(timeout: float = 120.0) -> dict:
+    """Start the real bot with EXIT_AFTER_READY and read its STARTUP line."""
+    env = _env(live=True)
+    env["EXIT_AFTER_READY"] = "true"
+    proc = subprocess.run(
+        [sys.executable, "main.py"], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Bot exited without reaching on_ready (code {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="also measure time to on_ready (connects to Discord)")
+    parser.add_argument("--json", action="store_true", help="print a single JSON document")
+    args = parser.parse_args()
+
+    report = {
+        "imports": [import_times(module) for module in MODULES],
+        "rss": baseline_rss(),
+    }
+    if args.live:
+        report["ready"] = time_to_ready()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("Import time (cumulative, fresh interpreter):")
+    for entry in report["imports"]:
+        print(f"  {entry['module']:<20} {entry['total_ms']:>8} ms")
+    slowest = report["imports"][0]["top_self"][:5]
+    print("Slowest modules under main (self time):")
+    for row in slowest:
+        print(f"  {row['module']:<40} {row['self_us'] / 1000:>8.1f} ms")
+    rss = report["rss"]
+    print(f"RSS: {rss['rss_before_bytes'] / 2**20:.1f} MiB bare, {rss['rss_after_bytes'] / 2**20:.1f} MiB after imports")
+    if "ready" in report:
+        ready = report["ready"]
+        print(f"Time to on_ready: {ready['startup_seconds']} s (RSS {ready['rss_bytes'] / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
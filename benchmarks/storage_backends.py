@@ -0,0 +1,126 @@
+"""Compare the Mongo and SQLite storage backends on the bot's hot paths.
+
+Runs the same workload through both ``DatabaseManager`` implementations:
+
+- ``set_birthday``: N upserts (registration / bulk import);
+- ``daily_lookup``: ``get_birthdays_for_date`` for all 366 dates (a year of daily runs);
+- ``doy_ranges``: 100 ``/birthday upcoming`` windows of 30 days;
+- ``get_birthday``: 1000 point reads;
+- ``count_by_month``: the data-health aggregation.
+
+Mongo is mongomock-motor unless ``--mongo-uri`` points at a real mongod,
+which it should when the numbers matter. mongomock is a pure-Python
+stand-in and much slower than a server.
+
+Usage:
+    python benchmarks/storage_backends.py --birthdays 5000
+    python benchmarks/storage_backends.py --mongo-uri mongodb://localhost:27017 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BENCH_DB_NAME = "mangalify_storage_bench"
+
+
+def _open(backend: str, mongo_uri: str | None, directory: str):
+    if backend == "sqlite":
+        from utils.sqlite_manager import SQLiteDatabaseManager
+
+        return SQLiteDatabaseManager(os.path.join(directory, "bench.db"))
+    from utils.db_manager import DatabaseManager
+
+    if mongo_uri:
+        return DatabaseManager(mongo_uri, BENCH_DB_NAME)
+    from mongomock_motor import AsyncMongoMockClient
+
+    return DatabaseManager(None, client=AsyncMongoMockClient())
+
+
+async def _timed(results: dict, name: str, operations: int, coro):
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    results[name] = {"seconds": round(elapsed, 4), "ops_per_second": round(operations / elapsed, 1) if elapsed else None}
+
+
+async def run_backend(backend: str, birthdays: int, mongo_uri: str | None, seed: int) -> dict:
+    from utils.dates import doy_ranges
+
+    rng = random.Random(seed)
+    people = [(user_id, rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2010)) for user_id in range(1, birthdays + 1)]
+    with tempfile.TemporaryDirectory() as directory:
+        db = _open(backend, mongo_uri, directory)
+        try:
+            await db.ensure_indexes()
+            if backend == "mongo":
+                from utils.migrations import MigrationRunner
+
+                await MigrationRunner(db, pause_seconds=0).run()  # doy index
+            results = {}
+
+            async def register():
+                for user_id, day, month, year in people:
+                    await db.set_birthday(user_id, day, month, year)
+
+            async def daily_lookup():
+                start = date(2024, 1, 1)
+                for offset in range(366):
+                    day = start + timedelta(days=offset)
+                    [doc async for doc in db.get_birthdays_for_date(day.day, day.month)]
+
+            async def upcoming():
+                for _ in range(100):
+                    start = date(2026, 1, 1) + timedelta(days=rng.randrange(365))
+                    await db.get_birthdays_in_doy_ranges(doy_ranges(start, 30), 500)
+
+            async def point_reads():
+                for _ in range(1000):
+                    await db.get_birthday(rng.randint(1, birthdays))
+
+            await _timed(results, "set_birthday", birthdays, register())
+            await _timed(results, "daily_lookup", 366, daily_lookup())
+            await _timed(results, "doy_ranges", 100, upcoming())
+            await _timed(results, "get_birthday", 1000, point_reads())
+            await _timed(results, "count_by_month", 1, db.count_birthdays_by_month())
+            return {"backend": backend, "birthdays": birthdays, "results": results}
+        finally:
+            if backend == "mongo" and mongo_uri:
+                await db.client.drop_database(BENCH_DB_NAME)
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--birthdays", type=int, default=5000)
+    parser.add_argument("--backends", nargs="+", choices=("mongo", "sqlite"), default=["mongo", "sqlite"])
+    parser.add_argument("--mongo-uri", help="benchmark a real mongod (scratch database) instead of mongomock")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print a single JSON document")
+    args = parser.parse_args()
+
+    reports = [asyncio.run(run_backend(backend, args.birthdays, args.mongo_uri, args.seed)) for backend in args.backends]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    label = "mongod" if args.mongo_uri else "mongomock"
+    names = list(reports[0]["results"])
+    print(f"{'operation':<16}" + "".join(f"{(label if r['backend'] == 'mongo' else 'sqlite') + ' s':>16}" for r in reports))
+    for name in names:
+        print(f"{name:<16}" + "".join(f"{report['results'][name]['seconds']:>16}" for report in reports))
+
+
+if __name__ == "__main__":
+    main()
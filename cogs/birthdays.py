@@ -1,29 +1,82 @@
 # cogs/birthdays.py
 
-import os
 import json
 import io
+from typing import Literal
+
 import discord
-from discord import app_commands
+from discord import app_commands, ui
 from discord.ext import commands
 from datetime import datetime
-from utils.db_manager import db_manager
+from utils.checks import is_staff
+from utils.dates import date_from_doy, day_of_year, doy_ranges, next_occurrence
+from utils.locales import LOCALES, normalize_locale
+from utils.reminders import MAX_SUBSCRIPTIONS
+
+UPCOMING_MAX_RESULTS = 500
+PAGE_SIZE = 20
+LOCALE_CHOICES = [app_commands.Choice(name=locale.language, value=code) for code, locale in LOCALES.items()]
+
+
+class BirthdayPages(ui.View):
+    """Previous/next buttons over a pre-rendered list of lines."""
+
+    def __init__(self, title: str, lines: list[str], owner_id: int):
+        super().__init__(timeout=180)
+        self.title = title
+        self.lines = lines
+        self.owner_id = owner_id
+        self.page = 0
+        self.page_count = max(1, -(-len(lines) // PAGE_SIZE))
+        self._sync_buttons()
+
+    def render(self) -> str:
+        start = self.page * PAGE_SIZE
+        body = "\n".join(self.lines[start:start + PAGE_SIZE])
+        return f"{self.title} (page {self.page + 1}/{self.page_count})\n{body}"
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction):
+        self._sync_buttons()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page = max(self.page - 1, 0)
+        await self._show(interaction)
+
+    @ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page = min(self.page + 1, self.page_count - 1)
+        await self._show(interaction)
 
-STAFF_ROLE_ID = int(os.getenv("STAFF_ROLE_ID"))
 
 class Birthdays(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.settings = bot.app_context.settings
+        self.db = bot.app_context.db
+        self.members = bot.app_context.members
 
     birthday_group = app_commands.Group(name="birthday", description="Manage your birthday")
+    reminders_group = app_commands.Group(name="reminders", description="DM reminders before birthdays", parent=birthday_group)
 
     @birthday_group.command(name="set", description="Set your birthday for server announcements.")
     @app_commands.describe(
         day="Day of your birth (1-31)",
         month="Month of your birth (1-12)",
-        year="Year of your birth (e.g., 2000)"
+        year="Year of your birth (e.g., 2000)",
+        locale="Language of your birthday wish (default: the server's)"
     )
-    async def set_birthday(self, interaction: discord.Interaction, day: app_commands.Range[int, 1, 31], month: app_commands.Range[int, 1, 12], year: app_commands.Range[int, 1900, 2024]):
+    @app_commands.choices(locale=LOCALE_CHOICES)
+    async def set_birthday(self, interaction: discord.Interaction, day: app_commands.Range[int, 1, 31], month: app_commands.Range[int, 1, 12], year: app_commands.Range[int, 1900, 2024],
+                           locale: app_commands.Choice[str] | None = None):
         try:
             # Validate if the date is a real calendar date
             datetime(year, month, day)
@@ -31,29 +84,152 @@ class Birthdays(commands.Cog):
             await interaction.response.send_message("That's not a valid date. Please check the day and month.", ephemeral=True)
             return
 
-        await db_manager.set_birthday(interaction.user.id, day, month, year)
+        await self.db.set_birthday(interaction.user.id, day, month, year, locale.value if locale else None)
         await interaction.response.send_message(f"Your birthday has been set to {day}/{month}/{year}.", ephemeral=True)
 
+    @birthday_group.command(name="language", description="Choose the language of your birthday wish.")
+    @app_commands.describe(locale="Language for your wish")
+    @app_commands.choices(locale=[*LOCALE_CHOICES, app_commands.Choice(name="Server default", value="default")])
+    async def set_language(self, interaction: discord.Interaction, locale: app_commands.Choice[str]):
+        code = normalize_locale(locale.value)
+        if not await self.db.set_birthday_locale(interaction.user.id, code):
+            await interaction.response.send_message("You haven't set your birthday yet. Use `/birthday set`.", ephemeral=True)
+            return
+        language = LOCALES[code or self.settings.default_locale].language
+        await interaction.response.send_message(f"Your birthday wish will be in {language}.", ephemeral=True)
+
     @birthday_group.command(name="view", description="Check the birthday you have set.")
     async def view_birthday(self, interaction: discord.Interaction):
         user_id = interaction.user.id
-        data = await db_manager.get_birthday(user_id)
+        data = await self.db.get_birthday(user_id)
         if data:
-            await interaction.response.send_message(f"Your birthday is set to {data['day']}/{data['month']}/{data['year']}.", ephemeral=True)
+            language = LOCALES[normalize_locale(data.get('locale')) or self.settings.default_locale].language
+            await interaction.response.send_message(
+                f"Your birthday is set to {data['day']}/{data['month']}/{data['year']} (wish in {language}).", ephemeral=True
+            )
         else:
             await interaction.response.send_message("You haven't set your birthday yet. Use `/birthday set`.", ephemeral=True)
 
+    @birthday_group.command(name="upcoming", description="List birthdays in the next few days.")
+    @app_commands.describe(days="How many days ahead to look, including today (default 7)")
+    async def upcoming_birthdays(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 366] = 7):
+        today = datetime.now(self.settings.server_timezone).date()
+        entries = await self.db.get_birthdays_in_doy_ranges(doy_ranges(today, days), UPCOMING_MAX_RESULTS)
+        lines = []
+        for entry in entries:
+            when = next_occurrence(entry["day"], entry["month"], today)
+            delta = (when - today).days
+            label = "today" if delta == 0 else "tomorrow" if delta == 1 else f"in {delta} days"
+            lines.append(f"• {entry['day']:02d}/{entry['month']:02d} — <@{entry['_id']}> ({label})")
+        await self._send_pages(interaction, f"🎂 Birthdays in the next {days} day(s)", lines)
+
+    @birthday_group.command(name="on", description="List birthdays on a given date.")
+    @app_commands.describe(date="Date as DD-MM (e.g., 29-02)")
+    async def birthdays_on(self, interaction: discord.Interaction, date: str):
+        try:
+            # Against a leap year, so 29-02 parses (strptime defaults to 1900)
+            parsed = datetime.strptime(f"{date.strip()}-2000", "%d-%m-%Y")
+            doy = day_of_year(parsed.day, parsed.month)
+        except ValueError:
+            await interaction.response.send_message("Invalid date format. Use DD-MM.", ephemeral=True)
+            return
+        entries = await self.db.get_birthdays_in_doy_ranges([(doy, doy)], UPCOMING_MAX_RESULTS)
+        day, month = date_from_doy(doy)
+        lines = [f"• <@{entry['_id']}>" for entry in entries]
+        await self._send_pages(interaction, f"🎂 Birthdays on {day:02d}/{month:02d}", lines)
+
+    async def _send_pages(self, interaction: discord.Interaction, title: str, lines: list[str]):
+        if not lines:
+            await interaction.response.send_message(f"{title}: none found.", ephemeral=True)
+            return
+        if len(lines) == UPCOMING_MAX_RESULTS:
+            lines.append(f"… showing the first {UPCOMING_MAX_RESULTS} only.")
+        view = BirthdayPages(title, lines, interaction.user.id)
+        await interaction.response.send_message(
+            view.render(),
+            view=view if view.page_count > 1 else discord.utils.MISSING,
+            ephemeral=True,
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+
+    async def _reminder_target(self, interaction: discord.Interaction, user: discord.Member | None,
+                               role: discord.Role | None) -> tuple[str, int, str] | None:
+        """``(kind, target_id, label)`` for exactly one of ``user``/``role``, or None once the user was told off."""
+        if not self.settings.birthday_reminders:
+            await interaction.response.send_message("Birthday reminders are not enabled on this server.", ephemeral=True)
+            return None
+        if (user is None) == (role is None):
+            await interaction.response.send_message("Pick either a member or a role.", ephemeral=True)
+            return None
+        if user is not None:
+            return "user", user.id, f"{user.mention}'s birthday"
+        return "role", role.id, f"birthdays in {role.mention}"
+
+    @reminders_group.command(name="follow", description="Get a DM before a member's birthday, or before birthdays in a role.")
+    @app_commands.describe(
+        user="Member whose birthday to be reminded of",
+        role="Be reminded of every birthday in this role",
+        days_before="How early to be reminded (default 1 day)",
+    )
+    async def follow_reminders(self, interaction: discord.Interaction, user: discord.Member | None = None,
+                               role: discord.Role | None = None, days_before: Literal[1, 7] = 1):
+        target = await self._reminder_target(interaction, user, role)
+        if target is None:
+            return
+        kind, target_id, label = target
+        if user is not None and user.id == interaction.user.id:
+            await interaction.response.send_message("You can't follow your own birthday.", ephemeral=True)
+            return
+        following = {(sub["kind"], sub["target_id"]) for sub in await self.db.get_reminder_subscriptions(interaction.user.id)}
+        if len(following) >= MAX_SUBSCRIPTIONS and (kind, target_id) not in following:
+            await interaction.response.send_message(
+                f"You already follow {MAX_SUBSCRIPTIONS} birthdays or roles. Unfollow one first.", ephemeral=True
+            )
+            return
+        await self.db.add_reminder_subscription(interaction.user.id, kind, target_id, days_before)
+        when = "1 day" if days_before == 1 else f"{days_before} days"
+        await interaction.response.send_message(
+            f"You'll get a DM {when} before {label}. Make sure your DMs are open.",
+            ephemeral=True, allowed_mentions=discord.AllowedMentions.none(),
+        )
+
+    @reminders_group.command(name="unfollow", description="Stop birthday reminders for a member or role, or all of them.")
+    @app_commands.describe(user="Member to stop following", role="Role to stop following (leave both empty to stop all)")
+    async def unfollow_reminders(self, interaction: discord.Interaction, user: discord.Member | None = None,
+                                 role: discord.Role | None = None):
+        if user is None and role is None:
+            removed = await self.db.remove_reminder_subscriptions(interaction.user.id)
+            await interaction.response.send_message(f"Stopped all birthday reminders ({removed}).", ephemeral=True)
+            return
+        target = await self._reminder_target(interaction, user, role)
+        if target is None:
+            return
+        kind, target_id, label = target
+        removed = await self.db.remove_reminder_subscriptions(interaction.user.id, kind, target_id)
+        message = f"Stopped reminders for {label}." if removed else f"You weren't following {label}."
+        await interaction.response.send_message(message, ephemeral=True, allowed_mentions=discord.AllowedMentions.none())
+
+    @reminders_group.command(name="list", description="Show the birthdays and roles you follow.")
+    async def list_reminders(self, interaction: discord.Interaction):
+        subscriptions = await self.db.get_reminder_subscriptions(interaction.user.id)
+        lines = []
+        for sub in subscriptions:
+            target = f"<@{sub['target_id']}>" if sub["kind"] == "user" else f"<@&{sub['target_id']}>"
+            when = "1 day" if sub["days_before"] == 1 else f"{sub['days_before']} days"
+            lines.append(f"• {target} — {when} before")
+        await self._send_pages(interaction, "🔔 Birthday reminders", lines)
+
     @birthday_group.command(name="remove", description="Remove your birthday from the bot.")
     async def remove_birthday(self, interaction: discord.Interaction):
         user_id = interaction.user.id
-        was_deleted = await db_manager.delete_birthday(user_id)
+        was_deleted = await self.db.delete_birthday(user_id)
         if was_deleted:
             await interaction.response.send_message("Your birthday has been removed.", ephemeral=True)
         else:
             await interaction.response.send_message("You don't have a birthday set.", ephemeral=True)
 
     @app_commands.command(name="force_add_birthday", description="[STAFF] Add or update a birthday for a specific user.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     @app_commands.describe(
         user="The user whose birthday you want to set.",
         day="Day of birth (1-31)",
@@ -67,7 +243,7 @@ class Birthdays(commands.Cog):
             await interaction.response.send_message(f"Invalid date provided for {user.display_name}.", ephemeral=True)
             return
 
-        await db_manager.set_birthday(user.id, day, month, year)
+        await self.db.set_birthday(user.id, day, month, year)
         await interaction.response.send_message(f"Successfully set {user.mention}'s birthday to {day}/{month}/{year}.", ephemeral=True)
 
     @force_add_birthday.error
@@ -79,25 +255,28 @@ class Birthdays(commands.Cog):
             raise error
 
     @birthday_group.command(name="export", description="[STAFF] Export all birthdays as JSON (user_id/day/month/year).")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     async def export_birthdays(self, interaction: discord.Interaction):
-        cursor = await db_manager.get_all_birthdays()
+        cursor = await self.db.get_all_birthdays()
         data = []
         async for doc in cursor:
-            data.append({
+            item = {
                 "user_id": doc.get("_id"),
                 "day": doc.get("day"),
                 "month": doc.get("month"),
                 "year": doc.get("year"),
-            })
+            }
+            if doc.get("locale"):
+                item["locale"] = doc["locale"]
+            data.append(item)
         payload = json.dumps(data, ensure_ascii=True, indent=2)
         file_obj = io.StringIO(payload)
         discord_file = discord.File(file_obj, filename="birthdays.json")
         await interaction.response.send_message("Exported birthdays.", file=discord_file, ephemeral=True)
 
     @birthday_group.command(name="import_json", description="[STAFF] Import birthdays from JSON array.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
-    @app_commands.describe(json_payload="JSON array of objects with user_id, day, month, year")
+    @is_staff()
+    @app_commands.describe(json_payload="JSON array of objects with user_id, day, month, year (and optional locale)")
     async def import_birthdays(self, interaction: discord.Interaction, json_payload: str):
         try:
             items = json.loads(json_payload)
@@ -116,7 +295,7 @@ class Birthdays(commands.Cog):
                 month = int(item.get("month"))
                 year = int(item.get("year"))
                 datetime(year, month, day)  # validate date
-                await db_manager.set_birthday(user_id, day, month, year)
+                await self.db.set_birthday(user_id, day, month, year, normalize_locale(item.get("locale")))
                 imported += 1
             except Exception:
                 skipped += 1
@@ -128,26 +307,26 @@ class Birthdays(commands.Cog):
         )
 
     @birthday_group.command(name="cleanup_departed", description="[STAFF] Remove birthdays for users no longer in the server.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     async def cleanup_departed(self, interaction: discord.Interaction):
         guild = interaction.guild
         if not guild:
             await interaction.response.send_message("Cannot run outside a guild context.", ephemeral=True)
             return
 
+        # Resolving every registered user can take several gateway requests without a member cache
+        await interaction.response.defer(ephemeral=True, thinking=True)
         removed = 0
-        cursor = await db_manager.get_all_birthdays()
-        async for entry in cursor:
-            user_id = entry.get("_id")
-            if not user_id:
-                continue
-            member = guild.get_member(user_id)
-            if member is None:
-                await db_manager.delete_birthday(user_id)
-                await db_manager.remove_user_from_role_log(user_id)
+        cursor = await self.db.get_all_birthdays()
+        user_ids = [entry.get("_id") async for entry in cursor if entry.get("_id")]
+        members = await self.members.resolve(guild, user_ids, datetime.now(self.settings.server_timezone).date())
+        for user_id in user_ids:
+            if user_id not in members:
+                await self.db.delete_birthday(user_id)
+                await self.db.remove_user_from_role_log(user_id)
                 removed += 1
 
-        await interaction.response.send_message(f"Cleanup complete. Removed {removed} departed members.", ephemeral=True)
+        await interaction.followup.send(f"Cleanup complete. Removed {removed} departed members.", ephemeral=True)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Birthdays(bot))
\ No newline at end of file
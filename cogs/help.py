@@ -6,13 +6,18 @@ from discord.ext import commands
 HELP_TEXT = (
     "**Available Commands**\n"
     "• /birthday set <day> <month> <year> — Set your birthday\n"
+    "• /birthday language <language> — Language of your birthday wish\n"
     "• /birthday view — View your birthday\n"
     "• /birthday remove — Remove your birthday\n"
+    "• /birthday upcoming [days] — Birthdays in the next few days\n"
+    "• /birthday on <DD-MM> — Birthdays on a date\n"
+    "• /birthday reminders follow|unfollow|list — DM reminders before a member's or role's birthdays\n"
     "• /birthday export — [Staff] Export birthdays\n"
     "• /birthday import_json — [Staff] Import birthdays\n"
     "• /birthday cleanup_departed — [Staff] Cleanup departed members\n"
     "• /add_wish — [Staff] Add a custom wish (modal)\n"
-    "• /status — [Staff] Bot status and scheduler times"
+    "• /status — [Staff] Bot status and upcoming jobs\n"
+    "• /simulate [start] [days] — [Staff] Dry-run the daily task over a date range"
 )
 
 ABOUT_TEXT = (
@@ -1,56 +1,78 @@
 # cogs/wishes.py
 
-import os
+import asyncio
+import io
 import re
 import logging
 import discord
 from discord import app_commands, ui
-from discord.ext import commands, tasks
-from datetime import datetime, time, timedelta
-import pytz
+from discord.ext import commands
+from datetime import date, datetime, timedelta, timezone
+from time import perf_counter
 
-from utils.db_manager import db_manager
-from utils.api_client import api_client
-from utils import metrics
+from utils import budget, metrics, tracing
+from utils.anniversaries import JoinIndex, anniversary_messages, due_anniversaries, snapshot_entry
+from utils.budget import Budget
+from utils.checks import is_staff
+from utils.dates import doy_ranges
+from utils.jobs import JobQueue
+from utils.leader import default_owner_id
+from utils.locales import holiday_fallback, normalize_locale, wish_cache_key
+from utils.reminders import MAX_CELEBRANTS_PER_DAY, ReminderSender, plan_reminders, queue_reminders
+from utils.scheduler import JobDefinition, Scheduler, daily_at
+from utils.simulator import format_plan, simulate, summarize
+from utils.templates import choose_template, refill_pool, render_template
 
 logger = logging.getLogger(__name__)
 
 # Simple helper to avoid repeating message send error handling
+async def _discord_call(make_call, item: str) -> bool:
+    """Await a Discord REST call under the run's budget; False (noted as degraded) if it timed out."""
+    try:
+        await asyncio.wait_for(make_call(), budget.call_timeout(DISCORD_CALL_TIMEOUT))
+    except asyncio.TimeoutError:
+        budget.note_degraded(item)
+        logger.warning("Discord call timed out: %s", item, extra={"event": "discord_timeout", "item": item})
+        return False
+    return True
+
+
 async def _safe_send(channel: discord.abc.Messageable | None, content: str):
     if not channel:
         return
     try:
-        await channel.send(content)
+        with tracing.span("discord.send", channel=getattr(channel, 'id', None)):
+            await _discord_call(lambda: channel.send(content), f"message to channel {getattr(channel, 'id', 'unknown')}")
     except Exception as exc:
-        logger.warning("Failed to send message to channel %s: %s", getattr(channel, 'id', 'unknown'), exc)
-
-GUILD_ID = int(os.getenv("GUILD_ID"))
-STAFF_ROLE_ID = int(os.getenv("STAFF_ROLE_ID"))
-BIRTHDAY_ROLE_ID = int(os.getenv("BIRTHDAY_ROLE_ID"))
-WISHES_CHANNEL_ID = int(os.getenv("WISHES_CHANNEL_ID"))
-BIRTHDAY_CHANNEL_ID = int(os.getenv("BIRTHDAY_CHANNEL_ID"))
-STAFF_ALERTS_CHANNEL_ID = int(os.getenv("STAFF_ALERTS_CHANNEL_ID"))
-POST_TIME_UTC_STR = os.getenv("POST_TIME_UTC", "00:01")
-SERVER_TIMEZONE_STR = os.getenv("SERVER_TIMEZONE", "UTC")
-HOLIDAY_APPROVAL_MODE = os.getenv("HOLIDAY_APPROVAL_MODE", "false").lower() == "true"
-
-try:
-    utc_time_parts = list(map(int, POST_TIME_UTC_STR.split(':')))
-    POST_TIME = time(hour=utc_time_parts[0], minute=utc_time_parts[1], tzinfo=pytz.utc)
-    SERVER_TIMEZONE = pytz.timezone(SERVER_TIMEZONE_STR)
-except (ValueError, pytz.UnknownTimeZoneError):
-    POST_TIME = time(hour=0, minute=1, tzinfo=pytz.utc)
-    SERVER_TIMEZONE = pytz.utc
+        # Sampled per event by the logging pipeline, so a broken channel cannot flood the logs
+        logger.warning(
+            "Failed to send message to channel %s: %s", getattr(channel, 'id', 'unknown'), exc,
+            extra={"event": "send_failed", "channel": getattr(channel, 'id', None)},
+        )
+
+# Scheduled job limits; a run past its max runtime is cancelled
+PREPARE_MAX_RUNTIME = 900
+DAILY_TASK_MAX_RUNTIME = 1800
+# Per-call deadline for Discord REST calls; a run's budget can shorten it
+DISCORD_CALL_TIMEOUT = 15
+CLEANUP_MAX_RUNTIME = 3600
+CLEANUP_JITTER_SECONDS = 600
+REMINDERS_MAX_RUNTIME = 600
+JOIN_SNAPSHOT_MAX_RUNTIME = 3600
+PURGE_JOBS_MAX_RUNTIME = 600
 
 # WishModal is for staff input, it doesn't send messages, so no changes needed.
 class WishModal(ui.Modal, title='Add a Custom Wish'):
-    # ... (no changes here)
     name = ui.TextInput(label='Wish Name (for reference)')
     date = ui.TextInput(label='Date (DD-MM-YYYY)')
     message = ui.TextInput(label='Wish Message', style=discord.TextStyle.paragraph)
     role_to_ping = ui.TextInput(label='Role ID to Ping (optional)', required=False)
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
     async def on_submit(self, interaction: discord.Interaction):
-        # ... (no changes here)
         try:
             wish_date = datetime.strptime(self.date.value, "%d-%m-%Y")
         except ValueError:
@@ -59,105 +81,277 @@ class WishModal(ui.Modal, title='Add a Custom Wish'):
         role_id = None
         if self.role_to_ping.value.lower() == 'everyone': role_id = 'everyone'
         elif self.role_to_ping.value.isdigit(): role_id = int(self.role_to_ping.value)
-        await db_manager.add_manual_wish(
+        await self.db.add_manual_wish(
             name=self.name.value, day=wish_date.day, month=wish_date.month, year=wish_date.year,
             message=self.message.value, role_id=role_id
         )
         await interaction.response.send_message(f"Custom wish '{self.name.value}' saved.", ephemeral=True)
 
 class Wishes(commands.Cog):
-    _daily_started = False  # class-level guard to avoid duplicate loop starts
-    _indexes_ready = False
-
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        if not Wishes._daily_started:
-            Wishes._daily_started = True
-            self.daily_task.start()
+        self.settings = bot.app_context.settings
+        self.db = bot.app_context.db
+        self.api = bot.app_context.api
+        self.members = bot.app_context.members
+        self.leader = bot.app_context.leader
+        self.tz = self.settings.server_timezone
+        self._join_index: JoinIndex | None = None
+        self._join_index_guild: discord.Guild | None = None
+        self._join_index_built: datetime | None = None
+        self.scheduler = Scheduler(self.db, self.scheduled_jobs(), should_run=self._is_leader)
+        self._scheduler_task: asyncio.Task | None = None
+        # Reminder DMs go through the job queue so a large fan-out is sent at a steady rate
+        self.reminder_queue = JobQueue(
+            self.db, default_owner_id(),
+            lock_seconds=self.settings.job_lock_seconds, max_attempts=self.settings.job_max_attempts,
+        )
+        self.reminder_sender = ReminderSender(self.reminder_queue, bot, self.settings.reminder_dm_rate, self.tz)
+        self._reminder_task: asyncio.Task | None = None
+
+    async def cog_load(self):
+        # Started here rather than in __init__ so constructing the cog (tests, tools) has no side effects
+        if self.settings.run_mode == "gateway":
+            return  # worker.py runs the scheduled jobs from the job queue
+        if self._scheduler_task is None:
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
+        if self.settings.birthday_reminders and self._reminder_task is None:
+            self._reminder_task = asyncio.create_task(self._run_reminder_sender())
 
     def cog_unload(self):
-        self.daily_task.cancel()
+        self.scheduler.stop()
+        self.reminder_sender.stop()
+        for task in (self._scheduler_task, self._reminder_task):
+            if task is not None:
+                task.cancel()
 
-    @tasks.loop(time=POST_TIME)
-    async def daily_task(self):
+    def _is_leader(self) -> bool:
+        return self.leader is None or self.leader.is_leader
+
+    def scheduled_jobs(self) -> list[JobDefinition]:
+        """The daily work split by cost: generation before ``POST_TIME_UTC``, posting on it, cleanup off-peak."""
+        post_time = self.settings.post_time
+        prepare_time = (datetime.combine(date(2000, 1, 2), post_time) - timedelta(minutes=self.settings.prepare_lead_minutes)).time()
+        return [
+            JobDefinition(
+                "prepare", daily_at(prepare_time), lambda planned: self.run_prepare(planned),
+                "Fetch holidays, generate wishes, refill templates",
+                max_runtime=PREPARE_MAX_RUNTIME, catch_up="once",
+            ),
+            JobDefinition(
+                "daily_task", daily_at(post_time), lambda planned: self.run_daily(planned), "Post birthdays, anniversaries and holidays",
+                max_runtime=DAILY_TASK_MAX_RUNTIME, catch_up="once",
+            ),
+            JobDefinition(
+                "cleanup_departed", self.settings.cleanup_cron, lambda planned: self.run_cleanup(),
+                "Remove birthdays of members who left", jitter_seconds=CLEANUP_JITTER_SECONDS,
+                max_runtime=CLEANUP_MAX_RUNTIME, catch_up="skip",
+            ),
+            JobDefinition(
+                "purge_jobs", self.settings.cleanup_cron, lambda planned: self.run_purge_jobs(),
+                "Delete old finished jobs", jitter_seconds=CLEANUP_JITTER_SECONDS,
+                max_runtime=PURGE_JOBS_MAX_RUNTIME, catch_up="skip",
+            ),
+        ] + ([
+            JobDefinition(
+                "join_snapshot", self.settings.join_snapshot_cron, lambda planned: self.run_join_snapshot(),
+                "Rebuild stored member join dates", jitter_seconds=CLEANUP_JITTER_SECONDS,
+                max_runtime=JOIN_SNAPSHOT_MAX_RUNTIME, catch_up="once",
+            ),
+        ] if self.settings.join_anniversaries else []) + ([
+            JobDefinition(
+                "reminders", self.settings.reminder_cron, lambda planned: self.run_reminders(),
+                "Queue birthday reminder DMs", max_runtime=REMINDERS_MAX_RUNTIME, catch_up="once",
+            ),
+        ] if self.settings.birthday_reminders else [])
+
+    async def _run_scheduler(self):
+        await self.bot.wait_until_ready()
+        if self.leader is not None:
+            await self.leader.wait_ready()
+        try:
+            await self.db.ensure_indexes()
+        except Exception as exc:
+            logger.warning("Failed to ensure indexes", extra={"event": "ensure_indexes_error", "error": str(exc)})
+        await self.scheduler.load()
+        if self._is_leader():
+            # The leader posts the schedule notice and keeps the template pool
+            rows = await self.scheduler.upcoming()
+            next_runs = ", ".join(f"{row['name']} {self._local_time_str(row['next_run_at'])}" for row in rows)
+            await _safe_send(
+                self.bot.get_channel(self.settings.staff_alerts_channel_id),
+                f"ℹ️ Jobs scheduled. Next: {next_runs} ({self.settings.server_timezone_name})",
+            )
+            await self.refill_template_pool()
+        await self.scheduler.run()
+
+    async def _run_reminder_sender(self):
+        await self.bot.wait_until_ready()
+        # Only the leader sends, so REMINDER_DM_PER_SECOND holds however many replicas run
+        # (workers elect their own sender, see worker.py)
+        await self.reminder_sender.run(should_run=self._is_leader)
+
+    def _local_time_str(self, moment: datetime) -> str:
+        return moment.astimezone(self.tz).strftime('%Y-%m-%d %H:%M')
+
+    async def run_prepare(self, planned: datetime | None = None):
+        """Fetch the coming post day's holidays and cache their wishes, so posting makes no Gemini calls for them."""
+        post_at = (planned or datetime.now(timezone.utc)) + timedelta(minutes=self.settings.prepare_lead_minutes)
+        day = post_at.astimezone(self.tz).date().isoformat()
+        run_budget = Budget(self.settings.prepare_budget)
+        with tracing.run("prepare"), tracing.stage("prepare"), run_budget.activate():
+            holidays = await self.api.get_holidays(int(day[:4]), int(day[5:7])) or []
+            prepared = 0
+            for name in dict.fromkeys(h['name'] for h in holidays if h['date']['iso'] == day):
+                for locale in self.settings.holiday_wish_locales:
+                    if await self._holiday_wish(name, locale, int(day[:4])):
+                        prepared += 1
+            # Also after each daily run's use of the pool, before the next post
+            await self.refill_template_pool()
+        if run_budget.degraded:
+            metrics.record_degraded_items(len(run_budget.degraded))
+        logger.info(
+            "Prepared %s holiday wishes for %s", prepared, day,
+            extra={"event": "prepare_done", "date": day, "degraded": run_budget.degraded},
+        )
+
+    async def run_cleanup(self) -> int:
+        """Drop birthdays of members who left; off-peak, since it looks up every registered member."""
+        with tracing.run("cleanup_departed"), tracing.stage("cleanup_departed"):
+            removed = await self._cleanup_departed_members()
+        if removed:
+            await _safe_send(
+                self.bot.get_channel(self.settings.staff_alerts_channel_id),
+                f"🧹 Departed cleanup removed {removed} birthday(s).",
+            )
+        return removed
+
+    async def run_purge_jobs(self) -> int:
+        """Delete done and failed jobs older than ``JOB_RETENTION_DAYS``, so the queue stays small."""
+        with tracing.run("purge_jobs"), tracing.stage("purge_jobs"):
+            purged = await self.reminder_queue.purge(timedelta(days=self.settings.job_retention_days))
+        logger.info("Purged %s finished jobs", purged, extra={"event": "jobs_purged", "purged": purged})
+        return purged
+
+    async def run_reminders(self) -> int:
+        """Queue reminder DMs for birthdays one and seven days out; the sender delivers them later."""
+        today = datetime.now(self.tz).date()
+        guild = self.bot.get_guild(self.settings.guild_id)
+
+        async def roles_of(user_ids):
+            if guild is None:
+                return {}
+            members = await self.members.resolve(guild, user_ids, today)
+            return {user_id: [role.id for role in member.roles] for user_id, member in members.items()}
+
+        with tracing.run("reminders"), tracing.stage("reminders"):
+            reminders = await plan_reminders(self.db, today, roles_of)
+            queued = await queue_reminders(self.reminder_queue, reminders)
+        logger.info(
+            "Queued %s of %s birthday reminders", queued, len(reminders),
+            extra={"event": "reminders_queued", "queued": queued, "planned": len(reminders)},
+        )
+        return queued
+
+    async def run_daily(self, planned: datetime | None = None):
+        """One daily post; run by the scheduler here or by a worker's ``daily_task`` job.
+
+        Posts for the local date of ``planned``, so a run caught up after midnight
+        still announces the day it missed. Each date is posted at most once.
+        """
+        today = (planned or datetime.now(timezone.utc)).astimezone(self.tz)
+        post_date = today.date().isoformat()
+        meta = await self._get_scheduler_meta("daily_task")
+        if meta and (meta.get("last_posted_date") or "") >= post_date:
+            logger.info(
+                "Daily post for %s already done", post_date,
+                extra={"event": "daily_task_duplicate", "date": post_date, "last_posted": meta["last_posted_date"]},
+            )
+            return
+        # Recorded before posting: a crash part-way loses the rest of that day rather than posting it twice
+        try:
+            await self.db.update_scheduler_meta("daily_task", {"last_posted_date": post_date})
+        except Exception as exc:
+            logger.warning("Failed to record the post date; skipping the run", extra={"event": "scheduler_meta_store_error", "error": str(exc)})
+            return
         start_time = metrics.record_task_start()
-        today = datetime.now(SERVER_TIMEZONE)
         logger.info(
             "Running daily task",
-            extra={"event": "daily_task_start", "ts_local": today.strftime('%Y-%m-%d %H:%M:%S'), "tz": SERVER_TIMEZONE_STR},
+            extra={"event": "daily_task_start", "ts_local": today.strftime('%Y-%m-%d %H:%M:%S'), "tz": self.settings.server_timezone_name},
         )
-        alerts_channel = self.bot.get_channel(STAFF_ALERTS_CHANNEL_ID)
+        alerts_channel = self.bot.get_channel(self.settings.staff_alerts_channel_id)
+        run_budget = Budget(self.settings.daily_task_budget)
         try:
-            removed_roles = await self._cleanup_birthday_roles(today)
-            removed_departed = await self._cleanup_departed_members()
-            birthday_count = await self._check_for_birthdays(today)
-            holiday_count = await self._check_for_holidays(today)
+            with tracing.run("daily_task"), run_budget.activate():
+                with tracing.stage("cleanup_roles"):
+                    removed_roles = await self._cleanup_birthday_roles(today)
+                with tracing.stage("birthdays"):
+                    birthday_count = await self._check_for_birthdays(today)
+                with tracing.stage("anniversaries"):
+                    anniversary_count = await self._check_for_anniversaries(today)
+                with tracing.stage("holidays"):
+                    holiday_count = await self._check_for_holidays(today)
             metrics.record_task_end(start_time, status='success')
             summary = (
                 f"✅ Daily task done | Birthdays: {birthday_count} | Holidays: {holiday_count} | Roles removed: {removed_roles} | "
-                f"Departed cleaned: {removed_departed} | "
-                f"Next run: {self._next_run_time_str()} ({SERVER_TIMEZONE_STR})"
+                + (f"Anniversaries: {anniversary_count} | " if self.settings.join_anniversaries else "")
+                + f"Next run: {self._next_run_time_str()} ({self.settings.server_timezone_name})"
             )
+            if run_budget.degraded:
+                metrics.record_degraded_items(len(run_budget.degraded))
+                summary += f"\n⚠️ Degraded ({len(run_budget.degraded)}): " + ", ".join(run_budget.degraded[:20])
+                if len(run_budget.degraded) > 20:
+                    summary += f" and {len(run_budget.degraded) - 20} more"
             await _safe_send(alerts_channel, summary)
-            await self._store_scheduler_meta(next_run=self._next_run_time_iso(), last_run=today.astimezone(SERVER_TIMEZONE).isoformat())
+            await self._store_scheduler_meta(next_run=self._next_run_time_iso(), last_run=today.astimezone(self.tz).isoformat())
             logger.info(
                 "Daily task completed",
                 extra={
                     "event": "daily_task_done",
                     "birthdays": birthday_count,
+                    "anniversaries": anniversary_count,
                     "holidays": holiday_count,
                     "roles_removed": removed_roles,
-                    "departed_removed": removed_departed,
+                    "degraded": run_budget.degraded,
                     "next_run": self._next_run_time_iso(),
-                    "tz": SERVER_TIMEZONE_STR,
+                    "tz": self.settings.server_timezone_name,
                 },
             )
         except Exception as exc:
             metrics.record_task_end(start_time, status='error')
             metrics.record_error(error_type='daily_task')
-            await _safe_send(self.bot.get_channel(STAFF_ALERTS_CHANNEL_ID), f"❌ Daily task failed: {exc}")
+            await _safe_send(self.bot.get_channel(self.settings.staff_alerts_channel_id), f"❌ Daily task failed: {exc}")
             logger.exception("Daily task encountered an error", extra={"event": "daily_task_error", "error": str(exc)})
 
-    @daily_task.before_loop
-    async def before_daily_task(self):
-        await self.bot.wait_until_ready()
-        if not Wishes._indexes_ready:
-            try:
-                await db_manager.ensure_indexes()
-                Wishes._indexes_ready = True
-            except Exception as exc:
-                logger.warning("Failed to ensure indexes", extra={"event": "ensure_indexes_error", "error": str(exc)})
-        alerts_channel = self.bot.get_channel(STAFF_ALERTS_CHANNEL_ID)
-        last_meta = await self._get_scheduler_meta()
-        last_run = last_meta.get("last_run_at") if last_meta else "unknown"
-        next_run = self._next_run_time_str()
-        await _safe_send(alerts_channel, f"ℹ️ Daily task scheduled. Next run: {next_run} ({SERVER_TIMEZONE_STR}) | Last run: {last_run}")
-
     async def _check_for_holidays(self, today: datetime):
-        alerts_channel = self.bot.get_channel(STAFF_ALERTS_CHANNEL_ID)
+        alerts_channel = self.bot.get_channel(self.settings.staff_alerts_channel_id)
         if not alerts_channel:
             logger.warning("STAFF_ALERTS_CHANNEL_ID is not configured or not found.", extra={"event": "alerts_channel_missing"})
-        holidays = await api_client.get_holidays(today.year, today.month)
+        holidays = await self.api.get_holidays(today.year, today.month)
         if holidays is None:
-            if alerts_channel: await alerts_channel.send("⚠️ **API Error:** Could not fetch holidays (Calendarific unreachable or misconfigured).")
+            await _safe_send(alerts_channel, "⚠️ **API Error:** Could not fetch holidays (Calendarific unreachable or misconfigured).")
             logger.warning("Holiday fetch returned None", extra={"event": "holidays_none", "year": today.year, "month": today.month})
             return 0
 
-        todays_holidays_names = [h['name'] for h in holidays if h['date']['iso'] == today.strftime('%Y-%m-%d')]
+        todays_holidays = [h for h in holidays if h['date']['iso'] == today.strftime('%Y-%m-%d')]
+        todays_holidays_names = [h['name'] for h in todays_holidays]
         if todays_holidays_names:
-            holiday_list_str = ", ".join(f"**{name}**" for name in todays_holidays_names)
+            holiday_list_str = ", ".join(
+                f"**{h['name']}**" + (f" ({', '.join(h['countries'])})" if h.get('countries') else "")
+                for h in todays_holidays
+            )
             log_message = f"ℹ️ **Daily Check:** Found {len(todays_holidays_names)} holiday(s): {holiday_list_str}."
-            if alerts_channel: await alerts_channel.send(log_message)
+            await _safe_send(alerts_channel, log_message)
 
         sent = 0
-        for holiday_name in todays_holidays_names:
-            wish_text = await api_client.generate_wish_text(holiday_name)
-            wishes_channel = self.bot.get_channel(WISHES_CHANNEL_ID)
+        for holiday_name, locale in [(name, locale) for name in todays_holidays_names for locale in self.settings.holiday_wish_locales]:
+            wish_text = await self._holiday_wish(holiday_name, locale, today.year)
+            wishes_channel = self.bot.get_channel(self.settings.wishes_channel_id)
             
             # FIX: Send raw markdown text instead of an embed
             if wish_text:
                 safe_text = self._guard_message(wish_text, kind="holiday", name=holiday_name)
-                if HOLIDAY_APPROVAL_MODE:
+                if self.settings.holiday_approval_mode:
                     preview = (
                         f"🔎 Holiday preview for **{holiday_name}** (approval required).\n"
                         f"Use `/holiday_post holiday_name:<name> content:<text>` to post.\n\n{safe_text}"
@@ -168,32 +362,63 @@ class Wishes(commands.Cog):
                     metrics.record_wish_sent(wish_type='holiday')
                     sent += 1
             elif alerts_channel:
-                await alerts_channel.send(f"⚠️ **API Error:** Failed to generate wish text for **{holiday_name}**.")
+                await _safe_send(alerts_channel, f"⚠️ **API Error:** Failed to generate wish text for **{holiday_name}**.")
                 metrics.record_message_failed(channel_type='holiday')
 
         metrics.record_holiday(status='success')
         return sent
 
+    async def _holiday_wish(self, holiday_name: str, locale: str, year: int) -> str | None:
+        """Wish text for ``holiday_name`` in ``locale``; Gemini is asked once a year per holiday and locale."""
+        key = wish_cache_key(holiday_name, locale, year)
+        try:
+            cached = await self.db.get_cached_wish(key)
+        except Exception as exc:
+            logger.warning("Failed to read wish cache", extra={"event": "wish_cache_error", "error": str(exc)})
+            cached = None
+        metrics.record_wish_cache_lookup(locale, "hit" if cached else "miss")
+        if cached:
+            return cached
+        text = await self.api.generate_wish_text(holiday_name, locale)
+        # The fallback is not cached, so a later run can still get a generated wish
+        if text and text != holiday_fallback(holiday_name, locale):
+            try:
+                await self.db.store_cached_wish(key, text)
+            except Exception as exc:
+                logger.warning("Failed to store wish cache", extra={"event": "wish_cache_error", "error": str(exc)})
+        return text
+
     async def _check_for_birthdays(self, today: datetime):
-        guild = self.bot.get_guild(GUILD_ID)
-        birthday_channel = self.bot.get_channel(BIRTHDAY_CHANNEL_ID)
-        birthday_role = guild.get_role(BIRTHDAY_ROLE_ID) if guild else None
+        guild = self.bot.get_guild(self.settings.guild_id)
+        birthday_channel = self.bot.get_channel(self.settings.birthday_channel_id)
+        birthday_role = guild.get_role(self.settings.birthday_role_id) if guild else None
         if not all([guild, birthday_channel, birthday_role]):
-            await _safe_send(self.bot.get_channel(STAFF_ALERTS_CHANNEL_ID), "⚠️ Birthday check skipped: guild/channel/role missing.")
+            await _safe_send(self.bot.get_channel(self.settings.staff_alerts_channel_id), "⚠️ Birthday check skipped: guild/channel/role missing.")
             logger.warning("Birthday check skipped: missing guild/channel/role", extra={"event": "birthday_skip"})
             metrics.record_birthday(status='error')
             return 0
             return 0
 
-        cursor = db_manager.get_birthdays_for_date(today.day, today.month)
+        # By doy, so Feb 28 also celebrates Feb 29 birthdays in common years
+        celebrants = await self.db.get_birthdays_in_doy_ranges(doy_ranges(today.date(), 1), MAX_CELEBRANTS_PER_DAY, full=True)
+        members = await self.members.resolve(guild, [entry['_id'] for entry in celebrants], today.date())
+        templates: dict[str, list[dict]] = {}  # per locale, loaded on first use
+        taken_today: set[str] = set()
         sent = 0
-        async for birthday_data in cursor:
-            member = guild.get_member(birthday_data['_id'])
+        for birthday_data in celebrants:
+            member = members.get(birthday_data['_id'])
             if member:
                 try:
-                    birthday_message = await api_client.generate_birthday_wish_text(member.display_name, member.mention)
+                    locale = normalize_locale(birthday_data.get('locale')) or self.settings.default_locale
+                    if locale not in templates:
+                        templates[locale] = await self._load_birthday_templates(locale)
+                    birthday_message = await self._birthday_message(member, birthday_data, templates[locale], taken_today, locale)
                     
-                    await member.add_roles(birthday_role, reason="Birthday")
+                    with tracing.span("discord.add_roles", member=member.id):
+                        # Still announced without the role; tomorrow's cleanup skips members who lack it
+                        await _discord_call(
+                            lambda: member.add_roles(birthday_role, reason="Birthday"), f"birthday role: {member.display_name}",
+                        )
                     
                     # FIX: Send raw markdown text instead of an embed
                     if birthday_message:
@@ -201,25 +426,179 @@ class Wishes(commands.Cog):
                         await _safe_send(birthday_channel, safe_text)
                         sent += 1
                     
-                    await db_manager.add_user_to_role_log(birthday_data['_id'], today.strftime('%Y-%m-%d'))
+                    with tracing.span("db.add_user_to_role_log"):
+                        await self.db.add_user_to_role_log(birthday_data['_id'], today.strftime('%Y-%m-%d'))
                 except Exception as e:
                     logger.exception("Unexpected error during birthday announcement", extra={"event": "birthday_error", "member": member.display_name, "error": str(e)})
         return sent
 
+    async def _check_for_anniversaries(self, today: datetime) -> int:
+        """Announce today's join anniversaries in the birthday channel, in batches; returns how many."""
+        if not self.settings.join_anniversaries:
+            return 0
+        guild = self.bot.get_guild(self.settings.guild_id)
+        birthday_channel = self.bot.get_channel(self.settings.birthday_channel_id)
+        if not guild or not birthday_channel:
+            logger.warning("Anniversary check skipped: missing guild/channel", extra={"event": "anniversary_skip"})
+            return 0
+
+        started = perf_counter()
+        if guild.chunked:
+            source = "cache"
+            indexed = self._refresh_join_index(guild)
+            entries = self._join_index.on(today.date())
+        else:
+            # Rebuilt off-peak by the join_snapshot job: a full member fetch would hold up the post
+            source, indexed = "snapshot", None
+            docs = await self.db.get_member_joins_in_doy_ranges(doy_ranges(today.date(), 1))
+            entries = [(doc["_id"], doc["year"]) for doc in docs]
+        due = due_anniversaries(entries, today.date())
+        duration = perf_counter() - started
+        metrics.record_anniversary_pass(source, duration, indexed, len(due))
+        logger.info(
+            "Found %s join anniversaries", len(due),
+            extra={"event": "anniversary_pass", "source": source, "indexed": indexed, "found": len(due), "duration": round(duration, 4)},
+        )
+
+        for message in anniversary_messages(due, self.settings.anniversary_batch_size):
+            await _safe_send(birthday_channel, message)
+        return len(due)
+
+    def _join_snapshot_stale(self, refreshed_at: datetime | None) -> bool:
+        if refreshed_at is None:
+            return True
+        if refreshed_at.tzinfo is None:
+            refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC
+        return datetime.now(timezone.utc) - refreshed_at >= timedelta(days=self.settings.join_snapshot_max_age_days)
+
+    def _refresh_join_index(self, guild: discord.Guild) -> int | None:
+        """Bucket the member cache if the index is missing or stale; returns its size, or None if kept."""
+        # A reconnect that re-chunks builds new Guild objects, and events may have been missed meanwhile
+        if self._join_index is not None and self._join_index_guild is guild and not self._join_snapshot_stale(self._join_index_built):
+            return None
+        self._join_index = JoinIndex.from_members(guild.members, self.tz)
+        self._join_index_guild = guild
+        self._join_index_built = datetime.now(timezone.utc)
+        return len(self._join_index)
+
+    async def run_join_snapshot(self) -> int | None:
+        """Refresh the join dates anniversaries are read from, if stale; off-peak, since it may fetch every member."""
+        guild = self.bot.get_guild(self.settings.guild_id)
+        if guild is None:
+            return None
+        with tracing.run("join_snapshot"), tracing.stage("join_snapshot"):
+            if guild.chunked:
+                return self._refresh_join_index(guild)
+            return await self._refresh_join_snapshot(guild)
+
+    async def _refresh_join_snapshot(self, guild: discord.Guild) -> int | None:
+        """Rebuild the stored join snapshot if it is stale; returns how many members it now holds, or None if kept."""
+        meta = await self._get_scheduler_meta("join_snapshot")
+        if not self._join_snapshot_stale(meta.get("refreshed_at") if meta else None):
+            return None
+        now = datetime.now(timezone.utc)
+        try:
+            with tracing.span("discord.fetch_members"):
+                entries = [
+                    snapshot_entry(member.id, member.joined_at, self.tz)
+                    async for member in guild.fetch_members(limit=None)
+                    if not member.bot and member.joined_at is not None
+                ]
+        except (discord.ClientException, discord.HTTPException) as exc:
+            logger.warning("Failed to rebuild the join snapshot; using the stored one", extra={"event": "join_snapshot_error", "error": str(exc)})
+            return None
+        try:
+            await self.db.replace_member_joins(entries)
+            await self.db.update_scheduler_meta("join_snapshot", {"refreshed_at": now, "members": len(entries)})
+        except Exception as exc:
+            # Left stale, so the next run tries again
+            logger.warning("Failed to store the join snapshot", extra={"event": "join_snapshot_error", "error": str(exc)})
+            return None
+        return len(entries)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        # Keeps the index and the stored snapshot current between rebuilds
+        if not self.settings.join_anniversaries or member.bot or member.guild.id != self.settings.guild_id:
+            return
+        if member.joined_at is None:
+            return
+        if self._join_index is not None:
+            self._join_index.add(member.id, member.joined_at)
+        try:
+            await self.db.set_member_join(snapshot_entry(member.id, member.joined_at, self.tz))
+        except Exception as exc:
+            logger.warning("Failed to store member join", extra={"event": "join_snapshot_error", "error": str(exc)})
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if not self.settings.join_anniversaries or member.guild.id != self.settings.guild_id:
+            return
+        if self._join_index is not None:
+            self._join_index.remove(member.id)
+        try:
+            await self.db.delete_member_join(member.id)
+        except Exception as exc:
+            logger.warning("Failed to remove member join", extra={"event": "join_snapshot_error", "error": str(exc)})
+
+    async def _load_birthday_templates(self, locale: str) -> list[dict]:
+        """``locale``'s template pool in pool mode; empty (meaning live generation) otherwise or on failure."""
+        if self.settings.birthday_wish_mode != "pool":
+            return []
+        try:
+            templates = await self.db.get_birthday_templates(locale)
+        except Exception as exc:
+            logger.warning("Failed to load birthday templates; using live generation", extra={"event": "template_load_error", "error": str(exc)})
+            return []
+        if not templates:
+            logger.warning("Birthday template pool is empty; using live generation", extra={"event": "template_pool_empty", "locale": locale})
+        return templates
+
+    async def _birthday_message(self, member: discord.Member, birthday_data: dict, templates: list[dict], taken_today: set[str],
+                                locale: str):
+        template, reset = choose_template(templates, birthday_data.get('templates_used'), taken_today)
+        if template is None:
+            metrics.record_birthday_wish_source('live')
+            return await self.api.generate_birthday_wish_text(member.display_name, member.mention, locale)
+
+        taken_today.add(template['_id'])
+        try:
+            await self.db.record_birthday_template_use(birthday_data['_id'], template['_id'], reset=reset)
+        except Exception as exc:
+            logger.warning("Failed to record template use", extra={"event": "template_use_store_error", "error": str(exc)})
+        metrics.record_birthday_wish_source('pool')
+        return render_template(template['text'], member.display_name, member.mention)
+
+    async def refill_template_pool(self):
+        if self.settings.birthday_wish_mode != "pool":
+            return
+        try:
+            # One pool per language members have picked, plus the server default
+            locales = dict.fromkeys([self.settings.default_locale, *await self.db.get_birthday_locales()])
+            for locale in locales:
+                await refill_pool(self.db, self.api, self.settings.birthday_template_pool_size, locale)
+        except Exception as exc:
+            logger.warning("Failed to refill birthday template pool", extra={"event": "template_refill_error", "error": str(exc)})
+
     async def _cleanup_birthday_roles(self, today: datetime):
-        # ... (no changes here)
-        guild = self.bot.get_guild(GUILD_ID)
-        birthday_role = guild.get_role(BIRTHDAY_ROLE_ID) if guild else None
+        guild = self.bot.get_guild(self.settings.guild_id)
+        birthday_role = guild.get_role(self.settings.birthday_role_id) if guild else None
         if not guild or not birthday_role: return
-        cursor = await db_manager.get_users_with_birthday_role()
+        cursor = await self.db.get_users_with_birthday_role()
+        today_str = today.strftime('%Y-%m-%d')
+        expired = [user_log async for user_log in cursor if user_log.get('date_added') != today_str]
+        members = await self.members.resolve(guild, [user_log['_id'] for user_log in expired], today.date())
         removed = 0
-        async for user_log in cursor:
-            if user_log.get('date_added') != today.strftime('%Y-%m-%d'):
-                member = guild.get_member(user_log['_id'])
-                if member and birthday_role in member.roles:
-                    await member.remove_roles(birthday_role, reason="Birthday ended")
-                    removed += 1
-                await db_manager.remove_user_from_role_log(user_log['_id'])
+        for user_log in expired:
+            member = members.get(user_log['_id'])
+            if member and birthday_role in member.roles:
+                with tracing.span("discord.remove_roles", member=member.id):
+                    if not await _discord_call(
+                        lambda: member.remove_roles(birthday_role, reason="Birthday ended"), f"role removal: {member.display_name}",
+                    ):
+                        continue  # kept in the role log, so the next run retries
+                removed += 1
+            await self.db.remove_user_from_role_log(user_log['_id'])
         return removed
 
     def _guard_message(self, text: str, kind: str, name: str) -> str:
@@ -236,74 +615,103 @@ class Wishes(commands.Cog):
         return sanitized
 
     async def _cleanup_departed_members(self):
-        guild = self.bot.get_guild(GUILD_ID)
+        guild = self.bot.get_guild(self.settings.guild_id)
         if not guild:
             return 0
         removed = 0
-        cursor = await db_manager.get_all_birthdays()
-        async for entry in cursor:
-            user_id = entry.get("_id")
-            if not user_id:
-                continue
-            member = guild.get_member(user_id)
-            if member is None:
-                await db_manager.delete_birthday(user_id)
-                await db_manager.remove_user_from_role_log(user_id)
+        cursor = await self.db.get_all_birthdays()
+        user_ids = [entry.get("_id") async for entry in cursor if entry.get("_id")]
+        # Raises if Discord cannot be asked, so an outage never looks like everyone left
+        members = await self.members.resolve(guild, user_ids, datetime.now(self.tz).date())
+        for user_id in user_ids:
+            if user_id not in members:
+                await self.db.delete_birthday(user_id)
+                await self.db.remove_user_from_role_log(user_id)
                 removed += 1
         return removed
 
     def _next_run_time_str(self) -> str:
         """Compute next run time for the daily task in server timezone."""
-        now = datetime.now(SERVER_TIMEZONE)
-        target = now.replace(hour=POST_TIME.hour, minute=POST_TIME.minute, second=0, microsecond=0)
+        now = datetime.now(self.tz)
+        post_time = self.settings.post_time
+        target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
         if target <= now:
             target = target + timedelta(days=1)
         return target.strftime('%Y-%m-%d %H:%M')
 
     def _next_run_time_iso(self) -> str:
-        now = datetime.now(SERVER_TIMEZONE)
-        target = now.replace(hour=POST_TIME.hour, minute=POST_TIME.minute, second=0, microsecond=0)
+        now = datetime.now(self.tz)
+        post_time = self.settings.post_time
+        target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
         if target <= now:
             target = target + timedelta(days=1)
         return target.isoformat()
 
     async def _store_scheduler_meta(self, next_run: str | None, last_run: str | None):
         try:
-            await db_manager.upsert_scheduler_meta("daily_task", next_run_at=next_run, last_run_at=last_run)
+            await self.db.upsert_scheduler_meta("daily_task", next_run_at=next_run, last_run_at=last_run)
         except Exception as exc:
             logger.warning("Failed to store scheduler meta", extra={"event": "scheduler_meta_store_error", "error": str(exc)})
 
-    async def _get_scheduler_meta(self):
+    async def _get_scheduler_meta(self, name: str):
         try:
-            return await db_manager.get_scheduler_meta("daily_task")
+            return await self.db.get_scheduler_meta(name)
         except Exception as exc:
             logger.warning("Failed to load scheduler meta", extra={"event": "scheduler_meta_load_error", "error": str(exc)})
             return None
 
-    # ... (no changes to Staff Commands)
     @app_commands.command(name="add_wish", description="[STAFF] Add a custom wish for a specific date.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     async def add_wish(self, interaction: discord.Interaction):
-        await interaction.response.send_modal(WishModal())
+        await interaction.response.send_modal(WishModal(self.db))
 
     @app_commands.command(name="status", description="[STAFF] Check the operational status of the bot.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     async def status(self, interaction: discord.Interaction):
         latency = round(self.bot.latency * 1000)
-        meta = await self._get_scheduler_meta()
-        last_run = meta.get("last_run_at") if meta else "unknown"
-        next_run = meta.get("next_run_at") if meta else "unknown"
+        leader_line = ""
+        if self.leader is not None:
+            role = "this replica" if self.leader.is_leader else "standby"
+            leader_line = f"\nLeader: {self.leader.leader or 'none'} ({role})"
+        job_lines = []
+        for row in await self.scheduler.upcoming():
+            if row["running"]:
+                last = "running now"
+            elif row["last_status"]:
+                last = f"last {row['last_duration']:.1f}s ({row['last_status']})"
+            else:
+                last = "not run yet"
+            job_lines.append(f"• `{row['name']}` next {self._local_time_str(row['next_run_at'])} — {last}")
         await interaction.response.send_message(
-            f"Bot is online. Latency: {latency}ms.\n"
-            f"Daily task — Last run: {last_run}, Next run: {next_run}",
+            f"Bot is online. Latency: {latency}ms.{leader_line}\n"
+            f"Upcoming jobs ({self.settings.server_timezone_name}):\n" + "\n".join(job_lines),
+            ephemeral=True,
+        )
+
+    @app_commands.command(name="simulate", description="[STAFF] Dry-run the daily task over a date range; nothing is sent.")
+    @is_staff()
+    @app_commands.describe(start="First day as DD-MM-YYYY (default today)", days="How many days to simulate (default 30)")
+    async def simulate_daily(self, interaction: discord.Interaction, start: str | None = None,
+                             days: app_commands.Range[int, 1, 366] = 30):
+        try:
+            first_day = datetime.strptime(start, "%d-%m-%Y").date() if start else datetime.now(self.tz).date()
+        except ValueError:
+            await interaction.response.send_message("Invalid date format. Use DD-MM-YYYY.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        plans = await simulate(self.bot.app_context, first_day, days)
+        report = io.StringIO("\n".join(format_plan(plan) for plan in plans) + "\n")
+        await interaction.followup.send(
+            f"🧪 {summarize(plans)}",
+            file=discord.File(report, filename=f"simulation-{first_day.isoformat()}.txt"),
             ephemeral=True,
         )
 
     @app_commands.command(name="holiday_post", description="[STAFF] Post an approved holiday wish to the channel.")
-    @app_commands.checks.has_role(STAFF_ROLE_ID)
+    @is_staff()
     @app_commands.describe(holiday_name="Name of the holiday", content="Message to post")
     async def holiday_post(self, interaction: discord.Interaction, holiday_name: str, content: str):
-        wishes_channel = self.bot.get_channel(WISHES_CHANNEL_ID)
+        wishes_channel = self.bot.get_channel(self.settings.wishes_channel_id)
         if not wishes_channel:
             await interaction.response.send_message("Wishes channel not configured.", ephemeral=True)
             return
@@ -313,10 +721,14 @@ class Wishes(commands.Cog):
     
     @add_wish.error
     @status.error
+    @simulate_daily.error
     async def on_staff_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
-        # ... (no changes here)
         if isinstance(error, app_commands.MissingRole):
             await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        elif interaction.response.is_done():
+            # /simulate defers before doing any work
+            await interaction.followup.send("An unexpected error occurred.", ephemeral=True)
+            raise error
         else:
             await interaction.response.send_message("An unexpected error occurred.", ephemeral=True)
             raise error
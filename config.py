@@ -1,44 +1,288 @@
+"""Typed bot settings, parsed and validated once from the environment."""
+
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from datetime import time, tzinfo
+from typing import Mapping
+
+import pytz
+
+# pool: render pre-generated templates (no LLM call at post time); live: one Gemini call per celebrant
+BIRTHDAY_WISH_MODES = ("pool", "live")
+
+# mongo: MongoDB through Motor; sqlite: one local file (utils/sqlite_manager.py)
+STORAGE_BACKENDS = ("mongo", "sqlite")
+
+# all: one process does everything; gateway: interactions and events only; worker: queued jobs over REST
+RUN_MODES = ("all", "gateway", "worker")
+
+
+class ConfigError(ValueError):
+    """Raised when a required setting is missing or malformed."""
+
+
+def _require(env: Mapping[str, str], name: str, cast=str):
+    """Fetch and cast a required variable, failing with a clear message."""
+    raw_value = env.get(name)
+    if raw_value in (None, ""):
+        raise ConfigError(f"Missing required environment variable: {name}")
+    try:
+        return cast(raw_value)
+    except Exception:
+        raise ConfigError(f"Invalid value for {name}: expected {cast.__name__}")
+
+
+def _optional(env: Mapping[str, str], name: str, default=None, cast=str):
+    raw_value = env.get(name)
+    if raw_value in (None, ""):
+        return default
+    try:
+        return cast(raw_value)
+    except Exception:
+        raise ConfigError(f"Invalid value for {name}: expected {cast.__name__}")
+
+
+def _flag(env: Mapping[str, str], name: str, default: bool = False) -> bool:
+    return env.get(name, "true" if default else "false").lower() == "true"
+
+
+def _list(env: Mapping[str, str], name: str) -> tuple[str, ...]:
+    """Comma-separated values, blanks and duplicates dropped, order kept."""
+    items = (item.strip() for item in (env.get(name) or "").split(","))
+    return tuple(dict.fromkeys(item for item in items if item))
+
+
+def _parse_post_time(value: str) -> time:
+    parts = value.split(":")
+    if len(parts) != 2:
+        raise ConfigError("POST_TIME_UTC must be in HH:MM format (e.g., 00:01)")
+    hour, minute = parts
+    if not (hour.isdigit() and minute.isdigit()):
+        raise ConfigError("POST_TIME_UTC must contain only digits (HH:MM)")
+    hour_i, minute_i = int(hour), int(minute)
+    if not (0 <= hour_i <= 23 and 0 <= minute_i <= 59):
+        raise ConfigError("POST_TIME_UTC must be a valid 24h time (00:00-23:59)")
+    return time(hour=hour_i, minute=minute_i, tzinfo=pytz.utc)
 
-# Load environment variables from .env
-load_dotenv()
 
-class Config:
+@dataclass(frozen=True)
+class Settings:
     # Discord
-    DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
-    COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
-    
-    # Holiday API
-    HOLIDAY_API_KEY = os.getenv("HOLIDAY_API_KEY")
-    COUNTRY_CODE = os.getenv("COUNTRY_CODE", "IN")
-    YEAR = int(os.getenv("YEAR", "2025"))
-    
-    # Hugging Face
-    HF_API_KEY = os.getenv("HF_API_KEY")
-    HF_MODEL = os.getenv("HF_MODEL", "bigscience/bloomz-560m")
-    
-    # Bot Settings
-    DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "en")
-    FESTIVAL_CHANNEL_ID = int(os.getenv("FESTIVAL_CHANNEL_ID", "0"))
-    DAILY_REMINDER_TIME = os.getenv("DAILY_REMINDER_TIME", "22:00")  # IST
-    ENABLE_DAILY_REMINDER = os.getenv("ENABLE_DAILY_REMINDER", "true").lower() == "true"
-    
-    # Logging
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-
-    @staticmethod
-    def validate():
-        """Validate required configs are set"""
-        missing = []
-        if not Config.DISCORD_TOKEN:
-            missing.append("DISCORD_TOKEN")
-        if not Config.HOLIDAY_API_KEY:
-            missing.append("HOLIDAY_API_KEY")
-        if not Config.HF_API_KEY:
-            missing.append("HF_API_KEY")
-        if missing:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
-
-# Run validation at import
-Config.validate()
+    bot_token: str
+    guild_id: int
+    staff_role_id: int
+    birthday_role_id: int
+    wishes_channel_id: int
+    birthday_channel_id: int
+    staff_alerts_channel_id: int
+
+    # Scheduling
+    post_time: time = time(hour=0, minute=1, tzinfo=pytz.utc)
+    server_timezone_name: str = "UTC"
+    holiday_approval_mode: bool = False
+    force_command_sync: bool = False
+    low_memory_mode: bool = False
+    daily_task_budget: float = 180
+    prepare_budget: float = 600
+    prepare_lead_minutes: int = 30
+    cleanup_cron: str = "0 4 * * *"
+    run_mode: str = "all"
+    worker_poll_seconds: float = 5
+    job_lock_seconds: float = 600
+    job_max_attempts: int = 3
+    job_retention_days: float = 14
+    leader_election: bool = True
+    leader_lease_seconds: float = 30
+    leader_renew_seconds: float = 10
+    birthday_wish_mode: str = "pool"
+    birthday_template_pool_size: int = 60
+    run_migrations: bool = True
+    migration_batch_size: int = 500
+    migration_pause_seconds: float = 0.2
+    join_anniversaries: bool = False
+    anniversary_batch_size: int = 25
+    join_snapshot_max_age_days: float = 7
+    join_snapshot_cron: str = "30 4 * * *"
+    default_locale: str = "en"
+    holiday_locales: tuple[str, ...] = ()
+    birthday_reminders: bool = False
+    reminder_cron: str = "0 9 * * *"
+    reminder_dm_rate: float = 1
+
+    # Storage and external APIs
+    storage_backend: str = "mongo"
+    sqlite_path: str = "mangalify.db"
+    mongo_uri: str | None = None
+    mongo_db_name: str = "wishes_bot_db"
+    mongo_max_pool_size: int | None = None
+    mongo_min_pool_size: int | None = None
+    mongo_server_selection_timeout_ms: int | None = None
+    mongo_socket_timeout_ms: int | None = None
+    mongo_read_concern: str | None = None
+    mongo_write_concern: str | None = None
+    gemini_api_key: str | None = None
+    calendarific_api_key: str | None = None
+    calendarific_countries: tuple[str, ...] = ()
+    calendarific_holiday_types: tuple[str, ...] = ()
+    calendarific_concurrency: int = 4
+    gemini_timeout: float = 20
+    calendarific_timeout: float = 10
+    holiday_calendars: tuple[str, ...] = ()
+    holiday_cache: bool = True
+    holiday_cache_max_age_days: float = 7
+
+    # Monitoring
+    log_level: str = "INFO"
+    log_format: str = "plain"
+    log_sample_limit: int = 10
+    log_sample_window: float = 60
+    metrics_port: int = 8000
+    metrics_host: str = "0.0.0.0"
+    debug_token: str | None = None
+    trace_run_history: int = 10
+    data_health_interval: int = 300
+    data_health_aggregation_ttl: int = 3600
+    sentry_dsn: str | None = None
+    environment: str = "production"
+    exit_after_ready: bool = False
+
+    @property
+    def server_timezone(self) -> tzinfo:
+        return pytz.timezone(self.server_timezone_name)
+
+    @property
+    def holiday_wish_locales(self) -> tuple[str, ...]:
+        """Languages each holiday wish is posted in."""
+        return self.holiday_locales or (self.default_locale,)
+
+    @property
+    def mongo_client_options(self) -> dict:
+        """Keyword arguments for the Motor client; unset values keep the driver defaults."""
+        write_concern = self.mongo_write_concern
+        if write_concern is not None and write_concern.isdigit():
+            write_concern = int(write_concern)
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "readConcernLevel": self.mongo_read_concern,
+            "w": write_concern,
+        }
+        return {key: value for key, value in options.items() if value is not None}
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] | None = None) -> "Settings":
+        """Build settings from ``env`` (default ``os.environ``); raises ConfigError."""
+        env = os.environ if env is None else env
+
+        timezone_name = env.get("SERVER_TIMEZONE") or "UTC"
+        try:
+            pytz.timezone(timezone_name)
+        except pytz.UnknownTimeZoneError:
+            raise ConfigError(f"Unknown SERVER_TIMEZONE: {timezone_name}")
+
+        wish_mode = (env.get("BIRTHDAY_WISH_MODE") or "pool").lower()
+        if wish_mode not in BIRTHDAY_WISH_MODES:
+            raise ConfigError(f"BIRTHDAY_WISH_MODE must be one of: {', '.join(BIRTHDAY_WISH_MODES)}")
+
+        run_mode = (env.get("RUN_MODE") or "all").lower()
+        if run_mode not in RUN_MODES:
+            raise ConfigError(f"RUN_MODE must be one of: {', '.join(RUN_MODES)}")
+
+        from utils.scheduler import CronSchedule
+
+        cleanup_cron = env.get("CLEANUP_CRON") or "0 4 * * *"
+        reminder_cron = env.get("REMINDER_CRON") or "0 9 * * *"
+        join_snapshot_cron = env.get("JOIN_SNAPSHOT_CRON") or "30 4 * * *"
+        for name, expr in (("CLEANUP_CRON", cleanup_cron), ("REMINDER_CRON", reminder_cron),
+                           ("JOIN_SNAPSHOT_CRON", join_snapshot_cron)):
+            try:
+                CronSchedule(expr)
+            except ValueError as exc:
+                raise ConfigError(f"Invalid {name}: {exc}")
+
+        from utils.locales import LOCALES, normalize_locale
+
+        default_locale = normalize_locale(env.get("DEFAULT_LOCALE") or "en")
+        holiday_locales = tuple(normalize_locale(code) for code in _list(env, "HOLIDAY_LOCALES"))
+        if default_locale is None or None in holiday_locales:
+            raise ConfigError(f"DEFAULT_LOCALE and HOLIDAY_LOCALES must be among: {', '.join(LOCALES)}")
+
+        storage_backend = (env.get("STORAGE_BACKEND") or "mongo").lower()
+        if storage_backend not in STORAGE_BACKENDS:
+            raise ConfigError(f"STORAGE_BACKEND must be one of: {', '.join(STORAGE_BACKENDS)}")
+
+        return cls(
+            bot_token=_require(env, "BOT_TOKEN", str),
+            guild_id=_require(env, "GUILD_ID", int),
+            staff_role_id=_require(env, "STAFF_ROLE_ID", int),
+            birthday_role_id=_require(env, "BIRTHDAY_ROLE_ID", int),
+            wishes_channel_id=_require(env, "WISHES_CHANNEL_ID", int),
+            birthday_channel_id=_require(env, "BIRTHDAY_CHANNEL_ID", int),
+            staff_alerts_channel_id=_require(env, "STAFF_ALERTS_CHANNEL_ID", int),
+            post_time=_parse_post_time(env.get("POST_TIME_UTC") or "00:01"),
+            server_timezone_name=timezone_name,
+            holiday_approval_mode=_flag(env, "HOLIDAY_APPROVAL_MODE"),
+            force_command_sync=_flag(env, "FORCE_COMMAND_SYNC"),
+            low_memory_mode=_flag(env, "LOW_MEMORY_MODE"),
+            daily_task_budget=_optional(env, "DAILY_TASK_BUDGET_SECONDS", 180, float),
+            prepare_budget=_optional(env, "PREPARE_BUDGET_SECONDS", 600, float),
+            prepare_lead_minutes=_optional(env, "PREPARE_LEAD_MINUTES", 30, int),
+            cleanup_cron=cleanup_cron,
+            run_mode=run_mode,
+            worker_poll_seconds=_optional(env, "WORKER_POLL_SECONDS", 5, float),
+            job_lock_seconds=_optional(env, "JOB_LOCK_SECONDS", 600, float),
+            job_max_attempts=_optional(env, "JOB_MAX_ATTEMPTS", 3, int),
+            job_retention_days=_optional(env, "JOB_RETENTION_DAYS", 14, float),
+            leader_election=_flag(env, "LEADER_ELECTION", True),
+            leader_lease_seconds=_optional(env, "LEADER_LEASE_SECONDS", 30, float),
+            leader_renew_seconds=_optional(env, "LEADER_RENEW_SECONDS", 10, float),
+            birthday_wish_mode=wish_mode,
+            birthday_template_pool_size=_optional(env, "BIRTHDAY_TEMPLATE_POOL_SIZE", 60, int),
+            run_migrations=_flag(env, "RUN_MIGRATIONS", True),
+            migration_batch_size=_optional(env, "MIGRATION_BATCH_SIZE", 500, int),
+            migration_pause_seconds=_optional(env, "MIGRATION_PAUSE_MS", 200, int) / 1000,
+            join_anniversaries=_flag(env, "JOIN_ANNIVERSARIES"),
+            anniversary_batch_size=_optional(env, "ANNIVERSARY_BATCH_SIZE", 25, int),
+            join_snapshot_max_age_days=_optional(env, "JOIN_SNAPSHOT_MAX_AGE_DAYS", 7, float),
+            join_snapshot_cron=join_snapshot_cron,
+            default_locale=default_locale,
+            holiday_locales=tuple(dict.fromkeys(holiday_locales)),
+            birthday_reminders=_flag(env, "BIRTHDAY_REMINDERS"),
+            reminder_cron=reminder_cron,
+            reminder_dm_rate=_optional(env, "REMINDER_DM_PER_SECOND", 1, float),
+            storage_backend=storage_backend,
+            sqlite_path=_optional(env, "SQLITE_PATH", "mangalify.db"),
+            mongo_uri=_optional(env, "MONGO_URI"),
+            mongo_db_name=_optional(env, "MONGO_DB_NAME", "wishes_bot_db"),
+            mongo_max_pool_size=_optional(env, "MONGO_MAX_POOL_SIZE", None, int),
+            mongo_min_pool_size=_optional(env, "MONGO_MIN_POOL_SIZE", None, int),
+            mongo_server_selection_timeout_ms=_optional(env, "MONGO_SERVER_SELECTION_TIMEOUT_MS", None, int),
+            mongo_socket_timeout_ms=_optional(env, "MONGO_SOCKET_TIMEOUT_MS", None, int),
+            mongo_read_concern=_optional(env, "MONGO_READ_CONCERN"),
+            mongo_write_concern=_optional(env, "MONGO_WRITE_CONCERN"),
+            gemini_api_key=_optional(env, "GEMINI_API_KEY"),
+            calendarific_api_key=_optional(env, "CALENDARIFIC_API_KEY"),
+            calendarific_countries=tuple(code.upper() for code in _list(env, "CALENDARIFIC_COUNTRY_CODE")),
+            calendarific_holiday_types=tuple(kind.lower() for kind in _list(env, "CALENDARIFIC_HOLIDAY_TYPES")),
+            calendarific_concurrency=_optional(env, "CALENDARIFIC_CONCURRENCY", 4, int),
+            gemini_timeout=_optional(env, "GEMINI_TIMEOUT_SECONDS", 20, float),
+            calendarific_timeout=_optional(env, "CALENDARIFIC_TIMEOUT_SECONDS", 10, float),
+            holiday_calendars=_list(env, "HOLIDAY_CALENDARS"),
+            holiday_cache=_flag(env, "HOLIDAY_CACHE", True),
+            holiday_cache_max_age_days=_optional(env, "HOLIDAY_CACHE_MAX_AGE_DAYS", 7, float),
+            log_level=(env.get("LOG_LEVEL") or "INFO").upper(),
+            log_format=(env.get("LOG_FORMAT") or "plain").lower(),
+            log_sample_limit=_optional(env, "LOG_SAMPLE_LIMIT", 10, int),
+            log_sample_window=_optional(env, "LOG_SAMPLE_WINDOW_SECONDS", 60, float),
+            metrics_port=_optional(env, "METRICS_PORT", 8000, int),
+            metrics_host=_optional(env, "METRICS_HOST", "0.0.0.0"),
+            debug_token=_optional(env, "DEBUG_TOKEN"),
+            trace_run_history=_optional(env, "TRACE_RUN_HISTORY", 10, int),
+            data_health_interval=_optional(env, "DATA_HEALTH_INTERVAL_SECONDS", 300, int),
+            data_health_aggregation_ttl=_optional(env, "DATA_HEALTH_AGGREGATION_TTL_SECONDS", 3600, int),
+            sentry_dsn=_optional(env, "SENTRY_DSN"),
+            environment=_optional(env, "ENVIRONMENT", "production"),
+            exit_after_ready=_flag(env, "EXIT_AFTER_READY"),
+        )
@@ -1,119 +1,108 @@
 # main.py
 
+import time
+
+_PROCESS_START = time.perf_counter()
+
 import os
+import sys
 import asyncio
+import hashlib
+import dataclasses
 import logging
 import json
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-import sentry_sdk
 
 # Allow tests/CI to bypass local .env loading
 if os.getenv("LOAD_DOTENV", "true").lower() == "true":
     load_dotenv()
 
-BOT_TOKEN = None  # Populated after validation
-GUILD_ID = None   # Populated after validation
-
+from config import ConfigError, Settings
+from utils import tracing
+from utils.app_context import AppContext
 
-def _require_env(name: str, cast=str):
-    """Fetch and cast an environment variable, failing fast with a clear message."""
-    raw_value = os.getenv(name)
-    if raw_value in (None, ""):
-        raise SystemExit(f"Missing required environment variable: {name}")
-    try:
-        return cast(raw_value)
-    except Exception:
-        raise SystemExit(f"Invalid value for {name}: expected {cast.__name__}")
+logger = logging.getLogger(__name__)
 
 
-def _validate_post_time():
-    value = os.getenv("POST_TIME_UTC", "00:01")
-    parts = value.split(":")
-    if len(parts) != 2:
-        raise SystemExit("POST_TIME_UTC must be in HH:MM format (e.g., 00:01)")
-    hour, minute = parts
-    if not (hour.isdigit() and minute.isdigit()):
-        raise SystemExit("POST_TIME_UTC must contain only digits (HH:MM)")
-    hour_i, minute_i = int(hour), int(minute)
-    if not (0 <= hour_i <= 23 and 0 <= minute_i <= 59):
-        raise SystemExit("POST_TIME_UTC must be a valid 24h time (00:00-23:59)")
+def validate_environment() -> Settings:
+    """Fail fast if required configuration is missing or malformed."""
+    try:
+        settings = Settings.from_env()
+    except ConfigError as exc:
+        raise SystemExit(str(exc))
 
+    if "--force-sync" in sys.argv and not settings.force_command_sync:
+        settings = dataclasses.replace(settings, force_command_sync=True)
 
-def validate_environment():
-    """Fail fast if required configuration is missing or malformed."""
-    global BOT_TOKEN, GUILD_ID
-
-    BOT_TOKEN = _require_env("BOT_TOKEN", str)
-    GUILD_ID = _require_env("GUILD_ID", int)
-
-    # Validate other required IDs early so cogs don't fail at import time
-    required_ints = [
-        "STAFF_ROLE_ID",
-        "BIRTHDAY_ROLE_ID",
-        "WISHES_CHANNEL_ID",
-        "BIRTHDAY_CHANNEL_ID",
-        "STAFF_ALERTS_CHANNEL_ID",
-    ]
-    for name in required_ints:
-        _require_env(name, int)
-
-    _validate_post_time()
-    
     # Initialize Sentry for error tracking (optional)
-    sentry_dsn = os.getenv("SENTRY_DSN")
-    if sentry_dsn:
+    if settings.sentry_dsn:
+        import sentry_sdk
+
         sentry_sdk.init(
-            dsn=sentry_dsn,
+            dsn=settings.sentry_dsn,
             traces_sample_rate=0.1,
             profiles_sample_rate=0.1,
-            environment=os.getenv("ENVIRONMENT", "production"),
+            environment=settings.environment,
             before_send=lambda event, hint: event  # Customize filtering if needed
         )
+    return settings
 
 
-def configure_logging():
-    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
-    level = getattr(logging, level_name, logging.INFO)
-    log_format = os.getenv("LOG_FORMAT", "plain").lower()
-
-    class JsonFormatter(logging.Formatter):
-        def format(self, record: logging.LogRecord) -> str:
-            payload = {
-                "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
-                "level": record.levelname,
-                "logger": record.name,
-                "msg": record.getMessage(),
-            }
-            if record.args and isinstance(record.args, dict):
-                payload.update(record.args)
-            # Include any "extra" fields stored on the record
-            for key, value in record.__dict__.items():
-                if key.startswith('_') or key in ("args", "msg", "levelname", "name", "pathname", "filename", "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName", "created", "msecs", "relativeCreated", "thread", "threadName", "processName", "process"):
-                    continue
-                if key not in payload:
-                    payload[key] = value
-            return json.dumps(payload, ensure_ascii=True)
-
-    if log_format == "json":
-        handler = logging.StreamHandler()
-        handler.setFormatter(JsonFormatter())
-        logging.basicConfig(level=level, handlers=[handler])
-    else:
-        logging.basicConfig(
-            level=level,
-            format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-        )
+def configure_logging(settings: Settings):
+    from utils.logging_setup import configure_logging as start_log_pipeline
+
+    return start_log_pipeline(
+        settings.log_level, settings.log_format, settings.log_sample_limit, settings.log_sample_window
+    )
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere; it is the peak, not current
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild: discord.abc.Snowflake) -> str:
+    """Stable hash of the payload ``tree.sync(guild=guild)`` would upload."""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    serialized = json.dumps({"guild": guild.id, "commands": payload}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
 
 class WishesBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, app_context: AppContext):
+        self.app_context = app_context
+        self.settings = app_context.settings
+
         # Define necessary intents
         intents = discord.Intents.default()
-        intents.members = True # Required for role management
-        intents.message_content = True
-        
-        super().__init__(command_prefix="!", intents=intents)
+        intents.members = True # Required for role management and member queries
+
+        if self.settings.low_memory_mode:
+            # Members are resolved on demand (utils.members) instead of cached for the whole guild
+            super().__init__(
+                command_prefix="!",
+                intents=intents,
+                chunk_guilds_at_startup=False,
+                member_cache_flags=discord.MemberCacheFlags.none(),
+            )
+        else:
+            super().__init__(command_prefix="!", intents=intents)
+        self.migration_task: asyncio.Task | None = None
+        self.data_health_task: asyncio.Task | None = None
+        self.leader_task: asyncio.Task | None = None
 
     async def setup_hook(self):
         # This is the recommended way to load cogs
@@ -127,33 +116,138 @@ class WishesBot(commands.Bot):
                 except Exception as e:
                     print(f"Failed to load cog {filename}: {e}")
         
-        # Sync slash commands with the specified guild
-        self.tree.copy_global_to(guild=discord.Object(id=GUILD_ID))
-        await self.tree.sync(guild=discord.Object(id=GUILD_ID))
+        # Sync slash commands with the specified guild, but only when they changed
+        guild = discord.Object(id=self.settings.guild_id)
+        self.tree.copy_global_to(guild=guild)
+        await self.sync_commands_if_changed(guild)
+
+        if self.app_context.leader is not None:
+            # Only the lease holder runs scheduled jobs (see utils/leader.py)
+            self.leader_task = asyncio.create_task(self.app_context.leader.run())
+
+        if self.settings.run_migrations and self.settings.storage_backend == "mongo":
+            # Backfills are batched and paced, so the bot keeps serving while they run.
+            # The SQLite schema is created complete when the file is opened.
+            self.migration_task = asyncio.create_task(self.run_migrations())
+
+        if self.settings.data_health_interval > 0:
+            from utils.data_health import DataHealthCollector
+
+            collector = DataHealthCollector(
+                self.app_context.db,
+                guild_provider=lambda: self.get_guild(self.settings.guild_id),
+                interval=self.settings.data_health_interval,
+                aggregation_ttl=self.settings.data_health_aggregation_ttl,
+            )
+            self.data_health_task = asyncio.create_task(collector.run())
+
+    async def run_migrations(self):
+        from utils.migrations import MigrationRunner
+
+        runner = MigrationRunner(
+            self.app_context.db,
+            batch_size=self.settings.migration_batch_size,
+            pause_seconds=self.settings.migration_pause_seconds,
+        )
+        try:
+            applied = await runner.run()
+        except Exception as exc:
+            logger.error("Schema migrations failed", extra={"event": "migrations_failed", "error": str(exc)})
+            return
+        if applied:
+            print(f"Applied schema migrations: {applied}")
+
+    async def sync_commands_if_changed(self, guild: discord.abc.Snowflake) -> bool:
+        """Sync the guild's command tree unless Discord already has this exact tree."""
+        db = self.app_context.db
+        meta_name = f"command_tree:{guild.id}"
+        tree_hash = command_tree_hash(self.tree, guild)
+        meta = None
+        try:
+            meta = await db.get_scheduler_meta(meta_name)
+        except Exception as exc:
+            logger.warning("Failed to load command tree hash", extra={"event": "command_hash_load_error", "error": str(exc)})
+
+        if meta and meta.get("hash") == tree_hash and not self.settings.force_command_sync:
+            saved = meta.get("sync_seconds")
+            logger.info(
+                "Slash commands unchanged; skipped sync (saved ~%ss)", saved,
+                extra={"event": "command_sync_skipped", "hash": tree_hash, "saved_seconds": saved},
+            )
+            print("Slash commands unchanged; sync skipped.")
+            return False
+
+        started = time.perf_counter()
+        await self.tree.sync(guild=guild)
+        sync_seconds = round(time.perf_counter() - started, 3)
+        try:
+            await db.update_scheduler_meta(meta_name, {"hash": tree_hash, "sync_seconds": sync_seconds})
+        except Exception as exc:
+            logger.warning("Failed to store command tree hash", extra={"event": "command_hash_store_error", "error": str(exc)})
+        logger.info(
+            "Slash commands synced in %ss", sync_seconds,
+            extra={"event": "command_sync_done", "hash": tree_hash, "sync_seconds": sync_seconds},
+        )
         print("Slash commands synced.")
+        return True
 
     async def on_ready(self):
         print(f'Logged in as {self.user} (ID: {self.user.id})')
         print('------')
         # Update uptime metric on ready
-        from utils.metrics import set_uptime
-        import time
+        from utils.metrics import set_uptime, set_startup_duration
         set_uptime(int(time.time()))
 
-async def main():
-    validate_environment()
-    configure_logging()
-    
-    # Start metrics server in background thread
-    metrics_port = int(os.getenv("METRICS_PORT", "8000"))
+        startup_seconds = round(time.perf_counter() - _PROCESS_START, 3)
+        rss_bytes = current_rss_bytes()
+        set_startup_duration(startup_seconds)
+        logger.info(
+            "Ready after %ss (RSS %s bytes)", startup_seconds, rss_bytes,
+            extra={"event": "startup_ready", "startup_seconds": startup_seconds, "rss_bytes": rss_bytes},
+        )
+        if self.settings.exit_after_ready:
+            # Used by benchmarks/startup.py to measure time to on_ready
+            print(f"STARTUP {json.dumps({'startup_seconds': startup_seconds, 'rss_bytes': rss_bytes})}")
+            await self.close()
+
+    async def close(self):
+        if self.migration_task is not None and not self.migration_task.done():
+            # Progress is saved per batch, so the next start resumes from here
+            self.migration_task.cancel()
+        if self.data_health_task is not None:
+            self.data_health_task.cancel()
+        if self.leader_task is not None:
+            self.leader_task.cancel()
+            await self.app_context.leader.release()
+        await super().close()
+        await self.app_context.close()
+
+def start_metrics_server(settings: Settings):
+    """Serve Prometheus metrics from a background thread."""
     import threading
     from utils.metrics_server import run_metrics_server
-    metrics_thread = threading.Thread(target=run_metrics_server, args=(metrics_port,), daemon=True)
+    from utils.profiling import register_bot_loop
+    register_bot_loop(asyncio.get_running_loop())
+    metrics_thread = threading.Thread(
+        target=run_metrics_server, args=(settings.metrics_port, settings.metrics_host, settings.debug_token), daemon=True
+    )
     metrics_thread.start()
-    
-    bot = WishesBot()
+
+async def main():
+    settings = validate_environment()
+    configure_logging(settings)
+    tracing.set_history_size(settings.trace_run_history)
+    start_metrics_server(settings)
+
+    if settings.run_mode == "worker":
+        # Same image and entry point for every role; see worker.py
+        from worker import run_worker
+        await run_worker(AppContext.from_settings(settings))
+        return
+
+    bot = WishesBot(AppContext.from_settings(settings))
     async with bot:
-        await bot.start(BOT_TOKEN)
+        await bot.start(settings.bot_token)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
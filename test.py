@@ -15,20 +15,23 @@ sys.path.insert(0, project_root)
 
 # --- Load Config and Bot Modules ---
 load_dotenv()
-from utils.db_manager import db_manager
+from config import Settings
+from utils.app_context import AppContext
 from cogs.wishes import Wishes
 
 # --- Configuration ---
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-GUILD_ID = int(os.getenv("GUILD_ID"))
-WISHES_CHANNEL_ID = int(os.getenv("WISHES_CHANNEL_ID"))
-BIRTHDAY_CHANNEL_ID = int(os.getenv("BIRTHDAY_CHANNEL_ID"))
-STAFF_ALERTS_CHANNEL_ID = int(os.getenv("STAFF_ALERTS_CHANNEL_ID"))
+settings = Settings.from_env()
+BOT_TOKEN = settings.bot_token
+GUILD_ID = settings.guild_id
+WISHES_CHANNEL_ID = settings.wishes_channel_id
+BIRTHDAY_CHANNEL_ID = settings.birthday_channel_id
+STAFF_ALERTS_CHANNEL_ID = settings.staff_alerts_channel_id
 MOCK_HOLIDAY = "Bot Markdown Test Day"
 
 class E2ETestRunner(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.app_context = AppContext.from_settings(settings)
         self.report = []
 
     # FIX: All logic is moved back into on_ready, which runs AFTER the bot's cache is ready.
@@ -66,7 +69,7 @@ class E2ETestRunner(commands.Bot):
         tester_bot_id = self.user.id
         tester_bot_mention = self.user.mention
 
-        await db_manager.set_birthday(tester_bot_id, today.day, today.month, 2020)
+        await self.app_context.db.set_birthday(tester_bot_id, today.day, today.month, 2020)
         
         def is_birthday_message(message):
             return message.channel.id == birthday_channel.id and tester_bot_mention in message.content
@@ -81,7 +84,7 @@ class E2ETestRunner(commands.Bot):
         except asyncio.TimeoutError:
             self.report.append("❌ **Birthday Test:** Bot FAILED to post the birthday message.")
         finally:
-            await db_manager.delete_birthday(tester_bot_id)
+            await self.app_context.db.delete_birthday(tester_bot_id)
 
     async def test_holiday_announcement(self, guild, wishes_channel):
         print("▶️ Running: Holiday Announcement Test")
@@ -92,7 +95,7 @@ class E2ETestRunner(commands.Bot):
 
         mock_api_response = [{'name': MOCK_HOLIDAY, 'date': {'iso': today.strftime('%Y-%m-%d')}}]
         
-        with patch('cogs.wishes.api_client.get_holidays', new_callable=AsyncMock, return_value=mock_api_response):
+        with patch.object(self.app_context.api, 'get_holidays', new_callable=AsyncMock, return_value=mock_api_response):
             try:
                 wishes_cog = Wishes(self)
                 _, message = await asyncio.gather(
@@ -0,0 +1,171 @@
+import sys
+import os
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_member(user_id, joined_at, bot=False):
+    return MagicMock(id=user_id, joined_at=joined_at, bot=bot)
+
+
+def joined(year, month, day, hour=12):
+    return datetime(year, month, day, hour, tzinfo=timezone.utc)
+
+
+def test_join_index_buckets_in_one_pass():
+    from utils.anniversaries import JoinIndex, anniversary_messages, due_anniversaries
+
+    members = [
+        make_member(1, joined(2020, 10, 18)),
+        make_member(2, joined(2024, 10, 18)),
+        make_member(3, joined(2026, 10, 18)),  # joined today: nothing to celebrate yet
+        make_member(4, joined(2021, 10, 19)),
+        make_member(5, joined(2022, 10, 18), bot=True),
+        make_member(6, None),
+        make_member(7, joined(2024, 10, 17, hour=20)),  # Oct 18 in IST
+    ]
+    index = JoinIndex.from_members(members)
+    assert len(index) == 5
+    assert due_anniversaries(index.on(date(2026, 10, 18)), date(2026, 10, 18)) == [(1, 6), (2, 2)]
+
+    import pytz
+
+    local = JoinIndex.from_members(members, pytz.timezone("Asia/Kolkata"))
+    assert [user_id for user_id, _ in due_anniversaries(local.on(date(2026, 10, 18)), date(2026, 10, 18))] == [1, 2, 7]
+
+    messages = anniversary_messages([(1, 6), (2, 2), (7, 1)], batch_size=2)
+    assert len(messages) == 2
+    assert "<@1> — 6 years with us" in messages[0] and "<@7> — 1 year with us" in messages[1]
+
+
+def test_feb_29_joiners_are_celebrated_on_feb_28_in_common_years():
+    from utils.anniversaries import JoinIndex, due_anniversaries
+
+    index = JoinIndex.from_members([make_member(1, joined(2024, 2, 29)), make_member(2, joined(2023, 2, 28))])
+    assert due_anniversaries(index.on(date(2027, 2, 28)), date(2027, 2, 28)) == [(2, 4), (1, 3)]
+    assert due_anniversaries(index.on(date(2028, 2, 28)), date(2028, 2, 28)) == [(2, 5)]
+    assert due_anniversaries(index.on(date(2028, 2, 29)), date(2028, 2, 29)) == [(1, 4)]
+
+
+def make_cog(db=None, **overrides):
+    from config import Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+
+    overrides.setdefault("join_anniversaries", True)
+    settings = Settings(
+        bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6, **overrides,
+    )
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db or MagicMock(), api=MagicMock())
+    channel = AsyncMock()
+    bot.get_channel.side_effect = lambda channel_id: channel if channel_id == 5 else None
+    return Wishes(bot), bot, channel
+
+
+@pytest.mark.asyncio
+async def test_anniversaries_from_the_member_cache_are_posted_in_batches():
+    cog, bot, channel = make_cog(anniversary_batch_size=2)
+    guild = MagicMock(chunked=True, members=[make_member(i, joined(2020 + i % 5, 10, 18)) for i in range(5)])
+    bot.get_guild.return_value = guild
+
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 5
+    assert channel.send.await_count == 3
+    guild.fetch_members.assert_not_called()
+
+    # The index is reused and patched by events rather than rebuilt from the cache
+    guild.members = []
+    await cog.on_member_remove(MagicMock(id=0, guild=MagicMock(id=1)))
+    await cog.on_member_join(MagicMock(id=9, joined_at=joined(2016, 10, 18), bot=False, guild=MagicMock(id=1)))
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 5
+    assert "<@9> — 10 years with us" in channel.send.await_args_list[3].args[0]
+
+
+@pytest.mark.asyncio
+async def test_anniversaries_disabled_by_default():
+    cog, bot, channel = make_cog(join_anniversaries=False)
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 0
+    bot.get_guild.assert_not_called()
+    channel.send.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_rebuilt_when_stale_and_kept_current_by_events():
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    cog, bot, channel = make_cog(db)
+    members = [make_member(1, joined(2020, 10, 18)), make_member(2, joined(2021, 3, 1)), make_member(3, joined(2019, 10, 18), bot=True)]
+
+    async def fetch_members(limit=None):
+        for member in members:
+            yield member
+
+    guild = MagicMock(id=1, chunked=False)
+    guild.fetch_members = MagicMock(side_effect=fetch_members)
+    bot.get_guild.return_value = guild
+
+    # The post only reads the snapshot; the off-peak job rebuilds it
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 0
+    guild.fetch_members.assert_not_called()
+    assert await cog.run_join_snapshot() == 2
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 1
+    assert guild.fetch_members.call_count == 1
+    assert (await db.get_scheduler_meta("join_snapshot"))["members"] == 2
+
+    await cog.on_member_join(MagicMock(id=4, joined_at=joined(2025, 10, 18), bot=False, guild=guild))
+    await cog.on_member_remove(MagicMock(id=1, guild=guild))
+    assert await cog.run_join_snapshot() is None  # fresh snapshot: no second rebuild
+    assert await cog._check_for_anniversaries(datetime(2026, 10, 18)) == 1
+    assert guild.fetch_members.call_count == 1
+    assert "<@4> — 1 year with us" in channel.send.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_rebuild_is_swapped_in_whole_and_keeps_joins_stored_meanwhile():
+    import asyncio
+    from unittest.mock import patch
+
+    from utils.anniversaries import snapshot_entry
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    cog, bot, channel = make_cog(db)
+    members = [make_member(1, joined(2020, 10, 18)), make_member(2, joined(2021, 10, 18))]
+    await db.replace_member_joins([snapshot_entry(9, joined(2019, 10, 18))])  # the previous snapshot
+
+    async def fetch_members(limit=None):
+        for member in members:
+            yield member
+
+    guild = MagicMock(id=1, chunked=False)
+    guild.fetch_members = MagicMock(side_effect=fetch_members)
+    bot.get_guild.return_value = guild
+
+    staging = db.member_joins_rebuild
+    insert_many = staging.insert_many
+    seen_during_build = []
+
+    async def insert_then_join(*args, **kwargs):
+        result = await insert_many(*args, **kwargs)
+        # A daily run reading mid-build sees the old snapshot, and on_member_join lands meanwhile
+        seen_during_build.extend(doc["_id"] for doc in await db.get_member_joins_in_doy_ranges([(1, 366)]))
+        await asyncio.sleep(0.002)  # stored after the build started
+        await db.set_member_join(snapshot_entry(3, joined(2022, 10, 18)))
+        return result
+
+    staging.insert_many = insert_then_join
+    with patch.object(DatabaseManager, "member_joins_rebuild", property(lambda self: staging)):
+        assert await cog.run_join_snapshot() == 2
+    assert seen_during_build == [9]
+    assert sorted(doc["_id"] for doc in await db.member_joins.find({}).to_list(length=None)) == [1, 2, 3]
+    assert "doy_1__id_1" in await db.member_joins.index_information()
+    assert "join_snapshot" in [job.name for job in cog.scheduled_jobs()]
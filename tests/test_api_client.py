@@ -22,7 +22,7 @@ async def test_get_holidays_retry_on_failure(mock_env):
     """Test that get_holidays retries on failure."""
     from utils.api_client import ApiClient
     
-    client = ApiClient()
+    client = ApiClient(gemini_api_key="test_key", calendarific_api_key="test_key", calendarific_country="US")
     
     with patch.object(client, "_get_session") as mock_session:
         mock_resp = AsyncMock()
@@ -43,7 +43,7 @@ async def test_get_holidays_success(mock_env):
     """Test successful holiday fetch."""
     from utils.api_client import ApiClient
     
-    client = ApiClient()
+    client = ApiClient(gemini_api_key="test_key", calendarific_api_key="test_key", calendarific_country="US")
     
     with patch.object(client, "_get_session") as mock_session:
         mock_resp = AsyncMock()
@@ -64,7 +64,7 @@ async def test_get_holidays_success(mock_env):
     """Test fallback message when Gemini fails."""
     from utils.api_client import ApiClient
     
-    client = ApiClient()
+    client = ApiClient(gemini_api_key="test_key", calendarific_api_key="test_key", calendarific_country="US")
     
     # Mock the model to raise exception
     if client.gemini_model:
@@ -74,3 +74,134 @@ async def test_get_holidays_success(mock_env):
             # Should return fallback
             assert result is not None
             assert "Test Holiday" in result
+
+
+def test_sdk_clients_are_created_lazily(mock_env):
+    """Importing the clients must not import Gemini or Motor, or touch the network."""
+    import subprocess
+
+    code = (
+        "import sys; import utils.api_client, utils.db_manager; "
+        "print('google.generativeai' in sys.modules, 'motor' in sys.modules)"
+    )
+    env = dict(os.environ, MONGO_URI="")
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False False"
+
+
+@pytest.mark.asyncio
+async def test_gemini_metrics_record_retries_tokens_and_fallbacks():
+    """Attempts, retries, token usage and fallbacks all reach Prometheus."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from prometheus_client import REGISTRY
+
+    from utils.api_client import ApiClient
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    client = ApiClient()
+    client._backoff_base = 0
+    response = SimpleNamespace(
+        text=" Happy Birthday! ",
+        parts=["part"],
+        usage_metadata=SimpleNamespace(prompt_token_count=40, candidates_token_count=60),
+    )
+    client._gemini_model = MagicMock()
+    client._gemini_model.generate_content_async = AsyncMock(side_effect=[Exception("quota"), response])
+
+    retries = sample("mangalify_api_retries_total", service="gemini")
+    successes = sample("mangalify_api_calls_total", service="gemini", status="success")
+    completion = sample("mangalify_gemini_tokens_total", purpose="birthday_wish", kind="completion")
+    failed_attempts = sample("mangalify_api_attempt_duration_seconds_count", service="gemini", status="error")
+
+    assert await client.generate_birthday_wish_text("Ana", "<@1>") == "Happy Birthday!"
+    assert sample("mangalify_api_retries_total", service="gemini") == retries + 1
+    assert sample("mangalify_api_calls_total", service="gemini", status="success") == successes + 1
+    assert sample("mangalify_gemini_tokens_total", purpose="birthday_wish", kind="completion") == completion + 60
+    assert sample("mangalify_api_attempt_duration_seconds_count", service="gemini", status="error") == failed_attempts + 1
+
+    fallbacks = sample("mangalify_wish_fallbacks_total", purpose="birthday_wish")
+    client._gemini_model.generate_content_async = AsyncMock(side_effect=Exception("down"))
+    assert "Ana" in await client.generate_birthday_wish_text("Ana", "<@1>")
+    assert sample("mangalify_wish_fallbacks_total", purpose="birthday_wish") == fallbacks + 1
+
+
+@pytest.mark.asyncio
+async def test_multi_country_holidays_fetch_concurrently_and_merge():
+    """Countries are fetched in parallel, merged by normalized name/date, and one failure is tolerated."""
+    import asyncio
+    import time
+
+    from utils.api_client import ApiClient
+
+    client = ApiClient(calendarific_api_key="k", calendarific_countries=["US", "GB", "FR"])
+    client._backoff_base = 0
+    replies = {
+        "US": [{"name": "New Year's Day", "date": {"iso": "2026-01-01"}}],
+        "GB": [{"name": "New Years Day", "date": {"iso": "2026-01-01"}},
+               {"name": "Burns Night", "date": {"iso": "2026-01-25"}}],
+    }
+
+    async def fetch(country, year, month):
+        await asyncio.sleep(0.2)
+        if country not in replies:
+            return None  # FR failed
+        return replies[country]
+
+    with patch.object(client, "_get_country_holidays", side_effect=fetch):
+        started = time.perf_counter()
+        holidays = await client.get_holidays(2026, 1)
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5  # close to one fetch, not three
+    assert [(h["name"], h["countries"]) for h in holidays] == [
+        ("New Year's Day", ["US", "GB"]),
+        ("Burns Night", ["GB"]),
+    ]
+
+
+def test_holiday_name_normalization():
+    from utils.api_client import normalize_holiday_name
+
+    assert normalize_holiday_name("Fête  Nationale!") == normalize_holiday_name("fete nationale")
+
+
+@pytest.mark.asyncio
+async def test_deadlines_and_budget_switch_to_fallbacks():
+    """A hung call is cut off per attempt, and an exhausted budget skips the call entirely."""
+    import asyncio
+    import time
+    from unittest.mock import MagicMock
+
+    from utils.api_client import ApiClient
+    from utils.budget import Budget
+
+    client = ApiClient(gemini_timeout=0.05)
+    client._backoff_base = 0.01
+
+    async def hang(prompt):
+        await asyncio.sleep(10)
+
+    client._gemini_model = MagicMock()
+    client._gemini_model.generate_content_async = AsyncMock(side_effect=hang)
+
+    run_budget = Budget(5)
+    with run_budget.activate():
+        started = time.perf_counter()
+        text = await client.generate_birthday_wish_text("Ana", "<@1>")
+    assert time.perf_counter() - started < 1
+    assert "Ana" in text
+    assert client._gemini_model.generate_content_async.await_count == 3
+    assert run_budget.degraded == ["birthday wish: Ana"]
+
+    client._gemini_model.generate_content_async.reset_mock()
+    spent = Budget(0.01)
+    await asyncio.sleep(0.02)
+    with spent.activate():
+        text = await client.generate_wish_text("Diwali")
+    assert "Diwali" in text
+    client._gemini_model.generate_content_async.assert_not_awaited()
+    assert spent.degraded == ["holiday wish: Diwali"]
@@ -0,0 +1,92 @@
+import sys
+import os
+from datetime import date
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def test_doy_is_fixed_across_years():
+    """Feb 29 has its own doy and Mar 1 never moves."""
+    from utils.dates import day_of_year, date_from_doy
+
+    assert day_of_year(1, 1) == 1
+    assert day_of_year(29, 2) == 60
+    assert day_of_year(1, 3) == 61
+    assert day_of_year(31, 12) == 366
+    assert date_from_doy(60) == (29, 2)
+
+
+def test_doy_ranges_wrap_year_end_and_cover_feb_29():
+    from utils.dates import doy_ranges
+
+    assert doy_ranges(date(2026, 1, 6), 7) == [(6, 12)]
+    assert doy_ranges(date(2026, 12, 29), 7) == [(364, 366), (1, 4)]
+    # Non-leap year: a window ending Feb 28 includes Feb 29 birthdays
+    assert doy_ranges(date(2026, 2, 22), 7) == [(53, 60)]
+    assert doy_ranges(date(2028, 2, 22), 7) == [(53, 59)]
+    assert doy_ranges(date(2026, 5, 1), 400) == [(1, 366)]
+
+
+def test_next_occurrence_moves_feb_29_in_common_years():
+    from utils.dates import next_occurrence
+
+    assert next_occurrence(29, 2, date(2026, 1, 1)) == date(2026, 2, 28)
+    assert next_occurrence(29, 2, date(2027, 12, 1)) == date(2028, 2, 29)
+    assert next_occurrence(1, 1, date(2026, 12, 30)) == date(2027, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_upcoming_query_wraps_in_calendar_order():
+    """set_birthday stores doy and range queries return Dec before Jan across the boundary."""
+    from utils.db_manager import DatabaseManager
+    from utils.dates import doy_ranges
+    from utils.migrations import MigrationRunner
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 2, 1, 1990)
+    await db.set_birthday(2, 30, 12, 1991)
+    await db.set_birthday(3, 15, 6, 1992)
+    await db.birthdays.insert_one({"_id": 4, "day": 31, "month": 12, "year": 1993})  # pre-doy document
+
+    assert (await db.get_birthday(1))["doy"] == 2
+    assert await MigrationRunner(db, pause_seconds=0).run() == [1, 2, 3, 4, 5]  # backfills the pre-doy document
+
+    found = await db.get_birthdays_in_doy_ranges(doy_ranges(date(2026, 12, 29), 7), limit=10)
+    assert [doc["_id"] for doc in found] == [2, 4, 1]
+
+    limited = await db.get_birthdays_in_doy_ranges(doy_ranges(date(2026, 12, 29), 7), limit=2)
+    assert [doc["_id"] for doc in limited] == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_birthdays_on_accepts_feb_29():
+    from unittest.mock import AsyncMock, MagicMock
+
+    from config import Settings
+    from cogs.birthdays import Birthdays
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 29, 2, 2000)
+    settings = Settings(
+        bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6,
+    )
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db, api=MagicMock())
+    cog = Birthdays(bot)
+
+    interaction = MagicMock()
+    interaction.response.send_message = AsyncMock()
+    await cog.birthdays_on.callback(cog, interaction, "29-02")
+    assert interaction.response.send_message.await_args.args[0].startswith("🎂 Birthdays on 29/02")
+    assert "<@1>" in interaction.response.send_message.await_args.args[0]
+
+    await cog.birthdays_on.callback(cog, interaction, "30-02")
+    assert interaction.response.send_message.await_args.args[0] == "Invalid date format. Use DD-MM."
@@ -0,0 +1,75 @@
+import importlib
+import os
+import sys
+import dataclasses
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import discord
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setenv("LOAD_DOTENV", "false")
+    if "main" in sys.modules:
+        del sys.modules["main"]
+    main = importlib.import_module("main")
+    from config import Settings
+    from utils.app_context import AppContext
+
+    settings = Settings(
+        bot_token="t", guild_id=42, staff_role_id=1, birthday_role_id=2,
+        wishes_channel_id=3, birthday_channel_id=4, staff_alerts_channel_id=5,
+    )
+    bot = main.WishesBot(AppContext(settings=settings, db=MagicMock(), api=MagicMock()))
+
+    @bot.tree.command(name="ping", description="Ping")
+    async def ping(interaction: discord.Interaction):
+        pass
+
+    return bot
+
+
+@pytest.mark.asyncio
+async def test_sync_skipped_when_hash_matches(bot):
+    """An unchanged tree is not re-uploaded; a changed or forced one is."""
+    import main
+
+    guild = discord.Object(id=42)
+    bot.tree.copy_global_to(guild=guild)
+    stored = {}
+
+    async def get_meta(name):
+        return stored.get(name)
+
+    async def update_meta(name, fields):
+        stored[name] = dict(fields)
+
+    mock_db = bot.app_context.db
+    mock_db.get_scheduler_meta = AsyncMock(side_effect=get_meta)
+    mock_db.update_scheduler_meta = AsyncMock(side_effect=update_meta)
+
+    with patch.object(bot.tree, "sync", new_callable=AsyncMock) as mock_sync:
+
+        assert await bot.sync_commands_if_changed(guild) is True
+        assert stored["command_tree:42"]["hash"] == main.command_tree_hash(bot.tree, guild)
+
+        assert await bot.sync_commands_if_changed(guild) is False
+        assert mock_sync.await_count == 1
+
+        normal_settings = bot.settings
+        bot.settings = dataclasses.replace(normal_settings, force_command_sync=True)
+        assert await bot.sync_commands_if_changed(guild) is True
+        bot.settings = normal_settings
+        assert mock_sync.await_count == 2
+
+        @bot.tree.command(name="pong", description="Pong", guild=guild)
+        async def pong(interaction: discord.Interaction):
+            pass
+
+        assert await bot.sync_commands_if_changed(guild) is True
+        assert mock_sync.await_count == 3
@@ -0,0 +1,61 @@
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def sample(name, **labels):
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value(name, labels)
+
+
+@pytest.mark.asyncio
+async def test_collector_sets_gauges_and_caches_aggregation():
+    from utils.data_health import DataHealthCollector
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 6, 1, 2000)
+    await db.set_birthday(2, 7, 1, 2000)
+    await db.set_birthday(3, 1, 5, 2000)
+    await db.add_user_to_role_log(1, "2026-01-06")
+
+    guild = SimpleNamespace(member_count=1234)
+    collector = DataHealthCollector(db, guild_provider=lambda: guild, aggregation_ttl=3600)
+    db.count_birthdays_by_month = AsyncMock(wraps=db.count_birthdays_by_month)
+
+    await collector.collect()
+    assert sample("mangalify_registered_birthdays_total") == 3
+    assert sample("mangalify_birthday_role_log_entries") == 1
+    assert sample("mangalify_active_discord_members") == 1234
+    assert sample("mangalify_birthdays_by_month", month="1") == 2
+    assert sample("mangalify_birthdays_by_month", month="5") == 1
+    assert sample("mangalify_birthdays_by_month", month="12") == 0
+
+    await db.set_birthday(4, 1, 12, 2000)
+    await collector.collect()
+    assert sample("mangalify_registered_birthdays_total") == 4
+    # The month distribution is served from cache within the TTL
+    assert db.count_birthdays_by_month.await_count == 1
+    assert sample("mangalify_birthdays_by_month", month="12") == 0
+
+
+@pytest.mark.asyncio
+async def test_collector_survives_a_failing_source():
+    from utils.data_health import DataHealthCollector
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    db.estimated_birthday_count = AsyncMock(side_effect=RuntimeError("primary stepped down"))
+    guild = SimpleNamespace(member_count=42)
+
+    await DataHealthCollector(db, guild_provider=lambda: guild).collect()
+    assert sample("mangalify_active_discord_members") == 42
@@ -0,0 +1,90 @@
+import sys
+import os
+from types import SimpleNamespace
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def sample(name, **labels):
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_database_methods_record_operation_and_collection():
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    labels = {"operation": "set_birthday", "collection": "birthdays"}
+    before = sample("mangalify_database_operations_total", status="success", **labels)
+    before_count = sample("mangalify_database_operation_duration_seconds_count", **labels)
+
+    await db.set_birthday(1, 6, 1, 2000)
+
+    assert sample("mangalify_database_operations_total", status="success", **labels) == before + 1
+    assert sample("mangalify_database_operation_duration_seconds_count", **labels) == before_count + 1
+
+    errors = sample("mangalify_database_operations_total", operation="set_birthday", collection="birthdays", status="error")
+    with pytest.raises(ValueError):
+        await db.set_birthday(2, 30, 2, 2000)  # no such date
+    assert sample(
+        "mangalify_database_operations_total", operation="set_birthday", collection="birthdays", status="error"
+    ) == errors + 1
+
+
+@pytest.mark.asyncio
+async def test_cursor_methods_are_recorded_when_iterated():
+    from unittest.mock import patch
+
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 6, 1, 2000)
+    await db.set_birthday(2, 6, 1, 2001)
+    labels = {"operation": "get_birthdays_for_date", "collection": "birthdays"}
+    before = sample("mangalify_database_operations_total", status="success", **labels)
+
+    cursor = db.get_birthdays_for_date(6, 1)
+    assert sample("mangalify_database_operations_total", status="success", **labels) == before  # nothing fetched yet
+    assert sorted([doc["_id"] async for doc in cursor]) == [1, 2]
+    assert sample("mangalify_database_operations_total", status="success", **labels) == before + 1
+    assert len(await (await db.get_all_birthdays()).to_list(length=None)) == 2
+
+    class Broken:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            raise RuntimeError("connection reset")
+
+    errors = sample("mangalify_database_operations_total", status="error", **labels)
+    with patch.object(type(db.birthdays), "find", return_value=Broken()):
+        with pytest.raises(RuntimeError):
+            [doc async for doc in db.get_birthdays_for_date(6, 1)]
+    assert sample("mangalify_database_operations_total", status="error", **labels) == errors + 1
+
+
+def test_pool_listener_tracks_open_and_checked_out_connections():
+    from utils.db_monitoring import PoolMetricsListener
+
+    listener = PoolMetricsListener()
+    waits = sample("mangalify_mongo_pool_checkout_wait_seconds_count", status="success")
+    event = SimpleNamespace(duration=0.002)
+
+    listener.connection_created(event)
+    listener.connection_created(event)
+    listener.connection_checked_out(event)
+    assert sample("mangalify_mongo_pool_connections") == 2
+    assert sample("mangalify_mongo_pool_connections_in_use") == 1
+    assert sample("mangalify_mongo_pool_checkout_wait_seconds_count", status="success") == waits + 1
+
+    listener.connection_checked_in(event)
+    listener.connection_closed(event)
+    assert sample("mangalify_mongo_pool_connections") == 1
+    assert sample("mangalify_mongo_pool_connections_in_use") == 0
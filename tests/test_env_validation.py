@@ -29,9 +29,10 @@ def test_validate_environment_success(monkeypatch):
 
     main = reload_main()
     # Should not raise
-    main.validate_environment()
-    assert main.BOT_TOKEN == "token"
-    assert main.GUILD_ID == 1
+    settings = main.validate_environment()
+    assert settings.bot_token == "token"
+    assert settings.guild_id == 1
+    assert (settings.post_time.hour, settings.post_time.minute) == (5, 30)
 
 
 def test_validate_environment_missing(monkeypatch):
@@ -69,3 +70,56 @@ def test_validate_environment_invalid_time(monkeypatch):
     main = reload_main()
     with pytest.raises(SystemExit):
         main.validate_environment()
+
+
+def test_settings_from_mapping_is_independent_of_os_environ(monkeypatch):
+    """Settings can be built from any mapping, so several bots can share a process."""
+    from config import ConfigError, Settings
+
+    monkeypatch.delenv("BOT_TOKEN", raising=False)
+    base = {
+        "BOT_TOKEN": "a",
+        "GUILD_ID": "1",
+        "STAFF_ROLE_ID": "2",
+        "BIRTHDAY_ROLE_ID": "3",
+        "WISHES_CHANNEL_ID": "4",
+        "BIRTHDAY_CHANNEL_ID": "5",
+        "STAFF_ALERTS_CHANNEL_ID": "6",
+    }
+    first = Settings.from_env(base)
+    second = Settings.from_env({**base, "BOT_TOKEN": "b", "GUILD_ID": "9", "SERVER_TIMEZONE": "Asia/Kolkata"})
+    assert (first.bot_token, first.guild_id) == ("a", 1)
+    assert (second.bot_token, second.guild_id) == ("b", 9)
+    assert second.server_timezone.zone == "Asia/Kolkata"
+
+    with pytest.raises(ConfigError):
+        Settings.from_env({**base, "SERVER_TIMEZONE": "Mars/Olympus"})
+
+
+def test_mongo_client_options_only_include_configured_values():
+    from config import Settings
+
+    base = {
+        "BOT_TOKEN": "a",
+        "GUILD_ID": "1",
+        "STAFF_ROLE_ID": "2",
+        "BIRTHDAY_ROLE_ID": "3",
+        "WISHES_CHANNEL_ID": "4",
+        "BIRTHDAY_CHANNEL_ID": "5",
+        "STAFF_ALERTS_CHANNEL_ID": "6",
+    }
+    assert Settings.from_env(base).mongo_client_options == {}
+
+    tuned = Settings.from_env({
+        **base,
+        "MONGO_MAX_POOL_SIZE": "20",
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS": "3000",
+        "MONGO_READ_CONCERN": "majority",
+        "MONGO_WRITE_CONCERN": "1",
+    })
+    assert tuned.mongo_client_options == {
+        "maxPoolSize": 20,
+        "serverSelectionTimeoutMS": 3000,
+        "readConcernLevel": "majority",
+        "w": 1,
+    }
@@ -0,0 +1,123 @@
+import sys
+import os
+from unittest.mock import AsyncMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+ICS = "\r\n".join([
+    "BEGIN:VCALENDAR",
+    "BEGIN:VEVENT",
+    "SUMMARY:Thanksgiving",
+    "DTSTART;VALUE=DATE:20201126",
+    "RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=4TH",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "SUMMARY:Leap Day Party\\, again",
+    "DTSTART;VALUE=DATE:20200229",
+    "RRULE:FREQ=YEARLY",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "SUMMARY:Launch ",
+    " party",
+    "DTSTART:20261103T180000Z",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "SUMMARY:Weekly standup",
+    "DTSTART;VALUE=DATE:20260105",
+    "RRULE:FREQ=WEEKLY",
+    "END:VEVENT",
+    "END:VCALENDAR",
+])
+
+
+@pytest.mark.asyncio
+async def test_local_provider_expands_recurring_rules(tmp_path):
+    from utils.holidays import LocalCalendarProvider
+
+    (tmp_path / "us.ics").write_text(ICS)
+    (tmp_path / "extra.json").write_text(
+        '[{"name": "Last Friday", "date": "2026-01-30", "rrule": "FREQ=YEARLY;BYMONTH=1;BYDAY=-1FR"},'
+        ' {"name": "Broken"}]'
+    )
+    provider = LocalCalendarProvider([str(tmp_path)])
+
+    november = await provider.get_holidays(2026, 11)
+    assert [(h["name"], h["date"]["iso"]) for h in november] == [
+        ("Launch party", "2026-11-03"),
+        ("Thanksgiving", "2026-11-26"),
+    ]
+    assert [h["date"]["iso"] for h in await provider.get_holidays(2027, 11)] == ["2027-11-25"]
+    assert await provider.get_holidays(2026, 2) == []  # no Feb 29 in 2026
+    assert [h["name"] for h in await provider.get_holidays(2028, 2)] == ["Leap Day Party, again"]
+    assert [h["date"]["iso"] for h in await provider.get_holidays(2026, 1)] == ["2026-01-30"]
+
+
+def test_bundled_calendar_loads():
+    from utils.holidays import LocalCalendarProvider
+
+    provider = LocalCalendarProvider([os.path.join(PROJECT_ROOT, "calendars", "international.json")])
+    assert len(provider.events) >= 10
+
+
+@pytest.mark.asyncio
+async def test_chain_merges_local_with_network_then_cache(tmp_path):
+    from utils.api_client import ApiClient
+    from utils.db_manager import DatabaseManager
+    from utils.holidays import build_provider
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    api = ApiClient(calendarific_api_key="k", calendarific_countries=["US"])
+    api.fetch_calendarific_holidays = AsyncMock(return_value=[{"name": "MLK Day", "date": {"iso": "2026-01-19"}}])
+
+    # Network answer is returned and cached
+    api.holiday_provider = build_provider(api, db)
+    assert [h["source"] for h in await api.get_holidays(2026, 1)] == ["calendarific"]
+
+    # Calendarific down: the cached month is served
+    api.fetch_calendarific_holidays = AsyncMock(return_value=None)
+    assert [h["name"] for h in await api.get_holidays(2026, 1)] == ["MLK Day"]
+    assert await api.get_holidays(2026, 2) is None
+
+    # Local events are merged with the network answer (here the cache), duplicates listed once
+    (tmp_path / "local.json").write_text(
+        '[{"name": "Team Day", "date": "2026-01-09"}, {"name": "MLK day", "date": "2026-01-19"}]'
+    )
+    api.holiday_provider = build_provider(api, db, [str(tmp_path / "local.json")])
+    api.fetch_calendarific_holidays.reset_mock()
+    assert [(h["name"], h["source"]) for h in await api.get_holidays(2026, 1)] == [
+        ("Team Day", "local"), ("MLK day", "local"),
+    ]
+    api.fetch_calendarific_holidays.assert_awaited_once_with(2026, 1)
+    # A month with no local events still gets Calendarific's
+    api.fetch_calendarific_holidays = AsyncMock(return_value=[{"name": "Presidents' Day", "date": {"iso": "2026-02-16"}}])
+    assert [h["name"] for h in await api.get_holidays(2026, 2)] == ["Presidents' Day"]
+
+
+@pytest.mark.asyncio
+async def test_fresh_cached_month_skips_the_network(tmp_path):
+    from datetime import datetime, timedelta, timezone
+
+    from utils.api_client import ApiClient
+    from utils.db_manager import DatabaseManager
+    from utils.holidays import build_provider
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    api = ApiClient(calendarific_api_key="k", calendarific_countries=["US", "IN"])
+    api.fetch_calendarific_holidays = AsyncMock(return_value=[{"name": "MLK Day", "date": {"iso": "2026-01-19"}}])
+    (tmp_path / "local.json").write_text('[{"name": "Team Day", "date": "2026-01-09"}]')
+    api.holiday_provider = build_provider(api, db, [str(tmp_path / "local.json")], cache_max_age=timedelta(days=7))
+
+    # The first check fetches; later checks of the month are served from the cache, still with local events
+    for _ in range(3):
+        assert [h["name"] for h in await api.get_holidays(2026, 1)] == ["Team Day", "MLK Day"]
+    api.fetch_calendarific_holidays.assert_awaited_once_with(2026, 1)
+
+    # Once the cached month is too old, Calendarific is asked again
+    await db.holiday_cache.update_one({"_id": "2026-01"}, {"$set": {"fetched_at": datetime.now(timezone.utc) - timedelta(days=8)}})
+    await api.get_holidays(2026, 1)
+    assert api.fetch_calendarific_holidays.await_count == 2
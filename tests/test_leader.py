@@ -0,0 +1,78 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.mark.asyncio
+async def test_only_one_replica_leads_and_standby_takes_over():
+    from utils.db_manager import DatabaseManager
+    from utils.leader import LeaderElector
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    first = LeaderElector(db, owner="a", lease_seconds=30, renew_interval=10)
+    second = LeaderElector(db, owner="b", lease_seconds=30, renew_interval=10)
+
+    assert await first.renew() is True
+    assert await second.renew() is False
+    assert second.leader == "a"
+    assert await first.renew() is True  # renewal keeps the lease
+
+    # "a" dies: once its lease expires, "b" takes over
+    await db.scheduler_meta.update_one(
+        {"_id": "leader"}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+    )
+    assert await second.renew() is True
+    assert await first.renew() is False
+    assert first.leader == "b"
+
+    # Clean shutdown hands the lease over immediately
+    await second.release()
+    assert await first.renew() is True
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_renewal_fails_past_expiry():
+    from unittest.mock import AsyncMock
+
+    from utils.db_manager import DatabaseManager
+    from utils.leader import LeaderElector
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    elector = LeaderElector(db, owner="a", lease_seconds=30, renew_interval=10)
+    assert await elector.renew() is True
+
+    db.acquire_lease = AsyncMock(side_effect=RuntimeError("no primary"))
+    assert await elector.renew() is True  # lease still valid locally
+    elector._expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    assert await elector.renew() is False
+
+
+@pytest.mark.asyncio
+async def test_standby_skips_daily_task():
+    from unittest.mock import AsyncMock, MagicMock
+
+    from config import Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+
+    settings = Settings(
+        bot_token="t", guild_id=123, staff_role_id=456, birthday_role_id=789,
+        wishes_channel_id=111, birthday_channel_id=222, staff_alerts_channel_id=333,
+    )
+    bot = MagicMock()
+    leader = MagicMock(is_leader=False, leader="other")
+    bot.app_context = AppContext(settings=settings, db=MagicMock(), api=MagicMock(), leader=leader)
+    cog = Wishes(bot)
+    cog.run_daily = AsyncMock()
+
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    await cog.scheduler.load(now)
+    assert await cog.scheduler.run_due(now + timedelta(days=1)) == []
+    cog.run_daily.assert_not_awaited()
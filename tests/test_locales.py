@@ -0,0 +1,77 @@
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BASE_ENV = {
+    "BOT_TOKEN": "a", "GUILD_ID": "1", "STAFF_ROLE_ID": "2", "BIRTHDAY_ROLE_ID": "3",
+    "WISHES_CHANNEL_ID": "4", "BIRTHDAY_CHANNEL_ID": "5", "STAFF_ALERTS_CHANNEL_ID": "6",
+}
+
+
+def test_locale_codes_and_fallbacks():
+    from utils.locales import birthday_fallback, holiday_fallback, language_instruction, normalize_locale, wish_cache_key
+
+    assert [normalize_locale(code) for code in ("es", "es-ES", "pt_BR", " FR ", "xx", "", None)] == [
+        "es", "es", "pt", "fr", None, None, None,
+    ]
+    assert language_instruction("en") == ""
+    assert "Spanish" in language_instruction("es")
+    assert holiday_fallback("Diwali", "es").startswith("¡Feliz Diwali!")
+    assert holiday_fallback("Diwali", "xx") == holiday_fallback("Diwali", "en")
+    assert "<@1>" in birthday_fallback("{mention}", "<@1>", "de")
+    assert wish_cache_key("  Diwali/Deepavali ", "hi", 2026) == wish_cache_key("diwali/deepavali", "hi", 2026)
+
+
+def test_locale_settings_are_validated():
+    from config import ConfigError, Settings
+
+    settings = Settings.from_env({**BASE_ENV, "DEFAULT_LOCALE": "es-ES", "HOLIDAY_LOCALES": "en,hi"})
+    assert (settings.default_locale, settings.holiday_wish_locales) == ("es", ("en", "hi"))
+    assert Settings.from_env(BASE_ENV).holiday_wish_locales == ("en",)
+    with pytest.raises(ConfigError):
+        Settings.from_env({**BASE_ENV, "HOLIDAY_LOCALES": "en,klingon"})
+
+
+def make_cog(db, api, **overrides):
+    from config import Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+
+    settings = Settings(
+        bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6, **overrides,
+    )
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db, api=api)
+    return Wishes(bot)
+
+
+@pytest.mark.asyncio
+async def test_holiday_wishes_are_generated_once_per_locale():
+    from utils.db_manager import DatabaseManager
+    from utils.locales import holiday_fallback
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    api = MagicMock()
+    api.generate_wish_text = AsyncMock(side_effect=lambda name, locale: f"{locale}: {name}")
+    cog = make_cog(db, api, holiday_locales=("en", "es"))
+
+    # The prepare job and the daily post share one generation per holiday and language
+    for _ in range(2):
+        assert await cog._holiday_wish("Diwali", "en", 2026) == "en: Diwali"
+        assert await cog._holiday_wish("Diwali", "es", 2026) == "es: Diwali"
+    assert [call.args for call in api.generate_wish_text.await_args_list] == [("Diwali", "en"), ("Diwali", "es")]
+    await cog._holiday_wish("Diwali", "es", 2027)  # a new year asks again
+    assert api.generate_wish_text.await_count == 3
+
+    # A fallback is used but not cached, so the next run retries Gemini
+    api.generate_wish_text = AsyncMock(return_value=holiday_fallback("Holi", "hi"))
+    assert await cog._holiday_wish("Holi", "hi", 2026) == holiday_fallback("Holi", "hi")
+    assert await db.get_cached_wish("2026:hi:holi") is None
@@ -0,0 +1,56 @@
+import io
+import json
+import logging
+import sys
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def test_json_pipeline_writes_extras_from_listener_thread():
+    from utils.logging_setup import configure_logging
+
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+    listener = configure_logging("INFO", "json", stream=stream)
+    try:
+        logging.getLogger("test.pipeline").info("Posted %s wishes", 3, extra={"event": "posted", "count": 3})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test.pipeline").exception("Failed", extra={"event": "failed"})
+    finally:
+        listener.stop()
+        listener.stop()  # again at exit: a no-op
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first["msg"] == "Posted 3 wishes"
+    assert (first["event"], first["count"], first["logger"]) == ("posted", 3, "test.pipeline")
+    assert not {"levelno", "pathname", "threadName", "taskName", "args"} & set(first)
+    assert "ValueError: boom" in second["exc"]
+
+
+def test_sampling_filter_caps_repeated_warnings_per_event():
+    from utils.logging_setup import SamplingFilter
+
+    sampler = SamplingFilter(limit=2, window=0.05)
+
+    def record(event, level=logging.WARNING):
+        return logging.makeLogRecord({"msg": "send failed", "levelno": level, "event": event})
+
+    assert [sampler.filter(record("send_failed")) for _ in range(5)] == [True, True, False, False, False]
+    assert sampler.filter(record("other_event"))
+    assert sampler.filter(record("send_failed", logging.ERROR))
+    # Lifecycle INFO records are never sampled
+    assert all(sampler.filter(record("daily_task_start", logging.INFO)) for _ in range(5))
+
+    import time
+    time.sleep(0.06)
+    resumed = record("send_failed")
+    assert sampler.filter(resumed)
+    assert resumed.suppressed == 3
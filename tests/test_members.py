@@ -0,0 +1,92 @@
+import sys
+import os
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_guild(present_ids):
+    """An unchunked guild whose gateway query returns members in ``present_ids``."""
+    guild = MagicMock()
+    guild.chunked = False
+    guild.get_member.return_value = None
+
+    async def query_members(user_ids, limit, cache):
+        return [MagicMock(id=user_id) for user_id in user_ids if user_id in present_ids]
+
+    guild.query_members = AsyncMock(side_effect=query_members)
+    return guild
+
+
+@pytest.mark.asyncio
+async def test_resolver_batches_queries_and_caches_for_the_day():
+    """Lookups go out in batches of 100 and are reused until the date changes."""
+    from utils.members import MemberResolver
+
+    resolver = MemberResolver()
+    guild = make_guild(present_ids=set(range(0, 250, 2)))
+
+    found = await resolver.resolve(guild, range(250), date(2026, 1, 6))
+    assert set(found) == set(range(0, 250, 2))
+    assert guild.query_members.await_count == 3
+
+    again = await resolver.resolve(guild, [0, 1, 2], date(2026, 1, 6))
+    assert set(again) == {0, 2}
+    assert guild.query_members.await_count == 3
+
+    await resolver.resolve(guild, [0], date(2026, 1, 7))
+    assert guild.query_members.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_resolver_keys_the_day_on_the_server_timezone():
+    """A caller without a date uses the server's date, so it keeps the daily run's answers."""
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    from utils.members import MemberResolver
+
+    tz = ZoneInfo("Pacific/Kiritimati")  # UTC+14: a different date from UTC most of the day
+    resolver = MemberResolver(tz)
+    guild = make_guild(present_ids={1})
+    await resolver.resolve(guild, [1], datetime.now(tz).date())
+    await resolver.resolve(guild, [1])
+    assert guild.query_members.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_resolver_falls_back_to_rest_without_gateway():
+    """REST-only clients use fetch_member; NotFound means the user left."""
+    from utils.members import MemberResolver
+
+    guild = make_guild(present_ids=set())
+    guild.query_members = AsyncMock(side_effect=discord.ClientException("no gateway"))
+
+    async def fetch_member(user_id):
+        if user_id != 1:
+            raise discord.NotFound(MagicMock(status=404), "Unknown Member")
+        return MagicMock(id=user_id)
+
+    guild.fetch_member = AsyncMock(side_effect=fetch_member)
+
+    found = await MemberResolver().resolve(guild, [1, 2])
+    assert set(found) == {1}
+
+
+@pytest.mark.asyncio
+async def test_resolver_propagates_lookup_errors():
+    """An outage must not be reported as 'everyone left'."""
+    from utils.members import MemberResolver
+
+    guild = make_guild(present_ids=set())
+    guild.query_members = AsyncMock(side_effect=discord.ClientException("no gateway"))
+    guild.fetch_member = AsyncMock(side_effect=discord.HTTPException(MagicMock(status=503), "unavailable"))
+
+    with pytest.raises(discord.HTTPException):
+        await MemberResolver().resolve(guild, [1])
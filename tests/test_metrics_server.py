@@ -0,0 +1,71 @@
+import sys
+import os
+from unittest.mock import patch
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_require_token():
+    """Debug routes reject missing or wrong tokens but leave /metrics open."""
+    from utils.metrics_server import create_app
+
+    async with TestClient(TestServer(create_app(debug_token="secret"))) as client:
+        assert (await client.get("/metrics")).status == 200
+        assert (await client.get("/debug/runs")).status == 401
+        bad = await client.get("/debug/runs", headers={"Authorization": "Bearer nope"})
+        assert bad.status == 401
+        ok = await client.get("/debug/runs", headers={"Authorization": "Bearer secret"})
+        assert ok.status == 200
+        assert "runs" in await ok.json()
+
+
+@pytest.mark.asyncio
+async def test_heap_endpoint_takes_baseline_then_diffs():
+    """First heap call starts tracemalloc, later calls report growth."""
+    from utils import profiling
+    from utils.metrics_server import create_app
+
+    headers = {"Authorization": "Bearer secret"}
+    try:
+        async with TestClient(TestServer(create_app(debug_token="secret"))) as client:
+            first = await (await client.get("/debug/heap", headers=headers)).json()
+            assert first["status"] == "tracing_started"
+            _keep = [bytearray(1024) for _ in range(100)]
+            second = await (await client.get("/debug/heap?limit=5", headers=headers)).json()
+            assert second["status"] == "ok"
+            assert len(second["top_growth"]) <= 5
+            del _keep
+            assert (await client.get("/debug/heap?limit=many", headers=headers)).status == 400
+            assert len((await (await client.get("/debug/heap?limit=-3", headers=headers)).json())["top_growth"]) <= 1
+
+            # Too many traced blocks to snapshot without a long pause
+            with patch.object(profiling, "MAX_HEAP_TRACE_BYTES", 0):
+                refused = await client.get("/debug/heap", headers=headers)
+                assert refused.status == 503 and (await refused.json())["status"] == "refused"
+    finally:
+        profiling.stop_heap_tracing()
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_samples_bot_thread():
+    """Sampling returns collapsed stacks for the registered loop thread."""
+    import asyncio
+    from utils import profiling
+    from utils.metrics_server import create_app
+
+    profiling.register_bot_loop(asyncio.get_running_loop())
+    headers = {"Authorization": "Bearer secret"}
+    async with TestClient(TestServer(create_app(debug_token="secret"))) as client:
+        resp = await client.get("/debug/profile?seconds=1", headers=headers)
+        assert resp.status == 200
+        body = await resp.text()
+        assert body.strip()
+        assert body.splitlines()[0].rsplit(" ", 1)[1].isdigit()
+        assert (await client.get("/debug/profile?mode=bogus", headers=headers)).status == 400
+        assert (await client.get("/debug/profile?mode=cprofile&sort=bogus", headers=headers)).status == 400
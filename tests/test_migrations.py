@@ -0,0 +1,118 @@
+import sys
+import os
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_db():
+    from utils.db_manager import DatabaseManager
+
+    return DatabaseManager(None, client=AsyncMongoMockClient())
+
+
+@pytest.mark.asyncio
+async def test_migrations_apply_once_in_order():
+    from utils.migrations import MigrationRunner
+
+    db = make_db()
+    await db.birthdays.insert_many([{"_id": i, "day": 1 + i % 28, "month": 3} for i in range(25)])
+
+    runner = MigrationRunner(db, batch_size=10, pause_seconds=0)
+    assert await runner.run() == [1, 2, 3, 4, 5]
+    assert await db.birthdays.count_documents({"doy": {"$exists": False}}) == 0
+
+    status = {item["version"]: item for item in await runner.status()}
+    assert status[1]["status"] == "done"
+    assert status[1]["processed"] == 25
+    assert "lock_expires_at" not in status[1]
+
+    assert await runner.pending() == []
+    assert await runner.run() == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_after_interruption():
+    """A run that fails mid-backfill resumes after the last saved _id."""
+    from utils.migrations import Migration, MigrationContext, MigrationRunner
+
+    db = make_db()
+    await db.birthdays.insert_many([{"_id": i} for i in range(30)])
+    seen = []
+    fail_at = {15}
+
+    def mark(doc):
+        seen.append(doc["_id"])
+        if doc["_id"] in fail_at:
+            raise RuntimeError("interrupted")
+        return {"$set": {"marked": True}}
+
+    async def apply(ctx: MigrationContext):
+        await ctx.backfill(ctx.db.birthdays, {}, mark)
+
+    runner = MigrationRunner(db, [Migration(1, "mark", apply)], batch_size=10, pause_seconds=0)
+    with pytest.raises(RuntimeError):
+        await runner.run()
+    state = (await runner.status())[0]
+    assert state["status"] == "failed"
+    assert state["resume_after"] == 9
+
+    fail_at.clear()
+    seen.clear()
+    assert await runner.run() == [1]
+    assert seen == list(range(10, 30))
+    assert await db.birthdays.count_documents({"marked": True}) == 30
+
+
+@pytest.mark.asyncio
+async def test_lock_is_renewed_while_a_migration_runs(monkeypatch):
+    """A single slow step (e.g. an index build) keeps the lock past LOCK_SECONDS."""
+    import asyncio
+
+    from utils import migrations
+    from utils.migrations import Migration, MigrationRunner
+
+    monkeypatch.setattr(migrations, "LOCK_SECONDS", 0.3)
+    db = make_db()
+    rival = MigrationRunner(db, owner="rival")
+    claims = []
+
+    async def slow_step(ctx):
+        await asyncio.sleep(0.5)  # longer than the lock, with no batch in between
+        claims.append(await rival._claim(ctx.migration))
+
+    slow = Migration(1, "slow", slow_step)
+    runner = MigrationRunner(db, migrations=[slow], owner="first")
+    assert await runner.run() == [1]
+    assert claims == [None]
+    assert (await runner.status())[0]["owner"] == "first"
+
+
+@pytest.mark.asyncio
+async def test_migration_stops_when_its_lock_is_taken_over(monkeypatch):
+    """A runner whose lock expired and was claimed elsewhere stops and never marks the migration done."""
+    import asyncio
+
+    from utils import migrations
+    from utils.migrations import Migration, MigrationRunner
+
+    monkeypatch.setattr(migrations, "LOCK_SECONDS", 0.3)
+    db = make_db()
+    finished = []
+
+    async def slow_step(ctx):
+        # Another replica claimed the expired lock while this one was stalled
+        await db.schema_migrations.update_one({"_id": 1}, {"$set": {"owner": "rival"}})
+        await asyncio.sleep(0.5)
+        finished.append(True)
+
+    runner = MigrationRunner(db, migrations=[Migration(1, "slow", slow_step)])
+    assert runner.owner != MigrationRunner(db).owner
+    assert await runner.run() == []
+    assert finished == []
+    status = (await runner.status())[0]
+    assert (status["status"], status["owner"]) == ("running", "rival")
@@ -0,0 +1,163 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def sample(name, labels):
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def make_db():
+    from utils.db_manager import DatabaseManager
+
+    return DatabaseManager(None, client=AsyncMongoMockClient())
+
+
+@pytest.mark.asyncio
+async def test_reminders_are_planned_from_upcoming_birthdays_only():
+    from utils.reminders import plan_reminders
+
+    db = make_db()
+    await db.set_birthday(10, 19, 10, 1990)  # tomorrow
+    await db.set_birthday(11, 25, 10, 1995)  # in a week
+    await db.set_birthday(12, 20, 10, 2000)  # in two days: nobody is due for it
+    await db.add_reminder_subscription(1, "user", 10, 1)
+    await db.add_reminder_subscription(1, "role", 500, 1)  # also reaches 10 through the role: one DM
+    await db.add_reminder_subscription(2, "user", 11, 1)  # wrong lead for a birthday a week out
+    await db.add_reminder_subscription(3, "role", 500, 7)
+    await db.add_reminder_subscription(10, "role", 500, 1)  # a celebrant is not reminded of their own day
+    await db.add_reminder_subscription(4, "user", 12, 1)
+
+    roles_of = AsyncMock(return_value={10: [500], 11: [500, 600]})
+    reminders = await plan_reminders(db, date(2026, 10, 18), roles_of)
+    assert [(r["subscriber_id"], r["celebrant_id"], r["birthday"], r["days_before"]) for r in reminders] == [
+        (1, 10, "2026-10-19", 1),
+        (3, 11, "2026-10-25", 7),
+    ]
+    roles_of.assert_awaited_once_with([10, 11])
+
+    # Without role subscriptions nobody's roles are looked up
+    await db.remove_reminder_subscriptions(1, "role", 500)
+    await db.remove_reminder_subscriptions(3)
+    await db.remove_reminder_subscriptions(10)
+    roles_of.reset_mock()
+    assert len(await plan_reminders(db, date(2026, 10, 18), roles_of)) == 1
+    roles_of.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reminders_are_queued_once_and_sent_by_outcome():
+    from utils.jobs import JobQueue
+    from utils.reminders import REMINDER_JOB_KIND, ReminderSender, queue_reminders
+
+    db = make_db()
+    queue = JobQueue(db, "test", retry_delay=0)
+    today = datetime.now().date()
+    reminders = [
+        {"subscriber_id": 1, "celebrant_id": 10, "birthday": (today + timedelta(days=1)).isoformat(), "days_before": 1},
+        {"subscriber_id": 2, "celebrant_id": 10, "birthday": (today + timedelta(days=1)).isoformat(), "days_before": 1},
+        {"subscriber_id": 3, "celebrant_id": 11, "birthday": (today - timedelta(days=1)).isoformat(), "days_before": 7},
+    ]
+    assert await queue_reminders(queue, reminders) == 3
+    assert await queue_reminders(queue, reminders) == 0  # a re-run or catch-up queues nothing twice
+
+    users = {1: AsyncMock(), 2: AsyncMock()}
+    users[2].send.side_effect = discord.Forbidden(MagicMock(status=403), "Cannot send messages to this user")
+    client = MagicMock()
+    client.get_user.return_value = None
+    client.fetch_user = AsyncMock(side_effect=lambda user_id: users[user_id])
+    sender = ReminderSender(queue, client, rate=100)
+    outcomes = ("sent", "undeliverable", "expired")
+    before = {outcome: sample("mangalify_reminder_dms_total", {"outcome": outcome}) for outcome in outcomes}
+
+    while await sender.run_once():
+        pass
+    users[1].send.assert_awaited_once_with("🎂 Heads up: <@10>'s birthday is tomorrow "
+                                           f"({reminders[0]['birthday'][8:]}/{reminders[0]['birthday'][5:7]}).")
+    assert [call.args[0] for call in client.fetch_user.await_args_list] == [1, 2]  # expired one is never fetched
+    assert await db.count_jobs("done") == 3  # undeliverable DMs are dropped, not retried
+    assert {outcome: sample("mangalify_reminder_dms_total", {"outcome": outcome}) - before[outcome] for outcome in outcomes} == {
+        "sent": 1, "undeliverable": 1, "expired": 1,
+    }
+    assert await queue.claim(kinds=[REMINDER_JOB_KIND]) is None
+
+
+def make_cog(db, **overrides):
+    from config import Settings
+    from cogs.birthdays import Birthdays
+    from utils.app_context import AppContext
+
+    overrides.setdefault("birthday_reminders", True)
+    settings = Settings(
+        bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6, **overrides,
+    )
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db, api=MagicMock())
+    return Birthdays(bot)
+
+
+def make_interaction(user_id=1):
+    interaction = MagicMock()
+    interaction.user.id = user_id
+    interaction.response.send_message = AsyncMock()
+    return interaction
+
+
+@pytest.mark.asyncio
+async def test_follow_and_unfollow_commands():
+    db = make_db()
+    cog = make_cog(db)
+    friend, role = MagicMock(id=10, mention="<@10>"), MagicMock(id=500, mention="<@&500>")
+
+    interaction = make_interaction()
+    await cog.follow_reminders.callback(cog, interaction, user=friend, days_before=7)
+    assert "7 days before <@10>'s birthday" in interaction.response.send_message.await_args.args[0]
+    await cog.follow_reminders.callback(cog, make_interaction(), role=role)
+    assert [(sub["kind"], sub["target_id"], sub["days_before"]) for sub in await db.get_reminder_subscriptions(1)] == [
+        ("role", 500, 1), ("user", 10, 7),
+    ]
+
+    interaction = make_interaction()
+    await cog.follow_reminders.callback(cog, interaction, user=friend, role=role)
+    assert "either a member or a role" in interaction.response.send_message.await_args.args[0]
+
+    await cog.unfollow_reminders.callback(cog, make_interaction(), user=friend)
+    interaction = make_interaction()
+    await cog.unfollow_reminders.callback(cog, interaction)
+    assert "(1)" in interaction.response.send_message.await_args.args[0]
+    assert await db.get_reminder_subscriptions(1) == []
+
+    disabled, interaction = make_cog(db, birthday_reminders=False), make_interaction()
+    await disabled.follow_reminders.callback(disabled, interaction, user=friend)
+    assert "not enabled" in interaction.response.send_message.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_reminders_job_is_scheduled_only_when_enabled():
+    from config import Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+
+    def job_names(enabled):
+        settings = Settings(
+            bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+            wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6, birthday_reminders=enabled,
+        )
+        bot = MagicMock()
+        bot.app_context = AppContext(settings=settings, db=MagicMock(), api=MagicMock())
+        return [job.name for job in Wishes(bot).scheduled_jobs()]
+
+    assert "reminders" not in job_names(False)
+    assert job_names(True)[-1] == "reminders"
@@ -0,0 +1,184 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_cron_next_after():
+    from utils.scheduler import CronSchedule
+
+    assert CronSchedule("1 0 * * *").next_after(utc(2026, 10, 18, 0, 1)) == utc(2026, 10, 19, 0, 1)
+    assert CronSchedule("*/15 9-10 * * *").next_after(utc(2026, 10, 18, 10, 50)) == utc(2026, 10, 19, 9, 0)
+    assert CronSchedule("0 4 * * 0").next_after(utc(2026, 10, 18, 5, 0)) == utc(2026, 10, 25, 4, 0)  # Sundays
+    assert CronSchedule("0 0 29 2 *").next_after(utc(2026, 3, 1)) == utc(2028, 2, 29)
+    # Both day fields restricted: either matches, as in cron
+    assert CronSchedule("0 0 1 * 1").next_after(utc(2026, 10, 18)) == utc(2026, 10, 19)
+
+    for bad in ("0 0 * *", "60 0 * * *", "0 0 31 2 *", "0 0 * * 1-9"):
+        with pytest.raises(ValueError):
+            CronSchedule(bad).next_after(utc(2026, 1, 1))
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_due_order_and_record_durations():
+    from utils.db_manager import DatabaseManager
+    from utils.scheduler import JobDefinition, Scheduler
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    calls = []
+
+    async def handler(planned):
+        calls.append(planned)
+
+    scheduler = Scheduler(db, [
+        JobDefinition("post", "1 0 * * *", handler),
+        JobDefinition("prepare", "31 23 * * *", handler),
+        JobDefinition("cleanup", "0 4 * * *", handler, jitter_seconds=600),
+    ])
+    now = utc(2026, 10, 18, 12, 0)
+    await scheduler.load(now)
+    assert [row["name"] for row in await scheduler.upcoming()] == ["prepare", "post", "cleanup"]
+    cleanup_due = scheduler._due["cleanup"]
+    assert utc(2026, 10, 19, 4, 0) <= cleanup_due <= utc(2026, 10, 19, 4, 10)
+
+    assert await scheduler.run_due(utc(2026, 10, 19, 0, 1)) == ["prepare", "post"]
+    await scheduler.drain()
+    assert calls == [utc(2026, 10, 18, 23, 31), utc(2026, 10, 19, 0, 1)]
+
+    state = await db.get_scheduler_meta("job:post")
+    assert state["last_status"] == "ok" and state["last_duration"] >= 0
+    assert state["next_run_at"].replace(tzinfo=timezone.utc) == utc(2026, 10, 20, 0, 1)
+    assert state["schedule"] == "1 0 * * *"
+    rows = {row["name"]: row for row in await scheduler.upcoming()}
+    assert rows["post"]["last_status"] == "ok" and rows["cleanup"]["last_status"] is None
+
+
+@pytest.mark.asyncio
+async def test_catch_up_policy_after_downtime():
+    from utils.db_manager import DatabaseManager
+    from utils.scheduler import JobDefinition, Scheduler
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    handler = AsyncMock()
+    jobs = [JobDefinition("post", "1 0 * * *", handler, catch_up="once"), JobDefinition("cleanup", "0 4 * * *", handler)]
+    await Scheduler(db, jobs).load(utc(2026, 10, 16, 12, 0))
+
+    # Down from the 16th to the 18th: the post runs once now, the cleanup waits for its next time
+    restarted = Scheduler(db, jobs)
+    now = utc(2026, 10, 18, 9, 0)
+    await restarted.load(now)
+    assert await restarted.run_due(now) == ["post"]
+    await restarted.drain()
+    handler.assert_awaited_once_with(utc(2026, 10, 17, 0, 1))
+    assert restarted._planned["post"] == utc(2026, 10, 19, 0, 1)
+    assert restarted._planned["cleanup"] == utc(2026, 10, 19, 4, 0)
+
+
+@pytest.mark.asyncio
+async def test_max_runtime_standby_and_overlap():
+    from utils.db_manager import DatabaseManager
+    from utils.scheduler import JobDefinition, Scheduler
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    release = asyncio.Event()
+
+    async def slow(planned):
+        await release.wait()
+
+    leader = {"is": False}
+    scheduler = Scheduler(db, [
+        JobDefinition("slow", "* * * * *", slow, max_runtime=0.05),
+        JobDefinition("stuck", "* * * * *", slow),
+    ], should_run=lambda: leader["is"])
+    now = utc(2026, 10, 18, 12, 0)
+    await scheduler.load(now)
+
+    assert await scheduler.run_due(now + timedelta(minutes=1)) == []  # standby
+    leader["is"] = True
+    assert await scheduler.run_due(now + timedelta(minutes=2)) == ["slow", "stuck"]
+    await asyncio.sleep(0.1)
+    assert await scheduler.run_due(now + timedelta(minutes=3)) == ["slow"]  # "stuck" is still running
+    assert (await db.get_scheduler_meta("job:slow"))["last_status"] == "timeout"
+    release.set()
+    await scheduler.drain()
+    assert (await db.get_scheduler_meta("job:stuck"))["last_status"] == "ok"
+
+
+def test_invalid_cleanup_cron_is_a_config_error():
+    from config import ConfigError, Settings
+
+    base = {
+        "BOT_TOKEN": "a", "GUILD_ID": "1", "STAFF_ROLE_ID": "2", "BIRTHDAY_ROLE_ID": "3",
+        "WISHES_CHANNEL_ID": "4", "BIRTHDAY_CHANNEL_ID": "5", "STAFF_ALERTS_CHANNEL_ID": "6",
+    }
+    assert Settings.from_env({**base, "CLEANUP_CRON": "30 3 * * 1"}).cleanup_cron == "30 3 * * 1"
+    with pytest.raises(ConfigError):
+        Settings.from_env({**base, "CLEANUP_CRON": "every night"})
+
+
+@pytest.mark.asyncio
+async def test_restart_during_a_run_does_not_repeat_it():
+    from utils.db_manager import DatabaseManager
+    from utils.scheduler import JobDefinition, Scheduler
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def post(planned):
+        started.set()
+        await release.wait()
+
+    jobs = [JobDefinition("daily_task", "1 0 * * *", post, catch_up="once")]
+    scheduler = Scheduler(db, jobs)
+    await scheduler.load(utc(2026, 10, 18, 12, 0))
+    assert await scheduler.run_due(utc(2026, 10, 19, 0, 1)) == ["daily_task"]
+    await started.wait()
+    scheduler.stop()  # a deploy at 00:01:30, while the post is still going
+    await scheduler.drain()
+
+    restarted = Scheduler(db, jobs)
+    now = utc(2026, 10, 19, 0, 2)
+    await restarted.load(now)
+    assert await restarted.run_due(now) == []
+    assert restarted._planned["daily_task"] == utc(2026, 10, 20, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_new_leader_catches_up_a_run_missed_in_the_hand_over():
+    from utils.db_manager import DatabaseManager
+    from utils.scheduler import JobDefinition, Scheduler
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    handler = AsyncMock()
+    leader = {"is": False}
+    jobs = [JobDefinition("daily_task", "1 0 * * *", handler, catch_up="once"),
+            JobDefinition("cleanup", "1 0 * * *", handler, catch_up="skip")]
+    standby = Scheduler(db, jobs, should_run=lambda: leader["is"])
+    await standby.load(utc(2026, 10, 18, 12, 0))
+
+    # The old leader died at 00:00:50; this replica wins the lease at 00:01:40
+    assert await standby.run_due(utc(2026, 10, 19, 0, 1)) == []
+    leader["is"] = True
+    assert await standby.run_due(utc(2026, 10, 19, 0, 1, 40)) == ["daily_task"]
+    await standby.drain()
+    handler.assert_awaited_once_with(utc(2026, 10, 19, 0, 1))
+
+    # A run the old leader did start is not repeated
+    leader["is"] = False
+    assert await standby.run_due(utc(2026, 10, 20, 0, 1)) == []
+    await db.update_scheduler_meta("job:daily_task", {"last_started_at": utc(2026, 10, 20, 0, 1, 2)})
+    leader["is"] = True
+    assert await standby.run_due(utc(2026, 10, 20, 0, 2)) == []
+    assert handler.await_count == 1
@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_context(**overrides):
+    from config import Settings
+    from utils.api_client import ApiClient
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+    from utils.holidays import build_provider
+
+    settings = Settings(
+        bot_token="t", guild_id=1, staff_role_id=2, birthday_role_id=3,
+        wishes_channel_id=4, birthday_channel_id=5, staff_alerts_channel_id=6, **overrides,
+    )
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    api = ApiClient(gemini_api_key=settings.gemini_api_key, calendarific_api_key="key", calendarific_countries=("IN",))
+    api.holiday_provider = build_provider(api, db, cache_max_age=timedelta(days=settings.holiday_cache_max_age_days))
+    return AppContext(settings=settings, db=db, api=api)
+
+
+def test_plan_days_mirrors_the_daily_task():
+    from utils.simulator import RunCosts, plan_days
+
+    birthdays = [{"_id": 1, "day": 24, "month": 12}, {"_id": 2, "day": 25, "month": 12}, {"_id": 3, "day": 25, "month": 12}]
+    holidays = {(2026, 12): [{"name": "Christmas Day", "date": {"iso": "2026-12-25"}}]}
+    manual = [{"name": "Party", "day": 26, "month": 12, "year": 2026}]
+    costs = RunCosts(live_birthday_wishes=False, gemini_enabled=True, calendarific_calls_per_run=2)
+
+    plans = plan_days(birthdays, holidays, manual, date(2026, 12, 24), 3, costs)
+    christmas = plans[1]
+    assert christmas.celebrants == [2, 3] and christmas.holidays == ["Christmas Day"]
+    # summary + holiday list + 2 birthdays + 1 holiday wish; pool mode needs Gemini only for the holiday
+    assert (christmas.messages, christmas.gemini_calls, christmas.calendarific_calls) == (5, 1, 2)
+    assert christmas.role_changes == 3  # two added, yesterday's one removed
+    assert plans[2].manual_wishes == ["Party"] and plans[2].role_changes == 2
+
+    live = plan_days(birthdays, holidays, [], date(2026, 12, 25), 1, RunCosts(True, True, 0))
+    assert live[0].gemini_calls == 3
+
+    joins = [{"_id": 10 + i, "doy": 360, "year": 2020} for i in range(3)] + [{"_id": 20, "doy": 360, "year": 2026}]
+    costs = RunCosts(False, True, 0, anniversary_batch_size=2)
+    christmas = plan_days(birthdays, holidays, [], date(2026, 12, 25), 1, costs, joins)[0]
+    assert christmas.anniversaries == 3  # this year's joiner is not due yet
+    assert christmas.messages == 5 + 2  # two anniversary messages
+
+    # A fetched month is served from the cache for a week
+    cached = plan_days(birthdays, holidays, [], date(2026, 12, 1), 10, RunCosts(False, True, 2, holiday_cache_days=7))
+    assert [plan.calendarific_calls for plan in cached] == [2, 0, 0, 0, 0, 0, 0, 2, 0, 0]
+
+    leapling = [{"_id": 30, "day": 29, "month": 2}]
+    assert [plan.celebrants for plan in plan_days(leapling, {}, [], date(2027, 2, 28), 2, costs)] == [[30], []]
+    assert [plan.celebrants for plan in plan_days(leapling, {}, [], date(2028, 2, 28), 2, costs)] == [[], [30]]
+
+
+@pytest.mark.asyncio
+async def test_simulate_a_year_offline_without_sending_or_writing():
+    from utils.simulator import simulate
+
+    context = make_context(gemini_api_key="g", birthday_wish_mode="live")
+    await context.db.birthdays.insert_many(
+        [{"_id": i, "day": 1 + i % 28, "month": 1 + i % 12} for i in range(2000)] + [{"_id": 9999, "day": 29, "month": 2}]
+    )
+    await context.db.store_cached_holidays("2027-03", [{"name": "Holi", "date": {"iso": "2027-03-22"}}], None)
+    context.api.fetch_calendarific_holidays = AsyncMock()
+
+    started = time.perf_counter()
+    plans = await simulate(context, date(2027, 1, 1), 365, offline=True)
+    assert time.perf_counter() - started < 5
+
+    context.api.fetch_calendarific_holidays.assert_not_awaited()
+    assert len(plans) == 365
+    assert sum(len(plan.celebrants) for plan in plans) == 2001  # the Feb 29 birthday is celebrated on Feb 28, 2027
+    holi = next(plan for plan in plans if plan.day == date(2027, 3, 22))
+    assert holi.holidays == ["Holi"] and not holi.holidays_unavailable
+    assert plans[0].holidays_unavailable  # nothing cached for January
+    assert holi.calendarific_calls == 1
+    assert sum(plan.calendarific_calls for plan in plans) == 59  # days 1, 8, 15, 22 and 29 of each month
+    assert await context.db.holiday_cache.count_documents({}) == 1
@@ -0,0 +1,232 @@
+"""Behaviour every storage backend must share; each test runs against Mongo and SQLite."""
+
+import sys
+import os
+import inspect
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.fixture(params=["mongo", "sqlite"])
+def db(request, tmp_path):
+    if request.param == "mongo":
+        from utils.db_manager import DatabaseManager
+
+        manager = DatabaseManager(None, client=AsyncMongoMockClient())
+    else:
+        from utils.sqlite_manager import SQLiteDatabaseManager
+
+        manager = SQLiteDatabaseManager(str(tmp_path / "mangalify.db"))
+    yield manager
+    manager.close()
+
+
+def test_sqlite_backend_implements_every_database_method():
+    from utils.db_manager import DatabaseManager
+    from utils.sqlite_manager import SQLiteDatabaseManager
+
+    for name, member in vars(DatabaseManager).items():
+        if name.startswith("_") or not inspect.isfunction(member):
+            continue
+        assert hasattr(SQLiteDatabaseManager, name), name
+        assert inspect.iscoroutinefunction(getattr(SQLiteDatabaseManager, name)) == inspect.iscoroutinefunction(member), name
+
+
+@pytest.mark.asyncio
+async def test_birthday_crud_and_date_queries(db):
+    await db.set_birthday(1, 29, 2, 2000)
+    await db.set_birthday(2, 1, 3, 1999)
+    await db.set_birthday(3, 1, 3, 1990)
+    await db.set_birthday(2, 2, 3, 1999)  # update keeps one document
+
+    assert {key: (await db.get_birthday(2))[key] for key in ("_id", "day", "month", "year")} == {"_id": 2, "day": 2, "month": 3, "year": 1999}
+    assert [doc["_id"] async for doc in db.get_birthdays_for_date(1, 3)] == [3]
+    assert sorted([doc["_id"] async for doc in await db.get_all_birthdays()]) == [1, 2, 3]
+
+    entries = await db.get_birthdays_in_doy_ranges([(60, 62)], limit=10)
+    assert [(entry["_id"], entry["doy"]) for entry in entries] == [(1, 60), (3, 61), (2, 62)]
+    assert len(await db.get_birthdays_in_doy_ranges([(1, 366)], limit=2)) == 2
+    assert "year" not in entries[0]
+    assert (await db.get_birthdays_in_doy_ranges([(60, 60)], limit=10, full=True))[0]["year"] == 2000
+
+    assert await db.estimated_birthday_count() == 3
+    assert await db.count_birthdays_by_month() == {2: 1, 3: 2}
+    assert sorted((doc["_id"], doc["day"], doc["month"]) for doc in await db.get_birthday_dates()) == [(1, 29, 2), (2, 2, 3), (3, 1, 3)]
+
+    assert await db.delete_birthday(3) is True
+    assert await db.delete_birthday(3) is False
+    assert await db.get_birthday(3) is None
+
+
+@pytest.mark.asyncio
+async def test_templates_and_template_history(db):
+    assert await db.add_birthday_templates(["Hi {name} {mention}", "Yo {name} {mention}"]) == 2
+    assert await db.add_birthday_templates(["Hi {name} {mention}"]) == 0
+    assert await db.count_birthday_templates() == 2
+    templates = await db.get_birthday_templates()
+    assert sorted(template["text"] for template in templates) == ["Hi {name} {mention}", "Yo {name} {mention}"]
+
+    await db.set_birthday(7, 1, 1, 2000)
+    await db.record_birthday_template_use(7, "a")
+    await db.record_birthday_template_use(7, "b")
+    await db.record_birthday_template_use(7, "a")
+    assert (await db.get_birthday(7))["templates_used"] == ["a", "b"]
+    await db.record_birthday_template_use(7, "c", reset=True)
+    assert (await db.get_birthday(7))["templates_used"] == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_role_log(db):
+    await db.add_user_to_role_log(1, "2026-10-17")
+    await db.add_user_to_role_log(2, "2026-10-18")
+    await db.add_user_to_role_log(1, "2026-10-18")
+    logs = sorted([(log["_id"], log["date_added"]) async for log in await db.get_users_with_birthday_role()])
+    assert logs == [(1, "2026-10-18"), (2, "2026-10-18")]
+    assert await db.estimated_role_log_count() == 2
+    await db.remove_user_from_role_log(1)
+    assert [log["_id"] async for log in await db.get_all_role_logs()] == [2]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_meta_and_leases(db):
+    assert await db.get_scheduler_meta("daily_task") is None
+    await db.upsert_scheduler_meta("daily_task", next_run_at="n1", last_run_at=None)
+    await db.update_scheduler_meta("daily_task", {"hash": "abc", "sync_seconds": 1.5})
+    await db.upsert_scheduler_meta("daily_task", next_run_at=None, last_run_at="l1")
+    meta = await db.get_scheduler_meta("daily_task")
+    assert {key: meta[key] for key in ("next_run_at", "last_run_at", "hash", "sync_seconds")} == {
+        "next_run_at": "n1", "last_run_at": "l1", "hash": "abc", "sync_seconds": 1.5,
+    }
+
+    now = datetime.now(timezone.utc)
+    lease = await db.acquire_lease("leader", "a", now, now + timedelta(seconds=30), acquired_at=now)
+    assert lease["owner"] == "a"
+    assert await db.acquire_lease("leader", "b", now, now + timedelta(seconds=30)) is None
+    await db.release_lease("leader", "a", now)
+    lease = await db.acquire_lease("leader", "b", now, now + timedelta(seconds=30), acquired_at=now)
+    assert lease["owner"] == "b"
+    assert (await db.get_scheduler_meta("leader"))["owner"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_holiday_cache(db):
+    assert await db.get_cached_holidays("2026-12") is None
+    holidays = [{"name": "Christmas Day", "date": {"iso": "2026-12-25"}, "countries": ["IN"]}]
+    await db.store_cached_holidays("2026-12", holidays, datetime.now(timezone.utc))
+    assert (await db.get_cached_holidays("2026-12"))["holidays"] == holidays
+
+
+@pytest.mark.asyncio
+async def test_birthday_locales_and_wish_cache(db):
+    await db.set_birthday(1, 1, 1, 2000, "es")
+    await db.set_birthday(2, 2, 2, 2000)
+    await db.set_birthday(1, 3, 1, 2000)  # a date change keeps the chosen locale
+    assert (await db.get_birthday(1))["locale"] == "es"
+    assert "locale" not in await db.get_birthday(2)
+    assert await db.set_birthday_locale(2, "fr") is True
+    assert await db.set_birthday_locale(3, "fr") is False
+    assert await db.get_birthday_locales() == ["es", "fr"]
+    assert await db.set_birthday_locale(1, None) is True
+    assert "locale" not in await db.get_birthday(1)
+
+    assert await db.add_birthday_templates(["Hola {name} {mention}"], locale="es") == 1
+    assert await db.add_birthday_templates(["Hi {name} {mention}"]) == 1
+    assert [template["text"] for template in await db.get_birthday_templates("es")] == ["Hola {name} {mention}"]
+    assert [template["text"] for template in await db.get_birthday_templates()] == ["Hi {name} {mention}"]
+    assert await db.count_birthday_templates("es") == 1 and await db.count_birthday_templates("de") == 0
+
+    assert await db.get_cached_wish("2026:es:diwali") is None
+    await db.store_cached_wish("2026:es:diwali", "¡Feliz Diwali!")
+    assert await db.get_cached_wish("2026:es:diwali") == "¡Feliz Diwali!"
+
+
+@pytest.mark.asyncio
+async def test_job_queue(db):
+    from utils.jobs import JobQueue, run_job
+
+    first, second = JobQueue(db, "w1"), JobQueue(db, "w2")
+    assert await first.enqueue("daily_task", {"n": 1}, job_id="daily_task:2026-10-18") is True
+    assert await second.enqueue("daily_task", job_id="daily_task:2026-10-18") is False
+    await first.enqueue("later", run_at=datetime.now(timezone.utc) + timedelta(hours=1))
+
+    job = await first.claim()
+    assert (job["_id"], job["payload"], job["attempts"], job["owner"]) == ("daily_task:2026-10-18", {"n": 1}, 1, "w1")
+    assert await second.claim() is None
+    assert await db.count_jobs("running") == 1
+
+    assert await db.update_job(job["_id"], "w2", {"status": "done"}) is False
+    assert await run_job(first, job, lambda payload: _noop()) is True
+    assert await db.count_jobs("done") == 1
+    assert await db.count_jobs("pending") == 1
+
+    # Finished jobs are kept for the retention period, then purged; pending ones never are
+    assert await first.purge(timedelta(days=1)) == 0
+    assert await db.purge_finished_jobs(datetime.now(timezone.utc) + timedelta(seconds=1)) == 1
+    assert (await db.count_jobs("done"), await db.count_jobs("pending")) == (0, 1)
+
+
+async def _noop():
+    return None
+
+
+@pytest.mark.asyncio
+async def test_member_join_snapshot(db):
+    from utils.anniversaries import snapshot_entry
+
+    joined = datetime(2020, 10, 18, 12, tzinfo=timezone.utc)
+    await db.replace_member_joins([snapshot_entry(1, joined), snapshot_entry(2, joined.replace(month=3, day=1))])
+    await db.set_member_join(snapshot_entry(3, joined.replace(year=2024)))
+    assert [(doc["_id"], doc["year"]) for doc in await db.get_member_joins_in_doy_ranges([(292, 292)])] == [(1, 2020), (3, 2024)]
+
+    await db.delete_member_join(1)
+    await db.replace_member_joins([snapshot_entry(2, joined)])
+    assert [doc["_id"] for doc in await db.get_member_joins_in_doy_ranges([(1, 366)])] == [2]
+
+
+@pytest.mark.asyncio
+async def test_reminder_subscriptions(db):
+    await db.add_reminder_subscription(1, "user", 10, 1)
+    await db.add_reminder_subscription(1, "user", 10, 7)  # re-following updates the lead
+    await db.add_reminder_subscription(1, "role", 500, 1)
+    await db.add_reminder_subscription(2, "user", 11, 1)
+    assert [(sub["kind"], sub["target_id"], sub["days_before"]) for sub in await db.get_reminder_subscriptions(1)] == [
+        ("role", 500, 1), ("user", 10, 7),
+    ]
+    assert [sub["subscriber_id"] for sub in await db.get_reminder_subscribers("user", [10, 11, 12])] == [1, 2]
+    assert [sub["target_id"] for sub in await db.get_reminder_subscribers("role")] == [500]
+
+    assert await db.remove_reminder_subscriptions(1, "user", 99) == 0
+    assert await db.remove_reminder_subscriptions(1, "user", 10) == 1
+    assert await db.remove_reminder_subscriptions(1) == 1
+    assert await db.get_reminder_subscriptions(1) == []
+
+
+@pytest.mark.asyncio
+async def test_manual_wishes(db):
+    await db.add_manual_wish("Party", 26, 12, 2026, "Hooray", 123)
+    await db.add_manual_wish("Old", 1, 1, 2020, "Old one", None)
+    wishes = await db.get_manual_wishes_for_years(2026, 2027)
+    assert [(wish["name"], wish["day"], wish["month"], wish["year"]) for wish in wishes] == [("Party", 26, 12, 2026)]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_uses_wal_and_indexes(tmp_path):
+    from utils.sqlite_manager import SQLiteDatabaseManager
+
+    db = SQLiteDatabaseManager(str(tmp_path / "wal.db"))
+    try:
+        await db.ensure_indexes()
+        mode = await db._call(lambda conn: conn.execute("PRAGMA journal_mode").fetchone()[0])
+        plan = await db._call(lambda conn: conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM birthdays WHERE month = 3 AND day = 1"
+        ).fetchall())
+    finally:
+        db.close()
+    assert mode == "wal"
+    assert "birthdays_month_day" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,134 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def test_parse_templates_keeps_only_renderable_entries():
+    from utils.templates import parse_templates
+
+    raw = """```json
+    [
+      "# Happy Birthday, {name}! Everyone wish {mention}!",
+      "# Happy Birthday, {name}! Everyone wish {mention}!",
+      "Missing the mention, {name}",
+      "Hi {name} {mention} {age}",
+      "@everyone wish {name} {mention}",
+      42
+    ]
+    ```"""
+    assert parse_templates(raw) == ["# Happy Birthday, {name}! Everyone wish {mention}!"]
+    assert parse_templates("Sorry, I can't do that") == []
+
+
+def test_render_does_not_expand_placeholders_inside_names():
+    from utils.templates import render_template
+
+    assert render_template("Hi {name}, {mention}!", "{mention}", "<@1>") == "Hi {mention}, <@1>!"
+
+
+def test_choose_template_rotates_without_repeats():
+    from utils.templates import choose_template
+
+    templates = [{"_id": "a"}, {"_id": "b"}, {"_id": "c"}]
+    template, reset = choose_template(templates, ["a", "b"], set())
+    assert (template["_id"], reset) == ("c", False)
+
+    # Another celebrant already got "c" today, so prefer an unseen one that isn't taken
+    template, reset = choose_template(templates, ["a"], {"c"})
+    assert (template["_id"], reset) == ("b", False)
+
+    # Whole pool seen: start the member's history over
+    template, reset = choose_template(templates, ["a", "b", "c"], {"a", "b"})
+    assert (template["_id"], reset) == ("c", True)
+
+
+@pytest.mark.asyncio
+async def test_refill_tops_up_pool_in_bulk():
+    from utils.db_manager import DatabaseManager
+    from utils.templates import refill_pool
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    api = MagicMock()
+    api.generate_birthday_templates = AsyncMock(side_effect=[
+        '["A {name} {mention}", "B {name} {mention}", "bad"]',
+        '["A {name} {mention}", "C {name} {mention}"]',
+    ])
+
+    assert await refill_pool(db, api, target_size=3) == 3
+    assert api.generate_birthday_templates.await_count == 2
+    assert await refill_pool(db, api, target_size=3) == 0
+    assert api.generate_birthday_templates.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_mode_posts_without_calling_gemini():
+    from config import Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+
+    settings = Settings(
+        bot_token="t", guild_id=123, staff_role_id=456, birthday_role_id=789,
+        wishes_channel_id=111, birthday_channel_id=222, staff_alerts_channel_id=333,
+    )
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 6, 1, 2000)
+    await db.set_birthday(2, 6, 1, 2000)
+    await db.add_birthday_templates(["# Yay {name}! {mention}", "# Woo {name}! {mention}"])
+    api = MagicMock()
+    api.generate_birthday_wish_text = AsyncMock()
+
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db, api=api)
+    channel = AsyncMock()
+    bot.get_channel.return_value = channel
+    guild = MagicMock()
+    bot.get_guild.return_value = guild
+
+    def member(user_id):
+        found = MagicMock(id=user_id, display_name=f"User{user_id}", mention=f"<@{user_id}>")
+        found.add_roles = AsyncMock()
+        return found
+    guild.get_member.side_effect = member
+
+    cog = Wishes(bot)
+    assert await cog._check_for_birthdays(datetime(2026, 1, 6)) == 2
+
+    api.generate_birthday_wish_text.assert_not_awaited()
+    posts = [call.args[0] for call in channel.send.await_args_list]
+    assert {post.split("!")[0][2:5] for post in posts} == {"Yay", "Woo"}  # two celebrants, two templates
+    used = [(await db.get_birthday(user_id))["templates_used"] for user_id in (1, 2)]
+    assert all(len(ids) == 1 for ids in used)
+
+
+@pytest.mark.asyncio
+async def test_cli_uses_the_pools_in_use(monkeypatch, capsys):
+    from utils import templates
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+
+    for key, value in {"BOT_TOKEN": "t", "GUILD_ID": "1", "STAFF_ROLE_ID": "2", "BIRTHDAY_ROLE_ID": "3",
+                       "WISHES_CHANNEL_ID": "4", "BIRTHDAY_CHANNEL_ID": "5", "STAFF_ALERTS_CHANNEL_ID": "6",
+                       "DEFAULT_LOCALE": "es"}.items():
+        monkeypatch.setenv(key, value)
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    await db.set_birthday(1, 6, 1, 2000)
+    await db.set_birthday_locale(1, "fr")
+    await db.add_birthday_templates(["¡Feliz cumpleaños, {name}! {mention}"], "es")
+    await db.add_birthday_templates(["Joyeux anniversaire, {name} ! {mention}"], "fr")
+    await db.add_birthday_templates(["Happy birthday, {name}! {mention}"], "en")
+    api = MagicMock(close_session=AsyncMock())
+    monkeypatch.setattr(AppContext, "from_settings", classmethod(lambda cls, settings: cls(settings=settings, db=db, api=api)))
+
+    assert await templates._main(["list"]) == 0
+    assert [line[:4] for line in capsys.readouterr().out.splitlines()] == ["[es]", "[fr]"]
+    assert await templates._main(["list", "--locale", "en"]) == 0
+    assert "Happy birthday" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.mark.asyncio
+async def test_run_records_nested_timeline():
+    """Stages and calls nest under the run and the timeline is kept."""
+    from utils import tracing, metrics
+
+    before = metrics.daily_task_stage_duration.labels(stage="unit_stage")._sum.get()
+
+    with tracing.run("unit_run"):
+        with tracing.stage("unit_stage"):
+            with tracing.span("external.call", target="x"):
+                await asyncio.sleep(0)
+
+    timeline = tracing.recent_runs()[0]
+    assert timeline["run"] == "unit_run"
+    assert timeline["status"] == "success"
+    stage = timeline["children"][0]
+    assert stage["name"] == "unit_stage"
+    assert stage["children"][0]["name"] == "external.call"
+    assert stage["children"][0]["attrs"] == {"target": "x"}
+    assert metrics.daily_task_stage_duration.labels(stage="unit_stage")._sum.get() > before
+
+
+@pytest.mark.asyncio
+async def test_traced_decorator_marks_errors():
+    """Errors raised inside a span are recorded on the timeline."""
+    from utils import tracing
+
+    @tracing.traced("failing.call")
+    async def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        with tracing.run("unit_error_run"):
+            await failing()
+
+    timeline = tracing.recent_runs()[0]
+    assert timeline["status"] == "error"
+    assert timeline["children"][0]["error"] == "RuntimeError: boom"
@@ -10,29 +10,38 @@ if PROJECT_ROOT not in sys.path:
 
 
 @pytest.fixture
-def mock_env(monkeypatch):
-    """Set up minimal environment for tests."""
-    monkeypatch.setenv("LOAD_DOTENV", "false")
-    monkeypatch.setenv("BOT_TOKEN", "test_token")
-    monkeypatch.setenv("GUILD_ID", "123")
-    monkeypatch.setenv("STAFF_ROLE_ID", "456")
-    monkeypatch.setenv("BIRTHDAY_ROLE_ID", "789")
-    monkeypatch.setenv("WISHES_CHANNEL_ID", "111")
-    monkeypatch.setenv("BIRTHDAY_CHANNEL_ID", "222")
-    monkeypatch.setenv("STAFF_ALERTS_CHANNEL_ID", "333")
-    monkeypatch.setenv("POST_TIME_UTC", "00:01")
-    monkeypatch.setenv("SERVER_TIMEZONE", "UTC")
-    monkeypatch.setenv("MONGO_URI", "mongodb://localhost:27017")
+def settings():
+    """Minimal settings matching the IDs used by the mocks below."""
+    from config import Settings
+
+    return Settings(
+        bot_token="test_token",
+        guild_id=123,
+        staff_role_id=456,
+        birthday_role_id=789,
+        wishes_channel_id=111,
+        birthday_channel_id=222,
+        staff_alerts_channel_id=333,
+    )
+
+
+def make_bot(settings, db=None, api=None):
+    """A mock bot carrying an AppContext with the given fakes."""
+    from utils.app_context import AppContext
+
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=settings, db=db or MagicMock(), api=api or MagicMock())
+    return bot
 
 
 @pytest.mark.asyncio
-async def test_holiday_check_with_holidays(mock_env):
+async def test_holiday_check_with_holidays(settings):
     """Test that holidays are detected and wishes are generated."""
     from cogs.wishes import Wishes
     from unittest.mock import AsyncMock
 
     # Mock bot and channels
-    mock_bot = MagicMock()
+    mock_bot = make_bot(settings)
     mock_wishes_channel = AsyncMock()
     mock_alerts_channel = AsyncMock()
     mock_bot.get_channel.side_effect = lambda cid: {
@@ -40,13 +49,11 @@ async def test_holiday_check_with_holidays(mock_env):
         333: mock_alerts_channel,
     }.get(cid)
 
-    # Prevent daily task from starting
-    with patch.object(Wishes, '_daily_started', True):
-        # Create cog instance
-        cog = Wishes(mock_bot)
+    # Create cog instance (the daily task only starts in cog_load)
+    cog = Wishes(mock_bot)
 
     # Mock API client
-    with patch("cogs.wishes.api_client") as mock_api:
+    with patch.object(cog, "api") as mock_api:
         mock_api.get_holidays = AsyncMock(return_value=[
             {"name": "Test Day", "date": {"iso": "2026-01-06"}},
         ])
@@ -61,18 +68,17 @@ async def test_holiday_check_with_holidays(mock_env):
 
 
 @pytest.mark.asyncio
-async def test_holiday_check_no_holidays(mock_env):
+async def test_holiday_check_no_holidays(settings):
     """Test holiday check when no holidays found."""
     from cogs.wishes import Wishes
 
-    mock_bot = MagicMock()
+    mock_bot = make_bot(settings)
     mock_alerts_channel = MagicMock()
     mock_bot.get_channel.return_value = mock_alerts_channel
 
-    with patch.object(Wishes, '_daily_started', True):
-        cog = Wishes(mock_bot)
+    cog = Wishes(mock_bot)
 
-    with patch("cogs.wishes.api_client") as mock_api:
+    with patch.object(cog, "api") as mock_api:
         mock_api.get_holidays = AsyncMock(return_value=[])
 
         today = datetime(2026, 1, 6)
@@ -82,11 +88,11 @@ async def test_holiday_check_no_holidays(mock_env):
 
 
 @pytest.mark.asyncio
-async def test_birthday_check_with_birthdays(mock_env):
+async def test_birthday_check_with_birthdays(settings):
     """Test birthday check finds and announces birthdays."""
     from cogs.wishes import Wishes
 
-    mock_bot = MagicMock()
+    mock_bot = make_bot(settings)
     mock_guild = MagicMock()
     mock_birthday_channel = AsyncMock()
     mock_role = MagicMock()
@@ -100,30 +106,13 @@ async def test_birthday_check_with_birthdays(mock_env):
     mock_guild.get_role.return_value = mock_role
     mock_guild.get_member.return_value = mock_member
 
-    with patch.object(Wishes, '_daily_started', True):
-        cog = Wishes(mock_bot)
+    cog = Wishes(mock_bot)
 
-    # Mock db cursor as an async iterable
-    class MockCursor:
-        def __init__(self):
-            self.items = [{"_id": 12345, "day": 6, "month": 1, "year": 2000}]
-            self.index = 0
-        
-        def __aiter__(self):
-            return self
-        
-        async def __anext__(self):
-            if self.index >= len(self.items):
-                raise StopAsyncIteration
-            item = self.items[self.index]
-            self.index += 1
-            return item
-
-    with patch("cogs.wishes.db_manager") as mock_db:
-        mock_db.get_birthdays_for_date = MagicMock(return_value=MockCursor())
+    with patch.object(cog, "db") as mock_db:
+        mock_db.get_birthdays_in_doy_ranges = AsyncMock(return_value=[{"_id": 12345, "day": 6, "month": 1, "year": 2000}])
         mock_db.add_user_to_role_log = AsyncMock()
 
-        with patch("cogs.wishes.api_client") as mock_api:
+        with patch.object(cog, "api") as mock_api:
             mock_api.generate_birthday_wish_text = AsyncMock(return_value="Happy Birthday TestUser!")
 
             today = datetime(2026, 1, 6)
@@ -135,13 +124,12 @@ async def test_birthday_check_with_birthdays(mock_env):
 
 
 @pytest.mark.asyncio
-async def test_message_guard_profanity_filter(mock_env):
+async def test_message_guard_profanity_filter(settings):
     """Test that message guard filters profanity."""
     from cogs.wishes import Wishes
 
-    mock_bot = MagicMock()
-    with patch.object(Wishes, '_daily_started', True):
-        cog = Wishes(mock_bot)
+    mock_bot = make_bot(settings)
+    cog = Wishes(mock_bot)
 
     dirty = "This is a fuck test with shit words"
     clean = cog._guard_message(dirty, kind="test", name="test")
@@ -152,13 +140,12 @@ async def test_message_guard_profanity_filter(mock_env):
 
 
 @pytest.mark.asyncio
-async def test_message_guard_length_cap(mock_env):
+async def test_message_guard_length_cap(settings):
     """Test that message guard caps message length."""
     from cogs.wishes import Wishes
 
-    mock_bot = MagicMock()
-    with patch.object(Wishes, '_daily_started', True):
-        cog = Wishes(mock_bot)
+    mock_bot = make_bot(settings)
+    cog = Wishes(mock_bot)
 
     long_text = "A" * 1000
     capped = cog._guard_message(long_text, kind="test", name="test")
@@ -168,17 +155,16 @@ async def test_message_guard_length_cap(mock_env):
 
 
 @pytest.mark.asyncio
-async def test_departed_member_cleanup(mock_env):
+async def test_departed_member_cleanup(settings):
     """Test cleanup of departed members."""
     from cogs.wishes import Wishes
 
-    mock_bot = MagicMock()
+    mock_bot = make_bot(settings)
     mock_guild = MagicMock()
     mock_bot.get_guild.return_value = mock_guild
     mock_guild.get_member.return_value = None  # Member no longer in guild
 
-    with patch.object(Wishes, '_daily_started', True):
-        cog = Wishes(mock_bot)
+    cog = Wishes(mock_bot)
 
     # Mock db cursor as an async iterable
     class MockCursor:
@@ -196,7 +182,7 @@ async def test_departed_member_cleanup(mock_env):
             self.index += 1
             return item
 
-    with patch("cogs.wishes.db_manager") as mock_db:
+    with patch.object(cog, "db") as mock_db:
         mock_db.get_all_birthdays = AsyncMock(return_value=MockCursor())
         mock_db.delete_birthday = AsyncMock()
         mock_db.remove_user_from_role_log = AsyncMock()
@@ -206,3 +192,94 @@ async def test_departed_member_cleanup(mock_env):
         assert removed == 1
         assert mock_db.delete_birthday.called
         assert mock_db.remove_user_from_role_log.called
+
+
+@pytest.mark.asyncio
+async def test_daily_run_posts_the_planned_date_once(settings):
+    """A catch-up posts the day it missed, and a replayed run posts nothing."""
+    from datetime import timezone
+
+    from mongomock_motor import AsyncMongoMockClient
+
+    from cogs.wishes import Wishes
+    from utils.db_manager import DatabaseManager
+
+    cog = Wishes(make_bot(settings, db=DatabaseManager(None, client=AsyncMongoMockClient())))
+    posted = []
+    cog._cleanup_birthday_roles = AsyncMock(return_value=0)
+    cog._check_for_birthdays = AsyncMock(side_effect=lambda today: posted.append(today.date().isoformat()) or 0)
+    cog._check_for_anniversaries = AsyncMock(return_value=0)
+    cog._check_for_holidays = AsyncMock(return_value=0)
+
+    # The Oct 1 run was missed and is caught up on Oct 2 before that day's run
+    await cog.run_daily(datetime(2026, 10, 1, 3, 30, tzinfo=timezone.utc))
+    await cog.run_daily(datetime(2026, 10, 2, 3, 30, tzinfo=timezone.utc))
+    await cog.run_daily(datetime(2026, 10, 2, 3, 30, tzinfo=timezone.utc))  # replayed job
+    await cog.run_daily(datetime(2026, 10, 1, 3, 30, tzinfo=timezone.utc))  # stale catch-up
+    assert posted == ["2026-10-01", "2026-10-02"]
+
+
+@pytest.mark.asyncio
+async def test_feb_29_birthdays_are_posted_on_feb_28_in_common_years(settings):
+    from mongomock_motor import AsyncMongoMockClient
+
+    from cogs.wishes import Wishes
+    from utils.db_manager import DatabaseManager
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    for user_id, day, month in ((1, 29, 2), (2, 28, 2), (3, 1, 3)):
+        await db.set_birthday(user_id, day, month, 2000)
+    mock_bot = make_bot(settings, db=db)
+    guild = MagicMock()
+    mock_bot.get_guild.return_value = guild
+    mock_bot.get_channel.return_value = AsyncMock()
+    cog = Wishes(mock_bot)
+    cog._birthday_message = AsyncMock(return_value="Happy birthday!")
+
+    async def celebrated(today):
+        cog.members.resolve = AsyncMock(side_effect=lambda guild, ids, day: {user_id: MagicMock(add_roles=AsyncMock()) for user_id in ids})
+        await cog._check_for_birthdays(today)
+        return sorted(cog.members.resolve.await_args.args[1])
+
+    assert await celebrated(datetime(2027, 2, 28)) == [1, 2]
+    assert await celebrated(datetime(2028, 2, 28)) == [2]
+    assert await celebrated(datetime(2028, 2, 29)) == [1]
+
+
+@pytest.mark.asyncio
+async def test_hung_discord_calls_degrade_within_the_budget(settings, monkeypatch):
+    import asyncio
+
+    import cogs.wishes
+    from cogs.wishes import Wishes
+    from utils import budget
+    from utils.budget import Budget
+
+    monkeypatch.setattr(cogs.wishes, "DISCORD_CALL_TIMEOUT", 0.05)
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mock_bot = make_bot(settings)
+    member = MagicMock(display_name="TestUser", add_roles=AsyncMock(side_effect=hang))
+    channel = MagicMock(id=222, send=AsyncMock(side_effect=hang))
+    mock_bot.get_guild.return_value = MagicMock()
+    mock_bot.get_channel.return_value = channel
+    cog = Wishes(mock_bot)
+    cog.members.resolve = AsyncMock(return_value={1: member})
+    cog._birthday_message = AsyncMock(return_value="Happy birthday!")
+
+    with patch.object(cog, "db") as mock_db:
+        mock_db.get_birthdays_in_doy_ranges = AsyncMock(return_value=[{"_id": 1, "day": 6, "month": 1}])
+        mock_db.add_user_to_role_log = AsyncMock()
+        run_budget = Budget(60)
+        with run_budget.activate():
+            await asyncio.wait_for(cog._check_for_birthdays(datetime(2026, 1, 6)), 2)
+    assert run_budget.degraded == ["birthday role: TestUser", "message to channel 222"]
+    mock_db.add_user_to_role_log.assert_awaited_once()
+
+    # The prepare job's generation runs under its own budget
+    budgets = []
+    cog.api = MagicMock(get_holidays=AsyncMock(side_effect=lambda year, month: budgets.append(budget.current()) or []))
+    cog.refill_template_pool = AsyncMock()
+    await cog.run_prepare()
+    assert budgets[0] is not None and budgets[0].seconds == settings.prepare_budget
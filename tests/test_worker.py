@@ -0,0 +1,159 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_settings(**overrides):
+    from config import Settings
+
+    return Settings(
+        bot_token="t", guild_id=123, staff_role_id=456, birthday_role_id=789,
+        wishes_channel_id=111, birthday_channel_id=222, staff_alerts_channel_id=333, **overrides,
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_is_claimed_once_and_retried_with_backoff():
+    from utils.db_manager import DatabaseManager
+    from utils.jobs import JobQueue, run_job
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    first = JobQueue(db, "w1", max_attempts=2, retry_delay=60)
+    second = JobQueue(db, "w2", max_attempts=2, retry_delay=60)
+
+    assert await first.enqueue("daily_task", job_id="daily_task:2026-10-18") is True
+    assert await second.enqueue("daily_task", job_id="daily_task:2026-10-18") is False
+
+    job = await first.claim()
+    assert job["owner"] == "w1" and job["attempts"] == 1
+    assert await second.claim() is None
+
+    assert await run_job(first, job, AsyncMock(side_effect=RuntimeError("boom"))) is False
+    stored = await db.jobs.find_one({"_id": job["_id"]})
+    assert stored["status"] == "pending" and stored["error"] == "boom"
+    assert await second.claim() is None  # backing off
+
+    await db.jobs.update_one({"_id": job["_id"]}, {"$set": {"run_at": datetime.now(timezone.utc)}})
+    job = await second.claim()
+    assert await run_job(second, job, AsyncMock(side_effect=RuntimeError("boom"))) is False
+    assert (await db.jobs.find_one({"_id": job["_id"]}))["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_lets_another_worker_take_over():
+    from utils.db_manager import DatabaseManager
+    from utils.jobs import JobQueue, run_job
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    crashed = JobQueue(db, "w1")
+    survivor = JobQueue(db, "w2")
+    await crashed.enqueue("daily_task")
+    job = await crashed.claim()
+
+    await db.jobs.update_one({"_id": job["_id"]}, {"$set": {"locked_until": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+    retaken = await survivor.claim()
+    assert retaken["owner"] == "w2" and retaken["attempts"] == 2
+    assert await run_job(survivor, retaken, AsyncMock()) is True
+    assert (await db.jobs.find_one({"_id": job["_id"]}))["status"] == "done"
+
+    # The original owner finishing late does not overwrite the result
+    assert await db.update_job(job["_id"], "w1", {"status": "failed"}) is False
+
+
+@pytest.mark.asyncio
+async def test_lock_is_renewed_while_a_long_job_runs():
+    import asyncio
+
+    from utils.db_manager import DatabaseManager
+    from utils.jobs import JobQueue, run_job
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    runner = JobQueue(db, "w1", lock_seconds=0.3)
+    other = JobQueue(db, "w2", lock_seconds=0.3)
+    await runner.enqueue("daily_task")
+    job = await runner.claim()
+
+    async def long_run(payload):
+        await asyncio.sleep(0.8)  # well past the lock
+        assert await other.claim() is None
+
+    assert await run_job(runner, job, long_run) is True
+    assert (await db.jobs.find_one({"_id": job["_id"]}))["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_workers_queue_one_daily_run_and_execute_it():
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+    from utils.jobs import JobQueue
+    from worker import Worker
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    context = AppContext(settings=make_settings(), db=db, api=MagicMock())
+    bot = MagicMock(app_context=context, refresh_guild=AsyncMock())
+    workers = [Worker(context, bot, JobQueue(db, f"w{i}")) for i in range(2)]
+
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    for worker in workers:
+        await worker.scheduler.load(now)
+        assert await worker.scheduler.run_due(now + timedelta(hours=12, minutes=1)) == ["prepare", "daily_task"]
+        await worker.scheduler.drain()
+    jobs = await db.jobs.find({}).sort("_id", 1).to_list(length=None)
+    assert [job["_id"] for job in jobs] == ["daily_task:2026-10-19T00:01:00+00:00", "prepare:2026-10-18T23:31:00+00:00"]
+
+    workers[1].wishes.run_daily = AsyncMock()
+    workers[1].wishes.run_prepare = AsyncMock()
+    assert await workers[1].run_once() is True
+    assert await workers[1].run_once() is True
+    workers[1].wishes.run_daily.assert_awaited_once_with(datetime(2026, 10, 19, 0, 1, tzinfo=timezone.utc))
+    workers[1].wishes.run_prepare.assert_awaited_once_with(datetime(2026, 10, 18, 23, 31, tzinfo=timezone.utc))
+    assert bot.refresh_guild.await_count == 2
+    assert (await db.get_scheduler_meta("job:daily_task"))["last_status"] == "ok"
+    assert await workers[0].run_once() is False
+
+
+@pytest.mark.asyncio
+async def test_only_one_worker_sends_reminders():
+    from utils.app_context import AppContext
+    from utils.db_manager import DatabaseManager
+    from utils.jobs import JobQueue
+    from worker import Worker
+
+    db = DatabaseManager(None, client=AsyncMongoMockClient())
+    context = AppContext(settings=make_settings(birthday_reminders=True), db=db, api=MagicMock())
+    workers = [Worker(context, MagicMock(app_context=context), JobQueue(db, f"w{i}")) for i in range(2)]
+    assert [await worker.sender_lease.renew() for worker in workers] == [True, False]
+
+    # The sender's lease passes on when it shuts down
+    await workers[0].sender_lease.release()
+    assert await workers[1].sender_lease.renew() is True
+    context = AppContext(settings=make_settings(), db=db, api=MagicMock())
+    assert Worker(context, MagicMock(app_context=context), JobQueue(db, "w3")).sender_lease is None
+
+
+@pytest.mark.asyncio
+async def test_gateway_mode_does_not_start_daily_task():
+    from config import ConfigError, Settings
+    from cogs.wishes import Wishes
+    from utils.app_context import AppContext
+
+    bot = MagicMock()
+    bot.app_context = AppContext(settings=make_settings(run_mode="gateway"), db=MagicMock(), api=MagicMock())
+    cog = Wishes(bot)
+    await cog.cog_load()
+    assert cog._scheduler_task is None
+
+    with pytest.raises(ConfigError):
+        Settings.from_env({
+            "BOT_TOKEN": "a", "GUILD_ID": "1", "STAFF_ROLE_ID": "2", "BIRTHDAY_ROLE_ID": "3",
+            "WISHES_CHANNEL_ID": "4", "BIRTHDAY_CHANNEL_ID": "5", "STAFF_ALERTS_CHANNEL_ID": "6",
+            "RUN_MODE": "scheduler",
+        })
@@ -0,0 +1,108 @@
+"""Server join anniversaries, found by day-of-year bucket instead of per-member date checks.
+
+Join dates are numbered with the same leap-year ``doy`` as birthdays
+(``utils/dates.py``), taken in the server timezone. Today's anniversaries
+are the members in today's one or two buckets. In common years, Feb 28's
+window also covers Feb 29.
+
+Two sources feed the buckets:
+
+* ``JoinIndex``: built in one pass over ``guild.members`` when the guild is
+  chunked (the default), then kept in memory and patched by member join and
+  leave events. A bucketing pass costs several times a plain date comparison
+  of every member (``benchmarks/anniversaries.py``), so it pays off only
+  because it is reused across runs.
+* A ``member_joins`` snapshot in the database, indexed on ``doy``, for
+  ``LOW_MEMORY_MODE`` and REST-only workers that hold no member cache. It is
+  filled from ``guild.fetch_members`` and patched by the same events.
+
+Both are rebuilt from scratch once older than ``JOIN_SNAPSHOT_MAX_AGE_DAYS``,
+which picks up anything the events missed while the bot was disconnected.
+The in-memory index is rebuilt in place; the snapshot only by the off-peak
+``join_snapshot`` job, so the daily post never waits on a full member fetch.
+"""
+
+from datetime import date, datetime, tzinfo
+
+from utils.dates import date_from_doy, day_of_year, doy_ranges
+
+ANNIVERSARY_HEADER = "🎊 **Happy server anniversary!**"
+
+
+def local_join_date(joined_at: datetime, tz: tzinfo | None = None) -> date:
+    return joined_at.astimezone(tz).date() if tz is not None else joined_at.date()
+
+
+def snapshot_entry(user_id: int, joined_at: datetime, tz: tzinfo | None = None) -> dict:
+    """A ``member_joins`` document for ``user_id``."""
+    joined = local_join_date(joined_at, tz)
+    return {"_id": user_id, "joined_at": joined_at, "doy": day_of_year(joined.day, joined.month), "year": joined.year}
+
+
+class JoinIndex:
+    """Join years bucketed by local join date: ``{(month, day): {user_id: year}}``.
+
+    Built once in a single pass and then patched with ``add``/``remove`` from
+    member events, so a daily run only reads today's buckets.
+    """
+
+    def __init__(self, tz: tzinfo | None = None):
+        # Skip the per-member astimezone when it would be a no-op; it dominates the pass
+        self.tz = None if tz is None or str(tz) == "UTC" else tz
+        self._buckets: dict[tuple[int, int], dict[int, int]] = {}
+        self._keys: dict[int, tuple[int, int]] = {}
+
+    @classmethod
+    def from_members(cls, members, tz: tzinfo | None = None) -> "JoinIndex":
+        """Index ``members`` in a single pass; bots and members without a join date are skipped."""
+        index = cls(tz)
+        for member in members:
+            if not member.bot and member.joined_at is not None:
+                index._put(member.id, member.joined_at)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _put(self, user_id: int, joined_at: datetime):
+        joined = joined_at.astimezone(self.tz) if self.tz is not None else joined_at
+        key = (joined.month, joined.day)
+        self._buckets.setdefault(key, {})[user_id] = joined.year
+        self._keys[user_id] = key
+
+    def add(self, user_id: int, joined_at: datetime):
+        self.remove(user_id)
+        self._put(user_id, joined_at)
+
+    def remove(self, user_id: int):
+        key = self._keys.pop(user_id, None)
+        if key is not None:
+            self._buckets[key].pop(user_id, None)
+
+    def on(self, day: date) -> list[tuple[int, int]]:
+        """``(user_id, join_year)`` for everyone whose join date falls on ``day``."""
+        found = []
+        for low, high in doy_ranges(day, 1):
+            for doy in range(low, high + 1):
+                bucket_day, bucket_month = date_from_doy(doy)
+                found.extend(self._buckets.get((bucket_month, bucket_day), {}).items())
+        return found
+
+
+def due_anniversaries(entries, day: date) -> list[tuple[int, int]]:
+    """``(user_id, years)`` for entries at least a year old, longest-serving first."""
+    due = [(user_id, day.year - year) for user_id, year in entries if day.year - year >= 1]
+    return sorted(due, key=lambda item: (-item[1], item[0]))
+
+
+def anniversary_messages(due: list[tuple[int, int]], batch_size: int) -> list[str]:
+    """One message per ``batch_size`` members, each line mentioning one member."""
+    batch_size = max(batch_size, 1)
+    messages = []
+    for start in range(0, len(due), batch_size):
+        lines = [
+            f"• <@{user_id}> — {years} year{'s' if years != 1 else ''} with us"
+            for user_id, years in due[start:start + batch_size]
+        ]
+        messages.append("\n".join([ANNIVERSARY_HEADER, *lines]))
+    return messages
@@ -1,72 +1,169 @@
 # utils/api_client.py
 
-import os
 import asyncio
 import logging
+import re
+import time
+import unicodedata
 import aiohttp
-from dotenv import load_dotenv
-import google.generativeai as genai
 
-load_dotenv()
+from utils import budget, metrics, tracing
+from utils.locales import DEFAULT_LOCALE, birthday_fallback, holiday_fallback, language_instruction
 
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL_NAME = 'gemini-1.5-flash-latest'
+CALENDARIFIC_URL = "https://calendarific.com/api/v2/holidays"
+
+
+def normalize_holiday_name(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive key, so "New Year's Day" == "New Years Day"."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", "", stripped.casefold()).split())
+
+
+def merge_holidays(by_country: dict[str, list[dict]]) -> list[dict]:
+    """One entry per (normalized name, date), tagged with every country that observes it."""
+    merged: dict[tuple[str, str], dict] = {}
+    for country, holidays in by_country.items():
+        for holiday in holidays:
+            key = (normalize_holiday_name(holiday.get("name", "")), holiday.get("date", {}).get("iso", "")[:10])
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {**holiday, "countries": []}
+            if country not in entry["countries"]:
+                entry["countries"].append(country)
+    return sorted(merged.values(), key=lambda holiday: holiday.get("date", {}).get("iso", ""))
+
+
 class ApiClient:
-    def __init__(self):
-        gemini_key = os.getenv("GEMINI_API_KEY")
-        if gemini_key:
-            genai.configure(api_key=gemini_key)
-        
-        self.gemini_model = genai.GenerativeModel('gemini-1.5-flash-latest') if gemini_key else None
-        
-        self.calendarific_api_key = os.getenv("CALENDARIFIC_API_KEY")
-        self.calendarific_country = os.getenv("CALENDARIFIC_COUNTRY_CODE")
+    def __init__(self, gemini_api_key: str | None = None, calendarific_api_key: str | None = None,
+                 calendarific_country: str | None = None, calendarific_countries=(),
+                 calendarific_holiday_types=(), calendarific_concurrency: int = 4,
+                 gemini_timeout: float = 20, calendarific_timeout: float = 10):
+        # The Gemini SDK is heavy to import; it is loaded on first use of gemini_model.
+        self._gemini_key = gemini_api_key
+        self._gemini_model = None
+
+        self.calendarific_api_key = calendarific_api_key
+        countries = list(calendarific_countries) or ([calendarific_country] if calendarific_country else [])
+        self.calendarific_countries = list(dict.fromkeys(countries))
+        self.calendarific_holiday_types = list(calendarific_holiday_types)
+        self._calendarific_limit = asyncio.Semaphore(max(calendarific_concurrency, 1))
+        # Optional utils.holidays provider chain; get_holidays asks Calendarific directly without one
+        self.holiday_provider = None
         self._session = None
 
         self._max_retries = 3
         self._backoff_base = 0.5  # seconds
+        # Per-attempt deadlines; a running daily-task budget (utils.budget) can shorten them
+        self.gemini_timeout = gemini_timeout
+        self.calendarific_timeout = calendarific_timeout
+
+    @property
+    def gemini_model(self):
+        """The Gemini model, created on first access; None when no API key is set."""
+        if self._gemini_model is None and self._gemini_key:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self._gemini_key)
+            self._gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        return self._gemini_model
 
     async def _get_session(self):
         if self._session is None: self._session = aiohttp.ClientSession()
         return self._session
 
-    async def _with_retry(self, label: str, coro_factory):
-        """Retry an async operation with exponential backoff."""
+    async def _with_retry(self, label: str, service: str, coro_factory, timeout: float):
+        """Retry an async operation with exponential backoff, timing each attempt.
+
+        Each attempt is cut off at ``timeout`` or at the end of the active
+        budget, whichever is sooner. When the budget cannot cover another
+        attempt, BudgetExceeded is raised so the caller falls back at once.
+        """
         for attempt in range(1, self._max_retries + 1):
+            deadline = budget.call_timeout(timeout)
+            started = time.perf_counter()
             try:
-                return await coro_factory()
+                result = await asyncio.wait_for(coro_factory(), deadline)
+                metrics.record_api_attempt(service, "success", time.perf_counter() - started)
+                return result
             except Exception as exc:
+                metrics.record_api_attempt(service, "error", time.perf_counter() - started)
                 if attempt == self._max_retries:
                     logger.error("%s failed after %s attempts: %s", label, attempt, exc, extra={"event": "retry_failed", "label": label, "attempt": attempt})
                     raise
                 sleep_for = self._backoff_base * (2 ** (attempt - 1))
-                logger.warning("%s attempt %s failed: %s; retrying in %.2fs", label, attempt, exc, sleep_for, extra={"event": "retry_wait", "label": label, "attempt": attempt, "sleep": sleep_for})
+                if not budget.can_wait(sleep_for):
+                    raise budget.BudgetExceeded(f"{label}: no budget left to retry") from exc
+                logger.warning("%s attempt %s failed: %s; retrying in %.2fs", label, attempt, repr(exc), sleep_for, extra={"event": "retry_wait", "label": label, "attempt": attempt, "sleep": sleep_for})
+                metrics.record_api_retry(service)
                 await asyncio.sleep(sleep_for)
 
+    @staticmethod
+    def _record_gemini_usage(response, purpose: str):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        metrics.record_gemini_tokens(
+            purpose,
+            getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
     async def get_holidays(self, year: int, month: int):
-        if not self.calendarific_api_key:
+        """Holidays for the month from the configured provider chain, or from Calendarific."""
+        if self.holiday_provider is not None:
+            return await self.holiday_provider.get_holidays(year, month)
+        return await self.fetch_calendarific_holidays(year, month)
+
+    async def fetch_calendarific_holidays(self, year: int, month: int):
+        """Holidays for every configured country, fetched concurrently and merged.
+
+        Each holiday carries a ``countries`` list. A country that fails is
+        logged and skipped; None is returned only if every country failed.
+        """
+        if not self.calendarific_api_key or not self.calendarific_countries:
             return None
-        url = (
-            f"https://calendarific.com/api/v2/holidays?"
-            f"&api_key={self.calendarific_api_key}&country={self.calendarific_country}"
-            f"&year={year}&month={month}"
-        )
+        with tracing.span("calendarific.get_holidays", year=year, month=month, countries=len(self.calendarific_countries)):
+            results = await asyncio.gather(
+                *(self._get_country_holidays(country, year, month) for country in self.calendarific_countries)
+            )
+        fetched = {country: holidays for country, holidays in zip(self.calendarific_countries, results) if holidays is not None}
+        if not fetched:
+            return None
+        return merge_holidays(fetched)
+
+    async def _get_country_holidays(self, country: str, year: int, month: int):
+        params = {"api_key": self.calendarific_api_key, "country": country, "year": year, "month": month}
+        if self.calendarific_holiday_types:
+            params["type"] = ",".join(self.calendarific_holiday_types)
+        started = time.perf_counter()
         try:
             session = await self._get_session()
 
             async def _fetch():
-                async with session.get(url, timeout=10) as response:
+                async with session.get(CALENDARIFIC_URL, params=params) as response:
                     if response.status != 200:
                         raise RuntimeError(f"Calendarific status {response.status}")
                     data = await response.json()
                     return data.get("response", {}).get("holidays", [])
 
-            return await self._with_retry("Calendarific fetch", _fetch)
+            async with self._calendarific_limit:
+                with tracing.span("calendarific.get_country_holidays", country=country):
+                    holidays = await self._with_retry(
+                        f"Calendarific fetch ({country})", "calendarific", _fetch, self.calendarific_timeout
+                    )
+            metrics.record_api_call("calendarific", "success", time.perf_counter() - started)
+            return holidays
         except Exception as e:
-            logger.error("Exception while fetching holidays: %s", e, extra={"event": "calendarific_error", "year": year, "month": month})
+            metrics.record_api_call("calendarific", "error", time.perf_counter() - started)
+            budget.note_degraded(f"holidays ({country})")
+            logger.error("Exception while fetching holidays for %s: %s", country, e, extra={"event": "calendarific_error", "country": country, "year": year, "month": month})
             return None
 
-    async def generate_wish_text(self, holiday_name: str):
+    async def generate_wish_text(self, holiday_name: str, locale: str = DEFAULT_LOCALE):
         if not self.gemini_model: return None
             
         # FIX: New prompt for rich markdown text
@@ -76,19 +173,27 @@ class ApiClient:
             "Start with a bold header using a hash symbol (e.g., '# Happy {holiday_name}!'). "
             "Include bold (`**text**`), italics (`*text*`), and a block quote (`> quote`). "
             "Do not use embeds. The output should be a raw text message."
-        )
+        ) + language_instruction(locale)
 
+        started = time.perf_counter()
         try:
             async def _gen():
                 response = await self.gemini_model.generate_content_async(prompt)
+                self._record_gemini_usage(response, "holiday_wish")
                 return response.text.strip() if response.parts else None
 
-            return await self._with_retry("Gemini holiday wish", _gen)
+            with tracing.span("gemini.holiday_wish"):
+                text = await self._with_retry("Gemini holiday wish", "gemini", _gen, self.gemini_timeout)
+            metrics.record_api_call("gemini", "success" if text else "error", time.perf_counter() - started)
+            return text
         except Exception as e:
+            metrics.record_api_call("gemini", "fallback", time.perf_counter() - started)
+            metrics.record_wish_fallback("holiday_wish")
+            budget.note_degraded(f"holiday wish: {holiday_name}")
             logger.error("Gemini API error for holiday wish: %s", e, extra={"event": "gemini_holiday_error", "holiday": holiday_name})
-            return f"Happy {holiday_name}! Wishing everyone a wonderful celebration."
+            return holiday_fallback(holiday_name, locale)
 
-    async def generate_birthday_wish_text(self, member_name: str, member_mention: str):
+    async def generate_birthday_wish_text(self, member_name: str, member_mention: str, locale: str = DEFAULT_LOCALE):
         if not self.gemini_model: return None
             
         # FIX: New prompt for rich markdown text, including the user's mention
@@ -99,22 +204,58 @@ class ApiClient:
             f"Make sure to include their mention, which is `{member_mention}`, in the body of the message. "
             "Use other formatting like bold, italics, and block quotes to make it feel special. "
             "Encourage others to wish them a happy birthday. Do not use embeds."
-        )
+        ) + language_instruction(locale)
 
+        started = time.perf_counter()
         try:
             async def _gen():
                 response = await self.gemini_model.generate_content_async(prompt)
+                self._record_gemini_usage(response, "birthday_wish")
                 return response.text.strip() if response.parts else None
 
-            text = await self._with_retry("Gemini birthday wish", _gen)
+            with tracing.span("gemini.birthday_wish"):
+                text = await self._with_retry("Gemini birthday wish", "gemini", _gen, self.gemini_timeout)
             if text:
+                metrics.record_api_call("gemini", "success", time.perf_counter() - started)
                 return text
         except Exception as e:
             logger.error("Gemini API error for birthday wish: %s", e, extra={"event": "gemini_birthday_error", "member": member_name})
-        return f"# 🎉 Happy Birthday, {member_name}! 🎉\n\n> Hope you have a fantastic day filled with joy and laughter!\n\nEveryone, please wish a happy birthday to {member_mention}!"
+        metrics.record_api_call("gemini", "fallback", time.perf_counter() - started)
+        metrics.record_wish_fallback("birthday_wish")
+        budget.note_degraded(f"birthday wish: {member_name}")
+        return birthday_fallback(member_name, member_mention, locale)
+
+    async def generate_birthday_templates(self, count: int, locale: str = DEFAULT_LOCALE) -> str | None:
+        """Ask Gemini for ``count`` birthday templates in one call; returns the raw JSON reply."""
+        if not self.gemini_model: return None
+
+        prompt = (
+            f"Write {count} different cheerful birthday wishes for members of a Discord community. "
+            "Return ONLY a JSON array of strings, with no commentary. "
+            "Every string must contain the literal placeholders {name} (the member's display name) "
+            "and {mention} (their ping), and no other curly braces. "
+            "Use Discord markdown: start with a '# ' header that includes {name}, and use bold, italics "
+            "and a block quote. Encourage others to wish {mention} a happy birthday. "
+            "Vary the tone, emoji and structure between wishes, keep each under 600 characters, "
+            "and never use @everyone or @here."
+        ) + language_instruction(locale)
+
+        started = time.perf_counter()
+        try:
+            async def _gen():
+                response = await self.gemini_model.generate_content_async(prompt)
+                self._record_gemini_usage(response, "birthday_templates")
+                return response.text.strip() if response.parts else None
+
+            with tracing.span("gemini.birthday_templates", count=count):
+                text = await self._with_retry("Gemini birthday templates", "gemini", _gen, self.gemini_timeout)
+            metrics.record_api_call("gemini", "success" if text else "error", time.perf_counter() - started)
+            return text
+        except Exception as e:
+            metrics.record_api_call("gemini", "error", time.perf_counter() - started)
+            logger.error("Gemini API error for birthday templates: %s", e, extra={"event": "gemini_templates_error"})
+            return None
 
     async def close_session(self):
         if self._session and not self._session.closed:
             await self._session.close()
-
-api_client = ApiClient()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Application context: settings plus the clients and caches built from them.
+
+One ``AppContext`` per bot instance replaces the old module-level
+``db_manager``/``api_client`` singletons, so several bots (or a benchmark
+harness) can share a process and tests can hand cogs their own fakes.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from config import Settings
+from utils.api_client import ApiClient
+from utils.db_manager import DatabaseManager
+from utils.holidays import build_provider
+from utils.leader import LeaderElector
+from utils.members import MemberResolver
+
+
+@dataclass
+class AppContext:
+    settings: Settings
+    db: DatabaseManager
+    api: ApiClient
+    members: MemberResolver = field(default_factory=MemberResolver)
+    # None means a single instance that always runs the scheduled jobs
+    leader: LeaderElector | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AppContext":
+        if settings.storage_backend == "sqlite":
+            from utils.sqlite_manager import SQLiteDatabaseManager
+
+            db = SQLiteDatabaseManager(settings.sqlite_path)
+        else:
+            db = DatabaseManager(settings.mongo_uri, settings.mongo_db_name, client_options=settings.mongo_client_options)
+        api = ApiClient(
+            gemini_api_key=settings.gemini_api_key,
+            calendarific_api_key=settings.calendarific_api_key,
+            calendarific_countries=settings.calendarific_countries,
+            calendarific_holiday_types=settings.calendarific_holiday_types,
+            calendarific_concurrency=settings.calendarific_concurrency,
+            gemini_timeout=settings.gemini_timeout,
+            calendarific_timeout=settings.calendarific_timeout,
+        )
+        # Local calendars are parsed here, once per process
+        api.holiday_provider = build_provider(
+            api, db, settings.holiday_calendars, settings.holiday_cache,
+            timedelta(days=settings.holiday_cache_max_age_days),
+        )
+        leader = None
+        # Gateway processes schedule nothing, and workers share jobs through the queue's claims
+        if settings.leader_election and settings.run_mode == "all":
+            leader = LeaderElector(db, lease_seconds=settings.leader_lease_seconds, renew_interval=settings.leader_renew_seconds)
+        return cls(settings=settings, db=db, api=api, members=MemberResolver(settings.server_timezone), leader=leader)
+
+    async def close(self):
+        await self.api.close_session()
+        self.db.close()
@@ -0,0 +1,77 @@
+"""Time budget for a run of the daily task.
+
+The daily task and the prepare job activate a ``Budget``. ApiClient, and the
+daily task's Discord calls, cap every external call at
+``min(per-call deadline, time left in the budget)``. Once the budget is spent,
+calls fail immediately and take their fallback path. Every fallback is noted
+on the budget, so the run summary can list the degraded items. The budget
+lives in a ContextVar, as tracing spans do, so nothing has to be threaded
+through call signatures and outside a run only the per-call deadlines apply.
+"""
+
+import asyncio
+import contextlib
+import math
+import time
+from contextvars import ContextVar
+
+_current_budget: ContextVar["Budget | None"] = ContextVar("mangalify_budget", default=None)
+
+
+class BudgetExceeded(asyncio.TimeoutError):
+    """The run's time budget is used up; callers should fall back right away."""
+
+
+class Budget:
+    def __init__(self, seconds: float | None):
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self._started = time.monotonic()
+        self.degraded: list[str] = []
+
+    def remaining(self) -> float:
+        if self.seconds is None:
+            return math.inf
+        return self.seconds - (time.monotonic() - self._started)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, per_call: float) -> float:
+        """Deadline for the next call; raises BudgetExceeded if nothing is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise BudgetExceeded("daily task time budget exhausted")
+        return min(per_call, remaining)
+
+    def degrade(self, item: str):
+        self.degraded.append(item)
+
+    @contextlib.contextmanager
+    def activate(self):
+        token = _current_budget.set(self)
+        try:
+            yield self
+        finally:
+            _current_budget.reset(token)
+
+
+def current() -> Budget | None:
+    return _current_budget.get()
+
+
+def call_timeout(per_call: float) -> float:
+    budget = _current_budget.get()
+    return budget.timeout(per_call) if budget is not None else per_call
+
+
+def can_wait(seconds: float) -> bool:
+    """Whether a backoff of ``seconds`` still leaves budget for another attempt."""
+    budget = _current_budget.get()
+    return budget is None or budget.remaining() > seconds
+
+
+def note_degraded(item: str):
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.degrade(item)
@@ -0,0 +1,18 @@
+"""Slash-command checks that read their configuration from the bot's AppContext."""
+
+import discord
+from discord import app_commands
+
+
+def is_staff():
+    """Like ``app_commands.checks.has_role(STAFF_ROLE_ID)``, resolved at call time.
+
+    Raises ``MissingRole`` so existing error handlers keep working.
+    """
+    async def predicate(interaction: discord.Interaction) -> bool:
+        role_id = interaction.client.app_context.settings.staff_role_id
+        if isinstance(interaction.user, discord.Member) and interaction.user.get_role(role_id) is not None:
+            return True
+        raise app_commands.MissingRole(role_id)
+
+    return app_commands.check(predicate)
@@ -0,0 +1,69 @@
+"""Periodic refresh of the data-health gauges.
+
+Prometheus scrapes only read gauges that this collector set earlier, so a
+scrape never queries Mongo. Each cycle costs two ``estimated_document_count``
+calls, which read collection metadata, plus ``guild.member_count``, which comes
+from the gateway and needs no member cache. The per-month ``$group`` scans the
+whole birthdays collection, so its result is cached and recomputed at most
+once per ``aggregation_ttl``.
+"""
+
+import asyncio
+import logging
+import time
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DataHealthCollector:
+    def __init__(self, db, guild_provider=None, interval: float = 300, aggregation_ttl: float = 3600):
+        self.db = db
+        self._guild_provider = guild_provider  # () -> discord.Guild | None
+        self.interval = interval
+        self.aggregation_ttl = aggregation_ttl
+        self._by_month: dict[int, int] | None = None
+        self._by_month_at: float | None = None
+
+    async def collect(self):
+        """Refresh every gauge once; one failing source does not stop the others."""
+        ok = True
+        for name, refresh in (
+            ("birthdays", self._refresh_birthdays),
+            ("role_log", self._refresh_role_log),
+            ("members", self._refresh_members),
+            ("distribution", self._refresh_distribution),
+        ):
+            try:
+                await refresh()
+            except Exception as exc:
+                ok = False
+                logger.warning("Data health refresh failed for %s", name,
+                               extra={"event": "data_health_error", "source": name, "error": str(exc)})
+        if ok:
+            metrics.set_data_health_success()
+
+    async def _refresh_birthdays(self):
+        metrics.update_birthday_count(await self.db.estimated_birthday_count())
+
+    async def _refresh_role_log(self):
+        metrics.update_role_log_size(await self.db.estimated_role_log_count())
+
+    async def _refresh_members(self):
+        guild = self._guild_provider() if self._guild_provider else None
+        if guild is not None and guild.member_count is not None:
+            metrics.update_member_count(guild.member_count)
+
+    async def _refresh_distribution(self):
+        now = time.monotonic()
+        if self._by_month_at is None or now - self._by_month_at >= self.aggregation_ttl:
+            self._by_month = await self.db.count_birthdays_by_month()
+            self._by_month_at = now
+        metrics.update_birthday_distribution(self._by_month)
+
+    async def run(self):
+        """Collect every ``interval`` seconds until cancelled."""
+        while True:
+            await self.collect()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,54 @@
+"""Day-of-year helpers for birthday range queries.
+
+Birthdays store ``doy``, their day of year in a leap year (2000), so every
+calendar date has one fixed number: Feb 29 is 60 and Mar 1 is always 61. In
+non-leap years, Feb 29 birthdays count as Feb 28.
+"""
+
+import calendar
+from datetime import date, timedelta
+
+LEAP_REFERENCE_YEAR = 2000
+DAYS_IN_LEAP_YEAR = 366
+FEB_29_DOY = 60
+
+
+def day_of_year(day: int, month: int) -> int:
+    """Day of year of (day, month) in the leap reference year; raises ValueError for bad dates."""
+    return date(LEAP_REFERENCE_YEAR, month, day).timetuple().tm_yday
+
+
+def date_from_doy(doy: int) -> tuple[int, int]:
+    """Inverse of :func:`day_of_year`: (day, month) for a doy in 1..366."""
+    ref = date(LEAP_REFERENCE_YEAR, 1, 1) + timedelta(days=doy - 1)
+    return ref.day, ref.month
+
+
+def doy_ranges(start: date, days: int) -> list[tuple[int, int]]:
+    """Inclusive doy ranges covering ``days`` days from ``start``, in calendar order.
+
+    A window that crosses Dec 31 becomes two ranges. In non-leap years a window
+    ending on Feb 28 also covers Feb 29 birthdays.
+    """
+    if days >= DAYS_IN_LEAP_YEAR:
+        return [(1, DAYS_IN_LEAP_YEAR)]
+    end = start + timedelta(days=days - 1)
+    lo = day_of_year(start.day, start.month)
+    hi = day_of_year(end.day, end.month)
+    if (end.month, end.day) == (2, 28) and not calendar.isleap(end.year):
+        hi = FEB_29_DOY
+    if lo <= hi and start.year == end.year:
+        return [(lo, hi)]
+    return [(lo, DAYS_IN_LEAP_YEAR), (1, hi)]
+
+
+def next_occurrence(day: int, month: int, today: date) -> date:
+    """The next date (today included) a birthday on (day, month) is celebrated."""
+    for year in (today.year, today.year + 1):
+        if (month, day) == (2, 29) and not calendar.isleap(year):
+            candidate = date(year, 2, 28)
+        else:
+            candidate = date(year, month, day)
+        if candidate >= today:
+            return candidate
+    raise ValueError("unreachable")  # pragma: no cover
@@ -1,47 +1,292 @@
 # utils/db_manager.py
-from dotenv import load_dotenv
-load_dotenv()
+import asyncio
+import functools
+import time
+from datetime import datetime, timezone
+
+from utils import metrics
+from utils.dates import day_of_year
+
+
+def _instrumented(collection: str, cursor: bool = False):
+    """Record the wrapped method in the DB metrics, labelled with its name and ``collection``.
+
+    With ``cursor=True`` the method returns a cursor, which costs nothing to
+    build. The returned cursor is wrapped instead, so the time spent fetching
+    from it, and any error while doing so, is what gets recorded.
+    """
+    def decorator(func):
+        operation = func.__name__
+
+        def finish(result):
+            return _TimedCursor(result, operation, collection) if cursor else result
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if cursor:
+                    return finish(await func(*args, **kwargs))
+                started = time.perf_counter()
+                status = "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    status = "success"
+                    return result
+                finally:
+                    metrics.record_db_operation(operation, collection, status, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if cursor:
+                return finish(func(*args, **kwargs))
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = func(*args, **kwargs)
+                status = "success"
+                return result
+            finally:
+                metrics.record_db_operation(operation, collection, status, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class _TimedCursor:
+    """A cursor recorded as one operation: the time spent awaiting its results, once drained or failed.
+
+    A cursor abandoned before its end is not recorded.
+    """
+
+    def __init__(self, cursor, operation: str, collection: str):
+        self._cursor = cursor
+        self._operation = operation
+        self._collection = collection
+        self._iterator = None
+        self._elapsed = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _timed(self, awaitable, done: bool):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await awaitable
+            status = "success"
+            return result
+        except StopAsyncIteration:
+            status, done = "success", True
+            raise
+        finally:
+            self._elapsed += time.perf_counter() - started
+            if done or status == "error":
+                metrics.record_db_operation(self._operation, self._collection, status, self._elapsed)
+
+    async def to_list(self, length: int | None = None) -> list:
+        return await self._timed(self._cursor.to_list(length=length), done=True)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iterator is None:
+            self._iterator = self._cursor.__aiter__()
+        return await self._timed(self._iterator.__anext__(), done=False)
 
-import os
-import motor.motor_asyncio
 
 class DatabaseManager:
-    def __init__(self):
-        mongo_uri = os.getenv("MONGO_URI")
-        if not mongo_uri:
-            raise ValueError("MONGO_URI not found in environment variables.")
-            
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(mongo_uri)
-        self.db = self.client.wishes_bot_db
-        self.birthdays = self.db.birthdays
-        self.manual_wishes = self.db.manual_wishes
-        self.birthday_role_log = self.db.birthday_role_log
-        self.scheduler_meta = self.db.scheduler_meta
+    def __init__(self, mongo_uri: str | None, db_name: str = "wishes_bot_db", client=None,
+                 client_options: dict | None = None):
+        # The Motor client (and the motor/pymongo import) is created on first use,
+        # unless one is injected (e.g. mongomock-motor in tests and benchmarks).
+        self._mongo_uri = mongo_uri
+        self._db_name = db_name
+        self._client = client
+        self._client_options = client_options or {}
         self._indexes_ensured = False
 
+    @property
+    def client(self):
+        if self._client is None:
+            if not self._mongo_uri:
+                raise ValueError("MONGO_URI not found in environment variables.")
+            import motor.motor_asyncio
+
+            from utils.db_monitoring import CommandMetricsListener, PoolMetricsListener
+
+            self._client = motor.motor_asyncio.AsyncIOMotorClient(
+                self._mongo_uri,
+                event_listeners=[CommandMetricsListener(), PoolMetricsListener()],
+                **self._client_options,
+            )
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self._db_name]
+
+    @property
+    def birthdays(self):
+        return self.db.birthdays
+
+    @property
+    def manual_wishes(self):
+        return self.db.manual_wishes
+
+    @property
+    def birthday_role_log(self):
+        return self.db.birthday_role_log
+
+    @property
+    def scheduler_meta(self):
+        return self.db.scheduler_meta
+
+    @property
+    def schema_migrations(self):
+        return self.db.schema_migrations
+
+    @property
+    def birthday_templates(self):
+        return self.db.birthday_templates
+
+    @property
+    def holiday_cache(self):
+        return self.db.holiday_cache
+
+    @property
+    def jobs(self):
+        return self.db.jobs
+
+    @property
+    def member_joins(self):
+        return self.db.member_joins
+
+    @property
+    def member_joins_rebuild(self):
+        # Staging for replace_member_joins, renamed over member_joins when complete
+        return self.db.member_joins_rebuild
+
+    @property
+    def wish_cache(self):
+        return self.db.wish_cache
+
+    @property
+    def reminder_subscriptions(self):
+        return self.db.reminder_subscriptions
+
     # --- Birthday Methods ---
-    async def set_birthday(self, user_id: int, day: int, month: int, year: int):
-        await self.birthdays.update_one(
-            {"_id": user_id},
-            {"$set": {"day": day, "month": month, "year": year}},
-            upsert=True
-        )
+    @_instrumented("birthdays")
+    async def set_birthday(self, user_id: int, day: int, month: int, year: int, locale: str | None = None):
+        """Store a birthday; ``locale`` is only changed when given."""
+        fields = {"day": day, "month": month, "year": year, "doy": day_of_year(day, month)}
+        if locale is not None:
+            fields["locale"] = locale
+        await self.birthdays.update_one({"_id": user_id}, {"$set": fields}, upsert=True)
+
+    @_instrumented("birthdays")
+    async def set_birthday_locale(self, user_id: int, locale: str | None) -> bool:
+        """Set the wish locale of a registered birthday (None: server default); False if there is none."""
+        update = {"$set": {"locale": locale}} if locale is not None else {"$unset": {"locale": ""}}
+        result = await self.birthdays.update_one({"_id": user_id}, update)
+        return result.matched_count > 0
 
+    @_instrumented("birthdays")
+    async def get_birthday_locales(self) -> list[str]:
+        """Every locale members have chosen, for keeping a template pool per language."""
+        return sorted(locale for locale in await self.birthdays.distinct("locale") if locale)
+
+    @_instrumented("birthdays")
     async def get_birthday(self, user_id: int):
         return await self.birthdays.find_one({"_id": user_id})
 
+    @_instrumented("birthdays")
     async def delete_birthday(self, user_id: int):
         result = await self.birthdays.delete_one({"_id": user_id})
         return result.deleted_count > 0
 
+    @_instrumented("birthdays", cursor=True)
     async def get_all_birthdays(self):
         return self.birthdays.find({})
 
     # FIX: This function is synchronous, so we remove 'async'
+    @_instrumented("birthdays", cursor=True)
     def get_birthdays_for_date(self, day: int, month: int):
         return self.birthdays.find({"day": day, "month": month})
     
+    @_instrumented("birthdays")
+    async def get_birthdays_in_doy_ranges(self, ranges: list[tuple[int, int]], limit: int, full: bool = False):
+        """Birthdays whose ``doy`` falls in the given inclusive ranges, in range order then doy order.
+
+        Only ``_id``, day, month and doy are returned unless ``full`` is set.
+        """
+        projection = None if full else {"day": 1, "month": 1, "doy": 1}
+        results = []
+        for low, high in ranges:
+            remaining = limit - len(results)
+            if remaining <= 0:
+                break
+            cursor = (
+                self.birthdays.find({"doy": {"$gte": low, "$lte": high}}, projection)
+                .sort([("doy", 1), ("_id", 1)])
+                .limit(remaining)
+            )
+            results.extend(await cursor.to_list(length=remaining))
+        return results
+
+    @_instrumented("birthdays")
+    async def get_birthday_dates(self) -> list[dict]:
+        """Every birthday's ``_id``, day and month in one pass (for whole-year precomputation)."""
+        return await self.birthdays.find({}, {"day": 1, "month": 1}).to_list(length=None)
+
+    @_instrumented("birthdays")
+    async def estimated_birthday_count(self) -> int:
+        """Collection-metadata count; no scan, so cheap enough for periodic gauges."""
+        return await self.birthdays.estimated_document_count()
+
+    @_instrumented("birthdays")
+    async def count_birthdays_by_month(self) -> dict[int, int]:
+        cursor = self.birthdays.aggregate([{"$group": {"_id": "$month", "count": {"$sum": 1}}}])
+        return {int(doc["_id"]): doc["count"] async for doc in cursor if doc["_id"] is not None}
+
+    @_instrumented("birthdays")
+    async def record_birthday_template_use(self, user_id: int, template_id: str, reset: bool = False):
+        """Remember that ``user_id`` received ``template_id``; ``reset`` starts their history over."""
+        update = {"$set": {"templates_used": [template_id]}} if reset else {"$addToSet": {"templates_used": template_id}}
+        await self.birthdays.update_one({"_id": user_id}, update)
+
+    # --- Birthday Templates ---
+    @staticmethod
+    def _template_query(locale: str) -> dict:
+        # Templates stored before locales existed are English
+        return {"locale": {"$in": [locale, None]}} if locale == "en" else {"locale": locale}
+
+    @_instrumented("birthday_templates")
+    async def add_birthday_templates(self, texts: list[str], locale: str = "en") -> int:
+        """Store templates keyed by content hash; returns how many were new."""
+        from utils.templates import template_id
+
+        added = 0
+        for text in texts:
+            result = await self.birthday_templates.update_one(
+                {"_id": template_id(text)},
+                {"$setOnInsert": {"text": text, "locale": locale, "created_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+            if result.upserted_id is not None:
+                added += 1
+        return added
+
+    @_instrumented("birthday_templates")
+    async def get_birthday_templates(self, locale: str = "en") -> list[dict]:
+        return await self.birthday_templates.find(self._template_query(locale), {"text": 1}).to_list(length=None)
+
+    @_instrumented("birthday_templates")
+    async def count_birthday_templates(self, locale: str = "en") -> int:
+        return await self.birthday_templates.count_documents(self._template_query(locale))
+
     # --- Birthday Role Logging ---
+    @_instrumented("birthday_role_log")
     async def add_user_to_role_log(self, user_id: int, date_added: str):
         await self.birthday_role_log.update_one(
             {"_id": user_id},
@@ -49,16 +294,24 @@ class DatabaseManager:
             upsert=True
         )
         
+    @_instrumented("birthday_role_log", cursor=True)
     async def get_users_with_birthday_role(self):
         return self.birthday_role_log.find({})
 
+    @_instrumented("birthday_role_log", cursor=True)
     async def get_all_role_logs(self):
         return self.birthday_role_log.find({})
     
+    @_instrumented("birthday_role_log")
+    async def estimated_role_log_count(self) -> int:
+        return await self.birthday_role_log.estimated_document_count()
+
+    @_instrumented("birthday_role_log")
     async def remove_user_from_role_log(self, user_id: int):
         await self.birthday_role_log.delete_one({"_id": user_id})
 
     # --- Scheduler Metadata ---
+    @_instrumented("scheduler_meta")
     async def upsert_scheduler_meta(self, name: str, next_run_at: str | None, last_run_at: str | None):
         update = {}
         if next_run_at is not None:
@@ -69,10 +322,186 @@ class DatabaseManager:
             return
         await self.scheduler_meta.update_one({"_id": name}, {"$set": update}, upsert=True)
 
+    @_instrumented("scheduler_meta")
+    async def update_scheduler_meta(self, name: str, fields: dict):
+        if not fields:
+            return
+        await self.scheduler_meta.update_one({"_id": name}, {"$set": fields}, upsert=True)
+
+    @_instrumented("scheduler_meta")
     async def get_scheduler_meta(self, name: str):
         return await self.scheduler_meta.find_one({"_id": name})
 
+    @_instrumented("scheduler_meta")
+    async def acquire_lease(self, name: str, owner: str, now: datetime, expires_at: datetime,
+                            acquired_at: datetime | None = None):
+        """Atomically take or renew lease ``name`` for ``owner``; returns the lease, or None if held elsewhere."""
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        fields = {"owner": owner, "expires_at": expires_at, "renewed_at": now}
+        if acquired_at is not None:
+            fields["acquired_at"] = acquired_at
+        try:
+            return await self.scheduler_meta.find_one_and_update(
+                {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": fields},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None  # The filter missed because another owner holds a live lease
+
+    @_instrumented("scheduler_meta")
+    async def release_lease(self, name: str, owner: str, now: datetime):
+        await self.scheduler_meta.update_one({"_id": name, "owner": owner}, {"$set": {"expires_at": now}})
+
+    # --- Holiday Cache ---
+    @_instrumented("holiday_cache")
+    async def get_cached_holidays(self, key: str):
+        return await self.holiday_cache.find_one({"_id": key})
+
+    @_instrumented("holiday_cache")
+    async def store_cached_holidays(self, key: str, holidays: list[dict], fetched_at):
+        await self.holiday_cache.update_one(
+            {"_id": key}, {"$set": {"holidays": holidays, "fetched_at": fetched_at}}, upsert=True
+        )
+
+    # --- Holiday Wish Cache ---
+    @_instrumented("wish_cache")
+    async def get_cached_wish(self, key: str) -> str | None:
+        doc = await self.wish_cache.find_one({"_id": key}, {"text": 1})
+        return doc["text"] if doc else None
+
+    @_instrumented("wish_cache")
+    async def store_cached_wish(self, key: str, text: str):
+        await self.wish_cache.update_one(
+            {"_id": key}, {"$set": {"text": text, "created_at": datetime.now(timezone.utc)}}, upsert=True
+        )
+
+    # --- Job Queue ---
+    @_instrumented("jobs")
+    async def enqueue_job(self, job: dict) -> bool:
+        """Insert ``job``; returns False if a job with the same ``_id`` already exists."""
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            await self.jobs.insert_one(job)
+        except DuplicateKeyError:
+            return False
+        return True
+
+    @_instrumented("jobs")
+    async def claim_job(self, owner: str, now: datetime, locked_until: datetime, kinds=None):
+        """Atomically take the oldest due job (or one whose previous owner's lock ran out)."""
+        from pymongo import ReturnDocument
+
+        query = {"$or": [
+            {"status": "pending", "run_at": {"$lte": now}},
+            {"status": "running", "locked_until": {"$lte": now}},
+        ]}
+        if kinds:
+            query["kind"] = {"$in": list(kinds)}
+        return await self.jobs.find_one_and_update(
+            query,
+            {"$set": {"status": "running", "owner": owner, "locked_until": locked_until, "started_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @_instrumented("jobs")
+    async def update_job(self, job_id, owner: str, fields: dict) -> bool:
+        """Update a job this owner still holds; False if the lock was lost to another worker."""
+        result = await self.jobs.update_one({"_id": job_id, "owner": owner, "status": "running"}, {"$set": fields})
+        return result.matched_count > 0
+
+    @_instrumented("jobs")
+    async def purge_finished_jobs(self, before: datetime) -> int:
+        """Delete done and failed jobs that finished before ``before``; returns how many."""
+        result = await self.jobs.delete_many({"status": {"$in": ["done", "failed"]}, "finished_at": {"$lt": before}})
+        return result.deleted_count
+
+    @_instrumented("jobs")
+    async def count_jobs(self, status: str) -> int:
+        return await self.jobs.count_documents({"status": status})
+
+    # --- Member Join Snapshot ---
+    @_instrumented("member_joins")
+    async def set_member_join(self, entry: dict):
+        """Store one ``utils.anniversaries.snapshot_entry`` document; ``stored_at`` lets a running rebuild keep it."""
+        await self.member_joins.replace_one(
+            {"_id": entry["_id"]}, {**entry, "stored_at": datetime.now(timezone.utc)}, upsert=True
+        )
+
+    @_instrumented("member_joins")
+    async def delete_member_join(self, user_id: int):
+        await self.member_joins.delete_one({"_id": user_id})
+
+    @_instrumented("member_joins")
+    async def replace_member_joins(self, entries: list[dict]):
+        """Replace the whole snapshot with ``entries``.
+
+        The new snapshot is built in a staging collection, in batches of 1000,
+        and renamed over ``member_joins`` in one step. A daily run (or a crash)
+        during the build therefore sees the complete old snapshot, never an
+        empty or partial one. Entries stored by member join events during the
+        build are carried over.
+        """
+        started = datetime.now(timezone.utc)
+        staging = self.member_joins_rebuild
+        await staging.drop()  # left behind by a rebuild that crashed
+        for start in range(0, len(entries), 1000):
+            await staging.insert_many(entries[start:start + 1000], ordered=False)
+        await staging.create_index([("doy", 1), ("_id", 1)])
+        # Mongo keeps milliseconds, so an event in the very millisecond the build started is not carried over
+        async for entry in self.member_joins.find({"stored_at": {"$gt": started}}):
+            await staging.replace_one({"_id": entry["_id"]}, entry, upsert=True)
+        await staging.rename(self.member_joins.name, dropTarget=True)
+
+    @_instrumented("member_joins")
+    async def get_member_joins_in_doy_ranges(self, ranges: list[tuple[int, int]]) -> list[dict]:
+        """``_id``, ``doy`` and join ``year`` of every snapshot entry whose ``doy`` is in the inclusive ranges."""
+        results = []
+        for low, high in ranges:
+            cursor = self.member_joins.find({"doy": {"$gte": low, "$lte": high}}, {"doy": 1, "year": 1}).sort("_id", 1)
+            results.extend(await cursor.to_list(length=None))
+        return results
+
+    # --- Birthday Reminder Subscriptions ---
+    @_instrumented("reminder_subscriptions")
+    async def add_reminder_subscription(self, subscriber_id: int, kind: str, target_id: int, days_before: int):
+        """Follow a user's (``kind="user"``) or a role's (``kind="role"``) birthdays; re-following updates ``days_before``."""
+        await self.reminder_subscriptions.update_one(
+            {"_id": f"{subscriber_id}:{kind}:{target_id}"},
+            {"$set": {"subscriber_id": subscriber_id, "kind": kind, "target_id": target_id, "days_before": days_before}},
+            upsert=True,
+        )
+
+    @_instrumented("reminder_subscriptions")
+    async def remove_reminder_subscriptions(self, subscriber_id: int, kind: str | None = None,
+                                            target_id: int | None = None) -> int:
+        """Drop one subscription, or all of ``subscriber_id``'s when ``kind`` is None; returns how many went."""
+        query = {"subscriber_id": subscriber_id}
+        if kind is not None:
+            query.update({"kind": kind, "target_id": target_id})
+        result = await self.reminder_subscriptions.delete_many(query)
+        return result.deleted_count
+
+    @_instrumented("reminder_subscriptions")
+    async def get_reminder_subscriptions(self, subscriber_id: int) -> list[dict]:
+        return await self.reminder_subscriptions.find({"subscriber_id": subscriber_id}).sort("_id", 1).to_list(length=None)
+
+    @_instrumented("reminder_subscriptions")
+    async def get_reminder_subscribers(self, kind: str, target_ids=None) -> list[dict]:
+        """Subscriptions of ``kind`` following any of ``target_ids`` (every one of that kind when None)."""
+        query = {"kind": kind}
+        if target_ids is not None:
+            query["target_id"] = {"$in": list(target_ids)}
+        return await self.reminder_subscriptions.find(query).sort("_id", 1).to_list(length=None)
+
     # --- Manual Wish Methods (can be expanded) ---
+    @_instrumented("manual_wishes")
     async def add_manual_wish(self, name: str, day: int, month: int, year: int, message: str, role_id: int):
         wish_doc = {
             "name": name,
@@ -84,13 +513,26 @@ class DatabaseManager:
         }
         await self.manual_wishes.insert_one(wish_doc)
 
+    @_instrumented("manual_wishes")
+    async def get_manual_wishes_for_years(self, first_year: int, last_year: int) -> list[dict]:
+        return await self.manual_wishes.find(
+            {"year": {"$gte": first_year, "$lte": last_year}}, {"name": 1, "day": 1, "month": 1, "year": 1}
+        ).to_list(length=None)
+
     # --- Indexes ---
+    @_instrumented("all")
     async def ensure_indexes(self):
-        """Create helpful indexes; safe to call multiple times."""
+        """Create helpful indexes; safe to call multiple times.
+
+        Indexes on fields added after launch (e.g. ``doy``) are built by the
+        versioned migrations in ``utils/migrations.py`` instead.
+        """
         if self._indexes_ensured:
             return
         await self.birthdays.create_index([("day", 1), ("month", 1)])
         await self.birthday_role_log.create_index("date_added")
         self._indexes_ensured = True
 
-db_manager = DatabaseManager()
\ No newline at end of file
+    def close(self):
+        if self._client is not None:
+            self._client.close()
@@ -0,0 +1,89 @@
+"""pymongo event listeners that export driver-level metrics.
+
+``CommandMetricsListener`` times every command on the server round trip, which
+includes cursor ``getMore`` batches that the DatabaseManager wrappers cannot
+see. ``PoolMetricsListener`` reports how long operations wait for a pooled
+connection and how many connections are open or checked out, which shows
+when ``MONGO_MAX_POOL_SIZE`` is too small.
+
+Imported only when the Motor client is created, so importing pymongo stays off
+the startup path.
+"""
+
+import threading
+
+from pymongo import monitoring
+
+from utils import metrics
+
+
+def _observe_checkout(status: str, event):
+    # ``duration`` (seconds) was added in pymongo 4.7
+    duration = getattr(event, "duration", None)
+    if duration is not None:
+        metrics.mongo_pool_checkout_wait.labels(status=status).observe(duration)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.mongo_command_duration.labels(command=event.command_name, status="success").observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        metrics.mongo_command_duration.labels(command=event.command_name, status="error").observe(
+            event.duration_micros / 1_000_000
+        )
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Pool gauges; pymongo calls listeners from its own threads, hence the lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+
+    def _adjust(self, open_delta=0, in_use_delta=0):
+        with self._lock:
+            self._open = max(self._open + open_delta, 0)
+            self._in_use = max(self._in_use + in_use_delta, 0)
+            metrics.mongo_pool_connections.set(self._open)
+            metrics.mongo_pool_connections_in_use.set(self._in_use)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._adjust(open_delta=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._adjust(open_delta=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        _observe_checkout("error", event)
+
+    def connection_checked_out(self, event):
+        _observe_checkout("success", event)
+        self._adjust(in_use_delta=1)
+
+    def connection_checked_in(self, event):
+        self._adjust(in_use_delta=-1)
@@ -0,0 +1,341 @@
+"""Holiday providers: local calendar files, Calendarific and a Mongo cache.
+
+``ApiClient.get_holidays`` delegates to a provider when one is set. The usual
+setup built by ``AppContext`` is a chain:
+
+1. ``LocalCalendarProvider`` reads ICS/JSON files (``HOLIDAY_CALENDARS``)
+   once at startup into a date index, for events Calendarific does not know.
+2. ``HolidayCache`` serves a month fetched less than ``HOLIDAY_CACHE_MAX_AGE_DAYS``
+   ago, so daily checks of a known month need no network.
+3. ``CalendarificProvider`` is otherwise asked for the month. Each answer is
+   stored in the cache, which also serves it when Calendarific is unreachable.
+
+A provider returns a list (possibly empty) when it can answer and None when it
+cannot, which hands the question to the next provider. Local events are not
+an answer on their own: they are merged with the network (or cached) answer,
+and a holiday found in both is listed once. Holidays use
+Calendarific's shape (``{"name", "description", "date": {"iso"}}``) plus a
+``source`` field.
+
+JSON calendars hold a list (or ``{"holidays": [...]}``) of entries like::
+
+    {"name": "Earth Day", "date": "2026-04-22", "recurring": true}
+    {"name": "Thanksgiving", "date": "2026-11-26", "rrule": "FREQ=YEARLY;BYMONTH=11;BYDAY=4TH"}
+    {"name": "Founders' Day", "date": "2026-07-14"}
+
+ICS calendars use VEVENT ``SUMMARY``/``DESCRIPTION``/``DTSTART`` and yearly
+``RRULE`` (BYMONTH, BYMONTHDAY, BYDAY with an ordinal, INTERVAL, COUNT, UNTIL).
+"""
+
+import calendar
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from utils.api_client import normalize_holiday_name
+
+logger = logging.getLogger(__name__)
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+
+class HolidayProvider:
+    name = "provider"
+
+    async def get_holidays(self, year: int, month: int) -> list[dict] | None:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class _Event:
+    name: str
+    description: str
+    start: date
+    # Yearly recurrence; None for a one-off event
+    interval: int | None = None
+    month: int | None = None
+    month_day: int | None = None
+    weekday: int | None = None
+    ordinal: int | None = None
+    until: date | None = None
+    count: int | None = None
+
+    def occurrence(self, year: int) -> date | None:
+        if self.interval is None:
+            return self.start if self.start.year == year else None
+        if year < self.start.year or (year - self.start.year) % self.interval:
+            return None
+        if self.count is not None and (year - self.start.year) // self.interval >= self.count:
+            return None
+        month = self.month or self.start.month
+        if self.weekday is not None:
+            day = _nth_weekday(year, month, self.weekday, self.ordinal or 1)
+        else:
+            day = self.month_day or self.start.day
+            if day < 0:
+                day = calendar.monthrange(year, month)[1] + day + 1
+        try:
+            found = date(year, month, day) if day else None
+        except ValueError:
+            return None  # e.g. Feb 29 in a common year, as RFC 5545 skips it
+        if found is None or (self.until is not None and found > self.until):
+            return None
+        return found
+
+
+def _nth_weekday(year: int, month: int, weekday: int, ordinal: int) -> int | None:
+    days = [week[weekday] for week in calendar.monthcalendar(year, month) if week[weekday]]
+    try:
+        return days[ordinal - 1] if ordinal > 0 else days[ordinal]
+    except IndexError:
+        return None
+
+
+def _parse_date(value: str) -> date:
+    value = value.strip()
+    if "-" in value:
+        return date.fromisoformat(value[:10])
+    return datetime.strptime(value[:8], "%Y%m%d").date()
+
+
+def _parse_rrule(rule: str, name: str, description: str, start: date) -> _Event | None:
+    parts = dict(part.split("=", 1) for part in rule.strip().split(";") if "=" in part)
+    if parts.get("FREQ", "").upper() != "YEARLY":
+        logger.warning("Skipping %s: only yearly RRULEs are supported", name, extra={"event": "holiday_rrule_unsupported", "rrule": rule})
+        return None
+    weekday = ordinal = None
+    if "BYDAY" in parts:
+        by_day = parts["BYDAY"].split(",")[0].upper()
+        weekday = _WEEKDAYS[by_day[-2:]]
+        ordinal = int(by_day[:-2] or 1)
+    return _Event(
+        name=name, description=description, start=start,
+        interval=int(parts.get("INTERVAL", 1)),
+        month=int(parts["BYMONTH"].split(",")[0]) if "BYMONTH" in parts else None,
+        month_day=int(parts["BYMONTHDAY"].split(",")[0]) if "BYMONTHDAY" in parts else None,
+        weekday=weekday, ordinal=ordinal,
+        until=_parse_date(parts["UNTIL"]) if "UNTIL" in parts else None,
+        count=int(parts["COUNT"]) if "COUNT" in parts else None,
+    )
+
+
+def parse_json_calendar(text: str) -> list[_Event]:
+    data = json.loads(text)
+    entries = data.get("holidays", []) if isinstance(data, dict) else data
+    events = []
+    for entry in entries:
+        try:
+            name, start = entry["name"], _parse_date(entry["date"])
+            description = entry.get("description", "")
+            if entry.get("rrule"):
+                event = _parse_rrule(entry["rrule"], name, description, start)
+            elif entry.get("recurring"):
+                event = _Event(name=name, description=description, start=start, interval=1)
+            else:
+                event = _Event(name=name, description=description, start=start)
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.warning("Skipping invalid calendar entry %r: %s", entry, exc, extra={"event": "holiday_entry_invalid"})
+            continue
+        if event:
+            events.append(event)
+    return events
+
+
+def _unescape_ics(value: str) -> str:
+    return value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def parse_ics_calendar(text: str) -> list[_Event]:
+    # Unfold continuation lines (RFC 5545 3.1) before splitting properties
+    lines = text.replace("\r\n", "\n").replace("\n ", "").replace("\n\t", "").split("\n")
+    events, current = [], None
+    for line in lines:
+        if line == "BEGIN:VEVENT":
+            current = {}
+        elif line == "END:VEVENT" and current is not None:
+            try:
+                name = _unescape_ics(current["SUMMARY"])
+                start = _parse_date(current["DTSTART"])
+                description = _unescape_ics(current.get("DESCRIPTION", ""))
+                if "RRULE" in current:
+                    event = _parse_rrule(current["RRULE"], name, description, start)
+                else:
+                    event = _Event(name=name, description=description, start=start)
+            except (KeyError, ValueError) as exc:
+                logger.warning("Skipping invalid VEVENT: %s", exc, extra={"event": "holiday_entry_invalid"})
+                event = None
+            if event:
+                events.append(event)
+            current = None
+        elif current is not None and ":" in line:
+            key, value = line.split(":", 1)
+            current[key.split(";", 1)[0].upper()] = value
+    return events
+
+
+class LocalCalendarProvider(HolidayProvider):
+    """Holidays from local ICS/JSON files (or directories of them), parsed once."""
+
+    name = "local"
+
+    def __init__(self, paths):
+        self.events: list[_Event] = []
+        self._by_year: dict[int, dict[int, list[dict]]] = {}
+        for path in paths:
+            for file_path in self._files(path):
+                self.events.extend(self._load(file_path))
+        logger.info("Loaded %s local holiday events", len(self.events), extra={"event": "holiday_calendars_loaded", "count": len(self.events)})
+
+    @staticmethod
+    def _files(path: str) -> list[str]:
+        if os.path.isdir(path):
+            return sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith((".ics", ".json"))
+            )
+        return [path]
+
+    @staticmethod
+    def _load(file_path: str) -> list[_Event]:
+        try:
+            with open(file_path, encoding="utf-8") as handle:
+                text = handle.read()
+            if file_path.lower().endswith(".ics"):
+                return parse_ics_calendar(text)
+            return parse_json_calendar(text)
+        except (OSError, ValueError) as exc:
+            logger.error("Failed to load holiday calendar %s: %s", file_path, exc, extra={"event": "holiday_calendar_error", "path": file_path})
+            return []
+
+    def _index(self, year: int) -> dict[int, list[dict]]:
+        """Month-keyed holidays for ``year``; recurring rules are expanded once per year."""
+        if year not in self._by_year:
+            by_month: dict[int, list[dict]] = {}
+            for event in self.events:
+                day = event.occurrence(year)
+                if day is not None:
+                    by_month.setdefault(day.month, []).append({
+                        "name": event.name,
+                        "description": event.description,
+                        "date": {"iso": day.isoformat()},
+                        "source": self.name,
+                    })
+            for holidays in by_month.values():
+                holidays.sort(key=lambda holiday: holiday["date"]["iso"])
+            self._by_year[year] = by_month
+        return self._by_year[year]
+
+    async def get_holidays(self, year: int, month: int) -> list[dict] | None:
+        if not self.events:
+            return None
+        return list(self._index(year).get(month, []))
+
+
+class CalendarificProvider(HolidayProvider):
+    name = "calendarific"
+
+    def __init__(self, api):
+        self.api = api
+
+    async def get_holidays(self, year: int, month: int) -> list[dict] | None:
+        holidays = await self.api.fetch_calendarific_holidays(year, month)
+        if holidays is None:
+            return None
+        return [{**holiday, "source": self.name} for holiday in holidays]
+
+
+class HolidayCache(HolidayProvider):
+    """Last successful network answer per month, kept in Mongo."""
+
+    name = "cache"
+
+    def __init__(self, db):
+        self.db = db
+
+    async def _load(self, year: int, month: int) -> dict | None:
+        try:
+            return await self.db.get_cached_holidays(f"{year:04d}-{month:02d}")
+        except Exception as exc:
+            logger.warning("Holiday cache unavailable", extra={"event": "holiday_cache_error", "error": str(exc)})
+            return None
+
+    async def get_holidays(self, year: int, month: int) -> list[dict] | None:
+        cached = await self._load(year, month)
+        return cached["holidays"] if cached else None
+
+    async def get_fresh(self, year: int, month: int, max_age: timedelta) -> list[dict] | None:
+        """The cached month if it was fetched less than ``max_age`` ago, else None."""
+        cached = await self._load(year, month)
+        fetched_at = cached.get("fetched_at") if cached else None
+        if fetched_at is None:
+            return None
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC
+        if datetime.now(timezone.utc) - fetched_at >= max_age:
+            return None
+        return cached["holidays"]
+
+    async def store(self, year: int, month: int, holidays: list[dict]):
+        try:
+            await self.db.store_cached_holidays(f"{year:04d}-{month:02d}", holidays, datetime.now(timezone.utc))
+        except Exception as exc:
+            logger.warning("Failed to cache holidays", extra={"event": "holiday_cache_store_error", "error": str(exc)})
+
+
+class ChainProvider(HolidayProvider):
+    """Local events merged with a fresh cached month or the first network answer; a stale cache is the last resort."""
+
+    name = "chain"
+
+    def __init__(self, providers: list[HolidayProvider], cache: HolidayCache | None = None,
+                 max_age: timedelta | None = None):
+        self.providers = providers
+        self.cache = cache
+        self.max_age = max_age  # None or zero: always ask the network first
+
+    async def get_holidays(self, year: int, month: int) -> list[dict] | None:
+        local: list[dict] | None = None
+        network: list[dict] | None = None
+        if self.cache is not None and self.max_age:
+            network = await self.cache.get_fresh(year, month, self.max_age)
+        for provider in self.providers:
+            if network is not None and provider.name != LocalCalendarProvider.name:
+                continue
+            holidays = await provider.get_holidays(year, month)
+            if holidays is None:
+                continue
+            if provider.name == LocalCalendarProvider.name:
+                local = (local or []) + holidays
+                continue
+            if self.cache is not None:
+                await self.cache.store(year, month, holidays)
+            network = holidays
+        if network is None and self.cache is not None:
+            network = await self.cache.get_holidays(year, month)
+            if network is not None:
+                logger.warning("Serving holidays from cache", extra={"event": "holiday_cache_hit", "year": year, "month": month})
+        if local is None:
+            return network
+        return _merge(local, network or [])
+
+
+def _merge(*lists: list[dict]) -> list[dict]:
+    """Holidays from every list in date order; a name already seen on the same date is dropped."""
+    merged, seen = [], set()
+    for holidays in lists:
+        for holiday in holidays:
+            key = (holiday["date"]["iso"], normalize_holiday_name(holiday["name"]))
+            if key not in seen:
+                seen.add(key)
+                merged.append(holiday)
+    return sorted(merged, key=lambda holiday: holiday["date"]["iso"])
+
+
+def build_provider(api, db, calendar_paths=(), use_cache: bool = True,
+                   cache_max_age: timedelta | None = None) -> ChainProvider:
+    providers: list[HolidayProvider] = []
+    if calendar_paths:
+        providers.append(LocalCalendarProvider(calendar_paths))
+    providers.append(CalendarificProvider(api))
+    return ChainProvider(providers, HolidayCache(db) if use_cache else None, cache_max_age)
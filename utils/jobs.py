@@ -0,0 +1,139 @@
+"""Mongo-backed job queue shared by the gateway and the workers.
+
+Jobs live in the ``jobs`` collection::
+
+    {"_id", "kind", "payload", "status": "pending"|"running"|"done"|"failed",
+     "run_at", "attempts", "owner", "locked_until", "error"}
+
+A worker claims the oldest due job with one ``find_one_and_update``, which
+sets ``status: running`` and a lock. ``run_job`` renews the lock every third
+of ``lock_seconds`` while the handler runs, so a job may run longer than the
+lock. A worker that crashes mid-job stops renewing and leaves the lock to
+expire, and then another worker claims the job again, so delivery is
+at-least-once. A handler that raises has its job rescheduled with backoff
+until ``max_attempts``, then left as ``failed`` for a human. Done and failed
+jobs are deleted by ``purge`` once old enough (the ``purge_jobs`` job). The daily task
+reports its own errors to staff and does not raise, because a blind retry
+could post the day's wishes twice.
+
+Passing ``job_id`` makes ``enqueue`` idempotent. Every worker can then try to
+schedule the same run (``daily_task:2026-10-18T00:01:00+00:00``), and only the first
+insert wins.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    def __init__(self, db, owner: str, lock_seconds: float = 600, max_attempts: int = 3,
+                 retry_delay: float = 60):
+        self.db = db
+        self.owner = owner
+        self.lock_seconds = lock_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    async def enqueue(self, kind: str, payload: dict | None = None, run_at: datetime | None = None,
+                      job_id: str | None = None) -> bool:
+        """Queue a job; returns False if ``job_id`` is already queued (or was run)."""
+        job = {
+            "kind": kind,
+            "payload": payload or {},
+            "status": "pending",
+            "run_at": run_at or datetime.now(timezone.utc),
+            "attempts": 0,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if job_id is not None:
+            job["_id"] = job_id
+        return await self.db.enqueue_job(job)
+
+    async def claim(self, kinds=None) -> dict | None:
+        now = datetime.now(timezone.utc)
+        return await self.db.claim_job(self.owner, now, now + timedelta(seconds=self.lock_seconds), kinds)
+
+    async def renew(self, job: dict) -> bool:
+        """Push the lock of a job this worker runs forward; False if it was lost."""
+        locked_until = datetime.now(timezone.utc) + timedelta(seconds=self.lock_seconds)
+        return await self.db.update_job(job["_id"], self.owner, {"locked_until": locked_until})
+
+    async def complete(self, job: dict, duration: float | None = None):
+        finished = await self.db.update_job(
+            job["_id"], self.owner, {"status": "done", "finished_at": datetime.now(timezone.utc), "error": None}
+        )
+        self._record(job, "success" if finished else "lost", duration)
+
+    async def fail(self, job: dict, error: str, duration: float | None = None):
+        """Reschedule with exponential backoff, or give up after ``max_attempts``."""
+        now = datetime.now(timezone.utc)
+        attempts = job.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            fields, status = {"status": "failed", "finished_at": now, "error": error}, "failed"
+        else:
+            retry_at = now + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+            fields, status = {"status": "pending", "run_at": retry_at, "error": error}, "retry"
+        if not await self.db.update_job(job["_id"], self.owner, fields):
+            status = "lost"
+        logger.warning(
+            "Job %s failed (attempt %s): %s", job["_id"], attempts, error,
+            extra={"event": "job_failed", "job": str(job["_id"]), "kind": job["kind"], "attempt": attempts, "outcome": status},
+        )
+        self._record(job, status, duration)
+
+    async def purge(self, older_than: timedelta) -> int:
+        """Delete done and failed jobs that finished more than ``older_than`` ago; returns how many."""
+        return await self.db.purge_finished_jobs(datetime.now(timezone.utc) - older_than)
+
+    async def pending_count(self) -> int:
+        count = await self.db.count_jobs("pending")
+        metrics.set_jobs_pending(count)
+        return count
+
+    @staticmethod
+    def _record(job: dict, status: str, duration: float | None):
+        run_at, started_at = _aware(job.get("run_at")), _aware(job.get("started_at"))
+        delay = (started_at - run_at).total_seconds() if run_at and started_at else None
+        metrics.record_job(job["kind"], status, duration, delay)
+
+
+async def run_job(queue: JobQueue, job: dict, handler) -> bool:
+    """Run ``handler(payload)`` for a claimed job and settle it; returns whether it succeeded."""
+    started = time.perf_counter()
+    heartbeat = asyncio.create_task(_keep_lock(queue, job))
+    try:
+        await handler(job.get("payload") or {})
+    except Exception as exc:
+        logger.exception("Job %s raised", job["_id"], extra={"event": "job_error", "job": str(job["_id"]), "kind": job["kind"]})
+        await queue.fail(job, str(exc), time.perf_counter() - started)
+        return False
+    finally:
+        heartbeat.cancel()
+    await queue.complete(job, time.perf_counter() - started)
+    return True
+
+
+async def _keep_lock(queue: JobQueue, job: dict):
+    """Renew the job's lock until cancelled, so a long run is not claimed by a second worker."""
+    while True:
+        await asyncio.sleep(queue.lock_seconds / 3)
+        try:
+            if not await queue.renew(job):
+                logger.warning("Lost the lock on job %s", job["_id"], extra={"event": "job_lock_lost", "job": str(job["_id"]), "kind": job["kind"]})
+                return
+        except Exception as exc:
+            # Keep trying: the lock is still valid for two more intervals
+            logger.warning("Failed to renew job lock", extra={"event": "job_lock_error", "job": str(job["_id"]), "error": str(exc)})
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # Mongo returns naive UTC datetimes unless the client is tz_aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
@@ -0,0 +1,129 @@
+"""Lease-based leader election so several replicas can run safely.
+
+Every replica runs a ``LeaderElector``. They compete for one document in
+``scheduler_meta`` (``_id: "leader"``) that names an ``owner`` and an
+``expires_at``. Taking or renewing the lease is a single
+``find_one_and_update``. It matches only when the caller already owns the
+lease or the lease has expired, so at most one replica holds it at a time.
+
+Only the leader runs the daily task and the other scheduled jobs. The leader
+renews every ``renew_interval`` seconds. If it dies, a standby takes over
+within ``lease_seconds + renew_interval``, and then runs any daily job that
+fell due during the hand-over and that nobody started (see
+``utils/scheduler.py``). A leader that cannot renew steps
+down once its own lease has expired, even if Mongo is unreachable. On a
+clean shutdown the lease is released, so a standby can take over on its next
+renewal.
+
+The same elector with another ``name`` picks one worker for other
+singleton work, such as sending reminder DMs; only the scheduler lease
+(``leader``) is reported in the leader metrics.
+
+Expiry is compared against each replica's clock, so replicas need
+NTP-synchronised clocks. The lease should be much longer than any expected
+clock skew.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "leader"
+
+
+def default_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderElector:
+    def __init__(self, db, owner: str | None = None, lease_seconds: float = 30, renew_interval: float = 10,
+                 name: str = LEASE_NAME):
+        if renew_interval >= lease_seconds:
+            raise ValueError("renew_interval must be shorter than lease_seconds")
+        self.db = db
+        self.owner = owner or default_owner_id()
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval
+        self.name = name
+        self.is_leader = False
+        self.leader: str | None = None
+        self._acquired_at: datetime | None = None
+        self._expires_at: datetime | None = None
+        self._ready = asyncio.Event()
+
+    async def renew(self) -> bool:
+        """Take or extend the lease; returns whether this replica is now the leader."""
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await self.db.acquire_lease(
+                self.name, self.owner, now, now + timedelta(seconds=self.lease_seconds),
+                acquired_at=None if self.is_leader else now,
+            )
+            if lease is None:
+                lease = await self.db.get_scheduler_meta(self.name)
+        except Exception as exc:
+            # Keep leading only while our last successful lease is still valid
+            still_valid = self.is_leader and self._expires_at is not None and now < self._expires_at
+            logger.warning("Lease renewal failed", extra={"event": "leader_renew_error", "error": str(exc), "still_leader": still_valid})
+            self._set_state(still_valid, self.owner if still_valid else None, self._acquired_at, self._expires_at)
+            return self.is_leader
+
+        owned = lease is not None and lease.get("owner") == self.owner
+        self._set_state(
+            owned,
+            lease.get("owner") if lease else None,
+            _aware(lease.get("acquired_at")) if lease else None,
+            _aware(lease.get("expires_at")) if lease else None,
+        )
+        return self.is_leader
+
+    def _set_state(self, is_leader: bool, leader: str | None, acquired_at, expires_at):
+        if is_leader != self.is_leader:
+            logger.info(
+                "Became leader" if is_leader else "Lost leadership",
+                extra={"event": "leader_acquired" if is_leader else "leader_lost", "owner": self.owner, "leader": leader},
+            )
+            if self.name == LEASE_NAME:
+                metrics.record_leader_transition("acquired" if is_leader else "lost")
+        self.is_leader = is_leader
+        self.leader = leader
+        self._acquired_at = acquired_at
+        self._expires_at = expires_at
+        if self.name == LEASE_NAME:
+            age = (datetime.now(timezone.utc) - acquired_at).total_seconds() if acquired_at else 0
+            metrics.set_leader_state(is_leader, age)
+        self._ready.set()
+
+    async def wait_ready(self):
+        """Wait until the first election round has finished."""
+        await self._ready.wait()
+
+    async def run(self):
+        """Renew the lease every ``renew_interval`` seconds until cancelled."""
+        while True:
+            await self.renew()
+            await asyncio.sleep(self.renew_interval)
+
+    async def release(self):
+        """Give the lease up on clean shutdown so a standby takes over at its next renewal."""
+        if not self.is_leader:
+            return
+        try:
+            await self.db.release_lease(self.name, self.owner, datetime.now(timezone.utc))
+        except Exception as exc:
+            logger.warning("Failed to release lease", extra={"event": "leader_release_error", "error": str(exc)})
+        self._set_state(False, None, None, None)
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # Mongo returns naive UTC datetimes unless the client is tz_aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
@@ -0,0 +1,101 @@
+"""Wish languages: localized prompts and fallback texts, and the holiday wish cache key.
+
+A member picks a locale with ``/birthday language`` (or the ``locale``
+option of ``/birthday set``); it is stored on their birthday and used for
+their wish. Everyone else gets the server's ``DEFAULT_LOCALE``. Holiday
+wishes are posted once per ``HOLIDAY_LOCALES`` (default: ``DEFAULT_LOCALE``).
+
+Generated holiday wishes are cached in ``wish_cache`` under
+``<year>:<locale>:<normalized holiday>``. The prepare job, the daily post,
+retries and restarts then share one Gemini call per holiday and language
+each year. Birthday wishes come from a template pool kept per locale
+(``utils/templates.py``).
+"""
+
+from dataclasses import dataclass
+
+DEFAULT_LOCALE = "en"
+
+
+@dataclass(frozen=True)
+class Locale:
+    language: str  # English name, as used in prompts
+    holiday_fallback: str  # {holiday}
+    birthday_fallback: str  # {name} and {mention}
+
+
+LOCALES = {
+    "en": Locale(
+        "English",
+        "Happy {holiday}! Wishing everyone a wonderful celebration.",
+        "# 🎉 Happy Birthday, {name}! 🎉\n\n> Hope you have a fantastic day filled with joy and laughter!\n\n"
+        "Everyone, please wish a happy birthday to {mention}!",
+    ),
+    "es": Locale(
+        "Spanish",
+        "¡Feliz {holiday}! Les deseamos a todos una maravillosa celebración.",
+        "# 🎉 ¡Feliz cumpleaños, {name}! 🎉\n\n> ¡Que tengas un día fantástico, lleno de alegría y risas!\n\n"
+        "¡Todos, deséenle un feliz cumpleaños a {mention}!",
+    ),
+    "fr": Locale(
+        "French",
+        "Bonne fête : {holiday} ! Nous vous souhaitons à tous une merveilleuse célébration.",
+        "# 🎉 Joyeux anniversaire, {name} ! 🎉\n\n> Passe une journée fantastique, pleine de joie et de rires !\n\n"
+        "Tout le monde, souhaitez un joyeux anniversaire à {mention} !",
+    ),
+    "de": Locale(
+        "German",
+        "Frohes Fest: {holiday}! Wir wünschen allen eine wunderschöne Feier.",
+        "# 🎉 Alles Gute zum Geburtstag, {name}! 🎉\n\n> Wir wünschen dir einen fantastischen Tag voller Freude und Lachen!\n\n"
+        "Alle zusammen: Gratuliert {mention} zum Geburtstag!",
+    ),
+    "pt": Locale(
+        "Portuguese",
+        "Feliz {holiday}! Desejamos a todos uma celebração maravilhosa.",
+        "# 🎉 Feliz aniversário, {name}! 🎉\n\n> Que o seu dia seja fantástico, cheio de alegria e risadas!\n\n"
+        "Pessoal, desejem um feliz aniversário para {mention}!",
+    ),
+    "it": Locale(
+        "Italian",
+        "Buona festa: {holiday}! Auguriamo a tutti una splendida celebrazione.",
+        "# 🎉 Buon compleanno, {name}! 🎉\n\n> Ti auguriamo una giornata fantastica, piena di gioia e risate!\n\n"
+        "Fate tutti gli auguri di buon compleanno a {mention}!",
+    ),
+    "hi": Locale(
+        "Hindi",
+        "{holiday} की हार्दिक शुभकामनाएँ! सभी को एक शानदार उत्सव की बधाई।",
+        "# 🎉 जन्मदिन मुबारक हो, {name}! 🎉\n\n> आपका दिन खुशियों और हँसी से भरा रहे!\n\n"
+        "सभी {mention} को जन्मदिन की शुभकामनाएँ दें!",
+    ),
+}
+
+
+def normalize_locale(code: str | None) -> str | None:
+    """The supported locale for ``code`` ("es", "es-ES", "pt_BR"...), or None."""
+    if not code:
+        return None
+    base = code.strip().replace("_", "-").split("-")[0].lower()
+    return base if base in LOCALES else None
+
+
+def language_instruction(locale: str) -> str:
+    """Sentence appended to a Gemini prompt; empty for English, the prompts' own language."""
+    if locale == DEFAULT_LOCALE or locale not in LOCALES:
+        return ""
+    return f" Write the whole message in {LOCALES[locale].language}; keep the Discord markdown and any placeholders as they are."
+
+
+def holiday_fallback(holiday_name: str, locale: str) -> str:
+    return LOCALES.get(locale, LOCALES[DEFAULT_LOCALE]).holiday_fallback.replace("{holiday}", holiday_name)
+
+
+def birthday_fallback(member_name: str, member_mention: str, locale: str) -> str:
+    text = LOCALES.get(locale, LOCALES[DEFAULT_LOCALE]).birthday_fallback
+    # Mention first, as in utils.templates.render_template
+    return text.replace("{mention}", member_mention).replace("{name}", member_name)
+
+
+def wish_cache_key(holiday_name: str, locale: str, year: int) -> str:
+    from utils.api_client import normalize_holiday_name  # api_client imports this module
+
+    return f"{year}:{locale}:{normalize_holiday_name(holiday_name)}"
@@ -0,0 +1,145 @@
+"""Logging pipeline that keeps formatting and I/O off the event loop.
+
+Loggers hand records to a ``QueueHandler``. That costs one queue put on the
+calling thread. A ``QueueListener`` thread then formats each record (JSON
+or plain) and writes it to the stream, so a burst of log lines cannot stall
+the gateway loop on stdout. JSON encoding uses orjson when it is installed.
+
+``SamplingFilter`` runs before a record is queued and caps how often each
+``event`` may repeat at WARNING level, for example a failing channel in
+``_safe_send``. INFO lifecycle records such as ``daily_task_start`` and
+errors are never dropped. Once the window resets, the next record it lets through
+says how many were dropped.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is the fallback
+    orjson = None
+
+# Attributes every LogRecord has; anything else on a record came from ``extra=``
+RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+PLAIN_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+def _dumps(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode()
+    return json.dumps(payload, ensure_ascii=True, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and key not in payload and not key.startswith("_"):
+                payload[key] = value
+        return _dumps(payload)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and the traceback on the calling thread; leave formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Let at most ``limit`` records per ``event`` through every ``window`` seconds.
+
+    Only WARNING records that carry an ``event`` are sampled; routine INFO
+    records and errors always pass.
+    """
+
+    def __init__(self, limit: int = 10, window: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows: dict[str, list] = {}  # event -> [window_start, passed, dropped]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if self.limit <= 0 or event is None or record.levelno != logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(event)
+            if state is None or now - state[0] >= self.window:
+                dropped = state[2] if state else 0
+                self._windows[event] = [now, 1, 0]
+                if dropped:
+                    record.suppressed = dropped
+                    record.msg = f"{record.msg} [{dropped} similar suppressed]"
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """A listener that may be stopped twice (by its owner, then at exit)."""
+
+    _running = False
+
+    def start(self):
+        super().start()
+        self._running = True
+
+    def stop(self):
+        # QueueListener.stop() fails if already stopped
+        if self._running:
+            self._running = False
+            super().stop()
+
+
+def configure_logging(level: str = "INFO", log_format: str = "plain", sample_limit: int = 10,
+                      sample_window: float = 60.0, stream=None) -> logging.handlers.QueueListener:
+    """Route the root logger through a queue; returns the started listener."""
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(PLAIN_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_limit, sample_window))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    listener = _QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    # Flushes queued records at exit
+    atexit.register(listener.stop)
+    return listener
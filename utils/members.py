@@ -0,0 +1,89 @@
+"""On-demand member lookups for running without a full member cache.
+
+With ``chunk_guilds_at_startup=False`` and ``MemberCacheFlags.none()`` the bot
+no longer holds every member in memory, so ``guild.get_member`` stops working
+for celebrants and role holders. ``MemberResolver`` looks them up in batches of
+up to 100 with ``guild.query_members`` (one gateway request per batch), falls
+back to REST ``fetch_member`` when there is no gateway, and keeps the answers
+(including "not in the guild") until the date changes in the server timezone.
+Callers pass that date, or leave it to the resolver's clock; both agree, so
+the daily run and the off-peak cleanup do not flush each other's answers
+around midnight.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, tzinfo
+
+import discord
+
+from utils import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+QUERY_BATCH_SIZE = 100  # Discord's maximum for REQUEST_GUILD_MEMBERS by user id
+
+
+class MemberResolver:
+    def __init__(self, tz: tzinfo | None = None):
+        self.tz = tz
+        self._day: date | None = None
+        self._members: dict[int, discord.Member | None] = {}
+
+    def _roll_day(self, day: date | None):
+        day = day or datetime.now(self.tz).date()
+        if day != self._day:
+            self._day = day
+            self._members.clear()
+
+    def forget(self, user_id: int):
+        self._members.pop(user_id, None)
+
+    async def resolve(self, guild: discord.Guild, user_ids, day: date | None = None) -> dict[int, discord.Member]:
+        """Return ``{user_id: member}`` for the ids still in ``guild``.
+
+        Ids missing from the result are not members. If a lookup fails the
+        exception propagates, so callers never mistake an outage for departures.
+        """
+        self._roll_day(day)
+        wanted = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        pending = []
+        for user_id in wanted:
+            if user_id in self._members:
+                continue
+            member = guild.get_member(user_id)
+            if member is not None or guild.chunked:
+                # A chunked guild's cache is complete, so a miss means the user left
+                self._members[user_id] = member
+            else:
+                pending.append(user_id)
+
+        if pending:
+            with tracing.span("discord.resolve_members", count=len(pending)):
+                for start in range(0, len(pending), QUERY_BATCH_SIZE):
+                    batch = pending[start:start + QUERY_BATCH_SIZE]
+                    found = await self._lookup_batch(guild, batch)
+                    for user_id in batch:
+                        self._members[user_id] = found.get(user_id)
+            metrics.record_member_lookup(len(pending))
+
+        return {user_id: self._members[user_id] for user_id in wanted if self._members.get(user_id) is not None}
+
+    async def resolve_one(self, guild: discord.Guild, user_id: int, day: date | None = None) -> discord.Member | None:
+        return (await self.resolve(guild, [user_id], day)).get(int(user_id))
+
+    async def _lookup_batch(self, guild: discord.Guild, user_ids: list[int]) -> dict[int, discord.Member]:
+        try:
+            members = await guild.query_members(user_ids=user_ids, limit=len(user_ids), cache=False)
+            return {member.id: member for member in members}
+        except (discord.ClientException, RuntimeError, asyncio.TimeoutError) as exc:
+            # No gateway connection (REST-only client) or the query timed out
+            logger.info("Member query unavailable, using REST", extra={"event": "member_query_fallback", "error": str(exc)})
+
+        found = {}
+        for user_id in user_ids:
+            try:
+                found[user_id] = await guild.fetch_member(user_id)
+            except discord.NotFound:
+                continue
+        return found
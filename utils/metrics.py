@@ -1,7 +1,8 @@
 """Prometheus metrics collection for Mangalify bot monitoring."""
 
+import time
+
 from prometheus_client import Counter, Histogram, Gauge
-from datetime import datetime
 
 # Task execution metrics
 daily_task_executions = Counter(
@@ -16,6 +17,93 @@ daily_task_duration = Histogram(
     buckets=(0.5, 1, 2, 5, 10, 30, 60)
 )
 
+daily_task_degraded_items = Counter(
+    'mangalify_daily_task_degraded_items_total',
+    'Daily task items served by a fallback after a timeout, error or exhausted budget'
+)
+
+daily_task_stage_duration = Histogram(
+    'mangalify_daily_task_stage_duration_seconds',
+    'Duration of each daily task stage',
+    ['stage'],  # stage: cleanup_roles, cleanup_departed, birthdays, anniversaries, holidays, prepare, reminders
+    buckets=(0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+)
+
+# Scheduled job metrics (utils/scheduler.py)
+scheduled_job_runs = Counter(
+    'mangalify_scheduled_job_runs_total',
+    'Scheduled job runs by outcome',
+    ['job', 'status']  # status: ok, error, timeout, skipped
+)
+
+scheduled_job_duration = Histogram(
+    'mangalify_scheduled_job_duration_seconds',
+    'Run time of scheduled jobs',
+    ['job'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 180, 600, 1800)
+)
+
+scheduled_job_next_run = Gauge(
+    'mangalify_scheduled_job_next_run_timestamp_seconds',
+    'When each scheduled job is next due (Unix time)',
+    ['job']
+)
+
+# Leader election metrics
+is_leader = Gauge(
+    'mangalify_is_leader',
+    '1 if this replica holds the scheduler lease, else 0'
+)
+
+leader_lease_age = Gauge(
+    'mangalify_leader_lease_age_seconds',
+    'Seconds since the current leader acquired the scheduler lease'
+)
+
+leader_transitions = Counter(
+    'mangalify_leader_transitions_total',
+    'Times this replica gained or lost leadership',
+    ['transition']  # transition: acquired, lost
+)
+
+# Job queue metrics (worker.py)
+jobs_processed = Counter(
+    'mangalify_jobs_processed_total',
+    'Queued jobs finished by a worker',
+    ['kind', 'status']  # status: success, retry, failed, lost
+)
+
+job_duration = Histogram(
+    'mangalify_job_duration_seconds',
+    'Time a worker spent running a queued job',
+    ['kind'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 180, 600)
+)
+
+job_queue_delay = Histogram(
+    'mangalify_job_queue_delay_seconds',
+    'Time between a job becoming due and a worker claiming it',
+    ['kind'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+
+jobs_pending = Gauge(
+    'mangalify_jobs_pending',
+    'Jobs waiting in the queue, as last seen by this worker'
+)
+
+# Schema migration metrics
+schema_version = Gauge(
+    'mangalify_schema_version',
+    'Highest schema migration applied by this process'
+)
+
+migration_documents_processed = Gauge(
+    'mangalify_migration_documents_processed',
+    'Documents processed so far by a running migration backfill',
+    ['version']
+)
+
 # Holiday processing metrics
 holidays_processed = Counter(
     'mangalify_holidays_processed_total',
@@ -40,18 +128,69 @@ birthdays_wishes_sent = Counter(
     'Total birthday wishes sent to Discord'
 )
 
+birthday_wish_sources = Counter(
+    'mangalify_birthday_wish_source_total',
+    'Birthday wishes by where their text came from',
+    ['source']  # source: pool, live
+)
+
+# Join anniversary metrics
+anniversary_pass_duration = Histogram(
+    'mangalify_anniversary_pass_duration_seconds',
+    'Time to find the day\'s join anniversaries, index or snapshot rebuild included',
+    ['source'],  # source: cache, snapshot
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120)
+)
+
+anniversary_members_indexed = Gauge(
+    'mangalify_anniversary_members_indexed',
+    'Members in the join index or snapshot at its last rebuild',
+    ['source']
+)
+
+anniversaries_announced = Counter(
+    'mangalify_anniversaries_announced_total',
+    'Join anniversaries announced'
+)
+
+# Holiday wish cache metrics (utils/locales.py)
+wish_cache_lookups = Counter(
+    'mangalify_wish_cache_lookups_total',
+    'Holiday wish cache lookups by locale and result',
+    ['locale', 'result']  # result: hit, miss
+)
+
+# Birthday reminder DM metrics (utils/reminders.py)
+reminders_queued = Counter(
+    'mangalify_reminders_queued_total',
+    'Birthday reminder DMs queued for the background sender'
+)
+
+reminder_dms = Counter(
+    'mangalify_reminder_dms_total',
+    'Birthday reminder DMs by delivery outcome',
+    ['outcome']  # outcome: sent, undeliverable, expired, error
+)
+
 # API metrics
 api_calls = Counter(
     'mangalify_api_calls_total',
     'Total API calls to external services',
-    ['service', 'status']  # service: gemini, calendarific; status: success, error
+    ['service', 'status']  # service: gemini, calendarific; status: success, error, fallback
 )
 
 api_call_duration = Histogram(
     'mangalify_api_call_duration_seconds',
-    'Duration of external API calls',
+    'End-to-end duration of external API calls, retries and backoff included',
     ['service'],
-    buckets=(0.1, 0.5, 1, 2, 5)
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30)
+)
+
+api_attempt_duration = Histogram(
+    'mangalify_api_attempt_duration_seconds',
+    'Duration of each attempt at an external API call',
+    ['service', 'status'],  # status: success, error
+    buckets=(0.1, 0.5, 1, 2, 5, 10)
 )
 
 api_retries = Counter(
@@ -60,18 +199,54 @@ api_retries = Counter(
     ['service']
 )
 
+gemini_tokens = Counter(
+    'mangalify_gemini_tokens_total',
+    'Gemini tokens reported in usage_metadata',
+    ['purpose', 'kind']  # purpose: holiday_wish, birthday_wish; kind: prompt, completion
+)
+
+wish_fallbacks = Counter(
+    'mangalify_wish_fallbacks_total',
+    'Wishes that used the built-in fallback text instead of Gemini output',
+    ['purpose']
+)
+
 # Database metrics
 database_operations = Counter(
     'mangalify_database_operations_total',
     'Total database operations',
-    ['operation', 'status']  # operation: read, write, delete; status: success, error
+    ['operation', 'collection', 'status']  # operation: DatabaseManager method; status: success, error
 )
 
 database_operation_duration = Histogram(
     'mangalify_database_operation_duration_seconds',
     'Duration of database operations',
-    ['operation'],
-    buckets=(0.01, 0.05, 0.1, 0.5, 1)
+    ['operation', 'collection'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+mongo_command_duration = Histogram(
+    'mangalify_mongo_command_duration_seconds',
+    'Server round trip of MongoDB commands, from the driver command monitor',
+    ['command', 'status'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+mongo_pool_checkout_wait = Histogram(
+    'mangalify_mongo_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled MongoDB connection',
+    ['status'],  # status: success, error
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+mongo_pool_connections = Gauge(
+    'mangalify_mongo_pool_connections',
+    'Open MongoDB connections in the driver pool'
+)
+
+mongo_pool_connections_in_use = Gauge(
+    'mangalify_mongo_pool_connections_in_use',
+    'MongoDB connections currently checked out'
 )
 
 # Discord message metrics
@@ -99,6 +274,11 @@ bot_errors = Counter(
     ['error_type']
 )
 
+startup_duration = Gauge(
+    'mangalify_startup_duration_seconds',
+    'Seconds from process start to the first on_ready'
+)
+
 # Data health metrics
 registered_birthdays = Gauge(
     'mangalify_registered_birthdays_total',
@@ -110,42 +290,94 @@ departed_members_cleanup = Counter(
     'Total departed members removed'
 )
 
+member_lookups = Counter(
+    'mangalify_member_lookups_total',
+    'Members resolved on demand (cache misses sent to Discord)'
+)
+
 # Active session tracking
 active_discord_members = Gauge(
     'mangalify_active_discord_members',
     'Number of active Discord members being tracked'
 )
 
+birthdays_by_month = Gauge(
+    'mangalify_birthdays_by_month',
+    'Registered birthdays per calendar month',
+    ['month']  # month: 1..12
+)
+
+birthday_role_log_entries = Gauge(
+    'mangalify_birthday_role_log_entries',
+    'Members currently recorded as holding the birthday role'
+)
+
+data_health_last_success = Gauge(
+    'mangalify_data_health_last_success_timestamp_seconds',
+    'Unix time of the last successful data-health collection'
+)
+
 
 def record_task_start():
     """Record task start time for duration tracking."""
-    return datetime.utcnow()
+    return time.perf_counter()
 
 
 def record_task_end(start_time, status='success'):
     """Record task end and duration."""
-    duration = (datetime.utcnow() - start_time).total_seconds()
+    duration = time.perf_counter() - start_time
     daily_task_executions.labels(status=status).inc()
     daily_task_duration.observe(duration)
 
 
+def record_degraded_items(count):
+    """Record items a daily run had to degrade to fallbacks."""
+    daily_task_degraded_items.inc(count)
+
+
+def record_stage_duration(stage, duration):
+    """Record how long one daily task stage took."""
+    daily_task_stage_duration.labels(stage=stage).observe(duration)
+
+
 def record_api_call(service, status='success', duration=None):
     """Record external API call."""
     api_calls.labels(service=service, status=status).inc()
-    if duration:
+    if duration is not None:
         api_call_duration.labels(service=service).observe(duration)
 
 
+def record_api_attempt(service, status, duration):
+    """Record a single attempt of an external API call."""
+    api_attempt_duration.labels(service=service, status=status).observe(duration)
+
+
 def record_api_retry(service):
     """Record API retry."""
     api_retries.labels(service=service).inc()
 
 
-def record_db_operation(operation, status='success', duration=None):
+def record_gemini_tokens(purpose, prompt_tokens, completion_tokens):
+    """Record Gemini token usage for one response."""
+    gemini_tokens.labels(purpose=purpose, kind='prompt').inc(prompt_tokens)
+    gemini_tokens.labels(purpose=purpose, kind='completion').inc(completion_tokens)
+
+
+def record_birthday_wish_source(source):
+    """Record whether a birthday wish was rendered from the template pool or generated live."""
+    birthday_wish_sources.labels(source=source).inc()
+
+
+def record_wish_fallback(purpose):
+    """Record a wish that fell back to the built-in text."""
+    wish_fallbacks.labels(purpose=purpose).inc()
+
+
+def record_db_operation(operation, collection, status='success', duration=None):
     """Record database operation."""
-    database_operations.labels(operation=operation, status=status).inc()
-    if duration:
-        database_operation_duration.labels(operation=operation).observe(duration)
+    database_operations.labels(operation=operation, collection=collection, status=status).inc()
+    if duration is not None:
+        database_operation_duration.labels(operation=operation, collection=collection).observe(duration)
 
 
 def record_holiday(status='success'):
@@ -168,6 +400,29 @@ def record_birthday(status='success'):
     birthdays_processed.labels(status=status).inc()
 
 
+def record_anniversary_pass(source, duration, indexed, announced):
+    """Record one anniversary pass; ``indexed`` is None when the index or snapshot was reused as is."""
+    anniversary_pass_duration.labels(source=source).observe(duration)
+    if indexed is not None:
+        anniversary_members_indexed.labels(source=source).set(indexed)
+    anniversaries_announced.inc(announced)
+
+
+def record_wish_cache_lookup(locale, result):
+    """Record a holiday wish cache hit or miss."""
+    wish_cache_lookups.labels(locale=locale, result=result).inc()
+
+
+def record_reminders_queued(count):
+    """Record reminders newly added to the fan-out queue."""
+    reminders_queued.inc(count)
+
+
+def record_reminder_dm(outcome):
+    """Record one reminder DM delivery attempt."""
+    reminder_dms.labels(outcome=outcome).inc()
+
+
 def record_message_failed(channel_type='other'):
     """Record failed Discord message."""
     discord_messages_failed.labels(channel_type=channel_type).inc()
@@ -183,11 +438,82 @@ def update_birthday_count(count):
     registered_birthdays.set(count)
 
 
+def record_member_lookup(count=1):
+    """Record members fetched on demand instead of from the member cache."""
+    member_lookups.inc(count)
+
+
 def update_member_count(count):
     """Update active Discord members count."""
     active_discord_members.set(count)
 
 
+def update_birthday_distribution(counts_by_month):
+    """Update per-month birthday counts; months without birthdays are set to 0."""
+    for month in range(1, 13):
+        birthdays_by_month.labels(month=str(month)).set(counts_by_month.get(month, 0))
+
+
+def update_role_log_size(count):
+    """Update the number of birthday role log entries."""
+    birthday_role_log_entries.set(count)
+
+
+def set_data_health_success():
+    """Record a successful data-health collection."""
+    data_health_last_success.set(time.time())
+
+
 def set_uptime(seconds):
     """Update bot uptime."""
     bot_uptime.set(seconds)
+
+
+def set_startup_duration(seconds):
+    """Record time from process start to on_ready."""
+    startup_duration.set(seconds)
+
+
+def set_schema_version(version):
+    """Record the latest applied schema migration."""
+    schema_version.set(version)
+
+
+def set_migration_progress(version, processed):
+    """Record backfill progress for a migration."""
+    migration_documents_processed.labels(version=str(version)).set(processed)
+
+
+def set_leader_state(leader, lease_age_seconds):
+    """Record whether this replica leads and how old the current lease is."""
+    is_leader.set(1 if leader else 0)
+    leader_lease_age.set(lease_age_seconds)
+
+
+def record_leader_transition(transition):
+    """Record gaining or losing leadership."""
+    leader_transitions.labels(transition=transition).inc()
+
+
+def record_scheduled_job(job, status, duration=None):
+    scheduled_job_runs.labels(job=job, status=status).inc()
+    if duration is not None:
+        scheduled_job_duration.labels(job=job).observe(duration)
+
+
+def set_scheduled_job_next_run(job, timestamp):
+    scheduled_job_next_run.labels(job=job).set(timestamp)
+
+
+def record_job(kind, status, duration=None, queue_delay=None):
+    """Record a finished job and, when known, how long it ran and waited."""
+    jobs_processed.labels(kind=kind, status=status).inc()
+    if duration is not None:
+        job_duration.labels(kind=kind).observe(duration)
+    if queue_delay is not None:
+        job_queue_delay.labels(kind=kind).observe(max(queue_delay, 0))
+
+
+def set_jobs_pending(count):
+    """Record the queue backlog."""
+    jobs_pending.set(count)
@@ -1,15 +1,24 @@
 """HTTP server for Prometheus metrics endpoint."""
 
 import asyncio
+import hmac
 from aiohttp import web
-from prometheus_client import REGISTRY, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from utils import profiling, tracing
+
+MAX_PROFILE_SECONDS = 60
+LOCAL_ADDRESSES = {'127.0.0.1', '::1', 'localhost'}
+
+_debug_token_key = web.AppKey('debug_token', object)
+_profile_lock_key = web.AppKey('profile_lock', asyncio.Lock)
 
 
 async def metrics_handler(request):
     """Prometheus metrics endpoint handler."""
     return web.Response(
         body=generate_latest(REGISTRY),
-        content_type='text/plain; version=0.0.4; charset=utf-8'
+        headers={'Content-Type': CONTENT_TYPE_LATEST}
     )
 
 
@@ -18,39 +27,127 @@ async def health_handler(request):
     return web.json_response({'status': 'ok'})
 
 
-async def start_metrics_server(port: int = 8000):
+async def debug_runs_handler(request):
+    """Recent daily task timelines, newest first."""
+    return web.json_response({'runs': tracing.recent_runs()})
+
+
+async def debug_profile_handler(request):
+    """Capture a CPU profile of the bot loop.
+
+    Query: ``seconds`` (1-60, default 10), ``mode`` (``sample`` for collapsed
+    stacks, ``cprofile`` for pstats text), ``sort`` (a ``pstats.SortKey``
+    value, default ``cumulative``; cprofile only).
+    """
+    try:
+        seconds = float(request.query.get('seconds', '10'))
+    except ValueError:
+        raise web.HTTPBadRequest(text='seconds must be a number')
+    seconds = min(max(seconds, 1.0), MAX_PROFILE_SECONDS)
+    mode = request.query.get('mode', 'sample')
+    if mode not in ('sample', 'cprofile'):
+        raise web.HTTPBadRequest(text='mode must be sample or cprofile')
+    # Checked up front: pstats would only reject it after the whole capture
+    sort = request.query.get('sort', 'cumulative')
+    if sort not in profiling.PROFILE_SORT_KEYS:
+        raise web.HTTPBadRequest(text=f"sort must be one of: {', '.join(sorted(profiling.PROFILE_SORT_KEYS))}")
+
+    lock = request.app[_profile_lock_key]
+    if lock.locked():
+        raise web.HTTPConflict(text='A profile capture is already running')
+    async with lock:
+        if mode == 'sample':
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, profiling.sample_stacks, seconds)
+        else:
+            try:
+                body = await profiling.cprofile_bot_loop(seconds, sort=sort)
+            except RuntimeError as exc:
+                raise web.HTTPServiceUnavailable(text=str(exc))
+    return web.Response(text=body, content_type='text/plain')
+
+
+async def debug_heap_handler(request):
+    """tracemalloc snapshot diffed against a baseline.
+
+    The first call starts tracing and takes the baseline. Query: ``reset=1``
+    retakes the baseline, ``stop=1`` stops tracing, ``limit`` caps the rows
+    (1-200). Each snapshot pauses the bot loop briefly; when tracing has grown
+    too large to snapshot quickly the answer is 503 and tracing should be
+    stopped.
+    """
+    if request.query.get('stop') == '1':
+        profiling.stop_heap_tracing()
+        return web.json_response({'status': 'stopped'})
+    reset = request.query.get('reset') == '1'
+    try:
+        limit = int(request.query.get('limit', '25'))
+    except ValueError:
+        raise web.HTTPBadRequest(text='limit must be an integer')
+    loop = asyncio.get_running_loop()
+    report = await loop.run_in_executor(None, profiling.heap_report, reset, limit)
+    return web.json_response(report, status=503 if report['status'] == 'refused' else 200)
+
+
+@web.middleware
+async def debug_guard(request, handler):
+    """Require the debug token, or a loopback client when no token is configured."""
+    if request.path.startswith('/debug/'):
+        token = request.app[_debug_token_key]
+        if token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                raise web.HTTPUnauthorized(text='Invalid debug token')
+        elif request.remote not in LOCAL_ADDRESSES:
+            raise web.HTTPForbidden(text='Debug endpoints are localhost-only without DEBUG_TOKEN')
+    return await handler(request)
+
+
+def create_app(debug_token: str | None = None) -> web.Application:
+    app = web.Application(middlewares=[debug_guard])
+    app[_debug_token_key] = debug_token
+    app[_profile_lock_key] = asyncio.Lock()
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/health', health_handler)
+    app.router.add_get('/debug/runs', debug_runs_handler)
+    app.router.add_get('/debug/profile', debug_profile_handler)
+    app.router.add_get('/debug/heap', debug_heap_handler)
+    return app
+
+
+async def start_metrics_server(port: int = 8000, host: str = '0.0.0.0', debug_token: str | None = None):
     """Start the metrics HTTP server.
-    
+
     Args:
         port: Port to serve metrics on (default 8000)
+        host: Interface to bind (use 127.0.0.1 to keep debug endpoints local)
+        debug_token: Bearer token required by /debug/* endpoints
     """
-    app = web.Application()
-    app.router.add_get('/metrics', metrics_handler)
-    app.router.add_get('/health', health_handler)
-    
+    app = create_app(debug_token)
+
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, '0.0.0.0', port)
+    site = web.TCPSite(runner, host, port)
     await site.start()
-    
-    print(f"Prometheus metrics server started on port {port}")
+
+    print(f"Prometheus metrics server started on {host}:{port}")
     print(f"Access metrics at http://localhost:{port}/metrics")
-    
+
     return runner
 
 
-def run_metrics_server(port: int = 8000):
+def run_metrics_server(port: int = 8000, host: str = '0.0.0.0', debug_token: str | None = None):
     """Blocking wrapper to run metrics server."""
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    
+
     async def serve():
-        runner = await start_metrics_server(port)
+        runner = await start_metrics_server(port, host, debug_token)
         try:
             # Keep server running indefinitely
             while True:
                 await asyncio.sleep(3600)
         except KeyboardInterrupt:
             await runner.cleanup()
-    
+
     loop.run_until_complete(serve())
@@ -0,0 +1,311 @@
+"""Versioned, resumable schema migrations for the Mongo collections.
+
+Each migration is an ordered async function registered with ``@migration``.
+Applied versions are recorded in the ``schema_migrations`` collection, and
+backfills run in small ``_id``-ordered batches with a pause between them,
+saving their position after every batch. A restart therefore resumes where it
+stopped, and the bot keeps serving traffic while a large collection upgrades.
+The runner holds a per-migration lock and renews it from a heartbeat for the
+whole run, so a long index build is never picked up by a second replica.
+
+Run from the bot (in the background at startup) or by hand:
+
+    python -m utils.migrations status
+    python -m utils.migrations run
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from utils import metrics
+from utils.dates import day_of_year
+from utils.leader import default_owner_id
+
+logger = logging.getLogger(__name__)
+
+LOCK_SECONDS = 600  # A crashed runner's claim expires after this long
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[["MigrationContext"], Awaitable[None]]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str):
+    """Register an ``async def fn(ctx: MigrationContext)`` as schema version ``version``."""
+    def decorator(func):
+        if any(existing.version == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, name, func))
+        MIGRATIONS.sort(key=lambda item: item.version)
+        return func
+    return decorator
+
+
+class MigrationContext:
+    """What a migration gets: the database plus batching and progress helpers."""
+
+    def __init__(self, runner: "MigrationRunner", current: Migration, state: dict):
+        self.runner = runner
+        self.db = runner.db
+        self.migration = current
+        self.state = state
+
+    async def create_index(self, collection, keys, **kwargs):
+        """Build an index without blocking the collection on pre-4.2 servers."""
+        name = await collection.create_index(keys, background=True, **kwargs)
+        logger.info("Index ready", extra={"event": "migration_index", "version": self.migration.version, "index": name})
+        return name
+
+    async def backfill(self, collection, query: dict, compute_update: Callable[[dict], dict | None],
+                       projection: dict | None = None) -> int:
+        """Apply ``compute_update(doc)`` (a ``$set``-style update or None) to every matching doc.
+
+        Walks the collection in ``_id`` order in batches of ``runner.batch_size``
+        and records the last ``_id`` after each batch, so a restarted run resumes
+        from there.
+        """
+        last_id = self.state.get("resume_after")
+        processed = self.state.get("processed", 0)
+        while True:
+            batch_query = dict(query)
+            if last_id is not None:
+                batch_query["_id"] = {"$gt": last_id}
+            cursor = collection.find(batch_query, projection).sort("_id", 1).limit(self.runner.batch_size)
+            docs = await cursor.to_list(length=self.runner.batch_size)
+            if not docs:
+                return processed
+
+            # Documents needing the same update share one update_many (e.g. one per doy value)
+            grouped: dict[str, tuple[dict, list]] = {}
+            for doc in docs:
+                update = compute_update(doc)
+                if update:
+                    key = json.dumps(update, sort_keys=True, default=str)
+                    grouped.setdefault(key, (update, []))[1].append(doc["_id"])
+            for update, ids in grouped.values():
+                await collection.update_many({"_id": {"$in": ids}}, update)
+
+            last_id = docs[-1]["_id"]
+            processed += len(docs)
+            await self.runner.save_progress(self.migration, resume_after=last_id, processed=processed)
+            await asyncio.sleep(self.runner.pause_seconds)
+
+
+class MigrationRunner:
+    def __init__(self, db, migrations: list[Migration] | None = None, batch_size: int = 500,
+                 pause_seconds: float = 0.2, owner: str | None = None):
+        self.db = db
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda item: item.version)
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        # Unique per process, so a runner can tell its lock was taken over by another replica
+        self.owner = owner or default_owner_id()
+
+    @property
+    def collection(self):
+        return self.db.schema_migrations
+
+    async def status(self) -> list[dict]:
+        docs = {doc["_id"]: doc async for doc in self.collection.find({})}
+        return [
+            {"version": item.version, "name": item.name, **{k: v for k, v in docs.get(item.version, {}).items() if k != "_id"}}
+            for item in self.migrations
+        ]
+
+    async def pending(self) -> list[Migration]:
+        done = {doc["_id"] async for doc in self.collection.find({"status": "done"}, {"_id": 1})}
+        return [item for item in self.migrations if item.version not in done]
+
+    async def save_progress(self, current: Migration, **fields):
+        await self.collection.update_one(
+            {"_id": current.version, "owner": self.owner},
+            {"$set": {**fields, "lock_expires_at": self._lock_expiry()}},
+        )
+        if "processed" in fields:
+            metrics.set_migration_progress(current.version, fields["processed"])
+            logger.info(
+                "Migration %s progress: %s documents", current.version, fields["processed"],
+                extra={"event": "migration_progress", "version": current.version, "processed": fields["processed"]},
+            )
+
+    def _lock_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=LOCK_SECONDS)
+
+    async def _renew(self, current: Migration) -> bool:
+        """Push our lock's expiry forward; False if another runner has taken it."""
+        result = await self.collection.update_one(
+            {"_id": current.version, "owner": self.owner, "status": "running"},
+            {"$set": {"lock_expires_at": self._lock_expiry()}},
+        )
+        return result.matched_count > 0
+
+    async def _keep_lock(self, current: Migration, work: asyncio.Task):
+        """Renew the lock until cancelled, so a long index build is not taken over by a second runner.
+
+        If the lock is lost anyway (e.g. the database was unreachable past its
+        expiry), ``work`` is cancelled so two runners never apply it at once.
+        """
+        while True:
+            await asyncio.sleep(LOCK_SECONDS / 3)
+            try:
+                if not await self._renew(current):
+                    logger.warning("Lost the lock on migration %s; stopping it", current.version,
+                                   extra={"event": "migration_lock_lost", "version": current.version})
+                    work.cancel()
+                    return
+            except Exception as exc:
+                # Keep trying: the lock is still valid for two more intervals
+                logger.warning("Failed to renew migration lock",
+                               extra={"event": "migration_lock_error", "version": current.version, "error": str(exc)})
+
+    async def _claim(self, current: Migration) -> dict | None:
+        """Take the migration's lock; None if another runner holds it or it is done."""
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.now(timezone.utc)
+        try:
+            return await self.collection.find_one_and_update(
+                {
+                    "_id": current.version,
+                    "status": {"$ne": "done"},
+                    "$or": [{"lock_expires_at": {"$exists": False}}, {"lock_expires_at": {"$lt": now}}],
+                },
+                {
+                    "$set": {"name": current.name, "status": "running", "owner": self.owner,
+                             "lock_expires_at": self._lock_expiry()},
+                    "$setOnInsert": {"started_at": now},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None
+
+    async def run(self) -> list[int]:
+        """Apply pending migrations in order; stops at the first failure or lost lock."""
+        applied = []
+        for current in await self.pending():
+            state = await self._claim(current)
+            if state is None:
+                logger.info("Migration %s is held by another runner", current.version,
+                            extra={"event": "migration_locked", "version": current.version})
+                break
+            started = time.perf_counter()
+            logger.info("Applying migration %s (%s)", current.version, current.name,
+                        extra={"event": "migration_start", "version": current.version, "name": current.name})
+            work = asyncio.create_task(current.apply(MigrationContext(self, current, state)))
+            heartbeat = asyncio.create_task(self._keep_lock(current, work))
+            try:
+                await work
+            except asyncio.CancelledError:
+                if not heartbeat.done() or heartbeat.cancelled():
+                    raise  # we are being cancelled, not the migration
+                break  # lock lost: the new holder finishes it
+            except Exception as exc:
+                await self.collection.update_one(
+                    {"_id": current.version, "owner": self.owner},
+                    {"$set": {"status": "failed", "error": str(exc)}, "$unset": {"lock_expires_at": ""}},
+                )
+                logger.exception("Migration %s failed", current.version,
+                                 extra={"event": "migration_error", "version": current.version, "error": str(exc)})
+                raise
+            finally:
+                heartbeat.cancel()
+            duration = round(time.perf_counter() - started, 3)
+            result = await self.collection.update_one(
+                {"_id": current.version, "owner": self.owner},
+                {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc), "duration_seconds": duration},
+                 "$unset": {"lock_expires_at": "", "error": ""}},
+            )
+            if result.matched_count == 0:
+                logger.warning("Migration %s finished after losing its lock; not marking it done", current.version,
+                               extra={"event": "migration_lock_lost", "version": current.version})
+                break
+            metrics.set_schema_version(current.version)
+            logger.info("Migration %s done in %ss", current.version, duration,
+                        extra={"event": "migration_done", "version": current.version, "duration": duration})
+            applied.append(current.version)
+        return applied
+
+
+# --- Migrations ---
+
+def _doy_update(doc: dict) -> dict | None:
+    try:
+        return {"$set": {"doy": day_of_year(int(doc["day"]), int(doc["month"]))}}
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@migration(1, "birthdays_doy")
+async def _birthdays_doy(ctx: MigrationContext):
+    await ctx.create_index(ctx.db.birthdays, [("doy", 1), ("_id", 1)])
+    await ctx.backfill(ctx.db.birthdays, {"doy": {"$exists": False}}, _doy_update, {"day": 1, "month": 1})
+
+
+@migration(2, "manual_wishes_date_index")
+async def _manual_wishes_date_index(ctx: MigrationContext):
+    await ctx.create_index(ctx.db.manual_wishes, [("month", 1), ("day", 1)])
+
+
+@migration(3, "jobs_queue_index")
+async def _jobs_queue_index(ctx: MigrationContext):
+    await ctx.create_index(ctx.db.jobs, [("status", 1), ("run_at", 1)])
+
+
+@migration(4, "member_joins_doy_index")
+async def _member_joins_doy_index(ctx: MigrationContext):
+    await ctx.create_index(ctx.db.member_joins, [("doy", 1), ("_id", 1)])
+
+
+@migration(5, "reminder_subscriptions_indexes")
+async def _reminder_subscriptions_indexes(ctx: MigrationContext):
+    await ctx.create_index(ctx.db.reminder_subscriptions, [("kind", 1), ("target_id", 1)])
+    await ctx.create_index(ctx.db.reminder_subscriptions, [("subscriber_id", 1)])
+
+
+async def _main(argv: list[str]) -> int:
+    import argparse
+
+    from dotenv import load_dotenv
+
+    from config import Settings
+    from utils.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(prog="python -m utils.migrations")
+    parser.add_argument("command", choices=("status", "run"))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    settings = Settings.from_env()
+    db = DatabaseManager(settings.mongo_uri, settings.mongo_db_name)
+    runner = MigrationRunner(
+        db, batch_size=settings.migration_batch_size, pause_seconds=settings.migration_pause_seconds, owner=f"cli:{default_owner_id()}",
+    )
+    try:
+        if args.command == "run":
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+            print(f"Applied: {await runner.run()}")
+        else:
+            print(json.dumps(await runner.status(), indent=2, default=str))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,142 @@
+"""On-demand CPU and heap profiling of the bot event loop.
+
+The metrics server runs on its own thread and event loop, so captures started
+from there never block the gateway heartbeat: the sampler reads the bot
+thread's frames from a worker thread, and cProfile captures are scheduled onto
+the bot loop with ``asyncio.run_coroutine_threadsafe`` and await a sleep there.
+
+Heap snapshots are the exception. ``tracemalloc.take_snapshot`` copies every
+traced block while holding the GIL, so the bot loop is paused for the whole
+copy even though it runs in an executor. The pause grows with the number of
+traced blocks. A snapshot is therefore refused once tracemalloc's own
+bookkeeping passes ``MAX_HEAP_TRACE_BYTES``; stop tracing and start over.
+"""
+
+import asyncio
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+_bot_loop: asyncio.AbstractEventLoop | None = None
+_bot_thread_id: int | None = None
+_heap_baseline: tracemalloc.Snapshot | None = None
+_heap_lock = threading.Lock()
+
+MAX_HEAP_ROWS = 200
+# ``sort`` values accepted by cprofile_bot_loop
+PROFILE_SORT_KEYS = frozenset(key.value for key in pstats.SortKey)
+# tracemalloc's bookkeeping grows with the traced blocks (roughly 100 bytes each at 10 frames),
+# so this caps a snapshot at a few million blocks: about a second of paused event loop
+MAX_HEAP_TRACE_BYTES = 256 * 1024 * 1024
+
+
+def register_bot_loop(loop: asyncio.AbstractEventLoop):
+    """Remember the bot's event loop and thread; call from inside that loop."""
+    global _bot_loop, _bot_thread_id
+    _bot_loop = loop
+    _bot_thread_id = threading.get_ident()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """Sample the bot thread's stack and return collapsed-stack lines.
+
+    Blocking; run it in an executor. The output is the ``stack count`` format
+    understood by flamegraph.pl and speedscope.
+    """
+    thread_id = _bot_thread_id or threading.main_thread().ident
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+async def _cprofile_on_loop(seconds: float) -> cProfile.Profile:
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile.disable()
+    return profile
+
+
+async def cprofile_bot_loop(seconds: float, sort: str = "cumulative", limit: int = 50) -> str:
+    """Profile everything the bot loop runs for ``seconds`` and return pstats text."""
+    if _bot_loop is None or _bot_loop.is_closed():
+        raise RuntimeError("Bot event loop is not registered")
+    future = asyncio.run_coroutine_threadsafe(_cprofile_on_loop(seconds), _bot_loop)
+    profile = await asyncio.wrap_future(future)
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def heap_report(reset: bool = False, limit: int = 25, frames: int = 10) -> dict:
+    """Start tracing on first use, then diff the current heap against the baseline.
+
+    Blocking, and pauses the bot loop while the snapshot is copied (see the
+    module docstring); run it in an executor. ``limit`` is clamped to
+    1-``MAX_HEAP_ROWS``.
+    """
+    global _heap_baseline
+    limit = min(max(limit, 1), MAX_HEAP_ROWS)
+    with _heap_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _heap_baseline = tracemalloc.take_snapshot()
+            return {"status": "tracing_started", "baseline_taken": True}
+
+        overhead = tracemalloc.get_tracemalloc_memory()
+        if overhead > MAX_HEAP_TRACE_BYTES:
+            return {"status": "refused", "tracemalloc_bytes": overhead, "max_tracemalloc_bytes": MAX_HEAP_TRACE_BYTES}
+
+        snapshot = tracemalloc.take_snapshot()
+        if reset or _heap_baseline is None:
+            _heap_baseline = snapshot
+            return {"status": "baseline_reset", "baseline_taken": True}
+
+        current, peak = tracemalloc.get_traced_memory()
+        diff = snapshot.compare_to(_heap_baseline, "lineno")
+        return {
+            "status": "ok",
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "top_growth": [
+                {
+                    "location": str(stat.traceback[0]) if stat.traceback else "?",
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:limit]
+            ],
+        }
+
+
+def stop_heap_tracing():
+    """Stop tracemalloc and drop the baseline."""
+    global _heap_baseline
+    with _heap_lock:
+        _heap_baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
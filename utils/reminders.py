@@ -0,0 +1,157 @@
+"""Opt-in birthday reminder DMs, fanned out through the job queue.
+
+Members follow another member (``kind="user"``) or everyone in a role
+(``kind="role"``) and pick a lead of one day or one week. Subscriptions live
+in ``reminder_subscriptions``, indexed on ``(kind, target_id)``.
+
+Once a day (the ``reminders`` scheduled job) ``plan_reminders`` reads the
+birthdays one and seven days out from the ``doy`` index and matches them
+against the subscriptions, so the cost follows the number of upcoming
+celebrants rather than the number of subscribers. Role holders are resolved
+only for those celebrants, and only when someone follows a role.
+
+Each reminder becomes one ``birthday_reminder`` job in the ``jobs``
+collection, keyed by subscriber, celebrant, date and lead, so a re-run or a
+catch-up queues nothing twice. ``ReminderSender`` drains those jobs in the
+background at ``REMINDER_DM_PER_SECOND``, away from the daily post, and the
+queue retries failed sends with backoff. Members who do not accept DMs are
+counted and dropped, not retried.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, tzinfo
+
+import discord
+
+from utils import metrics
+from utils.dates import doy_ranges
+from utils.jobs import JobQueue, run_job
+
+logger = logging.getLogger(__name__)
+
+REMINDER_JOB_KIND = "birthday_reminder"
+REMINDER_LEADS = (1, 7)
+SUBSCRIPTION_KINDS = ("user", "role")
+MAX_SUBSCRIPTIONS = 25  # per member, which bounds one member's share of the fan-out
+MAX_CELEBRANTS_PER_DAY = 5000
+
+
+def reminder_text(celebrant_id: int, birthday: date, days_before: int) -> str:
+    when = "tomorrow" if days_before == 1 else f"in {days_before} days"
+    return f"🎂 Heads up: <@{celebrant_id}>'s birthday is {when} ({birthday.day:02d}/{birthday.month:02d})."
+
+
+async def plan_reminders(db, today: date, roles_of=None) -> list[dict]:
+    """Reminders to queue on ``today``: one per subscriber, celebrant and lead.
+
+    ``roles_of(user_ids)`` returns ``{user_id: role ids}`` for the celebrants
+    still in the server; role subscriptions are skipped without it.
+    """
+    celebrants: dict[int, list[int]] = {}
+    for lead in REMINDER_LEADS:
+        day = today + timedelta(days=lead)
+        entries = await db.get_birthdays_in_doy_ranges(doy_ranges(day, 1), MAX_CELEBRANTS_PER_DAY)
+        celebrants[lead] = [entry["_id"] for entry in entries]
+    everyone = sorted({user_id for ids in celebrants.values() for user_id in ids})
+    if not everyone:
+        return []
+
+    following: dict[tuple[str, int], list[dict]] = {}
+    for sub in await db.get_reminder_subscribers("user", everyone):
+        following.setdefault(("user", sub["target_id"]), []).append(sub)
+    roles: dict[int, set[int]] = {}
+    role_subs = await db.get_reminder_subscribers("role") if roles_of is not None else []
+    if role_subs:
+        for sub in role_subs:
+            following.setdefault(("role", sub["target_id"]), []).append(sub)
+        roles = {user_id: set(role_ids) for user_id, role_ids in (await roles_of(everyone)).items()}
+
+    reminders, seen = [], set()
+    for lead, ids in celebrants.items():
+        birthday = today + timedelta(days=lead)
+        for celebrant_id in ids:
+            keys = [("user", celebrant_id)] + [("role", role_id) for role_id in sorted(roles.get(celebrant_id, ()))]
+            for key in keys:
+                for sub in following.get(key, ()):
+                    subscriber_id = sub["subscriber_id"]
+                    if sub["days_before"] != lead or subscriber_id == celebrant_id:
+                        continue
+                    if (subscriber_id, celebrant_id, lead) in seen:
+                        continue  # followed both directly and through a role
+                    seen.add((subscriber_id, celebrant_id, lead))
+                    reminders.append({
+                        "subscriber_id": subscriber_id, "celebrant_id": celebrant_id,
+                        "birthday": birthday.isoformat(), "days_before": lead,
+                    })
+    return reminders
+
+
+async def queue_reminders(queue: JobQueue, reminders: list[dict]) -> int:
+    """Queue one job per reminder; returns how many were new."""
+    queued = 0
+    for reminder in reminders:
+        job_id = (f"{REMINDER_JOB_KIND}:{reminder['subscriber_id']}:{reminder['celebrant_id']}:"
+                  f"{reminder['birthday']}:{reminder['days_before']}")
+        if await queue.enqueue(REMINDER_JOB_KIND, reminder, job_id=job_id):
+            queued += 1
+    metrics.record_reminders_queued(queued)
+    return queued
+
+
+class ReminderSender:
+    """Sends queued reminder DMs one at a time, at most ``rate`` per second."""
+
+    def __init__(self, queue: JobQueue, client: discord.Client, rate: float = 1, tz: tzinfo | None = None,
+                 idle_seconds: float = 30):
+        self.queue = queue
+        self.client = client
+        self.interval = 1 / rate if rate > 0 else 0
+        self.tz = tz
+        self.idle_seconds = idle_seconds
+        self._stopping = asyncio.Event()
+
+    async def send(self, payload: dict):
+        """Deliver one reminder; raises on errors worth a retry."""
+        birthday = date.fromisoformat(payload["birthday"])
+        if datetime.now(self.tz).date() > birthday:
+            # The queue fell this far behind; a reminder after the fact is noise
+            metrics.record_reminder_dm("expired")
+            return
+        subscriber_id = int(payload["subscriber_id"])
+        try:
+            user = self.client.get_user(subscriber_id) or await self.client.fetch_user(subscriber_id)
+            await user.send(reminder_text(int(payload["celebrant_id"]), birthday, int(payload["days_before"])))
+        except (discord.Forbidden, discord.NotFound):
+            # DMs closed, or the account is gone: retrying cannot help
+            metrics.record_reminder_dm("undeliverable")
+            return
+        except Exception:
+            metrics.record_reminder_dm("error")
+            raise
+        metrics.record_reminder_dm("sent")
+
+    async def run_once(self) -> bool:
+        """Claim and send one due reminder; returns False when none was due."""
+        job = await self.queue.claim(kinds=[REMINDER_JOB_KIND])
+        if job is None:
+            return False
+        await run_job(self.queue, job, self.send)
+        return True
+
+    async def run(self, should_run=None):
+        """Drain the queue until ``stop``; idles while ``should_run()`` is false (a standby replica)."""
+        while not self._stopping.is_set():
+            delay = self.idle_seconds
+            try:
+                if (should_run is None or should_run()) and await self.run_once():
+                    delay = self.interval
+            except Exception as exc:
+                logger.error("Reminder sender error: %s", exc, extra={"event": "reminder_sender_error", "error": str(exc)})
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self._stopping.set()
@@ -0,0 +1,339 @@
+"""In-process scheduler for the bot's periodic jobs.
+
+Jobs are ``JobDefinition``s: a five-field cron schedule (evaluated in UTC,
+like ``POST_TIME_UTC``), a handler, and a few run rules:
+
+* ``jitter_seconds``: each run starts up to this much after its planned
+  time, so off-peak work does not land on the minute other bots use;
+* ``max_runtime``: a run still going after this long is cancelled and
+  recorded as ``timeout``;
+* ``catch_up``: ``once`` runs a job that was missed while the bot was down
+  (one run, however many were missed) as soon as the scheduler starts;
+  ``skip`` waits for the next planned time.
+
+Due times live in a heap, so the loop sleeps until the earliest one. Each
+job's state (planned next run, last run, duration and status) is persisted
+in ``scheduler_meta`` as ``job:<name>``. The planned next run moves on as a
+run starts, so a restart during a run does not start it again, while a run
+missed during downtime is still caught up. ``/status`` can report durations
+from any process. Only the leader (``should_run``) runs jobs. Standbys keep their
+heap moving so they can take over at the next planned time. A ``once`` run a
+standby skipped in the last ``STANDBY_CATCH_UP_SECONDS`` is run when it
+becomes leader if no other replica started it: the old leader died just
+before the run was due.
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CATCH_UP_POLICIES = ("once", "skip")
+MAX_SLEEP_SECONDS = 60  # Re-check at least this often, so clock jumps and leader changes are noticed
+STANDBY_CATCH_UP_SECONDS = 3600  # Far beyond a lease hand-over, well short of the next daily run
+_SEARCH_DAYS = 366 * 5  # Long enough for any valid expression (Feb 29 only comes round every four years)
+
+
+def _parse_field(text: str, low: int, high: int) -> frozenset[int]:
+    values = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start_text, end_text = spec.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(spec)
+            end = high if step_text else start
+        if step < 1 or not (low <= start <= end <= high):
+            raise ValueError(f"{part!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """``minute hour day-of-month month day-of-week``, with ``*``, ``a-b``, ``/step`` and comma lists.
+
+    Day of week runs 0-6 from Sunday (7 is Sunday too). As in cron, a day
+    matches either day field when both are restricted.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {len(fields)}: {expression!r}")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = frozenset(day % 7 for day in _parse_field(fields[4], 0, 7))
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        by_date = day.day in self.days
+        by_weekday = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return by_date and by_weekday
+        return by_date or by_weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute strictly after ``moment``, as an aware UTC datetime."""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        start = moment.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for offset in range(_SEARCH_DAYS):
+            day = start.date() + timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in sorted(self.hours):
+                for minute in sorted(self.minutes):
+                    candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+                    if candidate >= start:
+                        return candidate
+        raise ValueError(f"{self.expression!r} never matches")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+
+def daily_at(moment) -> str:
+    """The cron expression for every day at ``moment`` (a ``datetime.time``)."""
+    return f"{moment.minute} {moment.hour} * * *"
+
+
+@dataclass(frozen=True)
+class JobDefinition:
+    name: str
+    schedule: str
+    # Called with the run's planned time (aware UTC)
+    handler: Callable[[datetime], Awaitable] = field(compare=False)
+    description: str = ""
+    jitter_seconds: float = 0
+    max_runtime: float | None = None
+    catch_up: str = "skip"
+
+    def __post_init__(self):
+        if self.catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of: {', '.join(CATCH_UP_POLICIES)}")
+        object.__setattr__(self, "cron", CronSchedule(self.schedule))
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # Mongo returns naive UTC datetimes unless the client is tz_aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class Scheduler:
+    def __init__(self, db, jobs: list[JobDefinition], should_run: Callable[[], bool] | None = None,
+                 record_runs: bool = True, rng: random.Random | None = None):
+        self.db = db
+        self.jobs = {job.name: job for job in jobs}
+        self.should_run = should_run or (lambda: True)
+        # False when handlers only hand the run to someone else (worker queue), who records it
+        self.record_runs = record_runs
+        self._rng = rng or random.Random()
+        self._heap: list[tuple[datetime, str]] = []
+        self._planned: dict[str, datetime] = {}
+        self._due: dict[str, datetime] = {}
+        self._state: dict[str, dict] = {name: {} for name in self.jobs}
+        self._running: dict[str, asyncio.Task] = {}
+        # Planned times of runs skipped as a standby, checked once this replica leads
+        self._skipped: dict[str, datetime] = {}
+        self._loaded = False
+        self._stopping = asyncio.Event()
+
+    @staticmethod
+    def meta_name(name: str) -> str:
+        return f"job:{name}"
+
+    async def _load_state(self, name: str) -> dict:
+        try:
+            return await self.db.get_scheduler_meta(self.meta_name(name)) or {}
+        except Exception as exc:
+            logger.warning("Failed to load job state", extra={"event": "scheduler_state_error", "job": name, "error": str(exc)})
+            return {}
+
+    async def _save_state(self, name: str, fields: dict):
+        try:
+            await self.db.update_scheduler_meta(self.meta_name(name), fields)
+        except Exception as exc:
+            logger.warning("Failed to store job state", extra={"event": "scheduler_state_error", "job": name, "error": str(exc)})
+
+    async def load(self, now: datetime | None = None):
+        """Read persisted state and queue each job's next run, catching up missed ones per policy."""
+        now = now or datetime.now(timezone.utc)
+        self._heap.clear()
+        for job in self.jobs.values():
+            state = await self._load_state(job.name)
+            self._state[job.name] = {key: state.get(key) for key in ("last_run_at", "last_duration", "last_status")}
+            missed = _aware(state.get("next_run_at"))
+            if missed is not None and missed <= now and job.catch_up == "once":
+                logger.info("Catching up missed %s run planned for %s", job.name, missed.isoformat(),
+                            extra={"event": "scheduler_catch_up", "job": job.name, "planned": missed.isoformat()})
+                self._push(job, missed, due=now)
+            else:
+                self._push(job, job.cron.next_after(now))
+            fields = {
+                "schedule": job.schedule, "description": job.description, "jitter_seconds": job.jitter_seconds,
+                "max_runtime": job.max_runtime, "catch_up": job.catch_up,
+            }
+            # next_run_at only moves on once a run happens, so a run missed now is still caught up on the next start.
+            # A standby leaves it alone: it must not hide a run the leader has yet to catch up.
+            if self.should_run():
+                fields["next_run_at"] = self._planned[job.name]
+            await self._save_state(job.name, fields)
+        self._loaded = True
+
+    def _push(self, job: JobDefinition, planned: datetime, due: datetime | None = None):
+        if due is None:
+            due = planned + timedelta(seconds=self._rng.uniform(0, job.jitter_seconds)) if job.jitter_seconds else planned
+        self._planned[job.name] = planned
+        self._due[job.name] = due
+        heapq.heappush(self._heap, (due, job.name))
+        metrics.set_scheduled_job_next_run(job.name, due.timestamp())
+
+    def next_due(self) -> datetime | None:
+        # Entries left behind by a reschedule are dropped lazily
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def run_due(self, now: datetime | None = None) -> list[str]:
+        """Start every job due by ``now``; returns the names started."""
+        now = now or datetime.now(timezone.utc)
+        started = await self._catch_up_skipped(now) if self._skipped and self.should_run() else []
+        while (due := self.next_due()) is not None and due <= now:
+            _, name = heapq.heappop(self._heap)
+            job = self.jobs[name]
+            planned = self._planned[name]
+            self._push(job, job.cron.next_after(max(planned, now)))
+            if not self.should_run():
+                logger.info("Skipping %s: not the leader", name, extra={"event": "scheduler_standby", "job": name})
+                if job.catch_up == "once":
+                    self._skipped[name] = planned
+                continue
+            if name in self._running:
+                logger.warning("Skipping %s: previous run still going", name, extra={"event": "scheduler_overlap", "job": name})
+                metrics.record_scheduled_job(name, "skipped")
+                continue
+            self._running[name] = asyncio.create_task(self._execute(job, planned))
+            started.append(name)
+        return started
+
+    async def _catch_up_skipped(self, now: datetime) -> list[str]:
+        """Start runs skipped as a standby that no other replica started; returns their names."""
+        started = []
+        for name, planned in list(self._skipped.items()):
+            del self._skipped[name]
+            if now - planned > timedelta(seconds=STANDBY_CATCH_UP_SECONDS) or name in self._running:
+                continue
+            state = await self._load_state(name)
+            last_started = _aware(state.get("last_started_at") or state.get("last_run_at"))
+            if last_started is not None and last_started >= planned:
+                continue  # the previous leader ran it
+            logger.info("Catching up %s run planned for %s, missed in the leader hand-over", name, planned.isoformat(),
+                        extra={"event": "scheduler_catch_up", "job": name, "planned": planned.isoformat()})
+            self._running[name] = asyncio.create_task(self._execute(self.jobs[name], planned))
+            started.append(name)
+        return started
+
+    async def _execute(self, job: JobDefinition, planned: datetime):
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        status, error = "ok", None
+        # Moved on before the handler runs: a restart mid-run must not catch the same run up again
+        # (a second daily run would post twice), so an interrupted run is not repeated
+        await self._save_state(job.name, {"next_run_at": self._planned[job.name], "last_started_at": started_at})
+        try:
+            await asyncio.wait_for(job.handler(planned), job.max_runtime)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"exceeded {job.max_runtime:g}s"
+            logger.error("Job %s exceeded its %ss limit", job.name, job.max_runtime,
+                         extra={"event": "scheduler_timeout", "job": job.name})
+        except Exception as exc:
+            status, error = "error", str(exc)
+            logger.exception("Job %s failed", job.name, extra={"event": "scheduler_job_error", "job": job.name, "error": str(exc)})
+        finally:
+            self._running.pop(job.name, None)
+        fields = {"next_run_at": self._planned[job.name]}
+        if self.record_runs:
+            await self.record_run(job.name, started_at, time.perf_counter() - started, status, error, fields)
+        else:
+            await self._save_state(job.name, fields)
+
+    async def record_run(self, name: str, started_at: datetime, duration: float, status: str,
+                         error: str | None = None, extra: dict | None = None):
+        """Store the outcome of one run of ``name`` (also called by workers for queued runs)."""
+        state = {"last_run_at": started_at, "last_duration": round(duration, 3), "last_status": status}
+        self._state.setdefault(name, {}).update(state)
+        metrics.record_scheduled_job(name, status, duration)
+        logger.info("Job %s finished: %s in %.2fs", name, status, duration,
+                    extra={"event": "scheduler_job_done", "job": name, "status": status, "duration": round(duration, 3)})
+        await self._save_state(name, {**state, "last_error": error, **(extra or {})})
+
+    async def run(self):
+        """Load state, then start jobs as they fall due until ``stop``."""
+        if not self._loaded:
+            await self.load()
+        while not self._stopping.is_set():
+            try:
+                await self.run_due()
+            except Exception as exc:
+                logger.error("Scheduler loop error: %s", exc, extra={"event": "scheduler_loop_error", "error": str(exc)})
+            due = self.next_due()
+            delay = MAX_SLEEP_SECONDS
+            if due is not None:
+                delay = min(max((due - datetime.now(timezone.utc)).total_seconds(), 0), MAX_SLEEP_SECONDS)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self):
+        """Wait for the runs in progress to finish."""
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def stop(self):
+        self._stopping.set()
+        for task in self._running.values():
+            task.cancel()
+
+    async def upcoming(self) -> list[dict]:
+        """Every job with its next run and last outcome, soonest first.
+
+        Works in processes that do not run the scheduler (a gateway): next
+        runs then come from the schedules, last runs from the stored state.
+        """
+        now = datetime.now(timezone.utc)
+        rows = []
+        for job in self.jobs.values():
+            state = self._state.get(job.name) or {}
+            if not self._loaded:
+                stored = await self._load_state(job.name)
+                state = {key: stored.get(key) for key in ("last_run_at", "last_duration", "last_status")}
+            rows.append({
+                "name": job.name,
+                "description": job.description,
+                "next_run_at": self._due.get(job.name) or job.cron.next_after(now),
+                "last_run_at": _aware(state.get("last_run_at")),
+                "last_duration": state.get("last_duration"),
+                "last_status": state.get("last_status"),
+                "running": job.name in self._running,
+            })
+        return sorted(rows, key=lambda row: row["next_run_at"])
@@ -0,0 +1,258 @@
+"""Dry run of the daily task over a date range; nothing is sent or written.
+
+For each day the simulator reports who would be celebrated, which holidays
+would be announced and which manual wishes are stored. It also estimates how
+heavy the run would be: messages posted, role changes, and Gemini and
+Calendarific calls. The estimates mirror ``Wishes.run_daily``:
+
+* birthdays match on day and month, and in common years Feb 28 also
+  celebrates Feb 29 birthdays, as the daily run's doy lookup does;
+* every celebrant gets a birthday message, a role on the day and a role
+  removal on the next run. Everyone registered is assumed to still be in the
+  guild, since departures are only found at run time;
+* each holiday is one Gemini call and one message (a preview to staff in
+  approval mode), plus one staff list message on days with holidays, and a
+  summary every day;
+* a month's holidays cost one Calendarific call per country, then are served
+  from the cache until ``HOLIDAY_CACHE_MAX_AGE_DAYS`` have passed (every run
+  calls when the cache is off). The simulation assumes an empty cache;
+* birthday wishes cost a Gemini call only in live mode, or when the template
+  pool is empty. Refilling the pool after a run is not counted;
+* with ``JOIN_ANNIVERSARIES``, each ``ANNIVERSARY_BATCH_SIZE`` members
+  celebrating a join anniversary are one message. Join dates come from the
+  stored ``member_joins`` snapshot, so without one (a bot holding the member
+  cache) anniversaries are not counted.
+
+Manual wishes are listed but not counted as messages, because the daily task
+does not post them.
+
+Inputs are loaded up front: one query for all birthdays, one for the manual
+wishes in range, one for the join snapshot, and one holiday lookup per month. A whole year then
+evaluates in memory in well under a second.
+
+    python -m utils.simulator 2026-12-01 --days 31
+    python -m utils.simulator 2027-01-01 --days 365 --offline --json
+"""
+
+import asyncio
+import calendar
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+
+from utils.anniversaries import due_anniversaries
+from utils.dates import doy_ranges
+
+
+@dataclass
+class DayPlan:
+    day: date
+    celebrants: list[int] = field(default_factory=list)
+    holidays: list[str] = field(default_factory=list)
+    manual_wishes: list[str] = field(default_factory=list)
+    holidays_unavailable: bool = False
+    anniversaries: int = 0
+    messages: int = 0
+    role_changes: int = 0
+    gemini_calls: int = 0
+    calendarific_calls: int = 0
+
+
+@dataclass(frozen=True)
+class RunCosts:
+    """How the current configuration turns a day's inputs into work."""
+
+    live_birthday_wishes: bool
+    gemini_enabled: bool
+    calendarific_calls_per_run: int  # when the month is not served from the cache
+    holiday_locales: int = 1  # each holiday is generated and posted once per language
+    anniversary_batch_size: int = 0  # members per anniversary message; 0 when anniversaries are off
+    holiday_cache_days: float = 0  # how long a fetched month is served from the cache; 0 when off
+
+
+def _months(start: date, days: int) -> list[tuple[int, int]]:
+    months, current = [], date(start.year, start.month, 1)
+    end = start + timedelta(days=days - 1)
+    while current <= end:
+        months.append((current.year, current.month))
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+
+def plan_days(birthdays: list[dict], holidays_by_month: dict[tuple[int, int], list[dict] | None],
+              manual_wishes: list[dict], start: date, days: int, costs: RunCosts,
+              member_joins: list[dict] = ()) -> list[DayPlan]:
+    """Pure, in-memory core of the simulation; ``member_joins`` holds ``_id``, ``doy`` and ``year``."""
+    by_date: dict[tuple[int, int], list[int]] = {}
+    for entry in birthdays:
+        by_date.setdefault((entry.get("month"), entry.get("day")), []).append(entry["_id"])
+    manual_by_date: dict[tuple[int, int, int], list[str]] = {}
+    for wish in manual_wishes:
+        manual_by_date.setdefault((wish.get("year"), wish.get("month"), wish.get("day")), []).append(wish.get("name", "?"))
+    joins_by_doy: dict[int, list[tuple[int, int]]] = {}
+    for entry in member_joins if costs.anniversary_batch_size else ():
+        joins_by_doy.setdefault(entry["doy"], []).append((entry["_id"], entry["year"]))
+    holidays_by_day: dict[str, list[str]] = {}
+    for holidays in holidays_by_month.values():
+        for holiday in holidays or []:
+            holidays_by_day.setdefault(holiday.get("date", {}).get("iso", "")[:10], []).append(holiday["name"])
+
+    def celebrants_on(day: date) -> list[int]:
+        found = list(by_date.get((day.month, day.day), []))
+        if (day.month, day.day) == (2, 28) and not calendar.isleap(day.year):
+            found += by_date.get((2, 29), [])
+        return found
+
+    plans, yesterday = [], celebrants_on(start - timedelta(days=1))
+    fetched: dict[tuple[int, int], date] = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        plan = DayPlan(
+            day=day,
+            celebrants=celebrants_on(day),
+            holidays=list(holidays_by_day.get(day.isoformat(), [])),
+            manual_wishes=list(manual_by_date.get((day.year, day.month, day.day), [])),
+            holidays_unavailable=holidays_by_month.get((day.year, day.month)) is None,
+        )
+        birthday_messages = len(plan.celebrants)
+        if costs.live_birthday_wishes:
+            # Without a Gemini key live mode has no text to post
+            birthday_messages = birthday_messages if costs.gemini_enabled else 0
+            plan.gemini_calls += len(plan.celebrants) if costs.gemini_enabled else 0
+        if costs.gemini_enabled:
+            plan.gemini_calls += len(plan.holidays) * costs.holiday_locales
+        last_fetch = fetched.get((day.year, day.month))
+        if last_fetch is None or (day - last_fetch).days >= costs.holiday_cache_days:
+            plan.calendarific_calls = costs.calendarific_calls_per_run
+            fetched[(day.year, day.month)] = day
+        holiday_alerts = 1 if plan.holidays or plan.holidays_unavailable else 0
+        if joins_by_doy:
+            # Same buckets as the daily run: Feb 28 also covers Feb 29 in common years
+            entries = [
+                entry
+                for low, high in doy_ranges(day, 1)
+                for doy in range(low, high + 1)
+                for entry in joins_by_doy.get(doy, [])
+            ]
+            plan.anniversaries = len(due_anniversaries(entries, day))
+        anniversary_messages = -(-plan.anniversaries // costs.anniversary_batch_size) if plan.anniversaries else 0
+        plan.messages = (1 + holiday_alerts + birthday_messages + anniversary_messages
+                         + len(plan.holidays) * costs.holiday_locales)
+        plan.role_changes = len(plan.celebrants) + len(yesterday)
+        yesterday = plan.celebrants
+        plans.append(plan)
+    return plans
+
+
+def _holiday_source(context, offline: bool):
+    """``get_holidays(year, month)`` for the simulation, Calendarific calls per fetch, and days a fetch is cached."""
+    from utils.holidays import ChainProvider
+
+    api, provider = context.api, context.api.holiday_provider
+    # Local calendars are merged with Calendarific, not used instead of it
+    per_fetch = len(api.calendarific_countries) if api.calendarific_api_key else 0
+    if not isinstance(provider, ChainProvider):
+        return api.get_holidays, per_fetch, 0
+    cache_days = provider.max_age.total_seconds() / 86400 if provider.cache is not None and provider.max_age else 0
+    # The cache is read as a last resort but never written; offline skips Calendarific
+    sources = [source for source in provider.providers if not (offline and source.name == "calendarific")]
+    if provider.cache is not None:
+        sources.append(provider.cache)
+    return ChainProvider(sources).get_holidays, per_fetch, cache_days
+
+
+async def simulate(context, start: date, days: int, offline: bool = False) -> list[DayPlan]:
+    """Plan ``days`` daily runs from ``start`` using ``context`` (an AppContext)."""
+    settings, db = context.settings, context.db
+    end = start + timedelta(days=days - 1)
+    get_holidays, calendarific_per_fetch, holiday_cache_days = _holiday_source(context, offline)
+    months = _months(start, days)
+
+    template_count = await db.count_birthday_templates(settings.default_locale) if settings.birthday_wish_mode == "pool" else 0
+    birthdays, manual_wishes, member_joins, *holidays = await asyncio.gather(
+        db.get_birthday_dates(),
+        db.get_manual_wishes_for_years(start.year, end.year),
+        db.get_member_joins_in_doy_ranges([(1, 366)]) if settings.join_anniversaries else _nothing(),
+        *(get_holidays(year, month) for year, month in months),
+    )
+    costs = RunCosts(
+        live_birthday_wishes=settings.birthday_wish_mode != "pool" or not template_count,
+        gemini_enabled=bool(settings.gemini_api_key),
+        calendarific_calls_per_run=calendarific_per_fetch,
+        holiday_locales=len(settings.holiday_wish_locales),
+        anniversary_batch_size=max(settings.anniversary_batch_size, 1) if settings.join_anniversaries else 0,
+        holiday_cache_days=holiday_cache_days,
+    )
+    return plan_days(birthdays, dict(zip(months, holidays)), manual_wishes, start, days, costs, member_joins)
+
+
+async def _nothing() -> list:
+    return []
+
+
+def format_plan(plan: DayPlan) -> str:
+    holidays = "holidays unavailable" if plan.holidays_unavailable else (", ".join(plan.holidays) or "-")
+    line = (
+        f"{plan.day.isoformat()} | birthdays {len(plan.celebrants)} | anniversaries {plan.anniversaries} | holidays: {holidays} | "
+        f"messages {plan.messages} | roles {plan.role_changes} | gemini {plan.gemini_calls} | "
+        f"calendarific {plan.calendarific_calls}"
+    )
+    if plan.manual_wishes:
+        line += f" | manual: {', '.join(plan.manual_wishes)}"
+    return line
+
+
+def summarize(plans: list[DayPlan]) -> str:
+    if not plans:
+        return "Nothing to simulate."
+    busiest = max(plans, key=lambda plan: (plan.messages, plan.gemini_calls))
+    return (
+        f"{plans[0].day.isoformat()} → {plans[-1].day.isoformat()} ({len(plans)} days): "
+        f"{sum(len(plan.celebrants) for plan in plans)} birthdays, "
+        f"{sum(len(plan.holidays) for plan in plans)} holidays, "
+        f"{sum(plan.messages for plan in plans)} messages, "
+        f"{sum(plan.gemini_calls for plan in plans)} Gemini and "
+        f"{sum(plan.calendarific_calls for plan in plans)} Calendarific calls. "
+        f"Busiest: {busiest.day.isoformat()} ({busiest.messages} messages, {busiest.gemini_calls} Gemini calls)"
+    )
+
+
+async def _main(argv: list[str]) -> int:
+    import argparse
+    import json
+    import time
+
+    from dotenv import load_dotenv
+
+    from config import Settings
+    from utils.app_context import AppContext
+
+    parser = argparse.ArgumentParser(prog="python -m utils.simulator")
+    parser.add_argument("start", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--offline", action="store_true", help="use local calendars and the holiday cache only")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    context = AppContext.from_settings(Settings.from_env())
+    try:
+        started = time.perf_counter()
+        plans = await simulate(context, args.start, args.days, offline=args.offline)
+        elapsed = time.perf_counter() - started
+    finally:
+        await context.close()
+
+    if args.json:
+        print(json.dumps([asdict(plan) for plan in plans], default=str, indent=2))
+    else:
+        for plan in plans:
+            print(format_plan(plan))
+        print(summarize(plans))
+        print(f"Simulated in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,679 @@
+"""Embedded SQLite storage with the same methods as ``DatabaseManager``.
+
+For small deployments that would rather not run MongoDB. Select it with
+``STORAGE_BACKEND=sqlite`` and ``SQLITE_PATH``.
+
+* All SQL runs on one dedicated thread that owns the connection. Coroutines
+  hand it work through ``run_in_executor``, so the event loop never blocks
+  on disk I/O. Calls from the bot are also serialised this way, which makes
+  the read-modify-write methods (leases, job claims) atomic within the
+  process. They run in ``BEGIN IMMEDIATE`` transactions, which makes them
+  atomic across processes sharing the file too.
+* The journal is WAL with ``synchronous=NORMAL``, so readers in other
+  processes (the CLIs, a worker) do not block the bot's writes.
+* Birthdays are indexed on (month, day) for the daily lookup and on
+  (doy, user_id) for range queries, so no migrations are needed. The schema
+  is created when the file is first opened and versioned with
+  ``PRAGMA user_version``; columns added later (``ADDED_COLUMNS``) are
+  added to older files on open.
+
+Rows come back shaped like Mongo documents (``_id`` plus fields), and
+cursor-returning methods return an async iterable, so callers do not care
+which backend they have. ``tests/test_storage_conformance.py`` runs the same
+checks against both backends.
+"""
+
+import asyncio
+import json
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from utils.dates import day_of_year
+from utils.db_manager import _instrumented
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS birthdays (
+    user_id INTEGER PRIMARY KEY,
+    day INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    year INTEGER,
+    doy INTEGER,
+    templates_used TEXT NOT NULL DEFAULT '[]',
+    locale TEXT
+);
+CREATE INDEX IF NOT EXISTS birthdays_month_day ON birthdays (month, day);
+CREATE INDEX IF NOT EXISTS birthdays_doy ON birthdays (doy, user_id);
+
+CREATE TABLE IF NOT EXISTS birthday_role_log (
+    user_id INTEGER PRIMARY KEY,
+    date_added TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS birthday_role_log_date_added ON birthday_role_log (date_added);
+
+CREATE TABLE IF NOT EXISTS manual_wishes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    role_id TEXT
+);
+CREATE INDEX IF NOT EXISTS manual_wishes_date ON manual_wishes (month, day);
+
+CREATE TABLE IF NOT EXISTS scheduler_meta (
+    name TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS birthday_templates (
+    template_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    locale TEXT NOT NULL DEFAULT 'en'
+);
+
+CREATE TABLE IF NOT EXISTS holiday_cache (
+    key TEXT PRIMARY KEY,
+    holidays TEXT NOT NULL,
+    fetched_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    locked_until TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    created_at TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_run_at ON jobs (status, run_at);
+
+CREATE TABLE IF NOT EXISTS member_joins (
+    user_id INTEGER PRIMARY KEY,
+    joined_at TEXT NOT NULL,
+    doy INTEGER NOT NULL,
+    year INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS member_joins_doy ON member_joins (doy, user_id);
+
+CREATE TABLE IF NOT EXISTS reminder_subscriptions (
+    subscriber_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    days_before INTEGER NOT NULL,
+    PRIMARY KEY (subscriber_id, kind, target_id)
+);
+CREATE INDEX IF NOT EXISTS reminder_subscriptions_target ON reminder_subscriptions (kind, target_id);
+
+CREATE TABLE IF NOT EXISTS wish_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+# Columns added after a table first shipped; CREATE TABLE IF NOT EXISTS leaves older files without them
+ADDED_COLUMNS = (
+    ("birthdays", "locale", "TEXT"),
+    ("birthday_templates", "locale", "TEXT NOT NULL DEFAULT 'en'"),
+)
+
+_JOB_COLUMNS = ("kind", "payload", "status", "run_at", "attempts", "owner", "locked_until", "started_at",
+                "finished_at", "created_at", "error")
+_JOB_TIMES = ("run_at", "locked_until", "started_at", "finished_at", "created_at")
+
+
+def _ts(value: datetime | None) -> str | None:
+    """Fixed-width UTC text, so timestamps sort and compare correctly as strings."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # naive means UTC, as with Mongo
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _dt(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+
+
+def _dump_doc(doc: dict) -> str:
+    def encode(value):
+        if isinstance(value, datetime):
+            return {"$date": _ts(value)}
+        raise TypeError(f"Cannot store {type(value).__name__}")
+    return json.dumps(doc, default=encode)
+
+
+def _load_doc(text: str) -> dict:
+    def decode(value: dict):
+        return _dt(value["$date"]) if set(value) == {"$date"} else value
+    return json.loads(text, object_hook=decode)
+
+
+class _Rows:
+    """Async-iterable query result, standing in for a Motor cursor; runs when first iterated."""
+
+    def __init__(self, manager: "SQLiteDatabaseManager", fetch):
+        self._manager = manager
+        self._fetch = fetch
+
+    async def to_list(self, length: int | None = None) -> list[dict]:
+        rows = await self._manager._call(self._fetch)
+        return rows if length is None else rows[:length]
+
+    async def __aiter__(self):
+        for row in await self.to_list():
+            yield row
+
+
+class SQLiteDatabaseManager:
+    def __init__(self, path: str = "mangalify.db"):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        # One thread owns the connection; every call is queued onto it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    # --- Connection and threading ---
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(SCHEMA)
+            for table, column, definition in ADDED_COLUMNS:
+                if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connection(), *args))
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection, func, *args):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn, *args)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    async def _write(self, func, *args):
+        return await self._call(lambda conn, *inner: self._transaction(conn, func, *inner), *args)
+
+    async def _fetchall(self, sql: str, params=()) -> list[sqlite3.Row]:
+        return await self._call(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def _fetchone(self, sql: str, params=()) -> sqlite3.Row | None:
+        return await self._call(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def _execute(self, sql: str, params=()) -> int:
+        return await self._call(lambda conn: conn.execute(sql, params).rowcount)
+
+    def _rows(self, sql: str, params, shape) -> _Rows:
+        return _Rows(self, lambda conn: [shape(row) for row in conn.execute(sql, params).fetchall()])
+
+    # --- Birthday Methods ---
+    @staticmethod
+    def _birthday(row) -> dict:
+        doc = {"_id": row["user_id"], "day": row["day"], "month": row["month"]}
+        keys = row.keys()
+        for name in ("year", "doy"):
+            if name in keys:
+                doc[name] = row[name]
+        if "templates_used" in keys:
+            doc["templates_used"] = json.loads(row["templates_used"])
+        if "locale" in keys and row["locale"] is not None:
+            doc["locale"] = row["locale"]
+        return doc
+
+    @_instrumented("birthdays")
+    async def set_birthday(self, user_id: int, day: int, month: int, year: int, locale: str | None = None):
+        """Store a birthday; ``locale`` is only changed when given."""
+        await self._execute(
+            "INSERT INTO birthdays (user_id, day, month, year, doy, locale) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET day = excluded.day, month = excluded.month, "
+            "year = excluded.year, doy = excluded.doy, locale = COALESCE(excluded.locale, birthdays.locale)",
+            (user_id, day, month, year, day_of_year(day, month), locale),
+        )
+
+    @_instrumented("birthdays")
+    async def set_birthday_locale(self, user_id: int, locale: str | None) -> bool:
+        """Set the wish locale of a registered birthday (None: server default); False if there is none."""
+        return await self._execute("UPDATE birthdays SET locale = ? WHERE user_id = ?", (locale, user_id)) > 0
+
+    @_instrumented("birthdays")
+    async def get_birthday_locales(self) -> list[str]:
+        """Every locale members have chosen, for keeping a template pool per language."""
+        rows = await self._fetchall("SELECT DISTINCT locale FROM birthdays WHERE locale IS NOT NULL ORDER BY locale")
+        return [row[0] for row in rows]
+
+    @_instrumented("birthdays")
+    async def get_birthday(self, user_id: int):
+        row = await self._fetchone("SELECT * FROM birthdays WHERE user_id = ?", (user_id,))
+        return self._birthday(row) if row else None
+
+    @_instrumented("birthdays")
+    async def delete_birthday(self, user_id: int):
+        return await self._execute("DELETE FROM birthdays WHERE user_id = ?", (user_id,)) > 0
+
+    @_instrumented("birthdays", cursor=True)
+    async def get_all_birthdays(self):
+        return self._rows("SELECT * FROM birthdays ORDER BY user_id", (), self._birthday)
+
+    @_instrumented("birthdays", cursor=True)
+    def get_birthdays_for_date(self, day: int, month: int):
+        return self._rows("SELECT * FROM birthdays WHERE month = ? AND day = ? ORDER BY user_id", (month, day), self._birthday)
+
+    @_instrumented("birthdays")
+    async def get_birthdays_in_doy_ranges(self, ranges: list[tuple[int, int]], limit: int, full: bool = False):
+        """Birthdays whose ``doy`` falls in the given inclusive ranges, in range order then doy order.
+
+        Only ``_id``, day, month and doy are returned unless ``full`` is set.
+        """
+        columns = "*" if full else "user_id, day, month, doy"
+        def fetch(conn):
+            results = []
+            for low, high in ranges:
+                remaining = limit - len(results)
+                if remaining <= 0:
+                    break
+                rows = conn.execute(
+                    f"SELECT {columns} FROM birthdays WHERE doy BETWEEN ? AND ? "
+                    "ORDER BY doy, user_id LIMIT ?",
+                    (low, high, remaining),
+                ).fetchall()
+                results.extend(self._birthday(row) for row in rows)
+            return results
+        return await self._call(fetch)
+
+    @_instrumented("birthdays")
+    async def get_birthday_dates(self) -> list[dict]:
+        """Every birthday's ``_id``, day and month in one pass (for whole-year precomputation)."""
+        rows = await self._fetchall("SELECT user_id, day, month FROM birthdays")
+        return [self._birthday(row) for row in rows]
+
+    @_instrumented("birthdays")
+    async def estimated_birthday_count(self) -> int:
+        return (await self._fetchone("SELECT COUNT(*) FROM birthdays"))[0]
+
+    @_instrumented("birthdays")
+    async def count_birthdays_by_month(self) -> dict[int, int]:
+        rows = await self._fetchall("SELECT month, COUNT(*) FROM birthdays GROUP BY month")
+        return {int(row[0]): row[1] for row in rows if row[0] is not None}
+
+    @_instrumented("birthdays")
+    async def record_birthday_template_use(self, user_id: int, template_id: str, reset: bool = False):
+        """Remember that ``user_id`` received ``template_id``; ``reset`` starts their history over."""
+        def update(conn):
+            row = conn.execute("SELECT templates_used FROM birthdays WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return
+            used = [] if reset else json.loads(row[0])
+            if template_id not in used:
+                used.append(template_id)
+            conn.execute("UPDATE birthdays SET templates_used = ? WHERE user_id = ?", (json.dumps(used), user_id))
+        await self._write(update)
+
+    # --- Birthday Templates ---
+    @_instrumented("birthday_templates")
+    async def add_birthday_templates(self, texts: list[str], locale: str = "en") -> int:
+        """Store templates keyed by content hash; returns how many were new."""
+        from utils.templates import template_id
+
+        created_at = _ts(datetime.now(timezone.utc))
+
+        def insert(conn):
+            added = 0
+            for text in texts:
+                added += conn.execute(
+                    "INSERT OR IGNORE INTO birthday_templates (template_id, text, created_at, locale) VALUES (?, ?, ?, ?)",
+                    (template_id(text), text, created_at, locale),
+                ).rowcount
+            return added
+        return await self._write(insert)
+
+    @_instrumented("birthday_templates")
+    async def get_birthday_templates(self, locale: str = "en") -> list[dict]:
+        rows = await self._fetchall("SELECT template_id, text FROM birthday_templates WHERE locale = ?", (locale,))
+        return [{"_id": row["template_id"], "text": row["text"]} for row in rows]
+
+    @_instrumented("birthday_templates")
+    async def count_birthday_templates(self, locale: str = "en") -> int:
+        return (await self._fetchone("SELECT COUNT(*) FROM birthday_templates WHERE locale = ?", (locale,)))[0]
+
+    # --- Birthday Role Logging ---
+    @staticmethod
+    def _role_log(row) -> dict:
+        return {"_id": row["user_id"], "date_added": row["date_added"]}
+
+    @_instrumented("birthday_role_log")
+    async def add_user_to_role_log(self, user_id: int, date_added: str):
+        await self._execute(
+            "INSERT INTO birthday_role_log (user_id, date_added) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET date_added = excluded.date_added",
+            (user_id, date_added),
+        )
+
+    @_instrumented("birthday_role_log", cursor=True)
+    async def get_users_with_birthday_role(self):
+        return self._rows("SELECT * FROM birthday_role_log", (), self._role_log)
+
+    @_instrumented("birthday_role_log", cursor=True)
+    async def get_all_role_logs(self):
+        return self._rows("SELECT * FROM birthday_role_log", (), self._role_log)
+
+    @_instrumented("birthday_role_log")
+    async def estimated_role_log_count(self) -> int:
+        return (await self._fetchone("SELECT COUNT(*) FROM birthday_role_log"))[0]
+
+    @_instrumented("birthday_role_log")
+    async def remove_user_from_role_log(self, user_id: int):
+        await self._execute("DELETE FROM birthday_role_log WHERE user_id = ?", (user_id,))
+
+    # --- Scheduler Metadata ---
+    @staticmethod
+    def _get_meta(conn, name: str) -> dict | None:
+        row = conn.execute("SELECT doc FROM scheduler_meta WHERE name = ?", (name,)).fetchone()
+        return {"_id": name, **_load_doc(row[0])} if row else None
+
+    @staticmethod
+    def _put_meta(conn, name: str, doc: dict):
+        fields = {key: value for key, value in doc.items() if key != "_id"}
+        conn.execute(
+            "INSERT INTO scheduler_meta (name, doc) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET doc = excluded.doc",
+            (name, _dump_doc(fields)),
+        )
+
+    @_instrumented("scheduler_meta")
+    async def upsert_scheduler_meta(self, name: str, next_run_at: str | None, last_run_at: str | None):
+        update = {}
+        if next_run_at is not None:
+            update["next_run_at"] = next_run_at
+        if last_run_at is not None:
+            update["last_run_at"] = last_run_at
+        if not update:
+            return
+        await self.update_scheduler_meta(name, update)
+
+    @_instrumented("scheduler_meta")
+    async def update_scheduler_meta(self, name: str, fields: dict):
+        if not fields:
+            return
+
+        def merge(conn):
+            self._put_meta(conn, name, {**(self._get_meta(conn, name) or {}), **fields})
+        await self._write(merge)
+
+    @_instrumented("scheduler_meta")
+    async def get_scheduler_meta(self, name: str):
+        return await self._call(self._get_meta, name)
+
+    @_instrumented("scheduler_meta")
+    async def acquire_lease(self, name: str, owner: str, now: datetime, expires_at: datetime,
+                            acquired_at: datetime | None = None):
+        """Atomically take or renew lease ``name`` for ``owner``; returns the lease, or None if held elsewhere."""
+        def take(conn):
+            lease = self._get_meta(conn, name)
+            held = lease is not None and lease.get("owner") != owner and lease.get("expires_at") is not None
+            if held and _ts(lease["expires_at"]) > _ts(now):
+                return None
+            lease = {**(lease or {}), "owner": owner, "expires_at": expires_at, "renewed_at": now}
+            if acquired_at is not None:
+                lease["acquired_at"] = acquired_at
+            self._put_meta(conn, name, lease)
+            return {"_id": name, **lease}
+        return await self._write(take)
+
+    @_instrumented("scheduler_meta")
+    async def release_lease(self, name: str, owner: str, now: datetime):
+        def release(conn):
+            lease = self._get_meta(conn, name)
+            if lease is not None and lease.get("owner") == owner:
+                self._put_meta(conn, name, {**lease, "expires_at": now})
+        await self._write(release)
+
+    # --- Holiday Cache ---
+    @_instrumented("holiday_cache")
+    async def get_cached_holidays(self, key: str):
+        row = await self._fetchone("SELECT holidays, fetched_at FROM holiday_cache WHERE key = ?", (key,))
+        if row is None:
+            return None
+        return {"_id": key, "holidays": json.loads(row["holidays"]), "fetched_at": _dt(row["fetched_at"])}
+
+    @_instrumented("holiday_cache")
+    async def store_cached_holidays(self, key: str, holidays: list[dict], fetched_at):
+        await self._execute(
+            "INSERT INTO holiday_cache (key, holidays, fetched_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET holidays = excluded.holidays, fetched_at = excluded.fetched_at",
+            (key, json.dumps(holidays), _ts(fetched_at)),
+        )
+
+    # --- Holiday Wish Cache ---
+    @_instrumented("wish_cache")
+    async def get_cached_wish(self, key: str) -> str | None:
+        row = await self._fetchone("SELECT text FROM wish_cache WHERE key = ?", (key,))
+        return row["text"] if row else None
+
+    @_instrumented("wish_cache")
+    async def store_cached_wish(self, key: str, text: str):
+        await self._execute(
+            "INSERT INTO wish_cache (key, text, created_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET text = excluded.text, created_at = excluded.created_at",
+            (key, text, _ts(datetime.now(timezone.utc))),
+        )
+
+    # --- Job Queue ---
+    @staticmethod
+    def _job(row) -> dict:
+        job = {"_id": row["id"]}
+        for column in _JOB_COLUMNS:
+            value = row[column]
+            job[column] = _dt(value) if column in _JOB_TIMES else value
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    @_instrumented("jobs")
+    async def enqueue_job(self, job: dict) -> bool:
+        """Insert ``job``; returns False if a job with the same ``_id`` already exists."""
+        values = {column: job.get(column) for column in _JOB_COLUMNS}
+        values["payload"] = json.dumps(values["payload"] or {})
+        values["attempts"] = values["attempts"] or 0
+        for column in _JOB_TIMES:
+            values[column] = _ts(values[column])
+        job_id = str(job.get("_id") or uuid.uuid4().hex)
+        try:
+            await self._execute(
+                f"INSERT INTO jobs (id, {', '.join(_JOB_COLUMNS)}) VALUES (?{', ?' * len(_JOB_COLUMNS)})",
+                (job_id, *values.values()),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        job.setdefault("_id", job_id)
+        return True
+
+    @_instrumented("jobs")
+    async def claim_job(self, owner: str, now: datetime, locked_until: datetime, kinds=None):
+        """Atomically take the oldest due job (or one whose previous owner's lock ran out)."""
+        def claim(conn):
+            sql = ("SELECT id FROM jobs WHERE ((status = 'pending' AND run_at <= ?) "
+                   "OR (status = 'running' AND locked_until <= ?))")
+            params = [_ts(now), _ts(now)]
+            if kinds:
+                sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+                params.extend(kinds)
+            row = conn.execute(sql + " ORDER BY run_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, locked_until = ?, started_at = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (owner, _ts(locked_until), _ts(now), row["id"]),
+            )
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+        return await self._write(claim)
+
+    @_instrumented("jobs")
+    async def update_job(self, job_id, owner: str, fields: dict) -> bool:
+        """Update a job this owner still holds; False if the lock was lost to another worker."""
+        values = {
+            column: _ts(value) if column in _JOB_TIMES else json.dumps(value) if column == "payload" else value
+            for column, value in fields.items()
+            if column in _JOB_COLUMNS
+        }
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        changed = await self._execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ? AND status = 'running'",
+            (*values.values(), str(job_id), owner),
+        )
+        return changed > 0
+
+    @_instrumented("jobs")
+    async def purge_finished_jobs(self, before: datetime) -> int:
+        """Delete done and failed jobs that finished before ``before``; returns how many."""
+        return await self._execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (_ts(before),),
+        )
+
+    @_instrumented("jobs")
+    async def count_jobs(self, status: str) -> int:
+        return (await self._fetchone("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)))[0]
+
+    # --- Member Join Snapshot ---
+    @staticmethod
+    def _member_join_values(entry: dict) -> tuple:
+        return entry["_id"], _ts(entry["joined_at"]), entry["doy"], entry["year"]
+
+    @_instrumented("member_joins")
+    async def set_member_join(self, entry: dict):
+        """Store one ``utils.anniversaries.snapshot_entry`` document."""
+        await self._execute(
+            "INSERT OR REPLACE INTO member_joins (user_id, joined_at, doy, year) VALUES (?, ?, ?, ?)",
+            self._member_join_values(entry),
+        )
+
+    @_instrumented("member_joins")
+    async def delete_member_join(self, user_id: int):
+        await self._execute("DELETE FROM member_joins WHERE user_id = ?", (user_id,))
+
+    @_instrumented("member_joins")
+    async def replace_member_joins(self, entries: list[dict]):
+        """Replace the whole snapshot with ``entries`` in one transaction."""
+        rows = [self._member_join_values(entry) for entry in entries]
+
+        def replace(conn):
+            conn.execute("DELETE FROM member_joins")
+            conn.executemany("INSERT OR REPLACE INTO member_joins (user_id, joined_at, doy, year) VALUES (?, ?, ?, ?)", rows)
+        await self._write(replace)
+
+    @_instrumented("member_joins")
+    async def get_member_joins_in_doy_ranges(self, ranges: list[tuple[int, int]]) -> list[dict]:
+        """``_id``, ``doy`` and join ``year`` of every snapshot entry whose ``doy`` is in the inclusive ranges."""
+        def fetch(conn):
+            results = []
+            for low, high in ranges:
+                rows = conn.execute(
+                    "SELECT user_id, doy, year FROM member_joins WHERE doy BETWEEN ? AND ? ORDER BY user_id", (low, high)
+                ).fetchall()
+                results.extend({"_id": row["user_id"], "doy": row["doy"], "year": row["year"]} for row in rows)
+            return results
+        return await self._call(fetch)
+
+    # --- Birthday Reminder Subscriptions ---
+    @staticmethod
+    def _subscription(row) -> dict:
+        return {
+            "_id": f"{row['subscriber_id']}:{row['kind']}:{row['target_id']}",
+            "subscriber_id": row["subscriber_id"], "kind": row["kind"],
+            "target_id": row["target_id"], "days_before": row["days_before"],
+        }
+
+    @_instrumented("reminder_subscriptions")
+    async def add_reminder_subscription(self, subscriber_id: int, kind: str, target_id: int, days_before: int):
+        """Follow a user's (``kind="user"``) or a role's (``kind="role"``) birthdays; re-following updates ``days_before``."""
+        await self._execute(
+            "INSERT INTO reminder_subscriptions (subscriber_id, kind, target_id, days_before) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(subscriber_id, kind, target_id) DO UPDATE SET days_before = excluded.days_before",
+            (subscriber_id, kind, target_id, days_before),
+        )
+
+    @_instrumented("reminder_subscriptions")
+    async def remove_reminder_subscriptions(self, subscriber_id: int, kind: str | None = None,
+                                            target_id: int | None = None) -> int:
+        """Drop one subscription, or all of ``subscriber_id``'s when ``kind`` is None; returns how many went."""
+        if kind is None:
+            return await self._execute("DELETE FROM reminder_subscriptions WHERE subscriber_id = ?", (subscriber_id,))
+        return await self._execute(
+            "DELETE FROM reminder_subscriptions WHERE subscriber_id = ? AND kind = ? AND target_id = ?",
+            (subscriber_id, kind, target_id),
+        )
+
+    @_instrumented("reminder_subscriptions")
+    async def get_reminder_subscriptions(self, subscriber_id: int) -> list[dict]:
+        rows = await self._fetchall("SELECT * FROM reminder_subscriptions WHERE subscriber_id = ?", (subscriber_id,))
+        return sorted((self._subscription(row) for row in rows), key=lambda doc: doc["_id"])
+
+    @_instrumented("reminder_subscriptions")
+    async def get_reminder_subscribers(self, kind: str, target_ids=None) -> list[dict]:
+        """Subscriptions of ``kind`` following any of ``target_ids`` (every one of that kind when None)."""
+        def fetch(conn):
+            if target_ids is None:
+                rows = conn.execute("SELECT * FROM reminder_subscriptions WHERE kind = ?", (kind,)).fetchall()
+            else:
+                rows = []
+                ids = list(target_ids)
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    rows.extend(conn.execute(
+                        f"SELECT * FROM reminder_subscriptions WHERE kind = ? AND target_id IN ({', '.join('?' * len(batch))})",
+                        (kind, *batch),
+                    ).fetchall())
+            return sorted((self._subscription(row) for row in rows), key=lambda doc: doc["_id"])
+        return await self._call(fetch)
+
+    # --- Manual Wish Methods ---
+    @_instrumented("manual_wishes")
+    async def add_manual_wish(self, name: str, day: int, month: int, year: int, message: str, role_id: int):
+        await self._execute(
+            "INSERT INTO manual_wishes (name, day, month, year, message, role_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, day, month, year, message, None if role_id is None else str(role_id)),
+        )
+
+    @_instrumented("manual_wishes")
+    async def get_manual_wishes_for_years(self, first_year: int, last_year: int) -> list[dict]:
+        rows = await self._fetchall(
+            "SELECT id, name, day, month, year FROM manual_wishes WHERE year BETWEEN ? AND ?", (first_year, last_year)
+        )
+        return [{"_id": row["id"], "name": row["name"], "day": row["day"], "month": row["month"], "year": row["year"]} for row in rows]
+
+    # --- Indexes ---
+    @_instrumented("all")
+    async def ensure_indexes(self):
+        """Indexes are part of the schema created on connect; this just opens the file."""
+        await self._call(lambda conn: None)
+
+    def close(self):
+        if self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,153 @@
+"""Pool of pre-generated birthday wish templates.
+
+Gemini is asked for many templates at once, each using ``{name}`` and
+``{mention}`` placeholders. Valid ones are stored in the
+``birthday_templates`` collection. The daily task then renders wishes from
+the pool with no LLM call at post time, so midnight latency and quota no
+longer grow with the number of celebrants. Every member keeps a list of
+templates they have already received, and the pool is refilled in the
+background whenever it drops below ``BIRTHDAY_TEMPLATE_POOL_SIZE``. There is
+one pool per wish locale in use (``utils/locales.py``), each generated in
+its language.
+
+    python -m utils.templates refill              # every pool in use
+    python -m utils.templates list --locale es
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDERS = ("{name}", "{mention}")
+# Leaves room for the longest display name and mention under the 900-char message guard
+MAX_TEMPLATE_LENGTH = 800
+GENERATION_BATCH_SIZE = 25
+MAX_GENERATION_CALLS = 4
+
+_PLACEHOLDER_RE = re.compile(r"\{[^{}]*\}")
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def template_id(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def validate_template(text) -> str | None:
+    """Return the cleaned template, or None if it cannot be rendered safely."""
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    if not text or len(text) > MAX_TEMPLATE_LENGTH:
+        return None
+    if any(placeholder not in text for placeholder in PLACEHOLDERS):
+        return None
+    if set(_PLACEHOLDER_RE.findall(text)) - set(PLACEHOLDERS):
+        return None  # Unknown placeholders would be posted literally
+    if "@everyone" in text or "@here" in text:
+        return None
+    return text
+
+
+def parse_templates(raw: str | None) -> list[str]:
+    """Valid, de-duplicated templates from a Gemini reply holding a JSON array of strings."""
+    if not raw:
+        return []
+    try:
+        items = json.loads(_FENCE_RE.sub("", raw.strip()))
+    except json.JSONDecodeError:
+        logger.warning("Template batch was not valid JSON", extra={"event": "template_parse_error"})
+        return []
+    if not isinstance(items, list):
+        return []
+    valid = [validate_template(item) for item in items]
+    return list(dict.fromkeys(text for text in valid if text))
+
+
+def render_template(template: str, name: str, mention: str) -> str:
+    # Mention first: a display name containing "{mention}" is inserted last and never re-expanded
+    return template.replace("{mention}", mention).replace("{name}", name)
+
+
+def choose_template(templates: list[dict], used: list[str], taken_today: set[str]) -> tuple[dict | None, bool]:
+    """Pick a template this member has not had, avoiding ones already used today.
+
+    Returns ``(template, reset)``; ``reset`` is True when the member has seen
+    the whole pool and their history should start over.
+    """
+    if not templates:
+        return None, False
+    used = set(used or ())
+    for candidates, reset in (
+        ([t for t in templates if t["_id"] not in used and t["_id"] not in taken_today], False),
+        ([t for t in templates if t["_id"] not in used], False),
+        ([t for t in templates if t["_id"] not in taken_today], True),
+        (templates, True),
+    ):
+        if candidates:
+            return random.choice(candidates), reset
+    return None, False  # pragma: no cover
+
+
+async def refill_pool(db, api, target_size: int, locale: str = "en") -> int:
+    """Top ``locale``'s pool up to ``target_size`` with a few bulk Gemini calls; returns templates added."""
+    count = await db.count_birthday_templates(locale)
+    added = 0
+    calls = 0
+    while count < target_size and calls < MAX_GENERATION_CALLS:
+        calls += 1
+        raw = await api.generate_birthday_templates(min(GENERATION_BATCH_SIZE, target_size - count), locale)
+        new = await db.add_birthday_templates(parse_templates(raw), locale)
+        if not new:
+            break  # Gemini unavailable or only produced duplicates/invalid output
+        added += new
+        count += new
+    if added:
+        logger.info("Added %s %s birthday templates (pool size %s)", added, locale, count,
+                    extra={"event": "template_pool_refilled", "added": added, "size": count, "locale": locale})
+    return added
+
+
+async def _main(argv: list[str]) -> int:
+    import argparse
+
+    from dotenv import load_dotenv
+
+    from config import Settings
+    from utils.app_context import AppContext
+    from utils.locales import LOCALES
+
+    parser = argparse.ArgumentParser(prog="python -m utils.templates")
+    parser.add_argument("command", choices=("refill", "list"))
+    parser.add_argument("--locale", choices=sorted(LOCALES),
+                        help="one pool (default: DEFAULT_LOCALE plus every locale members picked)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    settings = Settings.from_env()
+    context = AppContext.from_settings(settings)
+    try:
+        # The same pools the bot keeps, see Wishes.refill_template_pool
+        locales = [args.locale] if args.locale else list(
+            dict.fromkeys([settings.default_locale, *await context.db.get_birthday_locales()])
+        )
+        for locale in locales:
+            if args.command == "refill":
+                added = await refill_pool(context.db, context.api, settings.birthday_template_pool_size, locale)
+                print(f"[{locale}] Added {added} templates")
+            else:
+                for template in await context.db.get_birthday_templates(locale):
+                    print(f"[{locale}] {template['_id']}  {template['text']!r}")
+    finally:
+        await context.close()
+    return 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
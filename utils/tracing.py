@@ -0,0 +1,161 @@
+"""Lightweight tracing spans and run timelines for scheduled tasks.
+
+Spans use monotonic clocks and nest through a context variable, so they follow
+``await`` boundaries and tasks spawned from inside a run. Top-level stages feed
+the ``mangalify_daily_task_stage_duration_seconds`` histogram, and the last few
+run timelines are kept in memory for the ``/debug/runs`` endpoint.
+"""
+
+import asyncio
+import contextvars
+import functools
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from utils import metrics
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("mangalify_current_span", default=None)
+
+_runs_lock = threading.Lock()
+_recent_runs: deque = deque(maxlen=10)
+
+
+class Span:
+    """A timed section of work; children are spans opened while this one is current."""
+
+    __slots__ = ("name", "stage", "attrs", "start", "end", "error", "children", "_sentry")
+
+    def __init__(self, name: str, stage: bool = False, attrs: dict | None = None):
+        self.name = name
+        self.stage = stage
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.error: str | None = None
+        self.children: list[Span] = []
+        self._sentry = None
+
+    @property
+    def duration(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def to_dict(self, origin: float) -> dict:
+        data = {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.stage:
+            data["stage"] = True
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+def _active_sentry():
+    """The sentry_sdk module if something already imported and initialised it."""
+    sentry_sdk = sys.modules.get("sentry_sdk")
+    try:
+        return sentry_sdk if sentry_sdk and sentry_sdk.get_client().is_active() else None
+    except Exception:
+        return None
+
+
+@contextmanager
+def span(name: str, stage: bool = False, **attrs):
+    """Time a block of work and attach it to the current span, if any."""
+    parent = _current_span.get()
+    current = Span(name, stage=stage, attrs=attrs)
+    if parent is not None:
+        parent.children.append(current)
+        if parent._sentry is not None:
+            current._sentry = parent._sentry.start_child(op="stage" if stage else "call", name=name)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        if current._sentry is not None:
+            current._sentry.set_status("internal_error" if current.error else "ok")
+            current._sentry.finish()
+        if stage:
+            metrics.record_stage_duration(name, current.duration)
+
+
+def stage(name: str, **attrs):
+    """Shortcut for a top-level stage span that feeds the stage histogram."""
+    return span(name, stage=True, **attrs)
+
+
+@contextmanager
+def run(name: str):
+    """Open a root span for one task run and keep its timeline once finished."""
+    started_at = datetime.now(timezone.utc).isoformat()
+    root = Span(name)
+    sentry_sdk = _active_sentry()
+    if sentry_sdk is not None:
+        root._sentry = sentry_sdk.start_transaction(op="task", name=name)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as exc:
+        root.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        root.end = time.perf_counter()
+        _current_span.reset(token)
+        if root._sentry is not None:
+            root._sentry.set_status("internal_error" if root.error else "ok")
+            root._sentry.finish()
+        timeline = {"run": name, "started_at": started_at, "status": "error" if root.error else "success"}
+        timeline.update(root.to_dict(root.start))
+        with _runs_lock:
+            _recent_runs.append(timeline)
+
+
+def traced(name: str, stage: bool = False):
+    """Decorator form of :func:`span` for plain and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, stage=stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, stage=stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_history_size(size: int):
+    """Keep the last ``size`` run timelines (TRACE_RUN_HISTORY)."""
+    global _recent_runs
+    with _runs_lock:
+        _recent_runs = deque(_recent_runs, maxlen=max(size, 1))
+
+
+def current_span() -> "Span | None":
+    return _current_span.get()
+
+
+def recent_runs() -> list[dict]:
+    """Return finished run timelines, newest first. Safe to call from any thread."""
+    with _runs_lock:
+        return list(reversed(_recent_runs))
@@ -0,0 +1,204 @@
+# worker.py
+"""Worker process: runs queued jobs without a gateway connection.
+
+With ``RUN_MODE=gateway`` the bot process (main.py) handles only slash
+commands and events. The daily task, including the Gemini calls, runs here
+instead, so the midnight run cannot slow interaction latency, and workers
+can be scaled apart from the gateway.
+
+Each worker:
+
+* runs the scheduler (``utils/scheduler.py``) over the same jobs as the bot
+  (``Wishes.scheduled_jobs``). A job falling due is not run in place; it is
+  queued in the Mongo ``jobs`` collection as ``<name>:<planned time>``.
+  Every worker queues it, and the deterministic job id lets only one insert
+  succeed;
+* claims due jobs one at a time (see ``utils/jobs.py``) and runs them;
+* with ``BIRTHDAY_REMINDERS``, competes for the ``reminder_sender`` lease
+  (``utils/leader.py``); the holder sends queued reminder DMs at
+  ``REMINDER_DM_PER_SECOND`` (``utils/reminders.py``), so that is the rate
+  however many workers run;
+* posts, assigns roles and looks members up through the Discord REST API:
+  channels are ``PartialMessageable`` objects, and the guild is fetched
+  over REST when a job starts.
+
+Start it with ``python worker.py``, or run main.py with ``RUN_MODE=worker``.
+SIGTERM lets the current job finish before the worker exits.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import signal
+import time
+from datetime import datetime, timezone
+
+import discord
+
+from utils.app_context import AppContext
+from utils.jobs import JobQueue, run_job
+from utils.leader import LeaderElector, default_owner_id
+from utils.scheduler import JobDefinition, Scheduler
+
+logger = logging.getLogger(__name__)
+
+REMINDER_SENDER_LEASE = "reminder_sender"
+
+
+class RestBot(discord.Client):
+    """The parts of WishesBot the Wishes cog needs, served over REST only."""
+
+    def __init__(self, app_context: AppContext):
+        intents = discord.Intents.none()
+        intents.members = True  # Lets REST guild.fetch_members rebuild the join snapshot; no gateway is opened
+        super().__init__(intents=intents)
+        self.app_context = app_context
+        self.settings = app_context.settings
+        self._guild: discord.Guild | None = None
+
+    async def prepare(self):
+        await self.login(self.settings.bot_token)
+        await self.refresh_guild()
+
+    async def refresh_guild(self):
+        # Fetched per job so role changes made since the last run are seen
+        self._guild = await self.fetch_guild(self.settings.guild_id)
+
+    def get_guild(self, guild_id: int, /):
+        return self._guild if self._guild is not None and self._guild.id == guild_id else None
+
+    def get_channel(self, channel_id: int, /):
+        return self.get_partial_messageable(channel_id)
+
+
+class Worker:
+    def __init__(self, app_context: AppContext, bot, queue: JobQueue, poll_seconds: float = 5):
+        from cogs.wishes import Wishes
+
+        self.settings = app_context.settings
+        self.bot = bot
+        self.queue = queue
+        self.poll_seconds = poll_seconds
+        self.wishes = Wishes(bot)
+        jobs = self.wishes.scheduled_jobs()
+        # Runs are recorded by whichever worker executes the queued job, not by the one that queued it
+        self.scheduler = Scheduler(
+            app_context.db,
+            [dataclasses.replace(job, handler=self._enqueuer(job)) for job in jobs],
+            record_runs=False,
+        )
+        self.handlers = {job.name: self._runner(job) for job in jobs}
+        self.handlers["refill_templates"] = self._refill_templates
+        # One worker at a time sends reminder DMs, elected like the bot's scheduler leader
+        self.sender_lease = LeaderElector(
+            app_context.db, queue.owner, self.settings.leader_lease_seconds, self.settings.leader_renew_seconds,
+            name=REMINDER_SENDER_LEASE,
+        ) if self.settings.birthday_reminders else None
+        self._stopping = asyncio.Event()
+
+    def _enqueuer(self, job: JobDefinition):
+        async def enqueue(planned: datetime):
+            job_id = f"{job.name}:{planned.isoformat()}"
+            if await self.queue.enqueue(job.name, {"planned": planned.isoformat()}, job_id=job_id):
+                logger.info("Queued %s run planned for %s", job.name, planned.isoformat(), extra={"event": "job_scheduled", "job": job_id})
+        return enqueue
+
+    def _runner(self, job: JobDefinition):
+        async def run(payload: dict):
+            planned = datetime.fromisoformat(payload["planned"]) if payload.get("planned") else datetime.now(timezone.utc)
+            started_at, started = datetime.now(timezone.utc), time.perf_counter()
+            status = "error"
+            try:
+                await self.bot.refresh_guild()
+                await asyncio.wait_for(job.handler(planned), job.max_runtime)
+                status = "ok"
+            except asyncio.TimeoutError:
+                # Not retried: a daily run cut short may already have posted some wishes
+                status = "timeout"
+                logger.error("Job %s exceeded its %ss limit", job.name, job.max_runtime, extra={"event": "scheduler_timeout", "job": job.name})
+            finally:
+                # Other failures still propagate, so the queue retries them
+                await self.scheduler.record_run(job.name, started_at, time.perf_counter() - started, status)
+        return run
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job; returns False when the queue had nothing due."""
+        job = await self.queue.claim(kinds=list(self.handlers))
+        if job is None:
+            return False
+        await run_job(self.queue, job, self.handlers[job["kind"]])
+        return True
+
+    async def run(self):
+        today = datetime.now(timezone.utc).date().isoformat()
+        # The pool is otherwise refilled by the prepare job; fill it before the first one
+        await self.queue.enqueue("refill_templates", job_id=f"refill_templates:{today}")
+        await self.scheduler.load()
+        # Reminder DMs drain on their own task and rate, so a large fan-out never holds up a daily job
+        sender = lease = None
+        if self.sender_lease is not None:
+            lease = asyncio.create_task(self.sender_lease.run())
+            sender = asyncio.create_task(self.wishes.reminder_sender.run(should_run=lambda: self.sender_lease.is_leader))
+        try:
+            while not self._stopping.is_set():
+                try:
+                    await self.scheduler.run_due()
+                    if await self.run_once():
+                        continue
+                    await self.queue.pending_count()
+                except Exception as exc:
+                    logger.error("Worker loop error: %s", exc, extra={"event": "worker_loop_error", "error": str(exc)})
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if sender is not None:
+                self.wishes.reminder_sender.stop()
+                await sender
+                lease.cancel()
+                await self.sender_lease.release()
+
+    def stop(self):
+        self._stopping.set()
+        self.wishes.reminder_sender.stop()
+
+    async def _refill_templates(self, payload: dict):
+        await self.wishes.refill_template_pool()
+
+
+async def run_worker(app_context: AppContext):
+    settings = app_context.settings
+    bot = RestBot(app_context)
+    queue = JobQueue(
+        app_context.db, default_owner_id(),
+        lock_seconds=settings.job_lock_seconds, max_attempts=settings.job_max_attempts,
+    )
+    worker = Worker(app_context, bot, queue, settings.worker_poll_seconds)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, worker.stop)
+    except NotImplementedError:  # Windows
+        pass
+    try:
+        await bot.prepare()
+        logger.info("Worker started", extra={"event": "worker_start", "owner": queue.owner})
+        await worker.run()
+    finally:
+        await bot.close()
+        await app_context.close()
+
+
+async def main():
+    from main import configure_logging, start_metrics_server, validate_environment
+    from utils import tracing
+
+    settings = dataclasses.replace(validate_environment(), run_mode="worker")
+    configure_logging(settings)
+    tracing.set_history_size(settings.trace_run_history)
+    start_metrics_server(settings)
+    await run_worker(AppContext.from_settings(settings))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())